@@ -4,16 +4,31 @@ API router configuration.
 Collects all API endpoints and prefixes them with the API version.
 """
 
-from fastapi import APIRouter
+from fastapi import FastAPI
 
-from app.api.endpoints import orders, products, users
+from app.api.endpoints import monitoring, orders, products, users
 from app.core.config import settings
 
-api_router = APIRouter()
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
+# (router, prefix, tags) of every API endpoint module
+API_ROUTES = [
+    (users.router, "/users", ["users"]),
+    (products.router, "/products", ["products"]),
+    (orders.router, "/orders", ["orders"]),
+    (monitoring.router, "/monitoring", ["monitoring"]),
+    # Authentication endpoints
+    (users.router, "/auth", ["auth"]),
+]
 
-# Add authentication endpoints
-auth_router = APIRouter()
-auth_router.include_router(users.router, prefix="/auth", tags=["auth"])
+
+def include_api_routes(app: FastAPI) -> None:
+    """
+    Register all API endpoints on the application.
+    
+    Routers are included directly under their full prefix: nesting them in
+    an intermediate router copies every route once more at startup.
+    
+    Args:
+        app: Application to register the routes on
+    """
+    for router, prefix, tags in API_ROUTES:
+        app.include_router(router, prefix=f"{settings.API_V1_STR}{prefix}", tags=tags)
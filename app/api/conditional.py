@@ -0,0 +1,125 @@
+"""
+HTTP conditional request helpers (ETag / If-None-Match / Last-Modified).
+
+Endpoints compute a validator from a cheap version probe and answer
+304 Not Modified before loading or serializing the full resource.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Clients must revalidate, which is cheap thanks to the validators
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the parts that identify a resource version.
+
+    Args:
+        parts: Values that change whenever the representation changes
+
+    Returns:
+        str: Weak entity tag, e.g. W/"3f2a..."
+    """
+    raw = "|".join(str(part) for part in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_http_date(value: datetime) -> str:
+    """
+    Format a datetime as an HTTP date.
+
+    Args:
+        value: Datetime (naive values are taken as UTC)
+
+    Returns:
+        str: IMF-fixdate, e.g. Mon, 19 Oct 2026 09:00:00 GMT
+    """
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Check a request's conditional headers against the current version.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    Args:
+        request: Incoming request
+        etag: Current entity tag
+        last_modified: Current modification time
+
+    Returns:
+        bool: True if the client's copy is still current
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def set_validators(
+    response: Response, etag: str, last_modified: Optional[datetime] = None
+) -> None:
+    """
+    Attach validator headers to a response.
+
+    Args:
+        response: Outgoing response
+        etag: Entity tag
+        last_modified: Modification time
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """
+    Build an empty 304 Not Modified response.
+
+    Args:
+        etag: Entity tag
+        last_modified: Modification time
+
+    Returns:
+        Response: 304 response with validator headers
+    """
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
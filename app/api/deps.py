@@ -4,77 +4,203 @@ API dependencies for FastAPI routes.
 This module contains dependencies that can be used in FastAPI route definitions.
 """
 
-from typing import AsyncGenerator
+import math
+from functools import lru_cache
+from typing import AsyncContextManager, AsyncGenerator, Callable, FrozenSet, Optional, Tuple
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
-from app.core.security import verify_password
-from app.db.session import AsyncSessionLocal
+from app.core.rate_limit import Rate, RateLimiter, RateLimitResult, create_rate_limit_store, parse_rate
+from app.core.revocation import token_denylist
+from app.core.security import Principal, password_hash_pool
+from app.crud import user as crud_user
+from app.db.session import AsyncSessionLocal, get_router
 from app.models.models import User
 from app.schemas.schemas import TokenPayload
 
 # OAuth2 token URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Methods that never write
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# Cookie and header carrying a client's read-your-writes marker
+READ_YOUR_WRITES_COOKIE = "primary_until"
+READ_YOUR_WRITES_HEADER = "X-Primary-Until"
+
+# Token buckets of the rate-limited routes
+rate_limiter = RateLimiter(
+    create_rate_limit_store(settings.RATE_LIMIT_STORAGE_URL)
+)
+
+
+def primary_until(request: Request) -> Optional[float]:
     """
-    Get an async database session.
+    Read the client's read-your-writes marker from a request.
     
+    Browsers send the marker back as a cookie; other clients echo the
+    response header of their last write.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        Optional[float]: Unix time until which reads go to the primary
+    """
+    marker = (
+        request.headers.get(READ_YOUR_WRITES_HEADER)
+        or request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    )
+    if not marker:
+        return None
+    try:
+        return float(marker)
+    except ValueError:
+        return None
+
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get an async database session on the primary.
+    
+    When read replicas are configured, writing requests hand the client a
+    marker (cookie and header) that routes its reads to the primary for
+    READ_YOUR_WRITES_SECONDS, so they see their own changes on any worker.
+    
+    Args:
+        request: Incoming request
+        response: Outgoing response
+        
     Yields:
         AsyncSession: SQLAlchemy async session
     """
+    router = get_router()
+    if request.method not in SAFE_METHODS and router.replicas:
+        marker = f"{router.write_marker():.3f}"
+        response.headers[READ_YOUR_WRITES_HEADER] = marker
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            marker,
+            max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
     async with AsyncSessionLocal() as session:
         yield session
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Get the current authenticated user.
+    Get an async database session for read-only work.
+    
+    The session is bound to a read replica when one is configured, healthy
+    and the client has not written recently; otherwise to the primary.
     
     Args:
-        db: Database session
-        token: JWT token
+        request: Incoming request
         
+    Yields:
+        AsyncSession: SQLAlchemy async session
+    """
+    engine = get_router().read_engine(primary_until(request))
+    async with AsyncSessionLocal(bind=engine) as session:
+        yield session
+
+
+def get_session_factory() -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """
+    Get the factory of primary sessions for work outliving a request.
+    
+    Background tasks open their own session with it: the request's
+    session is not theirs to use once the response is sent, and would
+    keep its connection checked out while they run.
+    
     Returns:
-        User: The authenticated user
-        
-    Raises:
-        HTTPException: If authentication fails
+        Callable[[], AsyncContextManager[AsyncSession]]: Session factory
+    """
+    return AsyncSessionLocal
+
+
+def credentials_error() -> HTTPException:
+    """
+    Build the error of a request with missing or invalid credentials.
+    
+    Returns:
+        HTTPException: 401 asking for a bearer token
     """
-    credentials_exception = HTTPException(
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    Decode and check the bearer access token.
+    
+    Args:
+        token: JWT token
+        
+    Returns:
+        TokenPayload: The token's claims
+        
+    Raises:
+        HTTPException: If the token is invalid, expired or revoked
+    """
+    from jose import jwt, JWTError
+    
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
         if token_data.sub is None:
-            raise credentials_exception
+            raise credentials_error()
     except (JWTError, ValidationError):
-        raise credentials_exception
+        raise credentials_error()
+    
+    if token_data.jti is not None and token_denylist.is_revoked(token_data.jti):
+        raise credentials_error()
+    return token_data
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token_data: TokenPayload = Depends(get_token_payload)
+) -> User:
+    """
+    Get the current authenticated user, loaded from the database.
+    
+    Only for endpoints needing the full profile; authorization alone uses
+    get_current_principal, which skips the load.
     
+    Args:
+        db: Database session
+        token_data: Claims of the access token
+        
+    Returns:
+        User: The authenticated user
+        
+    Raises:
+        HTTPException: If authentication fails
+    """
     result = await db.execute(select(User).filter(User.id == int(token_data.sub)))
     user = result.scalar_one_or_none()
     if not user:
-        raise credentials_exception
+        raise credentials_error()
+    if token_data.token_version is not None and token_data.token_version != user.token_version:
+        raise credentials_error()
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_profile(current_user: User = Depends(get_current_user)) -> User:
     """
-    Get the current active user.
+    Get the current active user, loaded from the database.
     
     Args:
         current_user: The authenticated user
@@ -90,6 +216,76 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
+async def get_current_principal(
+    db: AsyncSession = Depends(get_db), token_data: TokenPayload = Depends(get_token_payload)
+) -> Principal:
+    """
+    Get the current authenticated user from the access token's claims.
+    
+    The claims are signed, so the only database access is the user's
+    token version, read through a cache: a token whose version is behind
+    the user's was revoked. Tokens issued without claims load the user.
+    
+    Args:
+        db: Database session
+        token_data: Claims of the access token
+        
+    Returns:
+        Principal: The authenticated user's ID and flags
+        
+    Raises:
+        HTTPException: If authentication fails
+    """
+    if token_data.token_version is None:
+        current_user = await get_current_user(db, token_data)
+        return Principal(current_user.id, current_user.is_active, current_user.is_superuser)
+    
+    user_id = int(token_data.sub)
+    if await crud_user.get_token_version(db, id=user_id) != token_data.token_version:
+        raise credentials_error()
+    return Principal(user_id, bool(token_data.active), bool(token_data.superuser))
+
+
+def get_current_active_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
+    """
+    Get the current active user.
+    
+    Args:
+        current_user: The authenticated user
+        
+    Returns:
+        Principal: The active authenticated user
+        
+    Raises:
+        HTTPException: If the user is inactive
+    """
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+def get_current_active_superuser(
+    current_user: Principal = Depends(get_current_active_user),
+) -> Principal:
+    """
+    Get the current active superuser.
+    
+    Args:
+        current_user: The active authenticated user
+        
+    Returns:
+        Principal: The active authenticated superuser
+        
+    Raises:
+        HTTPException: If the user is not a superuser
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> User:
     """
     Authenticate a user by username and password.
@@ -105,6 +301,149 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> U
     stmt = select(User).where(User.username == username)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await password_hash_pool.verify(password, user.hashed_password):
         return None
-    return user
\ No newline at end of file
+    return user
+
+
+@lru_cache(maxsize=8)
+def trusted_proxies(allow_ips: str) -> FrozenSet[str]:
+    """
+    Parse a comma-separated list of trusted proxy addresses.
+    
+    Args:
+        allow_ips: FORWARDED_ALLOW_IPS value
+        
+    Returns:
+        FrozenSet[str]: The addresses, "*" trusting every peer
+    """
+    return frozenset(address.strip() for address in allow_ips.split(",") if address.strip())
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    Get the address of the client that sent a request.
+    
+    When the peer is a trusted proxy (FORWARDED_ALLOW_IPS), X-Forwarded-For
+    is followed back past the trusted hops to the first address no trusted
+    proxy vouches for; entries before it may be forged by the client. Any
+    other peer's X-Forwarded-For is ignored.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        Optional[str]: Client IP address, if known
+    """
+    peer = request.client.host if request.client else None
+    trusted = trusted_proxies(settings.FORWARDED_ALLOW_IPS)
+    if "*" not in trusted and peer not in trusted:
+        return peer
+    hops = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    if not hops:
+        return peer
+    if "*" in trusted:
+        return hops[0]
+    for hop in reversed(hops):
+        if hop not in trusted:
+            return hop
+    return hops[0]
+
+
+def enforce_rate_limit(result: RateLimitResult, response: Response) -> None:
+    """
+    Reject a request that exceeded a rate limit.
+    
+    Args:
+        result: Outcome of the rate limiter
+        response: Response of an allowed request, to report remaining tokens
+        
+    Raises:
+        HTTPException: 429 with Retry-After if the request is not allowed
+    """
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(result.retry_after))},
+        )
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+
+
+def _username_limit(username: str) -> Tuple[str, Rate, Optional[str]]:
+    return (
+        "login_username",
+        parse_rate(settings.RATE_LIMIT_LOGIN_PER_USERNAME),
+        username.lower(),
+    )
+
+
+async def limit_login(
+    request: Request,
+    response: Response,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> None:
+    """
+    Rate-limit login attempts per client IP and failed logins per username.
+    
+    Runs before the password is checked, so rejected attempts cost no
+    hashing. Every attempt is charged to the client's address; a username
+    is only checked here and charged for failed logins
+    (record_failed_login), so guessing spread over many addresses is
+    capped while the user's own successful logins never use it up.
+    
+    Args:
+        request: Incoming request
+        response: Outgoing response
+        form_data: Login form
+        
+    Raises:
+        HTTPException: 429 if either limit is exceeded
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    result = await rate_limiter.hit([
+        ("login_ip", parse_rate(settings.RATE_LIMIT_LOGIN_PER_IP), client_ip(request)),
+    ])
+    enforce_rate_limit(result, response)
+    result = await rate_limiter.hit([_username_limit(form_data.username)], cost=0)
+    enforce_rate_limit(result, response)
+
+
+async def record_failed_login(username: str) -> None:
+    """
+    Charge a failed login to the username's bucket.
+    
+    Args:
+        username: Username the login was attempted for
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    await rate_limiter.hit([_username_limit(username)])
+
+
+async def limit_checkout(
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+) -> None:
+    """
+    Rate-limit order placement per user.
+    
+    Args:
+        response: Outgoing response
+        current_user: The active authenticated user
+        
+    Raises:
+        HTTPException: 429 if the limit is exceeded
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    result = await rate_limiter.hit([
+        ("checkout_user", parse_rate(settings.RATE_LIMIT_CHECKOUT_PER_USER), str(current_user.id)),
+    ])
+    enforce_rate_limit(result, response)
\ No newline at end of file
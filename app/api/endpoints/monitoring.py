@@ -0,0 +1,104 @@
+"""
+API routes for operational monitoring.
+"""
+
+import asyncio
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api import deps
+from app.api.routing import TracedRoute
+from app.core.config import settings
+from app.core.metrics import metrics_store, registry, scrape
+from app.core.profiling import ProfilerBusy, collapse, loop_monitor, profiler
+from app.core.security import Principal
+from app.db.query_stats import query_metrics
+from app.schemas.schemas import LoopStallReport, RouteQueryStats
+
+router = APIRouter(route_class=TracedRoute)
+
+# Mounted at the application root for Prometheus scrapers
+metrics_router = APIRouter()
+
+
+@router.get("/queries", response_model=Dict[str, RouteQueryStats])
+async def read_query_stats(
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get SQL statement count and DB time histograms per route for this
+    worker (superuser only).
+
+    Runs on the event loop, the only thread updating the metrics.
+    """
+    return query_metrics.snapshot()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_event_loop(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS, description="Profile duration"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Milliseconds between samples"),
+    include_idle: bool = Query(False, description="Keep samples of the loop waiting for I/O"),
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> PlainTextResponse:
+    """
+    Sample this worker's event loop thread and return collapsed stacks
+    (superuser only).
+
+    The worker keeps serving traffic while the profile runs. The output
+    feeds flamegraph.pl or speedscope directly; X-Profile-Samples and
+    X-Profile-Idle-Samples give the total and idle sample counts.
+    """
+    try:
+        sampler = await profiler.profile(seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=409,
+            detail="A profile is already running on this worker",
+        )
+    return PlainTextResponse(
+        collapse(sampler.stacks),
+        headers={
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Idle-Samples": str(sampler.idle_samples),
+        },
+    )
+
+
+@router.get("/loop-stalls", response_model=LoopStallReport)
+def read_loop_stalls(
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get recent event loop stalls of this worker with the stack that was
+    blocking the loop (superuser only).
+    """
+    return loop_monitor.report()
+
+
+@router.get("/loop-stalls/collapsed", response_class=PlainTextResponse)
+def read_loop_stall_stacks(
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> PlainTextResponse:
+    """
+    Get the stacks captured during event loop stalls in the collapsed
+    flamegraph format (superuser only).
+    """
+    return PlainTextResponse(loop_monitor.collapsed())
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    """
+    Expose metrics in the Prometheus text format, merged across workers
+    when a multiprocess directory is configured.
+
+    The registry is snapshotted on the event loop, which is the only
+    thread updating it; writing, reading and rendering the snapshots run
+    in a thread.
+    """
+    snapshots = registry.snapshot()
+    text = await asyncio.get_running_loop().run_in_executor(None, scrape, snapshots, metrics_store)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
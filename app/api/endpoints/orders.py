@@ -2,47 +2,64 @@
 API routes for order management.
 """
 
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.api.responses import fast_json
+from app.api.routing import TracedRoute
+from app.core.security import Principal
 from app.crud import order
-from app.models.models import User
-from app.schemas.schemas import Order, OrderCreate, OrderUpdate
+from app.schemas.schemas import (
+    Order,
+    OrderBulkCancel,
+    OrderBulkResult,
+    OrderCreate,
+    OrderPage,
+    OrderStatusBatchUpdate,
+    OrderUpdate,
+)
+from app.schemas.serializers import serialize_order
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
+
+# Order fields customers may change on their own orders; status, payment
+# and tracking are set by staff, and customers cancel through /cancel
+CUSTOMER_ORDER_FIELDS = frozenset({"shipping_address_id", "billing_address_id"})
 
 
 @router.get("/", response_model=List[Order])
-def read_orders(
-    db: Session = Depends(deps.get_db),
+async def read_orders(
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
+    since: Optional[datetime] = Query(None, description="Only orders placed at or after"),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve orders for current user.
     """
-    orders = order.get_multi_by_customer(
-        db, customer_id=current_user.id, skip=skip, limit=limit
+    orders = await order.get_multi_by_customer(
+        db, customer_id=current_user.id, since=since, skip=skip, limit=limit
     )
-    return orders
+    return fast_json([serialize_order(order_obj) for order_obj in orders])
 
 
-@router.post("/", response_model=Order)
-def create_order(
+@router.post("/", response_model=Order, dependencies=[Depends(deps.limit_checkout)])
+async def create_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     order_in: OrderCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Create new order.
     """
     try:
-        return order.create_with_items(
+        return await order.create_with_items(
             db, obj_in=order_in, customer_id=current_user.id
         )
     except ValueError as e:
@@ -52,17 +69,107 @@ def create_order(
         )
 
 
+@router.get("/admin", response_model=OrderPage)
+async def query_orders(
+    db: AsyncSession = Depends(deps.get_read_db),
+    date_from: Optional[datetime] = Query(None, description="Orders placed at or after"),
+    date_to: Optional[datetime] = Query(None, description="Orders placed before"),
+    status: Optional[List[str]] = Query(None, description="Order statuses to include"),
+    customer_id: Optional[int] = None,
+    product_id: Optional[int] = Query(None, description="Orders containing this product"),
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    sort_by: str = Query("order_date", pattern="^(order_date|total_amount|id)$"),
+    sort_dir: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    include_counts: bool = Query(False, description="Include total and per-status counts"),
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Query orders across all customers (superuser only).
+    
+    Results are keyset-paginated: pass the returned next_cursor to get the
+    following page with the same filters and sort.
+    """
+    try:
+        page = await order.query(
+            db,
+            date_from=date_from,
+            date_to=date_to,
+            statuses=status,
+            customer_id=customer_id,
+            product_id=product_id,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            sort_by=sort_by,
+            descending=sort_dir == "desc",
+            cursor=cursor,
+            limit=limit,
+            with_counts=include_counts,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+    page["items"] = [serialize_order(order_obj) for order_obj in page["items"]]
+    return fast_json(page)
+
+
+@router.put("/cancel/batch", response_model=OrderBulkResult)
+async def cancel_orders_batch(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    cancel_in: OrderBulkCancel,
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Cancel many pending orders at once (superuser only).
+    
+    Orders that are missing or no longer pending are returned as rejected.
+    Orders are committed in chunks of ORDER_BULK_CHUNK_SIZE: if a chunk
+    fails, the request errors but the chunks before it stay cancelled.
+    Retrying the same IDs is safe, since only pending orders are cancelled
+    and the ones already cancelled come back as rejected.
+    """
+    cancelled, rejected = await order.cancel_orders(db, order_ids=cancel_in.order_ids)
+    return {"updated": cancelled, "rejected": rejected}
+
+
+@router.put("/status/batch", response_model=OrderBulkResult)
+async def update_order_statuses_batch(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    batch_in: OrderStatusBatchUpdate,
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Apply status changes to many orders at once (superuser only).
+    
+    Changes that are not allowed by the order status state machine, or that
+    target missing orders, are returned as rejected. If an order appears more
+    than once, the last change wins.
+    """
+    changes = {change.order_id: change.status for change in batch_in.changes}
+    updated, rejected = await order.update_statuses(db, changes=changes)
+    return {"updated": updated, "rejected": rejected}
+
+
 @router.get("/{id}", response_model=Order)
-def read_order(
+async def read_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    order_date: Optional[datetime] = Query(
+        None, description="Any time in the order's month, to read only its partition"
+    ),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get order by ID.
     """
-    order_obj = order.get_by_id_with_items(db, order_id=id)
+    order_obj = await order.get_by_id_with_items(db, order_id=id, order_date=order_date)
     
     if not order_obj:
         raise HTTPException(
@@ -80,17 +187,24 @@ def read_order(
 
 
 @router.put("/{id}", response_model=Order)
-def update_order(
+async def update_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
     order_in: OrderUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    order_date: Optional[datetime] = Query(
+        None, description="Any time in the order's month, to read only its partition"
+    ),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Update an order.
+    
+    Superusers may update any order, including moving its status forward.
+    Customers may only change the addresses of their own orders; they
+    cancel them through /cancel.
     """
-    order_obj = order.get(db, id=id)
+    order_obj = await order.get_by_id_with_items(db, order_id=id, order_date=order_date)
     
     if not order_obj:
         raise HTTPException(
@@ -98,26 +212,42 @@ def update_order(
             detail="Order not found",
         )
         
-    if order_obj.customer_id != current_user.id:
+    if not current_user.is_superuser:
+        if order_obj.customer_id != current_user.id:
+            raise HTTPException(
+                status_code=403,
+                detail="Not authorized to update this order",
+            )
+        staff_fields = order_in.model_dump(exclude_unset=True).keys() - CUSTOMER_ORDER_FIELDS
+        if staff_fields:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Not authorized to change {', '.join(sorted(staff_fields))}",
+            )
+        
+    try:
+        return await order.update(db, db_obj=order_obj, obj_in=order_in)
+    except ValueError as e:
         raise HTTPException(
-            status_code=403,
-            detail="Not authorized to update this order",
+            status_code=400,
+            detail=str(e),
         )
-        
-    return order.update(db, db_obj=order_obj, obj_in=order_in)
 
 
 @router.put("/{id}/cancel", response_model=Order)
-def cancel_order(
+async def cancel_order(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    order_date: Optional[datetime] = Query(
+        None, description="Any time in the order's month, to read only its partition"
+    ),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Cancel an order.
     """
-    order_obj = order.get_by_id_with_items(db, order_id=id)
+    order_obj = await order.get_by_id_with_items(db, order_id=id, order_date=order_date)
     
     if not order_obj:
         raise HTTPException(
@@ -132,7 +262,7 @@ def cancel_order(
         )
         
     try:
-        return order.cancel_order(db, db_obj=order_obj)
+        return await order.cancel_order(db, db_obj=order_obj)
     except ValueError as e:
         raise HTTPException(
             status_code=400,
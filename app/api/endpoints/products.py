@@ -4,20 +4,26 @@ API routes for product management.
 
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.api.conditional import is_not_modified, make_etag, not_modified, set_validators
+from app.api.responses import fast_json, versioned_json
+from app.api.routing import TracedRoute
+from app.core.security import Principal
 from app.crud import product
-from app.models.models import User
-from app.schemas.schemas import Product, ProductCreate, ProductUpdate
+from app.schemas.schemas import Product, ProductCacheStats, ProductCreate, ProductUpdate
+from app.schemas.serializers import serialize_product
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=List[Product])
-def read_products(
-    db: Session = Depends(deps.get_db),
+async def read_products(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
     search: str = Query(None, description="Search products by name or description")
@@ -25,83 +31,135 @@ def read_products(
     """
     Retrieve products.
     
-    Optionally filter products by a search term.
+    Optionally filter products by a search term. Unfiltered pages carry
+    ETag and Last-Modified validators and answer If-None-Match with 304
+    Not Modified.
     """
     if search:
-        products = product.search(db, query=search, skip=skip, limit=limit)
-    else:
-        products = product.get_multi(db, skip=skip, limit=limit)
+        products = await product.search(db, query=search, skip=skip, limit=limit)
+        return fast_json([serialize_product(product_obj) for product_obj in products])
     
-    return products
+    version = await product.get_page_version(db, skip=skip, limit=limit)
+    etag = make_etag("products", skip, limit, *version)
+    last_modified = version[-1]
+    # Deleting a product, or a deletion shifting the page, leaves the newest
+    # modification time as it was, so only the ETag can tell the page is
+    # current; Last-Modified is informational
+    if is_not_modified(request, etag):
+        return not_modified(etag, last_modified)
+    
+    set_validators(response, etag, last_modified)
+    
+    async def load() -> List[dict]:
+        return await product.get_multi_cached(
+            db, skip=skip, limit=limit, version=version
+        )
+        
+    return await versioned_json(request, response, etag, load)
 
 
 @router.post("/", response_model=Product)
-def create_product(
+async def create_product(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     product_in: ProductCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Create new product.
     """
     if product_in.sku:
-        existing_product = product.get_by_sku(db, sku=product_in.sku)
+        existing_product = await product.get_by_sku(db, sku=product_in.sku)
         if existing_product:
             raise HTTPException(
                 status_code=400,
                 detail=f"Product with SKU {product_in.sku} already exists",
             )
     
-    return product.create_with_owner(db, obj_in=product_in, owner_id=current_user.id)
+    product_obj = await product.create_with_owner(
+        db, obj_in=product_in, owner_id=current_user.id
+    )
+    return await product.get_cached(db, id=product_obj.id)
 
 
 @router.get("/me", response_model=List[Product])
-def read_products_by_me(
-    db: Session = Depends(deps.get_db),
+async def read_products_by_me(
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve products owned by current user.
     """
-    products = product.get_multi_by_owner(
+    products = await product.get_multi_by_owner(
         db, owner_id=current_user.id, skip=skip, limit=limit
     )
     return products
 
 
+@router.get("/cache/stats", response_model=ProductCacheStats)
+def read_product_cache_stats(
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get product cache hit/miss counters for this worker (superuser only).
+    """
+    return product.cache.stats.as_dict()
+
+
 @router.get("/{id}", response_model=Product)
-def read_product(
+async def read_product(
     *,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     id: int,
 ) -> Any:
     """
     Get product by ID.
+    
+    Carries ETag and Last-Modified validators and answers conditional
+    requests with 304 Not Modified.
     """
-    product_obj = product.get(db, id=id)
-    if not product_obj:
+    version = await product.get_version(db, id=id)
+    if not version:
         raise HTTPException(
             status_code=404,
             detail="Product not found",
         )
-    return product_obj
+    
+    etag = make_etag("product", *version)
+    last_modified = version[1]
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    set_validators(response, etag, last_modified)
+    
+    async def load() -> dict:
+        product_data = await product.get_cached(db, id=id, version=version)
+        if not product_data:
+            raise HTTPException(
+                status_code=404,
+                detail="Product not found",
+            )
+        return product_data
+        
+    return await versioned_json(request, response, etag, load)
 
 
 @router.put("/{id}", response_model=Product)
-def update_product(
+async def update_product(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
     product_in: ProductUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Update a product.
     """
-    product_obj = product.get(db, id=id)
+    product_obj = await product.get(db, id=id)
     if not product_obj:
         raise HTTPException(
             status_code=404,
@@ -115,27 +173,28 @@ def update_product(
         )
         
     if product_in.sku and product_in.sku != product_obj.sku:
-        existing_product = product.get_by_sku(db, sku=product_in.sku)
+        existing_product = await product.get_by_sku(db, sku=product_in.sku)
         if existing_product:
             raise HTTPException(
                 status_code=400,
                 detail=f"Product with SKU {product_in.sku} already exists",
             )
     
-    return product.update(db, db_obj=product_obj, obj_in=product_in)
+    await product.update(db, db_obj=product_obj, obj_in=product_in)
+    return await product.get_cached(db, id=id)
 
 
 @router.delete("/{id}", response_model=Product)
-def delete_product(
+async def delete_product(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Delete a product.
     """
-    product_obj = product.get(db, id=id)
+    product_obj = await product.get(db, id=id)
     if not product_obj:
         raise HTTPException(
             status_code=404,
@@ -148,4 +207,6 @@ def delete_product(
             detail="Not authorized to delete this product",
         )
         
-    return product.remove(db, id=id)
+    product_data = await product.get_cached(db, id=id)
+    await product.remove(db, id=id)
+    return product_data
@@ -2,78 +2,243 @@
 API routes for user authentication and management.
 """
 
-from datetime import timedelta
-from typing import Any
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncContextManager, Callable, Dict, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.api.responses import fast_json
+from app.api.routing import TracedRoute
 from app.core.config import settings
-from app.core.security import create_access_token
-from app.crud import user
-from app.schemas.schemas import Token, User, UserCreate, UserUpdate
+from app.core.security import Principal, create_access_token, new_token_id, user_claims
+from app.crud import token, user
+from app.schemas.schemas import (
+    Token,
+    TokenPayload,
+    TokenRefresh,
+    User,
+    UserCreate,
+    UserPage,
+    UserUpdate,
+)
+from app.schemas.serializers import serialize_user_admin
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
+router = APIRouter(route_class=TracedRoute)
 
-@router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db),
+
+def token_response(db_user: Any, access_jti: str, refresh_token: str) -> Dict[str, Any]:
+    """
+    Build the token response of a login or refresh.
+    
+    Args:
+        db_user: Authenticated user, whose flags become the token's claims
+        access_jti: ID of the access token to issue
+        refresh_token: Refresh token issued alongside
+        
+    Returns:
+        Dict[str, Any]: Token response
+    """
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = user_claims(db_user.is_active, db_user.is_superuser, db_user.token_version)
+    return {
+        "access_token": create_access_token(
+            db_user.id, expires_delta=access_token_expires, jti=access_jti, claims=claims
+        ),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds()),
+    }
+
+
+async def rehash_password(
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+    user_id: int,
+    hashed_password: str,
+    password: str,
+) -> None:
+    """
+    Rehash a password under the current policy, logging rather than raising.
+    
+    Runs after the response is sent, in a session of its own.
+    
+    Args:
+        session_factory: Factory of the session to write with
+        user_id: User ID
+        hashed_password: Hash the password was verified against
+        password: Plain text password
+    """
+    try:
+        async with session_factory() as db:
+            await user.rehash_password(
+                db, user_id=user_id, hashed_password=hashed_password, password=password
+            )
+    except Exception as exc:
+        # The old hash still works; the next login tries again
+        logger.warning("Password rehash for user %s failed: %r", user_id, exc)
+
+
+@router.post("/login", response_model=Token, dependencies=[Depends(deps.limit_login)])
+async def login_access_token(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]] = Depends(deps.get_session_factory),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
+    
+    Also returns a refresh token; exchange it at /auth/refresh when the
+    access token expires rather than logging in again. A password hash
+    made under an older hashing policy is replaced after the response is
+    sent, so the login does not wait for the second hash.
     """
-    authenticated_user = user.authenticate(
+    authenticated_user = await user.authenticate(
         db, username=form_data.username, password=form_data.password
     )
     if not authenticated_user:
+        await deps.record_failed_login(form_data.username)
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     
     if not user.is_active(authenticated_user):
         raise HTTPException(status_code=400, detail="Inactive user")
+    
+    if user.needs_rehash(authenticated_user):
+        background_tasks.add_task(
+            rehash_password,
+            session_factory,
+            authenticated_user.id,
+            authenticated_user.hashed_password,
+            form_data.password,
+        )
         
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            authenticated_user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    access_jti = new_token_id()
+    refresh_token = await token.issue(db, user_id=authenticated_user.id, access_jti=access_jti)
+    return token_response(authenticated_user, access_jti, refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    token_in: TokenRefresh,
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    No password is checked, so this is far cheaper than a login. Each
+    refresh token works once: presenting a used one again revokes every
+    token of its login.
+    """
+    access_jti = new_token_id()
+    rotation = await token.rotate(db, token=token_in.refresh_token, access_jti=access_jti)
+    if rotation is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    
+    refreshed_user = await user.get(db, id=rotation.user_id)
+    if not refreshed_user or not user.is_active(refreshed_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return token_response(refreshed_user, access_jti, rotation.refresh_token)
+
+
+@router.post("/logout", status_code=204)
+async def logout(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    token_data: TokenPayload = Depends(deps.get_token_payload),
+    current_user: Principal = Depends(deps.get_current_principal),
+    token_in: Optional[TokenRefresh] = None,
+) -> None:
+    """
+    Revoke the current access token and, if given, the refresh token of the login.
+    """
+    if token_in is not None:
+        await token.revoke_refresh(db, token=token_in.refresh_token, user_id=current_user.id)
+    if token_data.jti is not None:
+        expires_at = datetime.fromtimestamp(token_data.exp, timezone.utc)
+        await token.revoke_access(db, entries=[(token_data.jti, expires_at)])
 
 
 @router.post("/", response_model=User)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    existing_user = user.get_by_username(db, username=user_in.username)
+    existing_user = await user.get_by_username(db, username=user_in.username)
     if existing_user:
         raise HTTPException(
             status_code=400,
             detail="Username already registered",
         )
         
-    existing_email = user.get_by_email(db, email=user_in.email)
+    existing_email = await user.get_by_email(db, email=user_in.email)
     if existing_email:
         raise HTTPException(
             status_code=400,
             detail="Email already registered",
         )
         
-    new_user = user.create(db, obj_in=user_in)
+    new_user = await user.create(db, obj_in=user_in)
     return new_user
 
 
+@router.get("/", response_model=UserPage)
+async def query_users(
+    db: AsyncSession = Depends(deps.get_read_db),
+    search: Optional[str] = Query(
+        None, min_length=1, max_length=100, description="Username or email prefix"
+    ),
+    is_active: Optional[bool] = None,
+    is_superuser: Optional[bool] = None,
+    created_from: Optional[datetime] = Query(None, description="Users created at or after"),
+    created_to: Optional[datetime] = Query(None, description="Users created before"),
+    sort_by: str = Query("created_at", pattern="^(created_at|id)$"),
+    sort_dir: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    List users (superuser only).
+    
+    The search matches the start of usernames and emails, ignoring case.
+    Results are keyset-paginated: pass the returned next_cursor to get the
+    following page with the same filters and sort.
+    """
+    try:
+        page = await user.query(
+            db,
+            search=search,
+            is_active=is_active,
+            is_superuser=is_superuser,
+            created_from=created_from,
+            created_to=created_to,
+            sort_by=sort_by,
+            descending=sort_dir == "desc",
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e),
+        )
+    page["items"] = [serialize_user_admin(user_obj) for user_obj in page["items"]]
+    return fast_json(page)
+
+
 @router.get("/me", response_model=User)
 def read_user_me(
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_profile),
 ) -> Any:
     """
     Get current user.
@@ -82,18 +247,18 @@ def read_user_me(
 
 
 @router.put("/me", response_model=User)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: UserUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_profile),
 ) -> Any:
     """
     Update current user.
     """
     # If username is being updated, check that it's not already taken
     if user_in.username and user_in.username != current_user.username:
-        existing_user = user.get_by_username(db, username=user_in.username)
+        existing_user = await user.get_by_username(db, username=user_in.username)
         if existing_user:
             raise HTTPException(
                 status_code=400,
@@ -102,12 +267,12 @@ def update_user_me(
     
     # If email is being updated, check that it's not already taken
     if user_in.email and user_in.email != current_user.email:
-        existing_email = user.get_by_email(db, email=user_in.email)
+        existing_email = await user.get_by_email(db, email=user_in.email)
         if existing_email:
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered",
             )
     
-    updated_user = user.update(db, db_obj=current_user, obj_in=user_in)
+    updated_user = await user.update(db, db_obj=current_user, obj_in=user_in)
     return updated_user
@@ -0,0 +1,117 @@
+"""
+Fast JSON responses for hot endpoints.
+
+Endpoints hand over content that is already JSON-ready (see
+app/schemas/serializers.py). With FAST_JSON_RESPONSES enabled it is
+encoded by orjson directly; otherwise it goes through the route's
+response_model as usual.
+
+Versioned responses (those with an ETag) can also be served from
+precompressed bodies: the body for an ETag never changes, so it is
+compressed once per encoding, at a high level, and reused until evicted.
+"""
+
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+from app.core.cache import InMemoryCache
+from app.core.compression import enabled_codecs, negotiate
+from app.core.config import settings
+from app.core.metrics import cache_collector, registry
+
+# Compressed bodies by encoding and ETag; bytes, so kept per process
+body_cache = InMemoryCache(max_entries=settings.COMPRESSED_BODY_CACHE_ENTRIES)
+registry.register_collector(cache_collector("compressed_bodies", body_cache.stats))
+
+
+def _carried_headers(response: Optional[Response]) -> Dict[str, str]:
+    if response is None:
+        return {}
+    return {
+        name: value
+        for name, value in response.headers.items()
+        if name != "content-length"
+    }
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> Any:
+    """
+    Return JSON-ready content, bypassing response_model when enabled.
+
+    Args:
+        content: Serialized dictionaries/lists
+        response: The endpoint's Response parameter, whose headers are
+            carried over
+
+    Returns:
+        Any: ORJSONResponse, or the content itself when the fast path is off
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    return ORJSONResponse(content, headers=_carried_headers(response) or None)
+
+
+def render_json(content: Any) -> bytes:
+    """
+    Encode JSON-ready content the way the configured response class does.
+
+    Args:
+        content: Serialized dictionaries/lists
+
+    Returns:
+        bytes: JSON body
+    """
+    if settings.FAST_JSON_RESPONSES:
+        import orjson
+
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+async def versioned_json(
+    request: Request,
+    response: Response,
+    etag: str,
+    load: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Serve a versioned JSON response, precompressed when the client allows.
+
+    On a body cache hit the content is not loaded at all.
+
+    Args:
+        request: Incoming request
+        response: The endpoint's Response parameter (with the ETag set)
+        etag: Entity tag identifying the content
+        load: Coroutine function returning the JSON-ready content
+
+    Returns:
+        Any: Precompressed Response, or whatever fast_json returns
+    """
+    codecs = {}
+    if settings.COMPRESSION_ENABLED:
+        codecs = {codec.name: codec for codec in enabled_codecs(settings.COMPRESSION_ENCODINGS)}
+    encoding = negotiate(request.headers.get("accept-encoding"), list(codecs))
+    if encoding is None:
+        return fast_json(await load(), response)
+
+    key = f"{encoding}:{etag}"
+    body = await body_cache.get(key)
+    if body is None:
+        content = await load()
+        raw = render_json(content)
+        if len(raw) < settings.COMPRESSION_MINIMUM_SIZE:
+            return fast_json(content, response)
+        codec = codecs[encoding]
+        body = codec.compress(raw, codec.precompress_level)
+        await body_cache.set(key, body, 0)
+
+    headers = _carried_headers(response)
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(body, media_type="application/json", headers=headers)
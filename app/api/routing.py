@@ -0,0 +1,84 @@
+"""
+Route class tracing request handling phases.
+
+A traced request gets a span for the whole route handler (parameter and
+body validation, the endpoint, response serialization) and a child span
+for the endpoint function alone. The gaps before and after the endpoint
+span are validation and serialization time; they are also recorded as
+attributes of the route span.
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.tracing import current_span, span
+
+
+def _trace_endpoint(endpoint: Callable, name: str) -> Callable:
+    # include_router re-creates routes from the already wrapped endpoint
+    if getattr(endpoint, "_traced_endpoint", False):
+        return endpoint
+
+    def record(route_span, started: int, ended: int) -> None:
+        route_span.set_attribute("app.validation_ms", (started - route_span.start_ns) / 1e6)
+        route_span.set_attribute("app.endpoint_ended_ns", ended)
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def traced_endpoint(*args, **kwargs) -> Any:
+            route_span = current_span.get()
+            if route_span is None:
+                return await endpoint(*args, **kwargs)
+            started = time.time_ns()
+            try:
+                with span(name):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                record(route_span, started, time.time_ns())
+    else:
+        # Sync endpoints run in the threadpool, which copies the context
+        @functools.wraps(endpoint)
+        def traced_endpoint(*args, **kwargs) -> Any:
+            route_span = current_span.get()
+            if route_span is None:
+                return endpoint(*args, **kwargs)
+            started = time.time_ns()
+            try:
+                with span(name):
+                    return endpoint(*args, **kwargs)
+            finally:
+                record(route_span, started, time.time_ns())
+
+    traced_endpoint._traced_endpoint = True
+    return traced_endpoint
+
+
+class TracedRoute(APIRoute):
+    """APIRoute adding route and endpoint spans to traced requests."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        name = f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+        super().__init__(path, _trace_endpoint(endpoint, name), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        name = f"route {self.path}"
+
+        async def traced_handler(request: Request) -> Response:
+            if current_span.get() is None:
+                return await handler(request)
+            with span(name) as route_span:
+                response = await handler(request)
+                ended = route_span.attributes.pop("app.endpoint_ended_ns", None)
+                if ended is not None:
+                    route_span.set_attribute(
+                        "app.serialization_ms", (time.time_ns() - ended) / 1e6
+                    )
+                return response
+
+        return traced_handler
@@ -0,0 +1,198 @@
+"""
+Cache backends.
+
+Backends expose a small async key/value protocol (get, set with TTL, delete,
+incr) so callers can switch between an in-process LRU dictionary and a
+Redis-compatible server without code changes. Values must be JSON
+serializable.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Protocol
+
+
+class CacheStats:
+    """Hit/miss counters for a cache."""
+
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        """Get the counters as a dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+class CacheBackend(Protocol):
+    """Async key/value store used by the caches."""
+
+    stats: CacheStats
+
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class InMemoryCache:
+    """
+    In-process cache with per-entry TTL and LRU eviction.
+
+    Values are stored as-is, so callers must not mutate what they get back.
+    Not shared between worker processes.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            clock: Monotonic clock
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = CacheStats()
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Counters never expire and are not subject to eviction
+        self._counters: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._entries[key]
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        expires_at = self.clock() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = self._counters.get(key, 0) + 1
+        self._counters[key] = value
+        return value
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._counters.clear()
+
+
+class RedisCache:
+    """
+    Cache backed by a Redis-compatible server.
+
+    Size limits and LRU eviction are delegated to the server's maxmemory
+    policy, which must be volatile-lru (or another volatile-* policy):
+    counters are set without a TTL and must never be evicted, as losing a
+    generation counter would bring back the entries filed under its
+    earlier values. allkeys-* policies may evict them.
+    """
+
+    def __init__(self, client: Any, prefix: str = "forsit:"):
+        """
+        Initialize the cache.
+
+        Args:
+            client: redis.asyncio client (or a compatible stand-in)
+            prefix: Prefix for every key
+        """
+        self.client = client
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raw = json.dumps(value, separators=(",", ":"))
+        if ttl:
+            await self.client.set(self.prefix + key, raw, px=int(ttl * 1000))
+        else:
+            await self.client.set(self.prefix + key, raw)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*[self.prefix + key for key in keys])
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self.prefix + key))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def create_cache_backend(url: str, max_entries: int = 10000) -> CacheBackend:
+    """
+    Create a cache backend from a URL.
+
+    Args:
+        url: "memory://" for the in-process cache, or a redis:// / rediss://
+            URL (requires the redis package)
+        max_entries: Entry limit for the in-process cache
+
+    Returns:
+        CacheBackend: The backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("memory://"):
+        return InMemoryCache(max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        from redis.asyncio import Redis
+
+        return RedisCache(Redis.from_url(url))
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -7,12 +7,22 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = "HS256"
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Access tokens are short-lived; clients renew them at /auth/refresh
+    # with a rotating refresh token instead of logging in again
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Seconds between reloads of revoked access tokens from the database
+    # (0 disables; revocations made by a worker always apply in it at once)
+    TOKEN_DENYLIST_SYNC_SECONDS: float = float(os.getenv("TOKEN_DENYLIST_SYNC_SECONDS", "5"))
+    # Access tokens carry the user's active/superuser flags and token
+    # version, so requests are authorized without loading the user; the
+    # version (bumped on password or role changes) is cached this long per
+    # worker, or shared at once with a redis:// CACHE_URL
+    TOKEN_VERSION_CACHE_SECONDS: float = float(os.getenv("TOKEN_VERSION_CACHE_SECONDS", "30"))
     
     # CORS configuration
     BACKEND_CORS_ORIGINS: List[str] = []
-
+    
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -20,7 +30,7 @@ class Settings(BaseSettings):
         elif isinstance(v, (list, str)):
             return v
         raise ValueError(v)
-
+    
     # PostgreSQL database configuration
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
@@ -40,6 +50,181 @@ class Settings(BaseSettings):
             path=f"/{os.getenv('POSTGRES_DB', 'forsit_db')}"
         )
     
+    # Connection pool of each engine (primary and every replica)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    # Prepared statements cached per connection (0 disables caching)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Behind PgBouncer in transaction mode, server connections change between
+    # transactions: statement caching is disabled and statement names are
+    # made unique. PgBouncer 1.21+ with max_prepared_statements set can keep
+    # caching with this off
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = os.getenv("DB_PGBOUNCER_TRANSACTION_MODE", "False").lower() == "true"
+    
+    # On startup, open this many connections per engine (0 = DB_POOL_SIZE)
+    # and prepare the hot statements on each, so the first requests after a
+    # deploy skip connection setup; failures only log a warning
+    DB_WARMUP_ENABLED: bool = os.getenv("DB_WARMUP_ENABLED", "True").lower() == "true"
+    DB_WARMUP_CONNECTIONS: int = int(os.getenv("DB_WARMUP_CONNECTIONS", "0"))
+    DB_WARMUP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Read replicas (comma-separated URLs); reads fall back to the primary
+    DATABASE_REPLICA_URLS: List[str] = []
+    
+    @validator("DATABASE_REPLICA_URLS", pre=True)
+    def assemble_replica_urls(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    # Replicas lagging more than this many seconds are skipped; lag is
+    # probed by a background task every check interval
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 1.0
+    # After a write, the same client reads from the primary for this long;
+    # the deadline travels with the client (primary_until cookie and
+    # X-Primary-Until header), so it holds across workers
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    
+    # Cache backend: "memory://" (per process) or a redis:// URL (shared).
+    # With memory:// a write only invalidates the worker that made it, so
+    # other workers keep serving the old product for up to the cache TTL;
+    # use redis:// whenever the server runs more than one worker, with
+    # maxmemory-policy volatile-lru so generation counters (kept without a
+    # TTL) are never evicted
+    CACHE_URL: str = os.getenv("CACHE_URL", "memory://")
+    CACHE_MAX_ENTRIES: int = 10000
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_TTL_SECONDS: float = 60.0
+    PRODUCT_CACHE_LIST_TTL_SECONDS: float = 30.0
+    
+    # Serve JSON through orjson and let hot list endpoints skip response
+    # model validation (requires the orjson package)
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "False").lower() == "true"
+    
+    # Response compression; encodings in server preference order (br and
+    # zstd need the brotli / zstandard packages and are skipped without them)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"]
+    
+    @validator("COMPRESSION_ENCODINGS", pre=True)
+    def assemble_compression_encodings(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # Per-encoding level overrides for on-the-fly compression, e.g. {"gzip": 5}
+    COMPRESSION_LEVELS: Dict[str, int] = {}
+    # Precompressed bodies of versioned catalog responses kept per worker
+    COMPRESSED_BODY_CACHE_ENTRIES: int = 1000
+    
+    # SQL accounting: per-request statement counts (X-DB-* headers in debug
+    # mode), a warning above the budget, and logging of slow statements
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_BUDGET: int = int(os.getenv("QUERY_BUDGET", "20"))
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+    
+    # Prometheus-style /metrics endpoint. With several workers, set a shared
+    # directory (emptied on deploy) where each worker writes its snapshot
+    # every METRICS_FLUSH_SECONDS from a background task; scrapes merge all
+    # of them, and files of exited workers are folded into one aggregate
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = os.getenv("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_SECONDS: float = 5.0
+    
+    # Tracing: spans for requests, route handlers, CRUD methods and SQL
+    # statements, following sampled incoming W3C traceparent headers and
+    # sampling this share of new traces; exporter "log" writes OTLP/JSON lines
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_SAMPLE_RATIO: float = float(os.getenv("TRACING_SAMPLE_RATIO", "0.01"))
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "log")
+    
+    # Superuser profiling endpoints: longest sampling profile, and how long
+    # the event loop must be blocked for its stack to be recorded
+    PROFILER_MAX_SECONDS: float = 60.0
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_STALL_THRESHOLD_MS: float = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+    
+    # Threads hashing passwords off the event loop (0 = min(4, CPU count))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    
+    # Password hashing: new hashes use PASSWORD_HASH_SCHEME ("bcrypt", or
+    # "argon2" for argon2id, which needs argon2-cffi) at PASSWORD_HASH_COST
+    # (bcrypt rounds or argon2 time cost). With the cost 0 it is calibrated
+    # at startup so one hash takes about PASSWORD_HASH_TARGET_MS (0 = the
+    # library default). Hashes of other schemes or lower costs still verify
+    # and are replaced after the user's next successful login; a calibrated
+    # cost only replaces hashes below the scheme's floor (bcrypt 10, argon2
+    # 2), so set PASSWORD_HASH_COST to upgrade existing hashes
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    PASSWORD_HASH_COST: int = int(os.getenv("PASSWORD_HASH_COST", "0"))
+    PASSWORD_HASH_TARGET_MS: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+    PASSWORD_HASH_ARGON2_MEMORY_KIB: int = int(os.getenv("PASSWORD_HASH_ARGON2_MEMORY_KIB", "19456"))
+    
+    # Bulk order operations are committed in chunks of this many orders
+    ORDER_BULK_CHUNK_SIZE: int = int(os.getenv("ORDER_BULK_CHUNK_SIZE", "1000"))
+    
+    # Token-bucket rate limits as "<requests>/<second|minute|hour|day>" (the
+    # whole allowance may be used in a burst); buckets are kept per worker
+    # with "memory://" or shared by all workers with a redis:// URL. Only
+    # failed logins count against a username
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URL: str = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+    RATE_LIMIT_LOGIN_PER_IP: str = os.getenv("RATE_LIMIT_LOGIN_PER_IP", "30/minute")
+    RATE_LIMIT_LOGIN_PER_USERNAME: str = os.getenv("RATE_LIMIT_LOGIN_PER_USERNAME", "10/minute")
+    RATE_LIMIT_CHECKOUT_PER_USER: str = os.getenv("RATE_LIMIT_CHECKOUT_PER_USER", "30/minute")
+    
+    # Load shedding: while recent event loop lag or DB pool wait exceeds its
+    # threshold (0 disables a signal), low-priority requests get 503; from
+    # twice the threshold all but critical requests do. Rules are
+    # "METHOD /path" or "/path", with a trailing * matching a prefix
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHEDDING_LOOP_LAG_MS: float = float(os.getenv("LOAD_SHEDDING_LOOP_LAG_MS", "50"))
+    LOAD_SHEDDING_POOL_WAIT_MS: float = float(os.getenv("LOAD_SHEDDING_POOL_WAIT_MS", "100"))
+    LOAD_SHEDDING_LOW_PRIORITY: List[str] = [
+        "GET /api/v1/orders/admin",
+        "GET /api/v1/products/me",
+        "GET /api/v1/products/cache/stats",
+        "/docs*",
+        "/redoc",
+        "/openapi.json",
+    ]
+    LOAD_SHEDDING_CRITICAL: List[str] = [
+        "POST /api/v1/orders/",
+        "/api/v1/monitoring/*",
+        "/metrics",
+    ]
+    
+    @validator("LOAD_SHEDDING_LOW_PRIORITY", "LOAD_SHEDDING_CRITICAL", pre=True)
+    def assemble_shedding_rules(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    # Production server (python -m app.server): worker processes (0 = one per
+    # CPU); each worker is replaced after SERVER_MAX_REQUESTS requests plus
+    # up to SERVER_MAX_REQUESTS_JITTER more (0 = never), and on shutdown
+    # in-flight requests get SERVER_GRACEFUL_TIMEOUT_SECONDS to finish
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    SERVER_BIND: str = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+    SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: float = float(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    
+    # Comma-separated addresses of reverse proxies whose X-Forwarded-For and
+    # X-Forwarded-Proto headers are trusted ("*" trusts every peer); the
+    # client address of requests relayed by anyone else is the peer itself
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    
     # Initial superuser configuration
     FIRST_SUPERUSER_USERNAME: str = os.getenv("FIRST_SUPERUSER_USERNAME", "admin")
     FIRST_SUPERUSER_EMAIL: str = os.getenv("FIRST_SUPERUSER_EMAIL", "admin@example.com")
@@ -0,0 +1,132 @@
+"""
+Adaptive load shedding.
+
+When a worker falls behind, every request it accepts makes all of them
+slower. The shedder watches overload signals (event loop lag, time spent
+waiting for a database connection) and rejects requests by priority once
+a signal crosses its threshold: low-priority requests first, normal ones
+once a signal reaches twice its threshold, critical ones never. Rejected
+requests cost almost nothing, so the work already accepted finishes in
+time and the signals come back down.
+"""
+
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.metrics import registry
+
+# Pressure (signal / threshold) from which normal-priority requests are shed
+SEVERE_PRESSURE = 2.0
+
+
+class Priority(IntEnum):
+    """Request priority; lower values are shed first."""
+
+    LOW = 0
+    NORMAL = 1
+    CRITICAL = 2
+
+
+# Pressure from which each priority is shed
+SHED_FROM = {Priority.LOW: 1.0, Priority.NORMAL: SEVERE_PRESSURE}
+
+
+class LoadShedder:
+    """Decides which requests to reject while the worker is overloaded."""
+
+    def __init__(self, signals: Dict[str, Tuple[Callable[[], float], float]]):
+        """
+        Initialize the shedder.
+
+        Args:
+            signals: Overload signals by name, as (current value, threshold);
+                a threshold of 0 disables the signal
+        """
+        self.signals = {
+            name: (read, threshold) for name, (read, threshold) in signals.items() if threshold > 0
+        }
+        self.shed = registry.counter(
+            "http_requests_shed_total", "Requests rejected by load shedding",
+            ("priority", "signal"),
+        )
+
+    def pressure(self) -> Tuple[float, Optional[str]]:
+        """
+        Get the most overloaded signal.
+
+        Returns:
+            Tuple[float, Optional[str]]: Highest value / threshold ratio and
+                the signal it belongs to (None without signals)
+        """
+        worst, worst_signal = 0.0, None
+        for name, (read, threshold) in self.signals.items():
+            ratio = read() / threshold
+            if ratio > worst:
+                worst, worst_signal = ratio, name
+        return worst, worst_signal
+
+    def reject(self, priority: Priority) -> Optional[str]:
+        """
+        Decide whether to reject a request, counting rejections.
+
+        Args:
+            priority: The request's priority
+
+        Returns:
+            Optional[str]: Name of the overloaded signal if the request must
+                be rejected, else None
+        """
+        shed_from = SHED_FROM.get(priority)
+        if shed_from is None:
+            return None
+        ratio, signal = self.pressure()
+        if ratio < shed_from:
+            return None
+        self.shed.labels(priority.name.lower(), signal).inc()
+        return signal
+
+
+class PriorityRules:
+    """
+    Request priorities by method and path.
+
+    Rules are "METHOD /path" or "/path" (any method); a path ending in
+    "*" matches every path with that prefix.
+    """
+
+    def __init__(self, low: Sequence[str] = (), critical: Sequence[str] = ()):
+        """
+        Initialize the rules.
+
+        Args:
+            low: Rules for requests shed first
+            critical: Rules for requests never shed
+        """
+        self._rules: List[Tuple[Optional[str], str, bool, Priority]] = [
+            (*self._parse(rule), Priority.CRITICAL) for rule in critical
+        ] + [(*self._parse(rule), Priority.LOW) for rule in low]
+
+    @staticmethod
+    def _parse(rule: str) -> Tuple[Optional[str], str, bool]:
+        method, _, path = rule.strip().rpartition(" ")
+        prefix = path.endswith("*")
+        return method.upper() or None, path.rstrip("*"), prefix
+
+    def priority(self, method: str, path: str) -> Priority:
+        """
+        Get a request's priority.
+
+        Args:
+            method: HTTP method
+            path: Request path
+
+        Returns:
+            Priority: First matching rule's priority (critical rules first),
+                else normal
+        """
+        for rule_method, rule_path, prefix, priority in self._rules:
+            if rule_method is not None and rule_method != method:
+                continue
+            if path == rule_path or (prefix and path.startswith(rule_path)):
+                return priority
+        return Priority.NORMAL
@@ -0,0 +1,759 @@
+"""
+In-process metric primitives and Prometheus text exposition.
+
+Metrics are plain Python numbers updated from the event loop thread, so
+recording needs no locks. A registry turns its metric families, plus
+whatever its collectors report at scrape time, into JSON-compatible
+snapshots. In multiprocess mode every worker writes its snapshot to a
+shared directory from a background task and the worker answering a
+scrape merges them all: counters and histograms are summed over every
+file (so restarts never make them go backwards), gauges over live
+processes only. Files of exited workers are folded into one aggregate
+file, so recycled workers do not leave a file each behind.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+import secrets
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# Default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Dict[str, object]
+Collector = Callable[[], Iterable[Snapshot]]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with Prometheus-style cumulative buckets.
+
+    A value is counted in every bucket whose upper bound is >= the value.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Upper bounds of the finite buckets
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Observed value
+        """
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Dict[str, int]:
+        """
+        Get cumulative counts by upper bound, ending with "+Inf".
+
+        Returns:
+            Dict[str, int]: Count of values <= each bound
+        """
+        result = {}
+        total = 0
+        for bound, count in zip(self.buckets, self._counts):
+            total += count
+            result[f"{bound:g}"] = total
+        result["+Inf"] = self.count
+        return result
+
+    def as_dict(self) -> dict:
+        """Get the buckets, sum and count as a dictionary."""
+        return {
+            "buckets": self.cumulative(),
+            "sum": round(self.sum, 3),
+            "count": self.count,
+        }
+
+    def sample(self) -> dict:
+        """Get the unrounded buckets, sum and count for a snapshot."""
+        return {"buckets": self.cumulative(), "sum": self.sum, "count": self.count}
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        self.value += amount
+
+    def sample(self) -> dict:
+        return {"value": self.value}
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the gauge."""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge."""
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = value
+
+    def sample(self) -> dict:
+        return {"value": self.value}
+
+
+class DecayingAverage:
+    """
+    Moving average of recent observations that fades while none arrive.
+
+    Each observation moves the average by ``weight`` of the difference;
+    between observations the average halves every ``half_life`` seconds,
+    so a signal that stops being measured (e.g. because the work producing
+    it is being rejected) drops back on its own.
+    """
+
+    __slots__ = ("weight", "half_life", "clock", "_value", "_updated_at")
+
+    def __init__(
+        self, weight: float = 0.2, half_life: float = 1.0, clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the average.
+
+        Args:
+            weight: Share of each new observation in the average
+            half_life: Seconds for the average to halve without observations
+            clock: Monotonic clock
+        """
+        self.weight = weight
+        self.half_life = half_life
+        self.clock = clock
+        self._value = 0.0
+        self._updated_at = clock()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * 0.5 ** ((now - self._updated_at) / self.half_life)
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Observed value
+        """
+        now = self.clock()
+        current = self._decayed(now)
+        self._value = current + self.weight * (value - current)
+        self._updated_at = now
+
+    @property
+    def value(self) -> float:
+        """Current average."""
+        return self._decayed(self.clock())
+
+
+class MetricFamily:
+    """A named metric with one child per label value combination."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        multiprocess_mode: str = "sum",
+    ):
+        """
+        Initialize the family.
+
+        Args:
+            name: Metric name
+            help: Help text
+            type: counter, gauge or histogram
+            label_names: Label names, in the order labels() takes values
+            buckets: Histogram bucket upper bounds
+            multiprocess_mode: For gauges, "sum" to add up live workers or
+                "all" to keep one series per worker (pid label)
+        """
+        self.name = name
+        self.help = help
+        self.type = type
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.multiprocess_mode = multiprocess_mode
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """
+        Get the child metric for label values, creating it on first use.
+
+        Args:
+            values: One value per label name
+
+        Returns:
+            Counter, Gauge or Histogram
+        """
+        child = self._children.get(values)
+        if child is None:
+            if self.type == HISTOGRAM:
+                child = Histogram(self.buckets)
+            elif self.type == COUNTER:
+                child = Counter()
+            else:
+                child = Gauge()
+            self._children[values] = child
+        return child
+
+    def snapshot(self) -> Snapshot:
+        """Get the family and its samples in JSON-compatible form."""
+        return {
+            "name": self.name,
+            "help": self.help,
+            "type": self.type,
+            "multiprocess_mode": self.multiprocess_mode,
+            "samples": [
+                dict(labels=dict(zip(self.label_names, values)), **child.sample())
+                for values, child in self._children.items()
+            ],
+        }
+
+
+class Registry:
+    """Metric families and scrape-time collectors."""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.collectors: List[Collector] = []
+
+    def _family(self, name: str, help: str, type: str, **options) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, help, type, **options)
+        return family
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a counter family."""
+        return self._family(name, help, COUNTER, label_names=labels)
+
+    def gauge(
+        self, name: str, help: str, labels: Sequence[str] = (), multiprocess_mode: str = "sum"
+    ) -> MetricFamily:
+        """Get or create a gauge family."""
+        return self._family(
+            name, help, GAUGE, label_names=labels, multiprocess_mode=multiprocess_mode
+        )
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> MetricFamily:
+        """Get or create a histogram family."""
+        return self._family(name, help, HISTOGRAM, label_names=labels, buckets=buckets)
+
+    def register_collector(self, collector: Collector) -> None:
+        """
+        Add a function reporting extra families at scrape time.
+
+        Args:
+            collector: Returns family snapshots (see MetricFamily.snapshot)
+        """
+        self.collectors.append(collector)
+
+    def snapshot(self) -> List[Snapshot]:
+        """
+        Get every family's snapshot, including collected ones.
+
+        Collected families sharing a name (e.g. one per cache) are
+        combined into a single family.
+
+        Returns:
+            List[Snapshot]: Family snapshots
+        """
+        combined: Dict[str, Snapshot] = {}
+        for family in self.families.values():
+            combined[family.name] = family.snapshot()
+        for collector in self.collectors:
+            for family in collector():
+                existing = combined.get(family["name"])
+                if existing is None:
+                    combined[family["name"]] = dict(family, samples=list(family["samples"]))
+                else:
+                    existing["samples"].extend(family["samples"])
+        return list(combined.values())
+
+
+def gauge_snapshot(
+    name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]], multiprocess_mode: str = "sum"
+) -> Snapshot:
+    """
+    Build a gauge family snapshot for a collector.
+
+    Args:
+        name: Metric name
+        help: Help text
+        samples: (labels, value) pairs
+        multiprocess_mode: "sum" or "all"
+
+    Returns:
+        Snapshot: Gauge family snapshot
+    """
+    return {
+        "name": name,
+        "help": help,
+        "type": GAUGE,
+        "multiprocess_mode": multiprocess_mode,
+        "samples": [{"labels": labels, "value": value} for labels, value in samples],
+    }
+
+
+def counter_snapshot(
+    name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]
+) -> Snapshot:
+    """
+    Build a counter family snapshot for a collector.
+
+    Args:
+        name: Metric name
+        help: Help text
+        samples: (labels, value) pairs
+
+    Returns:
+        Snapshot: Counter family snapshot
+    """
+    return {
+        "name": name,
+        "help": help,
+        "type": COUNTER,
+        "multiprocess_mode": "sum",
+        "samples": [{"labels": labels, "value": value} for labels, value in samples],
+    }
+
+
+def histogram_snapshot(
+    name: str, help: str, samples: Iterable[Tuple[Dict[str, str], Histogram]]
+) -> Snapshot:
+    """
+    Build a histogram family snapshot for a collector.
+
+    Args:
+        name: Metric name
+        help: Help text
+        samples: (labels, histogram) pairs
+
+    Returns:
+        Snapshot: Histogram family snapshot
+    """
+    return {
+        "name": name,
+        "help": help,
+        "type": HISTOGRAM,
+        "multiprocess_mode": "sum",
+        "samples": [dict(labels=labels, **histogram.sample()) for labels, histogram in samples],
+    }
+
+
+def cache_collector(name: str, stats) -> Collector:
+    """
+    Build a collector for a cache's hit/miss counters.
+
+    Args:
+        name: Value of the "cache" label
+        stats: CacheStats of the cache
+
+    Returns:
+        Collector: Reports hits, misses, evictions and the hit ratio
+    """
+    labels = {"cache": name}
+
+    def collect() -> List[Snapshot]:
+        return [
+            counter_snapshot("cache_hits_total", "Cache hits", [(labels, stats.hits)]),
+            counter_snapshot("cache_misses_total", "Cache misses", [(labels, stats.misses)]),
+            counter_snapshot(
+                "cache_evictions_total", "Cache evictions", [(labels, stats.evictions)]
+            ),
+            gauge_snapshot(
+                "cache_hit_ratio",
+                "Share of lookups answered from the cache",
+                [(labels, stats.hit_ratio)],
+                multiprocess_mode="all",
+            ),
+        ]
+
+    return collect
+
+
+def merge_snapshots(
+    per_process: Dict[Union[int, str], List[Snapshot]],
+    live_pids: Optional[Iterable[Union[int, str]]] = None,
+) -> List[Snapshot]:
+    """
+    Merge snapshots written by several worker processes.
+
+    Args:
+        per_process: Snapshots by worker process (pid or file name)
+        live_pids: Processes still running; gauges of others are dropped
+            (None keeps every process)
+
+    Returns:
+        List[Snapshot]: One merged snapshot per family
+    """
+    live = None if live_pids is None else set(live_pids)
+    merged: Dict[str, Snapshot] = {}
+    series: Dict[str, Dict[Tuple, dict]] = {}
+
+    for pid, snapshots in sorted(per_process.items()):
+        for family in snapshots:
+            name = family["name"]
+            is_gauge = family["type"] == GAUGE
+            if is_gauge and live is not None and pid not in live:
+                continue
+            if name not in merged:
+                merged[name] = {key: value for key, value in family.items() if key != "samples"}
+                series[name] = {}
+            per_all = is_gauge and family.get("multiprocess_mode") == "all"
+            for sample in family["samples"]:
+                labels = dict(sample["labels"])
+                if per_all:
+                    labels["pid"] = str(pid)
+                key = tuple(sorted(labels.items()))
+                existing = series[name].get(key)
+                if existing is None:
+                    series[name][key] = dict(sample, labels=labels)
+                elif "buckets" in sample:
+                    existing["sum"] += sample["sum"]
+                    existing["count"] += sample["count"]
+                    existing["buckets"] = {
+                        bound: existing["buckets"].get(bound, 0) + count
+                        for bound, count in sample["buckets"].items()
+                    }
+                else:
+                    existing["value"] += sample["value"]
+
+    for name, family in merged.items():
+        family["samples"] = list(series[name].values())
+    return list(merged.values())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items())
+    if extra is not None:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in items) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(snapshots: Iterable[Snapshot]) -> str:
+    """
+    Render snapshots in the Prometheus text exposition format (0.0.4).
+
+    Args:
+        snapshots: Family snapshots
+
+    Returns:
+        str: Exposition text
+    """
+    lines = []
+    for family in snapshots:
+        name = family["name"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample in family["samples"]:
+            labels = sample["labels"]
+            if "buckets" in sample:
+                for bound, count in sample["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(labels, ('le', bound))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(sample['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {sample['count']}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {_number(sample['value'])}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessStore:
+    """
+    Snapshot files shared by the worker processes.
+    
+    Each worker process writes metrics_<pid>-<token>.json; the random token
+    keeps a recycled pid (or a pid reused by another container sharing the
+    directory) from being mistaken for the earlier process. A file not
+    rewritten for stale_after seconds belongs to a process that is gone:
+    its counters and histograms are folded into metrics_aggregate.json and
+    the file is deleted. Workers that shut down cleanly fold their own
+    file straight away.
+    """
+
+    AGGREGATE = "aggregate"
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 5.0,
+        stale_after: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory shared by all workers, emptied on deploy
+            flush_interval: Seconds between snapshot writes
+            stale_after: Seconds after its last write a worker's file is
+                considered abandoned (default: four flush intervals)
+            clock: Wall clock, compared with file modification times
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after if stale_after is not None else 4 * flush_interval
+        self.clock = clock
+        self._instance: Optional[str] = None
+        self._instance_pid: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def instance(self) -> str:
+        """Name of this process's file, renewed after a fork."""
+        pid = os.getpid()
+        if self._instance_pid != pid:
+            self._instance, self._instance_pid = f"{pid}-{secrets.token_hex(4)}", pid
+        return self._instance
+
+    def _path(self, instance: str) -> str:
+        return os.path.join(self.directory, f"metrics_{instance}.json")
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        # Folding a file into the aggregate and deleting it must look atomic
+        # to scrapes, or they would briefly count its samples twice
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_file(self, instance: str, snapshots: List[Snapshot]) -> None:
+        path = self._path(instance)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(snapshots, handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _files(self) -> Iterator[Tuple[str, str]]:
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.startswith("metrics_") and filename.endswith(".json"):
+                yield filename[len("metrics_"):-len(".json")], os.path.join(self.directory, filename)
+
+    def write(self, snapshots: List[Snapshot], instance: Optional[str] = None) -> None:
+        """
+        Write a process's snapshot atomically.
+
+        Args:
+            snapshots: Family snapshots
+            instance: File name of the process (defaults to this process)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_file(instance or self.instance, snapshots)
+
+    def read(self) -> Tuple[Dict[str, List[Snapshot]], List[str]]:
+        """
+        Read every snapshot file.
+
+        Returns:
+            Tuple[Dict[str, List[Snapshot]], List[str]]: Snapshots by
+                process (the aggregate under AGGREGATE), and the processes
+                whose files were written recently enough to count as live
+        """
+        per_process: Dict[str, List[Snapshot]] = {}
+        live: List[str] = []
+        now = self.clock()
+        with self._locked(exclusive=False):
+            for instance, path in self._files():
+                try:
+                    modified = os.stat(path).st_mtime
+                    with open(path) as handle:
+                        per_process[instance] = json.load(handle)
+                except (ValueError, OSError):
+                    continue
+                if instance != self.AGGREGATE and now - modified <= self.stale_after:
+                    live.append(instance)
+        return per_process, live
+
+    def compact(self, retire: bool = False) -> List[str]:
+        """
+        Fold the files of exited processes into the aggregate file.
+
+        Gauges of those processes are dropped; counters and histograms keep
+        counting in the aggregate.
+
+        Args:
+            retire: Also fold this process's own file, on shutdown
+
+        Returns:
+            List[str]: The processes whose files were folded
+        """
+        now = self.clock()
+        with self._locked(exclusive=True):
+            dead = {}
+            for instance, path in self._files():
+                if instance == self.AGGREGATE:
+                    continue
+                try:
+                    expired = now - os.stat(path).st_mtime > self.stale_after
+                except OSError:
+                    continue
+                if expired or (retire and instance == self.instance):
+                    dead[instance] = path
+            if not dead:
+                return []
+                
+            per_process: Dict[str, List[Snapshot]] = {}
+            for instance, path in [(self.AGGREGATE, self._path(self.AGGREGATE)), *dead.items()]:
+                try:
+                    with open(path) as handle:
+                        per_process[instance] = json.load(handle)
+                except (ValueError, OSError):
+                    continue
+            self._write_file(self.AGGREGATE, merge_snapshots(per_process, live_pids=[]))
+            for path in dead.values():
+                os.unlink(path)
+        return list(dead)
+
+    def flush(self, snapshots: List[Snapshot]) -> None:
+        """
+        Write this process's snapshot and fold abandoned files.
+
+        Args:
+            snapshots: This process's family snapshots
+        """
+        self.write(snapshots)
+        self.compact()
+
+    async def start(self, registry: "Registry") -> None:
+        """
+        Keep writing a registry's snapshot in the background.
+
+        The snapshot is taken on the event loop; the file IO runs in a thread.
+
+        Args:
+            registry: This process's registry
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(registry))
+
+    async def stop(self, registry: "Registry") -> None:
+        """
+        Stop writing, then fold this process's final snapshot into the aggregate.
+
+        Args:
+            registry: This process's registry
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        snapshots = registry.snapshot()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.write, snapshots)
+        await loop.run_in_executor(None, lambda: self.compact(retire=True))
+
+    async def _run(self, registry: "Registry") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            snapshots = registry.snapshot()
+            try:
+                await loop.run_in_executor(None, self.flush, snapshots)
+            except Exception as exc:
+                logger.warning("Metrics snapshot write failed: %r", exc)
+            await asyncio.sleep(self.flush_interval)
+
+
+def scrape(snapshots: List[Snapshot], store: Optional[MultiprocessStore] = None) -> str:
+    """
+    Render the metrics of this worker, or of every worker sharing a store.
+
+    Takes a snapshot rather than the registry: the registry may only be
+    read on the event loop, while scraping does file I/O and can run in
+    a thread.
+
+    Args:
+        snapshots: This worker's registry snapshot
+        store: Multiprocess store, if several workers serve the app
+
+    Returns:
+        str: Exposition text
+    """
+    if store is None:
+        return render(snapshots)
+    store.write(snapshots)
+    per_process, live = store.read()
+    return render(merge_snapshots(per_process, live))
+
+
+registry = Registry()
+
+metrics_store = (
+    MultiprocessStore(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+    if settings.METRICS_MULTIPROC_DIR
+    else None
+)
@@ -0,0 +1,57 @@
+"""
+Order status state machine.
+
+Defines which status changes an order may go through. Orders only move
+forward through fulfilment; cancellation is only possible while pending
+because it restores inventory.
+"""
+
+from typing import Dict, FrozenSet, List
+
+PENDING = "pending"
+PROCESSING = "processing"
+SHIPPED = "shipped"
+DELIVERED = "delivered"
+CANCELLED = "cancelled"
+
+ORDER_STATUSES = (PENDING, PROCESSING, SHIPPED, DELIVERED, CANCELLED)
+
+# Allowed target statuses for each source status
+ORDER_STATUS_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    PENDING: frozenset({PROCESSING, SHIPPED, CANCELLED}),
+    PROCESSING: frozenset({SHIPPED}),
+    SHIPPED: frozenset({DELIVERED}),
+    DELIVERED: frozenset(),
+    CANCELLED: frozenset(),
+}
+
+
+def can_transition(current: str, target: str) -> bool:
+    """
+    Check whether an order may move from one status to another.
+    
+    Args:
+        current: Current order status
+        target: Requested order status
+        
+    Returns:
+        bool: True if the transition is allowed
+    """
+    return target in ORDER_STATUS_TRANSITIONS.get(current, frozenset())
+
+
+def source_statuses(target: str) -> List[str]:
+    """
+    Get every status an order may move to the target status from.
+    
+    Args:
+        target: Requested order status
+        
+    Returns:
+        List[str]: Source statuses, empty if the target is unreachable
+    """
+    return [
+        source
+        for source, targets in ORDER_STATUS_TRANSITIONS.items()
+        if target in targets
+    ]
@@ -0,0 +1,337 @@
+"""
+Sampling profiler and event loop lag monitor for live workers.
+
+Both sample the event loop thread's Python stack from a helper thread,
+so they see exactly what the loop is doing, including code that blocks
+it (e.g. CPU-bound work called from a coroutine), without tracing every
+call. Stacks are reported in the collapsed format ("root;...;leaf count"
+per line) that flamegraph.pl and speedscope read directly.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import (
+    DecayingAverage,
+    Histogram,
+    counter_snapshot,
+    histogram_snapshot,
+    registry,
+)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+@lru_cache(maxsize=8192)
+def _code_label(code: CodeType) -> str:
+    # Computed once per function: the samplers label every frame of every
+    # sample while holding the GIL, which the event loop is waiting for
+    filename = code.co_filename
+    for path in sorted(sys.path, key=len, reverse=True):
+        if path and filename.startswith(path + os.sep):
+            filename = filename[len(path) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _frame_label(frame: FrameType) -> str:
+    return _code_label(frame.f_code)
+
+
+def stack_of(frame: Optional[FrameType]) -> List[str]:
+    """
+    Get the frames of a stack, outermost first.
+
+    Args:
+        frame: Innermost frame
+
+    Returns:
+        List[str]: "function (file:first line)" per frame
+    """
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+# Frames that start the event loop. A loop implemented in C (uvloop) waits
+# for I/O with no Python frame above the one that started it
+LOOP_ENTRY_FRAMES = frozenset({
+    (os.path.join("asyncio", "runners.py"), "run"),
+    (os.path.join("asyncio", "base_events.py"), "run_forever"),
+    (os.path.join("asyncio", "base_events.py"), "run_until_complete"),
+    (os.path.join("uvloop", "__init__.py"), "run"),
+})
+
+
+def is_idle(frame: FrameType) -> bool:
+    """Whether a thread is waiting for I/O in the event loop."""
+    code = frame.f_code
+    if code.co_filename.endswith("selectors.py"):
+        return True
+    return any(
+        code.co_name == name and code.co_filename.endswith(os.sep + filename)
+        for filename, name in LOOP_ENTRY_FRAMES
+    )
+
+
+def collapse(stacks: Dict[str, int]) -> str:
+    """
+    Render stack counts in the collapsed format, most frequent first.
+
+    Args:
+        stacks: Semicolon-joined stacks and their sample counts
+
+    Returns:
+        str: One "stack count" line per stack
+    """
+    ordered = sorted(stacks.items(), key=lambda item: (-item[1], item[0]))
+    return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+
+class StackSampler:
+    """Samples one thread's stack at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float, include_idle: bool = False):
+        """
+        Initialize the sampler.
+
+        Args:
+            thread_id: Thread to sample
+            interval: Seconds between samples
+            include_idle: Whether to keep samples taken while the thread
+                waits for I/O in the event loop
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            if is_idle(frame):
+                self.idle_samples += 1
+                if not self.include_idle:
+                    continue
+            self.stacks[";".join(stack_of(frame))] += 1
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the helper thread."""
+        self._stop.set()
+        self._thread.join()
+
+
+class Profiler:
+    """Time-bounded sampling profiles of the event loop thread, one at a time."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def profile(
+        self, seconds: float, interval: float, include_idle: bool = False
+    ) -> StackSampler:
+        """
+        Sample the event loop thread while it keeps serving requests.
+
+        Args:
+            seconds: Profile duration
+            interval: Seconds between samples
+            include_idle: Whether to keep samples of the idle loop
+
+        Returns:
+            StackSampler: Finished sampler with its stack counts
+
+        Raises:
+            ProfilerBusy: If another profile is running
+        """
+        if self._lock.locked():
+            raise ProfilerBusy()
+        async with self._lock:
+            sampler = StackSampler(threading.get_ident(), interval, include_idle)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+            return sampler
+
+
+class LoopStall:
+    """One period during which the event loop was blocked."""
+
+    __slots__ = ("detected_at", "blocked_seconds", "stack")
+
+    def __init__(self, detected_at: datetime, blocked_seconds: float, stack: List[str]):
+        self.detected_at = detected_at
+        self.blocked_seconds = blocked_seconds
+        self.stack = stack
+
+    def as_dict(self) -> dict:
+        """Get the stall as a dictionary."""
+        return {
+            "detected_at": self.detected_at,
+            "blocked_ms": round(self.blocked_seconds * 1000, 1),
+            "stack": self.stack,
+        }
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag and records stacks of blocked loops.
+
+    A heartbeat task wakes every interval and records how late it woke.
+    A watchdog thread checks the heartbeat; when the loop has not run it
+    for longer than the threshold, the loop is blocked right now, so the
+    watchdog captures the loop thread's stack, once per stall. The
+    heartbeat later fills in how long the stall lasted.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.02, history: int = 100):
+        """
+        Initialize the monitor.
+
+        Args:
+            threshold: Seconds the loop must be blocked to record a stall
+            interval: Seconds between heartbeats
+            history: Recent stalls kept
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = Histogram(LAG_BUCKETS)
+        # Lag of the last few heartbeats, read by the load shedder
+        self.recent_lag = DecayingAverage()
+        self.stalls: Deque[LoopStall] = deque(maxlen=history)
+        self.stall_stacks: Counter = Counter()
+        self.stall_count = 0
+        self._lock = threading.Lock()
+        self._heartbeat = time.monotonic()
+        self._pending: Optional[LoopStall] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the monitor has been started."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the heartbeat task and watchdog thread on the running loop."""
+        if self.running:
+            return
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat task and watchdog thread."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.lag.observe(lag)
+            self.recent_lag.observe(lag)
+            with self._lock:
+                self._heartbeat = now
+                if self._pending is not None:
+                    self._pending.blocked_seconds = lag
+                    self._pending = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                blocked = time.monotonic() - self._heartbeat - self.interval
+                if blocked < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                stack = stack_of(frame)
+                stall = LoopStall(datetime.now(timezone.utc), blocked, stack)
+                self._pending = stall
+                self.stalls.append(stall)
+                self.stall_stacks[";".join(stack)] += 1
+                self.stall_count += 1
+
+    def report(self) -> dict:
+        """Get the threshold, stall count and recent stalls, newest first."""
+        with self._lock:
+            recent = [stall.as_dict() for stall in reversed(self.stalls)]
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stalls": self.stall_count,
+            "recent": recent,
+        }
+
+    def collapsed(self) -> str:
+        """Get the stacks captured during stalls in the collapsed format."""
+        with self._lock:
+            return collapse(dict(self.stall_stacks))
+
+    def collect(self) -> list:
+        """
+        Report loop lag for the metrics registry.
+
+        Returns:
+            list: Family snapshots
+        """
+        return [
+            histogram_snapshot(
+                "event_loop_lag_seconds", "How late loop heartbeats ran", [({}, self.lag)]
+            ),
+            counter_snapshot(
+                "event_loop_stalls_total",
+                "Times the loop was blocked longer than the stall threshold",
+                [({}, self.stall_count)],
+            ),
+        ]
+
+
+profiler = Profiler()
+
+loop_monitor = LoopLagMonitor(settings.LOOP_STALL_THRESHOLD_MS / 1000)
+registry.register_collector(loop_monitor.collect)
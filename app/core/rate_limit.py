@@ -0,0 +1,267 @@
+"""
+Token-bucket rate limiting.
+
+A bucket holds up to ``capacity`` tokens and refills continuously at
+``per_second`` tokens per second; each request takes one token and is
+rejected when none is left. Taking no tokens (cost 0) only checks that
+one is left, for limits that are charged after the fact. Buckets live in a store behind a small async
+protocol, so limits can be kept per worker in memory or shared by every
+worker and instance through a Redis-compatible server.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Seconds between two warnings about an unavailable store
+ERROR_LOG_INTERVAL = 60
+
+
+class Rate(NamedTuple):
+    """Bucket size and refill speed."""
+
+    capacity: int
+    per_second: float
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of taking a token."""
+
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+@lru_cache(maxsize=None)
+def parse_rate(text: str) -> Rate:
+    """
+    Parse a rate such as "10/minute".
+
+    The bucket holds as many tokens as requests are allowed per period,
+    so a client may spend the whole period's allowance in one burst.
+
+    Args:
+        text: "<requests>/<second|minute|hour|day>"
+
+    Returns:
+        Rate: The bucket size and refill speed
+
+    Raises:
+        ValueError: If the rate is malformed
+    """
+    try:
+        count, period = text.strip().split("/")
+        requests = int(count)
+        seconds = PERIODS[period.strip().lower().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate: {text!r}")
+    if requests <= 0:
+        raise ValueError(f"Invalid rate: {text!r}")
+    return Rate(requests, requests / seconds)
+
+
+class RateLimitStore(Protocol):
+    """Async store of token buckets."""
+
+    async def consume(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        ...
+
+
+class InMemoryRateLimitStore:
+    """
+    Token buckets in a dictionary of this process.
+
+    Consuming never awaits, so it is atomic on the event loop. The least
+    recently used buckets are dropped beyond ``max_keys``; a dropped
+    bucket starts full again. Not shared between worker processes.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the store.
+
+        Args:
+            max_keys: Buckets kept before the least recently used is dropped
+            clock: Monotonic clock
+        """
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (tokens, updated_at), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def consume(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        now = self.clock()
+        tokens, updated_at = self._buckets.pop(key, (rate.capacity, now))
+        tokens = min(rate.capacity, tokens + (now - updated_at) * rate.per_second)
+        needed = max(cost, 1)
+        allowed = tokens >= needed
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (needed - tokens) / rate.per_second
+        return RateLimitResult(allowed, int(tokens), retry_after)
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+# Refill, take and store a bucket in one step, on the server's clock so
+# every instance agrees. Numbers come back as strings: Redis truncates
+# Lua numbers to integers
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * per_second)
+local needed = math.max(cost, 1)
+local allowed = 0
+local retry_after = 0
+if tokens >= needed then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (needed - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / per_second * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Token buckets on a Redis-compatible server, shared by every worker.
+
+    Each bucket is a hash updated by a Lua script, so concurrent requests
+    from different processes never both take the last token. Buckets
+    expire once they would be full again.
+    """
+
+    def __init__(self, client: Any, prefix: str = "forsit:ratelimit:"):
+        """
+        Initialize the store.
+
+        Args:
+            client: redis.asyncio client (or a compatible stand-in)
+            prefix: Prefix for every key
+        """
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def consume(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        allowed, tokens, retry_after = await self._script(
+            keys=[self.prefix + key], args=[rate.capacity, repr(rate.per_second), cost]
+        )
+        return RateLimitResult(bool(allowed), int(float(tokens)), float(retry_after))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def create_rate_limit_store(url: str, max_keys: int = 100000) -> RateLimitStore:
+    """
+    Create a rate limit store from a URL.
+
+    Args:
+        url: "memory://" for per-process buckets, or a redis:// / rediss://
+            URL (requires the redis package)
+        max_keys: Bucket limit of the in-process store
+
+    Returns:
+        RateLimitStore: The store
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("memory://"):
+        return InMemoryRateLimitStore(max_keys=max_keys)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        from redis.asyncio import Redis
+
+        return RedisRateLimitStore(Redis.from_url(url))
+    raise ValueError(f"Unsupported rate limit store URL: {url}")
+
+
+class RateLimiter:
+    """
+    Applies several limits to a request.
+
+    A request is allowed only if every limit has a token left. When the
+    store is unavailable, requests are allowed: losing the limits is
+    better than failing every login and checkout.
+    """
+
+    def __init__(self, store: RateLimitStore):
+        """
+        Initialize the limiter.
+
+        Args:
+            store: Store holding the buckets
+        """
+        self.store = store
+        self.requests = registry.counter(
+            "rate_limit_requests_total", "Rate-limited requests by limit and result",
+            ("limit", "result"),
+        )
+        self.errors = registry.counter(
+            "rate_limit_store_errors_total", "Requests allowed because the store failed"
+        ).labels()
+        self._last_error_log = -math.inf
+
+    async def hit(
+        self, limits: Sequence[Tuple[str, Rate, Optional[str]]], cost: int = 1
+    ) -> RateLimitResult:
+        """
+        Take tokens from each limit's bucket.
+
+        Args:
+            limits: (limit name, rate, client key) per limit; limits
+                without a key (e.g. unknown client address) are skipped
+            cost: Tokens to take; 0 only checks that a token is left
+
+        Returns:
+            RateLimitResult: Allowed if all limits allowed the request, with
+                the fewest remaining tokens or the longest wait
+        """
+        results: List[RateLimitResult] = []
+        for name, rate, key in limits:
+            if key is None:
+                continue
+            try:
+                result = await self.store.consume(f"{name}:{key}", rate, cost)
+            except Exception as exc:
+                self.errors.inc()
+                now = time.monotonic()
+                if now - self._last_error_log >= ERROR_LOG_INTERVAL:
+                    self._last_error_log = now
+                    logger.warning("Rate limit store unavailable, allowing requests: %r", exc)
+                continue
+            self.requests.labels(name, "allowed" if result.allowed else "limited").inc()
+            results.append(result)
+        denied = [result for result in results if not result.allowed]
+        if denied:
+            return RateLimitResult(False, 0, max(result.retry_after for result in denied))
+        remaining = min((result.remaining for result in results), default=0)
+        return RateLimitResult(True, remaining, 0.0)
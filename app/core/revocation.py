@@ -0,0 +1,236 @@
+"""
+In-memory denylist of revoked access tokens.
+
+Access tokens are verified without a database round trip, so revoking
+one (logout, a stolen refresh token) means telling every worker its ID.
+Revocations are written to the revoked_tokens table and each worker
+reloads the unexpired entries periodically. Because access tokens are
+short-lived, that set stays small no matter how many tokens were ever
+revoked.
+
+Checks first consult a Bloom filter: a token that was never revoked,
+nearly every token, is answered from a small bit array, and only the
+filter's positives are confirmed against the exact set.
+
+All of a user's tokens are revoked at once by bumping the user's token
+version, which every token carries as a claim; current versions are
+read through a cache.
+"""
+
+import hashlib
+import math
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.cache import CacheBackend, CacheStats
+from app.core.metrics import counter_snapshot, gauge_snapshot, registry
+
+# Smallest filter built, so a short list does not get a tiny filter that
+# fills up with the revocations made before the next reload
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """
+    Set membership with false positives but no false negatives.
+
+    Uses ``hashes`` bit positions per item, derived from one BLAKE2b digest
+    by double hashing.
+    """
+
+    __slots__ = ("size", "hashes", "bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Items the filter is sized for
+            error_rate: False positive rate at capacity
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenDenylist:
+    """
+    IDs of revoked, not yet expired access tokens.
+
+    Entries revoked in this worker apply at once; those revoked elsewhere
+    arrive with the next reload. Entries are replaced wholesale on reload,
+    never mutated from other threads, so no lock is needed.
+    """
+
+    def __init__(self, error_rate: float = 0.001):
+        """
+        Initialize an empty denylist.
+
+        Args:
+            error_rate: Bloom filter false positive rate
+        """
+        self.error_rate = error_rate
+        # jti -> expiry (epoch seconds)
+        self._entries: Dict[str, float] = {}
+        # Revoked here since the reload started, kept if the reload missed them
+        self._local: Dict[str, float] = {}
+        self._filter = BloomFilter(MIN_CAPACITY, error_rate)
+        self.false_positives = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token in this worker.
+
+        Args:
+            jti: Token ID
+            expires_at: Token expiry (epoch seconds)
+        """
+        self._entries[jti] = expires_at
+        self._local[jti] = expires_at
+        self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token was revoked.
+
+        Args:
+            jti: Token ID
+
+        Returns:
+            bool: True if the token is revoked
+        """
+        if jti not in self._filter:
+            return False
+        if jti in self._entries:
+            return True
+        self.false_positives += 1
+        return False
+
+    def begin_reload(self) -> None:
+        """Start tracking local revocations a reload in progress could miss."""
+        self._local = {}
+
+    def reload(self, entries: Iterable[Tuple[str, float]]) -> None:
+        """
+        Replace the denylist with the entries loaded from the table.
+
+        Args:
+            entries: (jti, expiry in epoch seconds) of every revoked token
+        """
+        now = time.time()
+        loaded = dict(entries)
+        for jti, expires_at in self._local.items():
+            if expires_at > now:
+                loaded.setdefault(jti, expires_at)
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(loaded)), self.error_rate)
+        for jti in loaded:
+            bloom.add(jti)
+        self._entries, self._filter = loaded, bloom
+
+    def collect(self) -> list:
+        """
+        Report the denylist's size for the metrics registry.
+
+        Returns:
+            list: Family snapshots
+        """
+        return [
+            gauge_snapshot("token_denylist_entries", "Revoked access tokens not yet expired", [({}, len(self))]),
+            counter_snapshot(
+                "token_denylist_false_positives_total",
+                "Bloom filter positives not in the denylist",
+                [({}, self.false_positives)],
+            ),
+        ]
+
+
+class TokenVersionCache:
+    """
+    Users' current token versions on a cache backend.
+
+    With a shared (Redis) backend a bump is seen by every worker at once;
+    with per-process backends, other workers see it once their entry
+    expires, so ``ttl`` bounds how long a revoked token keeps working.
+
+    Versions are filed under a per-user generation read before loading,
+    and a bump increments the generation once committed, so a load that
+    raced with the bump fills a key nobody reads any more instead of
+    caching the old version. As with the product cache, this relies on the
+    backend never evicting counters.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 30.0):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Cache backend
+            ttl: Seconds a version stays cached
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"users:token_version:{user_id}:generation"
+
+    @staticmethod
+    def _key(user_id: int, generation: int) -> str:
+        return f"users:token_version:{user_id}:{generation}"
+
+    async def get(self, user_id: int, loader: Callable[[], Awaitable[Optional[int]]]) -> Optional[int]:
+        """
+        Get a user's token version, loading and caching it on a miss.
+
+        Args:
+            user_id: User ID
+            loader: Coroutine function loading the version (None if the
+                user does not exist)
+
+        Returns:
+            Optional[int]: Current version, or None for unknown users
+        """
+        generation = await self.backend.get(self._generation_key(user_id)) or 0
+        key = self._key(user_id, generation)
+        version = await self.backend.get(key)
+        if version is not None:
+            self.stats.hits += 1
+            return version
+        self.stats.misses += 1
+        version = await loader()
+        if version is not None:
+            await self.backend.set(key, version, self.ttl)
+        return version
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Drop a user's cached version after a bump was committed.
+
+        Args:
+            user_id: User ID
+        """
+        generation = await self.backend.incr(self._generation_key(user_id))
+        await self.backend.delete(self._key(user_id, generation - 1))
+
+
+token_denylist = TokenDenylist()
+registry.register_collector(token_denylist.collect)
@@ -1,21 +1,214 @@
+import asyncio
+import hashlib
+import hmac
+import importlib.util
+import logging
+import math
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Union
+from uuid import uuid4
 
 from app.core.config import settings
+from app.core.metrics import Histogram, gauge_snapshot, histogram_snapshot, registry
+
+logger = logging.getLogger(__name__)
+
+# Supported password hash schemes; "argon2" hashes are argon2id
+PASSWORD_HASH_SCHEMES = ("argon2", "bcrypt")
+
+# Calibrated costs (bcrypt rounds, argon2 time cost) stay within these
+# bounds, so a slow or busy machine never gets a weak cost
+HASH_COST_BOUNDS = {"bcrypt": (10, 31), "argon2": (2, 64)}
+
+# Cost the calibration benchmark hashes at
+CALIBRATION_COST = {"bcrypt": 8, "argon2": 1}
+
+
+class HashPolicy(NamedTuple):
+    """Scheme and cost new password hashes are made with."""
+    
+    scheme: str
+    # bcrypt rounds or argon2 time cost; None for the library default
+    cost: Optional[int]
+
+
+# Policy applied by configure_password_hashing
+_hash_policy: Optional[HashPolicy] = None
+
+
+def create_pwd_context(scheme: str, cost: Optional[int] = None):
+    """
+    Create a password hashing context that hashes with a scheme.
+    
+    Hashes of the other schemes still verify, and ``needs_update`` reports
+    them, as well as hashes of the scheme made below ``cost``.
+    
+    Args:
+        scheme: "bcrypt", or "argon2" for argon2id (needs argon2-cffi)
+        cost: bcrypt rounds or argon2 time cost (library default if not given)
+        
+    Returns:
+        CryptContext: Password hashing configuration
+    """
+    from passlib.context import CryptContext
+    
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unknown password hash scheme: {scheme!r}")
+    # argon2 hashes can only be verified with argon2-cffi installed
+    schemes = [scheme] + [
+        other for other in PASSWORD_HASH_SCHEMES
+        if other != scheme and (other != "argon2" or importlib.util.find_spec("argon2"))
+    ]
+    options: Dict[str, Any] = {}
+    if "argon2" in schemes:
+        options.update(argon2__type="ID", argon2__memory_cost=settings.PASSWORD_HASH_ARGON2_MEMORY_KIB)
+    if cost:
+        options.update({f"{scheme}__default_rounds": cost, f"{scheme}__min_rounds": cost})
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """
+    Get the password hashing context, creating it on first use.
+    
+    passlib is imported here rather than at module level so importing the
+    app does not pay for it until a password is hashed or verified.
+    
+    Returns:
+        CryptContext: Password hashing configuration
+    """
+    return create_pwd_context(settings.PASSWORD_HASH_SCHEME, settings.PASSWORD_HASH_COST or None)
+
+
+def calibrate_hash_cost(scheme: str, target_seconds: float, samples: int = 3) -> int:
+    """
+    Benchmark a scheme and pick the highest cost that hashes within a target time.
+    
+    Hashing time doubles with each bcrypt round and grows linearly with the
+    argon2 time cost, so one timing at a low cost predicts the others. The
+    fastest of a few runs is used; slower ones measure interference.
+    
+    Args:
+        scheme: Hash scheme
+        target_seconds: Time one hash (and so one login) may take
+        samples: Benchmark runs
+        
+    Returns:
+        int: Cost within HASH_COST_BOUNDS
+    """
+    base = CALIBRATION_COST[scheme]
+    context = create_pwd_context(scheme, base)
+    elapsed = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration")
+        elapsed = min(elapsed, time.perf_counter() - started)
+    ratio = target_seconds / max(elapsed, 1e-6)
+    if scheme == "bcrypt":
+        cost = base + math.floor(math.log2(ratio))
+    else:
+        cost = math.floor(base * ratio)
+    low, high = HASH_COST_BOUNDS[scheme]
+    return max(low, min(high, cost))
+
+
+def configure_password_hashing() -> HashPolicy:
+    """
+    Apply the hashing policy, benchmarking the cost the first time if needed.
+    
+    With PASSWORD_HASH_COST unset, the cost is calibrated so one hash takes
+    about PASSWORD_HASH_TARGET_MS on this machine. The benchmark blocks for
+    a fraction of a second, so this runs at startup: in the server's master
+    process before workers are forked, so they all use one cost, or in the
+    lifespan handler otherwise. Later calls return the applied policy.
+    
+    A calibrated cost only applies to new hashes: it varies with timing
+    noise from one start to the next, and making it the minimum would
+    rehash every user's password whenever it came out higher. Only hashes
+    below HASH_COST_BOUNDS are replaced; pin PASSWORD_HASH_COST to upgrade
+    existing hashes to a cost.
+    
+    Returns:
+        HashPolicy: Policy in effect
+    """
+    global _hash_policy
+    if _hash_policy is None:
+        scheme = settings.PASSWORD_HASH_SCHEME
+        cost = settings.PASSWORD_HASH_COST or None
+        if cost is None and settings.PASSWORD_HASH_TARGET_MS > 0:
+            cost = calibrate_hash_cost(scheme, settings.PASSWORD_HASH_TARGET_MS / 1000)
+            get_pwd_context().update(**{
+                f"{scheme}__default_rounds": cost,
+                f"{scheme}__min_rounds": HASH_COST_BOUNDS[scheme][0],
+            })
+            logger.info(
+                "Password hashing calibrated to %s cost %d for %.0f ms",
+                scheme, cost, settings.PASSWORD_HASH_TARGET_MS,
+            )
+        _hash_policy = HashPolicy(scheme, cost)
+    return _hash_policy
+
+
+def __getattr__(name: str) -> Any:
+    # Kept for callers importing ``pwd_context`` directly
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def new_token_id() -> str:
+    """
+    Generate a unique token ID (the JWT "jti" claim).
+    
+    Returns:
+        str: 32 hex characters
+    """
+    return uuid4().hex
 
-# Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+class Principal(NamedTuple):
+    """The authenticated user as described by the access token's claims."""
+    
+    id: int
+    is_active: bool
+    is_superuser: bool
+
+
+def user_claims(is_active: bool, is_superuser: bool, token_version: int) -> Dict[str, Any]:
+    """
+    Build the access token claims that authorize requests without a user lookup.
+    
+    Args:
+        is_active: Whether the user is active
+        is_superuser: Whether the user is a superuser
+        token_version: The user's token version; bumping it revokes the token
+        
+    Returns:
+        Dict[str, Any]: Claims
+    """
+    return {"active": is_active, "superuser": is_superuser, "token_version": token_version}
+
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    jti: Optional[str] = None,
+    claims: Optional[Dict[str, Any]] = None,
+) -> str:
     """
     Create a JWT access token
     
     Args:
         subject: The subject of the token (typically user ID or username)
         expires_delta: Optional token expiration time (defaults to settings value)
+        jti: Token ID used to revoke the token (generated if not given)
+        claims: Additional claims, see user_claims
         
     Returns:
         str: Encoded JWT token
@@ -26,10 +219,39 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    from jose import jwt
+    
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "jti": jti or new_token_id()}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+
+def create_refresh_token() -> str:
+    """
+    Create an opaque refresh token.
+    
+    Returns:
+        str: 256 random bits, URL-safe
+    """
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Digest a refresh token for storage and lookup.
+    
+    Refresh tokens are random, so a keyed SHA-256 is enough: unlike a
+    password hash it costs microseconds, and the digest can be looked up
+    through an index. A leaked table is useless without SECRET_KEY.
+    
+    Args:
+        token: Refresh token
+        
+    Returns:
+        str: Hex digest
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against its hashed version
@@ -41,7 +263,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if passwords match, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
@@ -53,4 +275,123 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    return pwd_context.hash(password)
\ No newline at end of file
+    return get_pwd_context().hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash was made with another scheme or a lower cost than now
+    
+    Args:
+        hashed_password: Hashed password stored in database
+        
+    Returns:
+        bool: True if the password should be hashed again
+    """
+    return get_pwd_context().needs_update(hashed_password)
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool running password hashing off the event loop.
+    
+    bcrypt and argon2 release the GIL, so hashes run in parallel on the worker
+    threads while the loop keeps serving other requests. Counters are
+    only touched on the event loop thread, so they need no locks.
+    """
+    
+    def __init__(self, max_workers: int):
+        """
+        Initialize the pool.
+        
+        Args:
+            max_workers: Maximum concurrent hash operations
+        """
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self.in_flight = 0
+        self.seconds = Histogram((0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+        self.rehashes = registry.counter(
+            "password_rehashes_total", "Password hashes replaced at login under the current policy"
+        ).labels()
+    
+    @property
+    def queued(self) -> int:
+        """Operations waiting for a free worker thread."""
+        return max(0, self.in_flight - self.max_workers)
+    
+    @property
+    def saturation(self) -> float:
+        """Busy share of the worker threads (above 1.0 when operations queue)."""
+        return self.in_flight / self.max_workers
+    
+    async def _run(self, func, *args):
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.seconds.observe(time.perf_counter() - started)
+    
+    def collect(self) -> list:
+        """
+        Report the pool's load for the metrics registry.
+        
+        Returns:
+            list: Family snapshots
+        """
+        snapshots = [
+            gauge_snapshot("password_hash_workers", "Password hashing threads", [({}, self.max_workers)]),
+            gauge_snapshot("password_hash_in_flight", "Hash operations running or queued", [({}, self.in_flight)]),
+            gauge_snapshot("password_hash_queued", "Hash operations waiting for a thread", [({}, self.queued)]),
+            gauge_snapshot(
+                "password_hash_saturation",
+                "In-flight hash operations per thread",
+                [({}, self.saturation)],
+                multiprocess_mode="all",
+            ),
+            histogram_snapshot(
+                "password_hash_duration_seconds",
+                "Hash operation latency including queueing",
+                [({}, self.seconds)],
+            ),
+        ]
+        policy = _hash_policy
+        if policy is not None and policy.cost:
+            snapshots.append(gauge_snapshot(
+                "password_hash_cost",
+                "Cost new password hashes are made with",
+                [({"scheme": policy.scheme}, policy.cost)],
+            ))
+        return snapshots
+    
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password for storage without blocking the event loop.
+        
+        Args:
+            password: Plain text password
+            
+        Returns:
+            str: Hashed password
+        """
+        return await self._run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop.
+        
+        Args:
+            plain_password: Plain text password
+            hashed_password: Hashed password stored in database
+            
+        Returns:
+            bool: True if passwords match, False otherwise
+        """
+        return await self._run(verify_password, plain_password, hashed_password)
+
+
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1)
+)
+registry.register_collector(password_hash_pool.collect)
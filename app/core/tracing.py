@@ -0,0 +1,383 @@
+"""
+Lightweight distributed tracing.
+
+Spans follow the OpenTelemetry data model (trace and span IDs, parent,
+kind, attributes, events, status) and are exported in the OTLP/JSON
+shape, so a collector can ingest them as-is. Trace context is read from
+and written to W3C traceparent headers.
+
+Only TracingMiddleware starts traces. Everything below it creates child
+spans of the current span (a context variable), so unless a request was
+sampled, span() and @traced cost a single context variable lookup.
+"""
+
+import functools
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERNAL = "INTERNAL"
+SERVER = "SERVER"
+CLIENT = "CLIENT"
+
+# OTLP span kind and status code numbers
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+_STATUS_UNSET, _STATUS_OK, _STATUS_ERROR = 0, 1, 2
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span as propagated between services."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """
+    Parse a W3C traceparent header.
+
+    Args:
+        value: Header value, e.g. "00-<32 hex trace id>-<16 hex span id>-01"
+
+    Returns:
+        Optional[SpanContext]: Remote parent, or None if absent or invalid
+    """
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+def format_traceparent(context: SpanContext) -> str:
+    """
+    Format a span context as a W3C traceparent header.
+
+    Args:
+        context: Span context
+
+    Returns:
+        str: Header value
+    """
+    return f"00-{context.trace_id}-{context.span_id}-{'01' if context.sampled else '00'}"
+
+
+def _new_id(bits: int) -> str:
+    value = 0
+    while not value:
+        value = random.getrandbits(bits)
+    return f"{value:0{bits // 4}x}"
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "tracer", "name", "context", "parent_span_id", "kind",
+        "start_ns", "end_ns", "attributes", "events", "status", "status_message",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_span_id: Optional[str],
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.events: List[tuple] = []
+        self.status = _STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration, up to now if still running."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute."""
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        """Record a timestamped event."""
+        self.events.append((time.time_ns(), name, attributes or {}))
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Mark the span as failed by an exception."""
+        self.status = _STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+        self.add_event(
+            "exception",
+            {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+        )
+
+    def end(self) -> None:
+        """End the span and hand it to the exporter."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.exporter.export([self])
+
+    def to_otlp(self) -> dict:
+        """Get the span in the OTLP/JSON shape."""
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": _OTLP_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"timeUnixNano": str(ts), "name": name, "attributes": _otlp_attributes(attrs)}
+                for ts, name, attrs in self.events
+            ],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """Stand-in returned when the current request is not traced."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager making a span current for its duration."""
+
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.record_exception(exc)
+        current_span.reset(self._token)
+        self.span.end()
+        return False
+
+
+def child_span(
+    name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None
+) -> Optional[Span]:
+    """
+    Start a child of the current span without making it current.
+
+    Args:
+        name: Span name
+        kind: Span kind
+        attributes: Initial attributes
+
+    Returns:
+        Optional[Span]: The span, or None if the current request is not traced
+    """
+    parent = current_span.get()
+    if parent is None:
+        return None
+    context = SpanContext(parent.context.trace_id, _new_id(64), True)
+    return Span(parent.tracer, name, context, parent.context.span_id, kind, attributes)
+
+
+def span(name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Trace a block as a child of the current span.
+
+    Usage: ``with span("order.inventory") as current: ...``
+
+    Args:
+        name: Span name
+        kind: Span kind
+        attributes: Initial attributes
+
+    Returns:
+        Context manager yielding the span (a no-op one if not traced)
+    """
+    if current_span.get() is None:
+        return NOOP_SPAN
+    return _ActiveSpan(child_span(name, kind, attributes))
+
+
+def traced(func: Callable) -> Callable:
+    """
+    Trace every call of an async method as "<Class>.<method>".
+
+    Args:
+        func: Coroutine method
+
+    Returns:
+        Callable: Wrapped method
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if current_span.get() is None:
+            return await func(self, *args, **kwargs)
+        with span(f"{type(self).__name__}.{func.__name__}"):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list; for tests."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class LoggingSpanExporter:
+    """Logs each finished span as one OTLP/JSON line."""
+
+    def export(self, spans: List[Span]) -> None:
+        for finished in spans:
+            logger.info(json.dumps(finished.to_otlp(), separators=(",", ":")))
+
+
+class NoopSpanExporter:
+    """Discards finished spans."""
+
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+
+def create_exporter(name: str):
+    """
+    Create a span exporter by name.
+
+    Args:
+        name: "log", "memory" or "none"
+
+    Returns:
+        Exporter with an export(spans) method
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    exporters = {
+        "log": LoggingSpanExporter,
+        "memory": InMemorySpanExporter,
+        "none": NoopSpanExporter,
+    }
+    if name not in exporters:
+        raise ValueError(f"Unknown span exporter: {name}")
+    return exporters[name]()
+
+
+class Tracer:
+    """Starts sampled traces and hands their finished spans to an exporter."""
+
+    def __init__(self, exporter, sample_ratio: float = 1.0):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Receives finished spans
+            sample_ratio: Share of new traces (without a sampled or
+                unsampled parent) that are recorded
+        """
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self._bound = int(max(0.0, min(1.0, sample_ratio)) * (1 << 64))
+
+    def start_trace(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        kind: str = SERVER,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Span]:
+        """
+        Start the local root span of a trace.
+
+        A remote parent's sampling decision is followed; new traces are
+        sampled by trace ID, so every service keeps the same traces.
+
+        Args:
+            name: Span name
+            parent: Remote parent from a traceparent header
+            kind: Span kind
+            attributes: Initial attributes
+
+        Returns:
+            Optional[Span]: The span, or None if the trace is not sampled
+        """
+        if parent is not None:
+            if not parent.sampled:
+                return None
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_span_id = _new_id(128), None
+            if int(trace_id[16:], 16) >= self._bound:
+                return None
+        context = SpanContext(trace_id, _new_id(64), True)
+        return Span(self, name, context, parent_span_id, kind, attributes)
+
+
+tracer = Tracer(create_exporter(settings.TRACING_EXPORTER), settings.TRACING_SAMPLE_RATIO)
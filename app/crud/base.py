@@ -4,13 +4,13 @@ Base CRUD operations for database models.
 This module provides generic CRUD operations that can be used by any model.
 """
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, FrozenSet, Generic, List, Optional, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 
+from app.core.tracing import traced
 from app.db.session import Base
 
 # Define generic types for models and schemas
@@ -34,7 +34,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             model: The SQLAlchemy model class
         """
         self.model = model
+        # Column attribute names, read once from the mapper; only these are
+        # written by create and update
+        self.column_keys: FrozenSet[str] = frozenset(
+            attr.key for attr in inspect(model).column_attrs
+        )
 
+    @traced
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         """
         Get a single record by ID.
@@ -49,6 +55,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).filter(self.model.id == id))
         return result.scalar_one_or_none()
 
+    @traced
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
@@ -66,6 +73,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).offset(skip).limit(limit))
         return result.scalars().all()
 
+    @traced
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
         Create a new record.
@@ -77,13 +85,14 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             ModelType: Created record
         """
-        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data = obj_in.model_dump(include=set(self.column_keys))
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
+    @traced
     async def update(
         self,
         db: AsyncSession,
@@ -102,21 +111,21 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             ModelType: Updated record
         """
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
             
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in update_data.items():
+            if field in self.column_keys:
+                setattr(db_obj, field, value)
                 
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
+    @traced
     async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
         """
         Delete a record.
@@ -2,20 +2,43 @@
 CRUD operations for the Order model.
 """
 
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import exists, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
+from app.core.order_status import (
+    CANCELLED,
+    ORDER_STATUSES,
+    PENDING,
+    can_transition,
+    source_statuses,
+)
+from app.core.tracing import span, traced
 from app.crud.base import CRUDBase
+from app.crud.pagination import decode_cursor, encode_cursor, query_fingerprint
+from app.crud.product import product as crud_product
+from app.db.partitions import month_bounds
 from app.models.models import Order, OrderItem, Product
 from app.schemas.schemas import OrderCreate, OrderUpdate
 
+# Columns the admin order listing can be sorted by
+ORDER_SORT_COLUMNS = {
+    "order_date": Order.order_date,
+    "total_amount": Order.total_amount,
+    "id": Order.id,
+}
+
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     """CRUD operations for Order model."""
     
-    def create_with_items(
-        self, db: Session, *, obj_in: OrderCreate, customer_id: int
+    @traced
+    async def create_with_items(
+        self, db: AsyncSession, *, obj_in: OrderCreate, customer_id: int
     ) -> Order:
         """
         Create a new order with items.
@@ -28,94 +51,300 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         Returns:
             Order: Created order
         """
-        # Calculate total amount and collect order items
-        total_amount = 0.0
-        order_items = []
-        
-        for item in obj_in.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if not product:
-                raise ValueError(f"Product with id {item.product_id} not found")
-            
-            if product.inventory < item.quantity:
-                raise ValueError(f"Insufficient inventory for product {product.name}")
-            
-            unit_price = item.unit_price if item.unit_price else product.price
-            item_total = unit_price * item.quantity
-            total_amount += item_total
-            
-            # Prepare order item
-            order_items.append({
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "unit_price": unit_price
-            })
-            
-            # Update inventory
-            product.inventory -= item.quantity
-            
-        # Create the order
-        order_data = obj_in.dict(exclude={"items"})
-        db_obj = Order(**order_data, customer_id=customer_id, total_amount=total_amount)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        
-        # Create order items
-        for item_data in order_items:
-            db_order_item = OrderItem(order_id=db_obj.id, **item_data)
-            db.add(db_order_item)
-        
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        with span("order.inventory", attributes={"order.items": len(obj_in.items)}):
+            product_ids = {item.product_id for item in obj_in.items}
+            result = await db.execute(select(Product).filter(Product.id.in_(product_ids)))
+            products = {product.id: product for product in result.scalars().all()}
+            
+            # Calculate total amount and collect order items
+            total_amount = 0.0
+            order_items = []
+            quantities: Dict[int, int] = {}
+            
+            for item in obj_in.items:
+                product = products.get(item.product_id)
+                if not product:
+                    raise ValueError(f"Product with id {item.product_id} not found")
+                
+                unit_price = item.unit_price if item.unit_price else product.price
+                item_total = unit_price * item.quantity
+                total_amount += item_total
+                
+                # Prepare order item
+                order_items.append({
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "unit_price": unit_price
+                })
+                quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+                
+            # Take the stock with guarded UPDATEs, so concurrent orders cannot
+            # both pass a check and oversell; products in id order avoid deadlocks
+            for product_id in sorted(quantities):
+                quantity = quantities[product_id]
+                result = await db.execute(
+                    update(Product)
+                    .where(Product.id == product_id, Product.inventory >= quantity)
+                    .values(inventory=Product.inventory - quantity)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount != 1:
+                    name = products[product_id].name
+                    await db.rollback()
+                    raise ValueError(f"Insufficient inventory for product {name}")
+        
+        with span("order.persist"):
+            # Items carry the order date as their partition key
+            order_date = datetime.now(timezone.utc)
+            
+            # Create the order
+            order_data = obj_in.model_dump(exclude={"items"})
+            db_obj = Order(
+                **order_data,
+                customer_id=customer_id,
+                total_amount=total_amount,
+                order_date=order_date,
+            )
+            db.add(db_obj)
+            await db.flush()
+            
+            # Create order items
+            for item_data in order_items:
+                db_order_item = OrderItem(order_id=db_obj.id, order_date=order_date, **item_data)
+                db.add(db_order_item)
+            
+            await db.commit()
         
-    def get_multi_by_customer(
-        self, db: Session, *, customer_id: int, skip: int = 0, limit: int = 100
+        await crud_product.cache.invalidate(list(products))
+        return await self.get_by_id_with_items(
+            db, order_id=db_obj.id, order_date=order_date
+        )
+        
+    @traced
+    async def get_multi_by_customer(
+        self,
+        db: AsyncSession,
+        *,
+        customer_id: int,
+        since: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100
     ) -> List[Order]:
         """
         Get multiple orders by customer.
         
+        Passing since bounds the scan to the partitions covering that period
+        instead of the customer's whole history.
+        
         Args:
             db: Database session
             customer_id: User ID of the customer
+            since: Only orders placed at or after this time
             skip: Number of records to skip
             limit: Maximum number of records to return
             
         Returns:
             List[Order]: List of orders
         """
-        return (
-            db.query(self.model)
-            .filter(Order.customer_id == customer_id)
-            .order_by(Order.order_date.desc())
+        stmt = select(self.model).filter(Order.customer_id == customer_id)
+        if since is not None:
+            stmt = stmt.filter(Order.order_date >= since)
+        result = await db.execute(
+            stmt.order_by(Order.order_date.desc())
             .offset(skip)
             .limit(limit)
-            .all()
+            .options(selectinload(Order.items))
+        )
+        return result.scalars().all()
+        
+    @traced
+    async def query(
+        self,
+        db: AsyncSession,
+        *,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        statuses: Optional[Sequence[str]] = None,
+        customer_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        sort_by: str = "order_date",
+        descending: bool = True,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        with_counts: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Query orders across all customers with keyset pagination.
+        
+        When counts are requested, the total and per-status counts of the
+        whole filtered set are computed with window functions in the same
+        statement that fetches the page.
+        
+        Args:
+            db: Database session
+            date_from: Only orders placed at or after this time
+            date_to: Only orders placed before this time
+            statuses: Only orders in one of these statuses
+            customer_id: Only orders of this customer
+            product_id: Only orders containing this product
+            min_amount: Minimum order total
+            max_amount: Maximum order total
+            sort_by: Column to sort by (see ORDER_SORT_COLUMNS)
+            descending: Sort direction
+            cursor: Cursor returned with the previous page
+            limit: Maximum number of orders to return
+            with_counts: Whether to compute total and per-status counts
+            
+        Returns:
+            Dict[str, Any]: Page with items, next_cursor and counts
+            
+        Raises:
+            ValueError: If the sort column or cursor is invalid
+        """
+        if sort_by not in ORDER_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort orders by {sort_by}")
+        # Cursors only continue the query they were issued for
+        fingerprint = query_fingerprint(
+            sort_by=sort_by,
+            descending=descending,
+            date_from=date_from,
+            date_to=date_to,
+            statuses=sorted(statuses) if statuses else None,
+            customer_id=customer_id,
+            product_id=product_id,
+            min_amount=min_amount,
+            max_amount=max_amount,
+        )
+            
+        conditions = []
+        if date_from is not None:
+            conditions.append(Order.order_date >= date_from)
+        if date_to is not None:
+            conditions.append(Order.order_date < date_to)
+        if statuses:
+            conditions.append(Order.status.in_(statuses))
+        if customer_id is not None:
+            conditions.append(Order.customer_id == customer_id)
+        if product_id is not None:
+            conditions.append(
+                exists().where(
+                    OrderItem.order_id == Order.id,
+                    OrderItem.order_date == Order.order_date,
+                    OrderItem.product_id == product_id,
+                )
+            )
+        if min_amount is not None:
+            conditions.append(Order.total_amount >= min_amount)
+        if max_amount is not None:
+            conditions.append(Order.total_amount <= max_amount)
+            
+        if with_counts:
+            filtered = (
+                select(
+                    Order.id.label("id"),
+                    ORDER_SORT_COLUMNS[sort_by].label("sort_key"),
+                    func.count().over().label("total"),
+                    *[
+                        func.count().filter(Order.status == status).over().label(status)
+                        for status in ORDER_STATUSES
+                    ],
+                )
+                .where(*conditions)
+                .cte("filtered")
+            )
+            sort_key, id_key = filtered.c.sort_key, filtered.c.id
+            stmt = select(
+                Order,
+                filtered.c.total,
+                *[filtered.c[status] for status in ORDER_STATUSES],
+            ).join(filtered, filtered.c.id == Order.id)
+        else:
+            sort_key, id_key = ORDER_SORT_COLUMNS[sort_by], Order.id
+            stmt = select(Order).where(*conditions)
+            
+        if cursor:
+            last_key, last_id = decode_cursor(
+                cursor,
+                2,
+                query=fingerprint,
+                types=(ORDER_SORT_COLUMNS[sort_by].type.python_type, int),
+            )
+            if descending:
+                stmt = stmt.where(tuple_(sort_key, id_key) < tuple_(last_key, last_id))
+            else:
+                stmt = stmt.where(tuple_(sort_key, id_key) > tuple_(last_key, last_id))
+                
+        order_by = (sort_key.desc(), id_key.desc()) if descending else (sort_key, id_key)
+        result = await db.execute(
+            stmt.order_by(*order_by)
+            .limit(limit + 1)
+            .options(selectinload(Order.items))
         )
+        rows = result.all()
+        
+        items = [row[0] for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, sort_by), last.id, query=fingerprint)
+            
+        counts = None
+        if with_counts:
+            if rows:
+                first = rows[0][1:]
+            else:
+                # Past the last row the window has nothing to count over
+                result = await db.execute(
+                    select(
+                        func.count(),
+                        *[func.count().filter(Order.status == status) for status in ORDER_STATUSES],
+                    ).where(*conditions)
+                )
+                first = result.one()
+            counts = {
+                "total": first[0],
+                "by_status": {
+                    status: first[1 + index]
+                    for index, status in enumerate(ORDER_STATUSES)
+                },
+            }
+                
+        return {"items": items, "next_cursor": next_cursor, "counts": counts}
         
-    def get_by_id_with_items(self, db: Session, *, order_id: int) -> Optional[Order]:
+    @traced
+    async def get_by_id_with_items(
+        self, db: AsyncSession, *, order_id: int, order_date: Optional[datetime] = None
+    ) -> Optional[Order]:
         """
         Get an order by ID with all items.
         
         Args:
             db: Database session
             order_id: Order ID
+            order_date: Any time in the month the order was placed, if known,
+                to read a single partition instead of probing every month
             
         Returns:
             Optional[Order]: Order or None if not found
         """
-        return (
-            db.query(Order)
-            .filter(Order.id == order_id)
-            .options(joinedload(Order.items))
-            .first()
-        )
+        stmt = select(Order).filter(Order.id == order_id)
+        if order_date is not None:
+            start, end = month_bounds(order_date)
+            stmt = stmt.filter(Order.order_date >= start, Order.order_date < end)
+        result = await db.execute(stmt.options(selectinload(Order.items)))
+        return result.scalar_one_or_none()
         
-    def cancel_order(self, db: Session, *, db_obj: Order) -> Order:
+    @traced
+    async def cancel_order(self, db: AsyncSession, *, db_obj: Order) -> Order:
         """
         Cancel an order and restore inventory.
         
+        The status transition and the inventory restore run in one
+        transaction, so a concurrent cancel of the same order cannot
+        restock twice.
+        
         Args:
             db: Database session
             db_obj: Order to cancel
@@ -123,20 +352,215 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         Returns:
             Order: Updated order
         """
-        if db_obj.status != "pending":
+        if db_obj.status != PENDING:
             raise ValueError("Only pending orders can be cancelled")
             
-        # Restore inventory
-        for item in db_obj.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if product:
-                product.inventory += item.quantity
-                
-        db_obj.status = "cancelled"
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        cancelled_ids, product_ids = await self._cancel_pending(
+            db, order_ids=[db_obj.id], order_date=db_obj.order_date
+        )
+        if not cancelled_ids:
+            await db.rollback()
+            raise ValueError("Only pending orders can be cancelled")
+            
+        await db.commit()
+        await crud_product.cache.invalidate(product_ids)
+        await db.refresh(db_obj, attribute_names=["status"])
         return db_obj
-
+        
+    @traced
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Order,
+        obj_in: Union[OrderUpdate, Dict[str, Any]]
+    ) -> Order:
+        """
+        Update an order, enforcing the order status state machine.
+        
+        Args:
+            db: Database session
+            db_obj: Order to update
+            obj_in: Order data to update
+            
+        Returns:
+            Order: Updated order
+            
+        Raises:
+            ValueError: If the status change is not allowed
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+            
+        status = update_data.get("status")
+        if status is not None and status != db_obj.status:
+            if status == CANCELLED:
+                raise ValueError("Use the cancel endpoint to cancel an order")
+            if not can_transition(db_obj.status, status):
+                raise ValueError(
+                    f"Cannot change order status from {db_obj.status} to {status}"
+                )
+                
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        
+    @traced
+    async def update_statuses(
+        self,
+        db: AsyncSession,
+        *,
+        changes: Dict[int, str],
+        chunk_size: Optional[int] = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Apply status transitions to many orders.
+        
+        Orders are grouped by target status and each group is moved with a
+        single UPDATE guarded by the allowed source statuses, so invalid
+        transitions are rejected by the database without reading the orders
+        first. Cancellations go through the inventory-restoring path.
+        
+        Args:
+            db: Database session
+            changes: Mapping of order ID to target status
+            chunk_size: Orders per transaction (defaults to settings value)
+            
+        Returns:
+            Tuple[List[int], List[int]]: Updated IDs and rejected IDs
+        """
+        chunk_size = chunk_size or settings.ORDER_BULK_CHUNK_SIZE
+        
+        by_target: Dict[str, List[int]] = {}
+        for order_id, status in changes.items():
+            by_target.setdefault(status, []).append(order_id)
+            
+        updated: List[int] = []
+        for status, order_ids in by_target.items():
+            if status == CANCELLED:
+                cancelled, _ = await self.cancel_orders(
+                    db, order_ids=order_ids, chunk_size=chunk_size
+                )
+                updated.extend(cancelled)
+                continue
+                
+            sources = source_statuses(status)
+            if not sources:
+                continue
+                
+            for start in range(0, len(order_ids), chunk_size):
+                chunk = order_ids[start:start + chunk_size]
+                result = await db.execute(
+                    update(Order)
+                    .where(Order.id.in_(chunk), Order.status.in_(sources))
+                    .values(status=status)
+                    .returning(Order.id)
+                    .execution_options(synchronize_session=False)
+                )
+                updated.extend(result.scalars().all())
+                await db.commit()
+                
+        updated_set = set(updated)
+        rejected = [order_id for order_id in changes if order_id not in updated_set]
+        return updated, rejected
+        
+    @traced
+    async def cancel_orders(
+        self, db: AsyncSession, *, order_ids: Sequence[int], chunk_size: Optional[int] = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Cancel many pending orders and restore their inventory.
+        
+        Orders are processed in chunks, each committed in its own
+        transaction so a large batch never holds row locks for long. The
+        batch is therefore not atomic: if a chunk fails, the chunks before
+        it stay committed. Only pending orders are cancelled, so the batch
+        can be retried as is.
+        
+        Args:
+            db: Database session
+            order_ids: IDs of the orders to cancel
+            chunk_size: Orders per transaction (defaults to settings value)
+            
+        Returns:
+            Tuple[List[int], List[int]]: Cancelled IDs and rejected IDs
+        """
+        chunk_size = chunk_size or settings.ORDER_BULK_CHUNK_SIZE
+        unique_ids = list(dict.fromkeys(order_ids))
+        
+        cancelled: List[int] = []
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            cancelled_ids, product_ids = await self._cancel_pending(db, order_ids=chunk)
+            await db.commit()
+            cancelled.extend(cancelled_ids)
+            if product_ids:
+                await crud_product.cache.invalidate(product_ids)
+            
+        cancelled_set = set(cancelled)
+        rejected = [order_id for order_id in unique_ids if order_id not in cancelled_set]
+        return cancelled, rejected
+        
+    async def _cancel_pending(
+        self,
+        db: AsyncSession,
+        *,
+        order_ids: Sequence[int],
+        order_date: Optional[datetime] = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Move pending orders to cancelled and restock their items.
+        
+        Issues exactly two statements regardless of the number of orders:
+        a guarded status UPDATE and a set-based inventory UPDATE. Only the
+        orders the guarded UPDATE actually transitioned are restocked.
+        Does not commit.
+        
+        Args:
+            db: Database session
+            order_ids: IDs of the orders to cancel
+            order_date: Date of the order, when cancelling a single known one
+            
+        Returns:
+            Tuple[List[int], List[int]]: Cancelled order IDs and restocked product IDs
+        """
+        conditions = [Order.id.in_(order_ids), Order.status == PENDING]
+        if order_date is not None:
+            conditions.append(Order.order_date == order_date)
+        result = await db.execute(
+            update(Order)
+            .where(*conditions)
+            .values(status=CANCELLED)
+            .returning(Order.id, Order.order_date)
+            .execution_options(synchronize_session=False)
+        )
+        cancelled = result.all()
+        if not cancelled:
+            return [], []
+            
+        cancelled_ids = [row.id for row in cancelled]
+        order_dates = [row.order_date for row in cancelled]
+        
+        # Bounding the item dates lets the planner skip unrelated partitions
+        restock = (
+            select(
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity).label("quantity"),
+            )
+            .where(
+                OrderItem.order_id.in_(cancelled_ids),
+                OrderItem.order_date.between(min(order_dates), max(order_dates)),
+            )
+            .group_by(OrderItem.product_id)
+            .subquery()
+        )
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == restock.c.product_id)
+            .values(inventory=func.coalesce(Product.inventory, 0) + restock.c.quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        return cancelled_ids, list(result.scalars().all())
 
 order = CRUDOrder(Order)
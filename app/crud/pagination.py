@@ -0,0 +1,111 @@
+"""
+Keyset pagination helpers.
+
+Cursors are opaque, URL-safe strings carrying the sort key and ID of the
+last row on a page. Clients pass them back unchanged to get the next page.
+
+A cursor can be bound to the query it came from (its sort and filters) by
+a fingerprint, so passing it to a different query is rejected instead of
+comparing the sort column with a value of another type.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _object_hook(value: dict) -> Any:
+    if set(value) == {"dt"}:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def query_fingerprint(**params: Any) -> str:
+    """
+    Digest the parameters that define a listing's order and rows.
+    
+    Args:
+        params: Sort and filter parameters
+        
+    Returns:
+        str: Short fingerprint to bind cursors to
+    """
+    raw = json.dumps(params, default=_default, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def _matches(value: Any, expected: type) -> bool:
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def encode_cursor(*values: Any, query: Optional[str] = None) -> str:
+    """
+    Encode the keyset values of a row into a cursor.
+    
+    Args:
+        values: Sort key values followed by the row ID
+        query: Fingerprint of the query the cursor belongs to
+        
+    Returns:
+        str: Opaque cursor
+    """
+    payload: Any = list(values) if query is None else {"q": query, "k": list(values)}
+    raw = json.dumps(payload, default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    size: int,
+    *,
+    query: Optional[str] = None,
+    types: Optional[Sequence[type]] = None,
+) -> List[Any]:
+    """
+    Decode a cursor back into keyset values.
+    
+    Args:
+        cursor: Cursor produced by encode_cursor
+        size: Expected number of values
+        query: Fingerprint the cursor must have been encoded with
+        types: Expected Python type of each value (ints pass for floats)
+        
+    Returns:
+        List[Any]: Keyset values
+        
+    Raises:
+        ValueError: If the cursor is malformed, belongs to another query or
+            holds values of the wrong types
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(
+            base64.urlsafe_b64decode(padded.encode()), object_hook=_object_hook
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if query is not None:
+        if not isinstance(payload, dict) or set(payload) != {"q", "k"}:
+            raise ValueError("Invalid cursor")
+        if payload["q"] != query:
+            raise ValueError("Cursor belongs to a different sort or filter")
+        values = payload["k"]
+    else:
+        values = payload
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    if types is not None and not all(_matches(value, expected) for value, expected in zip(values, types)):
+        raise ValueError("Invalid cursor")
+    return values
@@ -2,12 +2,20 @@
 CRUD operations for the Product model.
 """
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import selectinload
 
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.core.metrics import cache_collector, registry
+from app.core.tracing import traced
 from app.crud.base import CRUDBase
+from app.crud.product_cache import ProductCache
+from app.db.session import primary_session
 from app.models.models import Category, Product, product_category
 from app.schemas.schemas import ProductCreate, ProductUpdate
 
@@ -15,6 +23,176 @@ from app.schemas.schemas import ProductCreate, ProductUpdate
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
     """CRUD operations for Product model."""
     
+    def __init__(self, model: type, cache: ProductCache):
+        """
+        Initialize with the model class and the product cache.
+        
+        Args:
+            model: The SQLAlchemy model class
+            cache: Cache invalidated by every write
+        """
+        super().__init__(model)
+        self.cache = cache
+        
+    def by_id_statement(self, id: int) -> Select:
+        """
+        Build the statement loading a product with its categories.
+        
+        Args:
+            id: Product ID
+            
+        Returns:
+            Select: Statement refreshing rows already in the session
+        """
+        return (
+            select(Product)
+            .filter(Product.id == id)
+            .options(selectinload(Product.categories))
+            .execution_options(populate_existing=True)
+        )
+        
+    def page_statement(self, skip: int, limit: int) -> Select:
+        """
+        Build the statement loading a page of products with their categories.
+        
+        Args:
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            
+        Returns:
+            Select: Statement refreshing rows already in the session
+        """
+        return (
+            select(Product)
+            .order_by(Product.id)
+            .offset(skip)
+            .limit(limit)
+            .options(selectinload(Product.categories))
+            .execution_options(populate_existing=True)
+        )
+        
+    @traced
+    async def get_cached(
+        self, db: AsyncSession, id: int, version: Optional[tuple] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a serialized product by ID through the cache.
+        
+        Args:
+            db: Database session
+            id: Product ID
+            version: Result of get_version, if already probed
+            
+        Returns:
+            Optional[Dict[str, Any]]: Serialized product or None
+        """
+        # Rows already in the session may predate set-based updates, so
+        # the loaders always refresh them from the database. What they load
+        # is cached for everyone, so they read the primary, never a replica
+        async def load() -> Optional[Product]:
+            async with primary_session(db) as session:
+                result = await session.execute(self.by_id_statement(id))
+                return result.scalar_one_or_none()
+            
+        return await self.cache.get(id, load, version)
+        
+    @traced
+    async def get_multi_cached(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        version: Optional[tuple] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a serialized page of products through the cache.
+        
+        Args:
+            db: Database session
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            version: Result of get_page_version, if already probed
+            
+        Returns:
+            List[Dict[str, Any]]: Serialized products ordered by ID
+        """
+        async def load() -> List[Product]:
+            async with primary_session(db) as session:
+                result = await session.execute(self.page_statement(skip, limit))
+                return result.scalars().all()
+            
+        return await self.cache.get_page(skip, limit, load, version)
+    
+    @traced
+    async def get_version(
+        self, db: AsyncSession, id: int
+    ) -> Optional[Tuple[int, Optional[datetime]]]:
+        """
+        Get the cheap version probe for a single product.
+        
+        Only the primary key and timestamps are read, so conditional
+        requests can be answered without loading the full row.
+        
+        Args:
+            db: Database session
+            id: Product ID
+            
+        Returns:
+            Optional[Tuple[int, Optional[datetime]]]: (id, last modified) or
+                None if the product does not exist
+        """
+        result = await db.execute(
+            select(
+                Product.id,
+                func.coalesce(Product.updated_at, Product.created_at),
+            ).filter(Product.id == id)
+        )
+        row = result.first()
+        return tuple(row) if row else None
+        
+    @traced
+    async def get_page_version(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> Tuple[int, int, int, int, Optional[datetime]]:
+        """
+        Get the cheap version probe for a listing page.
+        
+        The page's IDs are summarized (count, min, max, sum) so inserts,
+        deletes and page shifts change the version, and the newest
+        timestamp catches in-place updates.
+        
+        Args:
+            db: Database session
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            
+        Returns:
+            Tuple[int, int, int, int, Optional[datetime]]: (count, min id,
+                max id, id sum, last modified)
+        """
+        page = (
+            select(
+                Product.id.label("id"),
+                func.coalesce(Product.updated_at, Product.created_at).label("modified"),
+            )
+            .order_by(Product.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        result = await db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.min(page.c.id), 0),
+                func.coalesce(func.max(page.c.id), 0),
+                func.coalesce(func.sum(page.c.id), 0),
+                func.max(page.c.modified),
+            )
+        )
+        return tuple(result.one())
+    
+    @traced
     async def create_with_owner(
         self, db: AsyncSession, *, obj_in: ProductCreate, owner_id: int
     ) -> Product:
@@ -29,7 +207,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         Returns:
             Product: Created product
         """
-        obj_in_data = obj_in.dict(exclude={"category_ids"})
+        obj_in_data = obj_in.model_dump(exclude={"category_ids"})
         db_obj = Product(**obj_in_data, owner_id=owner_id)
         db.add(db_obj)
         await db.commit()
@@ -39,8 +217,10 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         if obj_in.category_ids:
             await self._add_categories(db, db_obj, obj_in.category_ids)
             
+        await self.cache.invalidate([db_obj.id])
         return db_obj
 
+    @traced
     async def get_multi_by_owner(
         self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[Product]:
@@ -61,9 +241,11 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             .filter(Product.owner_id == owner_id)
             .offset(skip)
             .limit(limit)
+            .options(selectinload(Product.categories))
         )
         return result.scalars().all()
     
+    @traced
     async def update(
         self,
         db: AsyncSession,
@@ -82,7 +264,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         Returns:
             Product: Updated product
         """
-        update_data = obj_in.dict(exclude_unset=True, exclude={"category_ids"})
+        update_data = obj_in.model_dump(exclude_unset=True, exclude={"category_ids"})
         
         # Update regular fields
         for field in update_data:
@@ -94,8 +276,26 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await self.cache.invalidate([db_obj.id])
         return db_obj
         
+    @traced
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Product]:
+        """
+        Delete a product.
+        
+        Args:
+            db: Database session
+            id: ID of the product to delete
+            
+        Returns:
+            Optional[Product]: Deleted product or None
+        """
+        obj = await super().remove(db, id=id)
+        if obj:
+            await self.cache.invalidate([id])
+        return obj
+        
     async def _add_categories(self, db: AsyncSession, product: Product, category_ids: List[int]) -> None:
         """
         Add categories to a product.
@@ -109,6 +309,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         # For now, this is a placeholder
         pass
         
+    @traced
     async def get_by_sku(self, db: AsyncSession, *, sku: str) -> Optional[Product]:
         """
         Get a product by SKU.
@@ -123,6 +324,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         result = await db.execute(select(Product).filter(Product.sku == sku))
         return result.scalar_one_or_none()
         
+    @traced
     async def search(
         self, db: AsyncSession, *, query: str, skip: int = 0, limit: int = 100
     ) -> List[Product]:
@@ -147,8 +349,18 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             )
             .offset(skip)
             .limit(limit)
+            .options(selectinload(Product.categories))
         )
         return result.scalars().all()
 
 
-product = CRUDProduct(Product)
+product = CRUDProduct(
+    Product,
+    cache=ProductCache(
+        create_cache_backend(settings.CACHE_URL, max_entries=settings.CACHE_MAX_ENTRIES),
+        ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+        list_ttl=settings.PRODUCT_CACHE_LIST_TTL_SECONDS,
+        enabled=settings.PRODUCT_CACHE_ENABLED,
+    ),
+)
+registry.register_collector(cache_collector("products", product.cache.stats))
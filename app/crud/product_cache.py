@@ -0,0 +1,211 @@
+"""
+Read-through cache for product reads.
+
+Products are cached as serialized response dictionaries, per ID and per
+listing page. Writes invalidate the affected IDs and bump a listing
+generation number, so every cached page goes stale at once without
+having to track which pages contained which products.
+
+Entries are filed under the generation read before loading (a per-ID
+generation for products), so a load that raced with a write fills a key
+nobody reads any more instead of caching the pre-write row. Counters have
+no TTL; on Redis the eviction policy must spare them (see RedisCache).
+
+Callers that already probed the database for a version (see the
+conditional request handling in the product endpoints) can pass it in;
+cached entries with a different version are treated as misses, which
+also catches changes made through other worker processes.
+"""
+
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import CacheBackend, CacheStats
+from app.schemas.serializers import serialize_product
+
+LIST_GENERATION_KEY = "products:list:generation"
+
+
+def generation_key(id: int) -> str:
+    """Get the key of a product's generation counter."""
+    return f"products:id:{id}:generation"
+
+
+def product_key(id: int, generation: int) -> str:
+    """Get the key of a product cached at a generation."""
+    return f"products:id:{id}:{generation}"
+
+
+def modified_at(data: Dict[str, Any]) -> Optional[datetime]:
+    """
+    Get the last modification time of a serialized product.
+
+    Args:
+        data: Serialized product
+
+    Returns:
+        Optional[datetime]: updated_at, falling back to created_at
+    """
+    value = data.get("updated_at") or data.get("created_at")
+    return datetime.fromisoformat(value) if value else None
+
+
+def product_version(data: Dict[str, Any]) -> Tuple[int, Optional[datetime]]:
+    """
+    Get the version of a serialized product.
+
+    Matches CRUDProduct.get_version.
+
+    Args:
+        data: Serialized product
+
+    Returns:
+        Tuple[int, Optional[datetime]]: (id, last modified)
+    """
+    return data["id"], modified_at(data)
+
+
+def page_version(
+    data: List[Dict[str, Any]]
+) -> Tuple[int, int, int, int, Optional[datetime]]:
+    """
+    Get the version of a serialized listing page.
+
+    Matches CRUDProduct.get_page_version.
+
+    Args:
+        data: Serialized products
+
+    Returns:
+        Tuple[int, int, int, int, Optional[datetime]]: (count, min id,
+            max id, id sum, last modified)
+    """
+    ids = [item["id"] for item in data]
+    stamps = [stamp for stamp in map(modified_at, data) if stamp is not None]
+    return (
+        len(ids),
+        min(ids, default=0),
+        max(ids, default=0),
+        sum(ids),
+        max(stamps, default=None),
+    )
+
+
+class ProductCache:
+    """Per-ID and per-page product cache on top of a cache backend."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        ttl: float = 60.0,
+        list_ttl: float = 30.0,
+        enabled: bool = True,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Cache backend
+            ttl: Seconds a single product stays cached
+            list_ttl: Seconds a listing page stays cached
+            enabled: When False, every read goes to the loader
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.list_ttl = list_ttl
+        self.enabled = enabled
+        self.stats = CacheStats()
+
+    async def get(
+        self,
+        id: int,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        version: Optional[tuple] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a product, loading and caching it on a miss.
+
+        Missing products are not cached.
+
+        Args:
+            id: Product ID
+            loader: Coroutine function loading the product row
+            version: Current version; a cached entry with another version
+                is reloaded
+
+        Returns:
+            Optional[Dict[str, Any]]: Serialized product or None
+        """
+        if self.enabled:
+            generation = await self.backend.get(generation_key(id)) or 0
+            key = product_key(id, generation)
+            cached = await self.backend.get(key)
+            if cached is not None and (
+                version is None or product_version(cached) == tuple(version)
+            ):
+                self.stats.hits += 1
+                return cached
+            self.stats.misses += 1
+
+        db_obj = await loader()
+        if db_obj is None:
+            return None
+        data = serialize_product(db_obj)
+        if self.enabled:
+            await self.backend.set(key, data, self.ttl)
+        return data
+
+    async def get_page(
+        self,
+        skip: int,
+        limit: int,
+        loader: Callable[[], Awaitable[List[Any]]],
+        version: Optional[tuple] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a listing page, loading and caching it on a miss.
+
+        Args:
+            skip: Number of products skipped
+            limit: Maximum number of products
+            loader: Coroutine function loading the page rows
+            version: Current version; a cached page with another version
+                is reloaded
+
+        Returns:
+            List[Dict[str, Any]]: Serialized products
+        """
+        if not self.enabled:
+            return [serialize_product(db_obj) for db_obj in await loader()]
+
+        generation = await self.backend.get(LIST_GENERATION_KEY) or 0
+        key = f"products:list:{generation}:{skip}:{limit}"
+        cached = await self.backend.get(key)
+        if cached is not None and (
+            version is None or page_version(cached) == tuple(version)
+        ):
+            self.stats.hits += 1
+            return cached
+        self.stats.misses += 1
+
+        data = [serialize_product(db_obj) for db_obj in await loader()]
+        await self.backend.set(key, data, self.list_ttl)
+        return data
+
+    async def invalidate(self, ids: Iterable[int]) -> None:
+        """
+        Drop cached products and every cached listing page.
+
+        Call after the change has been committed.
+
+        Args:
+            ids: IDs of the products that changed
+        """
+        keys = []
+        for id in set(ids):
+            generation = await self.backend.incr(generation_key(id))
+            keys.append(product_key(id, generation - 1))
+        if keys:
+            await self.backend.delete(*keys)
+        await self.backend.incr(LIST_GENERATION_KEY)
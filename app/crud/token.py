@@ -0,0 +1,269 @@
+"""
+CRUD operations for refresh tokens and revoked access tokens.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.revocation import token_denylist
+from app.core.security import create_refresh_token, hash_refresh_token, new_token_id
+from app.core.tracing import traced
+from app.models.models import RefreshToken, RevokedToken
+
+
+class Rotation(NamedTuple):
+    """A refresh token exchanged for a new one."""
+
+    user_id: int
+    refresh_token: str
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite hands back naive datetimes; every stored time is UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class CRUDToken:
+    """
+    Refresh token rotation and access token revocation.
+
+    Refresh tokens are random and stored as keyed digests, so exchanging
+    one is an indexed lookup; no password hashing is involved. Every
+    rotation of a login shares a family: presenting an already rotated
+    token means it was copied, and the whole family is revoked.
+    """
+
+    @traced
+    async def issue(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        access_jti: str,
+        family_id: Optional[str] = None,
+    ) -> str:
+        """
+        Issue a refresh token.
+
+        Args:
+            db: Database session
+            user_id: Owner of the token
+            access_jti: ID of the access token issued alongside
+            family_id: Family of the rotated token (a new family if not given)
+
+        Returns:
+            str: The refresh token
+        """
+        token = create_refresh_token()
+        db.add(
+            RefreshToken(
+                token_hash=hash_refresh_token(token),
+                user_id=user_id,
+                family_id=family_id or new_token_id(),
+                access_jti=access_jti,
+                expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            )
+        )
+        await db.commit()
+        return token
+
+    @traced
+    async def rotate(self, db: AsyncSession, *, token: str, access_jti: str) -> Optional[Rotation]:
+        """
+        Exchange a refresh token for a new one of the same family.
+
+        Args:
+            db: Database session
+            token: Presented refresh token
+            access_jti: ID of the access token issued alongside the new one
+
+        Returns:
+            Optional[Rotation]: Owner and new token, or None if the token is
+                unknown, expired, revoked or was already used
+        """
+        result = await db.execute(
+            select(RefreshToken).filter(RefreshToken.token_hash == hash_refresh_token(token))
+        )
+        db_obj = result.scalar_one_or_none()
+        if db_obj is None or db_obj.revoked_at is not None:
+            return None
+        now = datetime.now(timezone.utc)
+        if _epoch(db_obj.expires_at) <= now.timestamp():
+            return None
+        user_id, family_id = db_obj.user_id, db_obj.family_id
+
+        # Only one request can mark the token used; a second one, even a
+        # concurrent one, is treated as reuse
+        marked = await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.id == db_obj.id, RefreshToken.used_at.is_(None))
+            .values(used_at=now)
+        )
+        if marked.rowcount != 1:
+            await db.rollback()
+            await self.revoke_family(db, family_id=family_id)
+            return None
+        return Rotation(
+            user_id, await self.issue(db, user_id=user_id, access_jti=access_jti, family_id=family_id)
+        )
+
+    async def _revoke_refresh_tokens(self, db: AsyncSession, *criteria: Any) -> Dict[str, datetime]:
+        # Revokes the matching refresh tokens without committing and returns
+        # (jti, expiry) of the access tokens issued with them
+        result = await db.execute(select(RefreshToken.access_jti).filter(*criteria))
+        access_jtis = result.scalars().all()
+        await db.execute(
+            update(RefreshToken)
+            .where(*criteria, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        # Access tokens live at most this long after issue
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return {jti: expires_at for jti in access_jtis}
+
+    @traced
+    async def revoke_family(self, db: AsyncSession, *, family_id: str) -> None:
+        """
+        Revoke every refresh token of a login and the access tokens issued with them.
+
+        Args:
+            db: Database session
+            family_id: Family to revoke
+        """
+        entries = await self._revoke_refresh_tokens(db, RefreshToken.family_id == family_id)
+        await self.revoke_access(db, entries=entries.items())
+
+    @traced
+    async def stage_user_revocation(self, db: AsyncSession, *, user_id: int) -> Dict[str, datetime]:
+        """
+        Revoke every login of a user in the caller's transaction.
+
+        Nothing is committed: the revocation commits together with the
+        change that calls for it (e.g. a token version bump). Once it has,
+        pass the result to ``deny``.
+
+        Args:
+            db: Database session
+            user_id: User whose refresh tokens are revoked
+
+        Returns:
+            Dict[str, datetime]: Expiry of each revoked access token, by jti
+        """
+        entries = await self._revoke_refresh_tokens(
+            db, RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None)
+        )
+        await self._add_revoked(db, entries)
+        return entries
+
+    @staticmethod
+    def deny(entries: Dict[str, datetime]) -> None:
+        """
+        Deny committed revocations in this worker at once.
+
+        Args:
+            entries: Expiry of each revoked access token, by jti
+        """
+        for jti, expires_at in entries.items():
+            token_denylist.add(jti, _epoch(expires_at))
+
+    @traced
+    async def revoke_refresh(self, db: AsyncSession, *, token: str, user_id: int) -> bool:
+        """
+        Revoke the family of a user's refresh token (logout).
+
+        Args:
+            db: Database session
+            token: Refresh token
+            user_id: User the token must belong to
+
+        Returns:
+            bool: True if the token was found
+        """
+        result = await db.execute(
+            select(RefreshToken.family_id).filter(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                RefreshToken.user_id == user_id,
+            )
+        )
+        family_id = result.scalar_one_or_none()
+        if family_id is None:
+            return False
+        await self.revoke_family(db, family_id=family_id)
+        return True
+
+    @traced
+    async def revoke_access(
+        self, db: AsyncSession, *, entries: Iterable[Tuple[str, datetime]]
+    ) -> None:
+        """
+        Revoke access tokens in every worker.
+
+        They are denied in this worker at once and in the others from their
+        next denylist reload.
+
+        Args:
+            db: Database session
+            entries: (jti, expiry) of the tokens to revoke
+        """
+        entries = dict(entries)
+        await self._add_revoked(db, entries)
+        await db.commit()
+        self.deny(entries)
+
+    async def _add_revoked(self, db: AsyncSession, entries: Dict[str, datetime]) -> None:
+        # Adds denylist rows for the entries not revoked yet, without committing
+        if not entries:
+            return
+        result = await db.execute(
+            select(RevokedToken.jti).filter(RevokedToken.jti.in_(list(entries)))
+        )
+        known = set(result.scalars().all())
+        db.add_all(
+            RevokedToken(jti=jti, expires_at=expires_at)
+            for jti, expires_at in entries.items()
+            if jti not in known
+        )
+
+    @traced
+    async def get_revoked(self, db: AsyncSession) -> List[Tuple[str, float]]:
+        """
+        Get the revoked access tokens that have not expired.
+
+        Args:
+            db: Database session
+
+        Returns:
+            List[Tuple[str, float]]: (jti, expiry in epoch seconds) pairs
+        """
+        result = await db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).filter(
+                RevokedToken.expires_at > datetime.now(timezone.utc)
+            )
+        )
+        return [(jti, _epoch(expires_at)) for jti, expires_at in result.all()]
+
+    @traced
+    async def purge_expired(self, db: AsyncSession) -> None:
+        """
+        Delete expired refresh tokens and denylist entries.
+
+        Args:
+            db: Database session
+        """
+        now = datetime.now(timezone.utc)
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.execute(
+            delete(RefreshToken).where(
+                or_(RefreshToken.expires_at <= now, RefreshToken.revoked_at.is_not(None))
+            )
+        )
+        await db.commit()
+
+
+token = CRUDToken()
@@ -2,20 +2,53 @@
 CRUD operations for the User model.
 """
 
+from datetime import datetime
 from typing import Any, Dict, Optional, Union
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, or_, select, tuple_, update
 
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import create_cache_backend
+from app.core.config import settings
+from app.core.metrics import cache_collector, registry
+from app.core.revocation import TokenVersionCache
+from app.core.security import password_hash_pool, password_needs_rehash
 from app.crud.base import CRUDBase
+from app.crud.pagination import decode_cursor, encode_cursor, query_fingerprint
+from app.crud.token import token
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserUpdate
 
+# Changing any of these revokes the user's tokens, whose claims they back
+TOKEN_VERSION_FIELDS = ("hashed_password", "is_active", "is_superuser")
+
+# Columns the admin user directory can be sorted by
+USER_SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "id": User.id,
+}
+
+
+def _prefix_pattern(prefix: str) -> str:
+    # LIKE pattern matching values that start with the prefix, taken literally
+    escaped = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """CRUD operations for User model."""
     
+    def __init__(self, model: type, token_versions: TokenVersionCache):
+        """
+        Initialize with the model class and the token version cache.
+        
+        Args:
+            model: The SQLAlchemy model class
+            token_versions: Cache of users' current token versions
+        """
+        super().__init__(model)
+        self.token_versions = token_versions
+        
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         """
         Get a user by email.
@@ -44,13 +77,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         result = await db.execute(select(User).filter(User.username == username))
         return result.scalar_one_or_none()
 
-    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate, is_superuser: bool = False) -> User:
         """
         Create new user.
         
         Args:
             db: Database session
             obj_in: User data
+            is_superuser: Grant superuser rights; never set from request
+                data (see scripts/create_superuser.py)
             
         Returns:
             User: Created user
@@ -58,9 +93,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db_obj = User(
             username=obj_in.username,
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await password_hash_pool.hash(obj_in.password),
             is_active=True,
-            is_superuser=obj_in.is_superuser,
+            is_superuser=is_superuser,
         )
         db.add(db_obj)
         await db.commit()
@@ -73,6 +108,10 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         Update a user.
         
+        Changing a field in TOKEN_VERSION_FIELDS bumps the token version,
+        which revokes access tokens, and revokes every refresh token of the
+        user in the same transaction, so no login outlives the change.
+        
         Args:
             db: Database session
             db_obj: User to update
@@ -84,13 +123,133 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
         
         if "password" in update_data and update_data["password"]:
-            update_data["hashed_password"] = get_password_hash(update_data["password"])
+            update_data["hashed_password"] = await password_hash_pool.hash(update_data["password"])
             del update_data["password"]
             
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        revoke = any(
+            field in update_data and update_data[field] != getattr(db_obj, field)
+            for field in TOKEN_VERSION_FIELDS
+        )
+        revoked: Dict[str, datetime] = {}
+        if revoke:
+            update_data["token_version"] = db_obj.token_version + 1
+            revoked = await token.stage_user_revocation(db, user_id=db_obj.id)
+        updated = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        if revoke:
+            token.deny(revoked)
+            await self.token_versions.invalidate(updated.id)
+        return updated
+
+    async def get_token_version(self, db: AsyncSession, *, id: int) -> Optional[int]:
+        """
+        Get a user's current token version, through the cache.
+        
+        Args:
+            db: Database session
+            id: User ID
+            
+        Returns:
+            Optional[int]: Token version, or None if the user does not exist
+        """
+        async def load() -> Optional[int]:
+            result = await db.execute(select(User.token_version).filter(User.id == id))
+            return result.scalar_one_or_none()
+        
+        return await self.token_versions.get(id, load)
+
+    async def query(
+        self,
+        db: AsyncSession,
+        *,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        sort_by: str = "created_at",
+        descending: bool = True,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        Query users with keyset pagination.
+        
+        The search matches the start of the username or email, ignoring
+        case; each side is a range scan of its prefix index, and the flag
+        filters lead indexes ending in the sort columns.
+        
+        Args:
+            db: Database session
+            search: Username or email prefix
+            is_active: Only active (True) or inactive (False) users
+            is_superuser: Only superusers (True) or other users (False)
+            created_from: Only users created at or after this time
+            created_to: Only users created before this time
+            sort_by: Column to sort by (see USER_SORT_COLUMNS)
+            descending: Sort direction
+            cursor: Cursor returned with the previous page
+            limit: Maximum number of users to return
+            
+        Returns:
+            Dict[str, Any]: Page with items and next_cursor
+            
+        Raises:
+            ValueError: If the sort column or cursor is invalid
+        """
+        if sort_by not in USER_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort users by {sort_by}")
+        fingerprint = query_fingerprint(
+            search=search.lower() if search else None,
+            is_active=is_active,
+            is_superuser=is_superuser,
+            created_from=created_from,
+            created_to=created_to,
+            sort_by=sort_by,
+            descending=descending,
+        )
+            
+        conditions = []
+        if search:
+            pattern = _prefix_pattern(search)
+            conditions.append(
+                or_(
+                    func.lower(User.username).like(pattern, escape="\\"),
+                    func.lower(User.email).like(pattern, escape="\\"),
+                )
+            )
+        if is_active is not None:
+            conditions.append(User.is_active == is_active)
+        if is_superuser is not None:
+            conditions.append(User.is_superuser == is_superuser)
+        if created_from is not None:
+            conditions.append(User.created_at >= created_from)
+        if created_to is not None:
+            conditions.append(User.created_at < created_to)
+            
+        sort_key = USER_SORT_COLUMNS[sort_by]
+        stmt = select(User).where(*conditions)
+        if cursor:
+            last_key, last_id = decode_cursor(
+                cursor, 2, query=fingerprint, types=(sort_key.type.python_type, int)
+            )
+            if descending:
+                stmt = stmt.where(tuple_(sort_key, User.id) < tuple_(last_key, last_id))
+            else:
+                stmt = stmt.where(tuple_(sort_key, User.id) > tuple_(last_key, last_id))
+                
+        order_by = (sort_key.desc(), User.id.desc()) if descending else (sort_key, User.id)
+        result = await db.execute(stmt.order_by(*order_by).limit(limit + 1))
+        users = result.scalars().all()
+        
+        items = users[:limit]
+        next_cursor = None
+        if len(users) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, sort_by), last.id, query=fingerprint)
+        return {"items": items, "next_cursor": next_cursor}
 
     async def authenticate(self, db: AsyncSession, *, username: str, password: str) -> Optional[User]:
         """
@@ -107,9 +266,53 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await password_hash_pool.verify(password, user.hashed_password):
             return None
         return user
+
+    def needs_rehash(self, user: User) -> bool:
+        """
+        Check if a user's password hash predates the current hashing policy.
+        
+        Args:
+            user: User to check
+            
+        Returns:
+            bool: True if the password should be hashed again
+        """
+        return password_needs_rehash(user.hashed_password)
+
+    async def rehash_password(
+        self, db: AsyncSession, *, user_id: int, hashed_password: str, password: str
+    ) -> bool:
+        """
+        Replace a user's password hash with one under the current policy.
+        
+        The hash is written directly rather than through ``update`` so the
+        token version is not bumped: the password is unchanged, and tokens
+        issued before stay valid. Nothing is written if the password was
+        changed since ``hashed_password`` was read.
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            hashed_password: Hash the password was verified against
+            password: Plain text password
+            
+        Returns:
+            bool: True if the hash was replaced
+        """
+        new_hash = await password_hash_pool.hash(password)
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == hashed_password)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            return False
+        password_hash_pool.rehashes.inc()
+        return True
         
     def is_active(self, user: User) -> bool:
         """
@@ -124,4 +327,11 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return user.is_active
 
 
-user = CRUDUser(User)
+user = CRUDUser(
+    User,
+    token_versions=TokenVersionCache(
+        create_cache_backend(settings.CACHE_URL, max_entries=settings.CACHE_MAX_ENTRIES),
+        ttl=settings.TOKEN_VERSION_CACHE_SECONDS,
+    ),
+)
+registry.register_collector(cache_collector("token_versions", user.token_versions.stats))
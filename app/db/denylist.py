@@ -0,0 +1,95 @@
+"""
+Periodic reload of the revoked-token denylist.
+
+Each worker reloads the unexpired revoked_tokens rows every interval, so
+a token revoked by any worker is denied everywhere within one interval.
+The reload is an index range scan over a table holding only recent
+revocations, and once an hour expired rows are purged.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.revocation import TokenDenylist
+from app.crud import token
+
+logger = logging.getLogger(__name__)
+
+# Seconds between purges of expired tokens
+PURGE_INTERVAL = 3600
+
+
+async def reload_denylist(db: AsyncSession, denylist: TokenDenylist) -> None:
+    """
+    Replace a denylist with the revoked tokens stored in the database.
+
+    Args:
+        db: Database session
+        denylist: Denylist to reload
+    """
+    denylist.begin_reload()
+    denylist.reload(await token.get_revoked(db))
+
+
+class DenylistSync:
+    """Background task keeping a worker's denylist in step with the table."""
+
+    def __init__(
+        self,
+        denylist: TokenDenylist,
+        session_factory: Callable[[], AsyncSession],
+        interval: float,
+    ):
+        """
+        Initialize the task.
+
+        Args:
+            denylist: Denylist to keep loaded
+            session_factory: Creates database sessions
+            interval: Seconds between reloads
+        """
+        self.denylist = denylist
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._purged_at = time.monotonic()
+
+    async def sync(self) -> None:
+        """Reload the denylist, and purge expired tokens when due."""
+        async with self.session_factory() as db:
+            await reload_denylist(db, self.denylist)
+            if time.monotonic() - self._purged_at >= PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                await token.purge_expired(db)
+
+    async def start(self) -> None:
+        """Load the denylist, then keep reloading it in the background."""
+        try:
+            await self.sync()
+        except Exception as exc:
+            logger.warning("Token denylist load failed: %r", exc)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop reloading."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception as exc:
+                # Keep the last loaded entries until the database is back
+                logger.warning("Token denylist reload failed: %r", exc)
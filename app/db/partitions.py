@@ -0,0 +1,255 @@
+"""
+Monthly range partitioning of orders and order_items.
+
+On PostgreSQL both tables are partitioned by RANGE (order_date), one
+partition per calendar month (UTC), with order_items co-partitioned on the
+order's date. This module builds the partition DDL used by the migration
+and by scripts/manage_partitions.py.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Parent tables in creation order; detach and drop in reverse
+PARTITIONED_TABLES = ("orders", "order_items")
+
+# Foreign key from order_items to orders, dropped from detached partitions
+ORDER_ITEMS_ORDER_FK = "fk_order_items_order"
+
+# SQL listing the partitions of a table by name
+LIST_PARTITIONS_SQL = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = :table
+ORDER BY child.relname
+"""
+
+
+def month_start(value: Union[date, datetime]) -> date:
+    """
+    Get the first day of the month containing a date.
+    
+    Args:
+        value: Date or datetime (aware datetimes are converted to UTC)
+        
+    Returns:
+        date: First day of that month
+    """
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """
+    Shift a month start by a number of months.
+    
+    Args:
+        month: First day of a month
+        count: Months to add (may be negative)
+        
+    Returns:
+        date: First day of the resulting month
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(value: Union[date, datetime]) -> Tuple[datetime, datetime]:
+    """
+    Get the UTC range covered by the month partition containing a date.
+    
+    Args:
+        value: Date or datetime (naive values are taken as UTC)
+        
+    Returns:
+        Tuple[datetime, datetime]: Inclusive start and exclusive end
+    """
+    month = month_start(value)
+    end = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(end.year, end.month, 1, tzinfo=timezone.utc),
+    )
+
+
+def iter_months(first: date, last: date) -> Iterator[date]:
+    """
+    Iterate over month starts from first to last inclusive.
+    
+    Args:
+        first: First month
+        last: Last month
+        
+    Yields:
+        date: First day of each month
+    """
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """
+    Get the name of a table's partition for a month.
+    
+    Args:
+        table: Parent table name
+        month: First day of the month
+        
+    Returns:
+        str: Partition table name, e.g. orders_p2026_01
+    """
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """
+    Parse the month back out of a partition name.
+    
+    Args:
+        table: Parent table name
+        name: Partition table name
+        
+    Returns:
+        Optional[date]: Month start, or None for the default partition
+    """
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name[len(prefix):], "%Y_%m").date()
+    except ValueError:
+        return None
+
+
+def default_partition_name(table: str) -> str:
+    """
+    Get the name of a table's default partition.
+    
+    Args:
+        table: Parent table name
+        
+    Returns:
+        str: Default partition name, e.g. orders_default
+    """
+    return f"{table}_default"
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    """
+    Build the DDL creating a table's partition for a month.
+    
+    Args:
+        table: Parent table name
+        month: First day of the month
+        
+    Returns:
+        str: CREATE TABLE ... PARTITION OF statement
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ({_bound(month)}) "
+        f"TO ({_bound(add_months(month, 1))})"
+    )
+
+
+def move_default_rows_sql(month: date) -> List[str]:
+    """
+    Build the DDL creating a month's partitions out of the default ones.
+    
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows in its range, which happens once orders were placed in a
+    month before its partition existed. The month's rows are stashed in
+    temporary tables and deleted from the default partitions, items first
+    for the foreign key, then reinserted once the partitions exist. The
+    statements must run in one transaction.
+    
+    Args:
+        month: First day of the month
+        
+    Returns:
+        List[str]: Statements to run in order
+    """
+    stash: List[str] = []
+    restore: List[str] = []
+    for table in reversed(PARTITIONED_TABLES):
+        moved = f"{partition_name(table, month)}_moved"
+        stash.append(f"CREATE TEMPORARY TABLE {moved} (LIKE {table}) ON COMMIT DROP")
+        stash.append(
+            f"WITH moved AS ("
+            f"DELETE FROM {default_partition_name(table)} "
+            f"WHERE order_date >= {_bound(month)} "
+            f"AND order_date < {_bound(add_months(month, 1))} "
+            f"RETURNING *"
+            f") INSERT INTO {moved} SELECT * FROM moved"
+        )
+        restore.insert(0, f"INSERT INTO {table} SELECT * FROM {moved}")
+    create = [create_partition_sql(table, month) for table in PARTITIONED_TABLES]
+    return stash + create + restore
+
+
+def create_partitions_sql(
+    first: date, last: date, *, move_default_rows: bool = False
+) -> List[str]:
+    """
+    Build the DDL creating co-located partitions for a range of months.
+    
+    Args:
+        first: First month
+        last: Last month
+        move_default_rows: Move rows for these months out of the default
+            partitions first (needed once the default partitions exist)
+        
+    Returns:
+        List[str]: Statements, orders partitions before order_items ones
+    """
+    statements: List[str] = []
+    for month in iter_months(first, last):
+        if move_default_rows:
+            statements.extend(move_default_rows_sql(month))
+        else:
+            statements.extend(
+                create_partition_sql(table, month) for table in PARTITIONED_TABLES
+            )
+    return statements
+
+
+def detach_partition_sql(
+    table: str, month: date, *, archive_schema: Optional[str] = None, drop: bool = False
+) -> List[str]:
+    """
+    Build the DDL detaching a table's partition for a month.
+    
+    Detached order_items partitions lose their foreign key to orders so the
+    matching orders partition can be detached afterwards.
+    
+    Args:
+        table: Parent table name
+        month: First day of the month
+        archive_schema: Schema to move the detached partition into
+        drop: Drop the detached partition instead of keeping it
+        
+    Returns:
+        List[str]: Statements to run in order
+    """
+    name = partition_name(table, month)
+    statements = [f"ALTER TABLE {table} DETACH PARTITION {name}"]
+    if table == "order_items":
+        statements.append(
+            f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {ORDER_ITEMS_ORDER_FK}"
+        )
+    if drop:
+        statements.append(f"DROP TABLE {name}")
+    elif archive_schema:
+        statements.append(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+        statements.append(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+    return statements
@@ -0,0 +1,185 @@
+"""
+Per-request SQL statement accounting.
+
+Cursor execution hooks on the engines record every statement into the
+QueryStats of the request being served (held in a context variable set
+by QueryStatsMiddleware) and log statements slower than a threshold.
+Completed requests are aggregated into per-route histograms.
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import Histogram, counter_snapshot, histogram_snapshot, registry
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STARTED_KEY = "query_stats_started"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def compact_statement(statement: str, limit: int = 500) -> str:
+    """
+    Collapse whitespace in a SQL statement and truncate it.
+
+    Args:
+        statement: SQL text
+        limit: Maximum length
+
+    Returns:
+        str: Single-line statement
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement if len(statement) <= limit else statement[: limit - 3] + "..."
+
+
+class QueryStats:
+    """SQL statements issued while serving one request."""
+
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        """
+        Record one executed statement.
+
+        Args:
+            statement: SQL text
+            seconds: Execution time
+        """
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def install_query_hooks(engine: AsyncEngine, slow_query_seconds: float) -> None:
+    """
+    Time every statement an engine executes.
+
+    Args:
+        engine: Engine to instrument
+        slow_query_seconds: Statements at least this slow are logged
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info[_STARTED_KEY].pop()
+        seconds = time.perf_counter() - started
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+        if seconds >= slow_query_seconds:
+            logger.warning(
+                "Slow query (%.1f ms): %s", seconds * 1000, compact_statement(statement)
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # Failed statements never reach after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_STARTED_KEY):
+            conn.info[_STARTED_KEY].pop()
+
+
+class RouteQueryMetrics:
+    """Query count and DB time distributions for one route."""
+
+    def __init__(self):
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time_ms = Histogram(DB_TIME_MS_BUCKETS)
+        self.over_budget = 0
+
+    def as_dict(self) -> dict:
+        """Get the route's metrics as a dictionary."""
+        return {
+            "requests": self.queries.count,
+            "over_budget": self.over_budget,
+            "queries": self.queries.as_dict(),
+            "db_time_ms": self.db_time_ms.as_dict(),
+        }
+
+
+class QueryMetrics:
+    """Per-route query metrics for this worker process."""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteQueryMetrics] = {}
+
+    def observe(self, route: str, stats: QueryStats, over_budget: bool) -> None:
+        """
+        Record a completed request.
+
+        Args:
+            route: Method and route path template, e.g. "GET /api/v1/orders/{id}"
+            stats: The request's query stats
+            over_budget: Whether the request exceeded the query budget
+        """
+        metrics = self.routes.get(route)
+        if metrics is None:
+            metrics = self.routes[route] = RouteQueryMetrics()
+        metrics.queries.observe(stats.count)
+        metrics.db_time_ms.observe(stats.total_seconds * 1000)
+        if over_budget:
+            metrics.over_budget += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Get every route's metrics."""
+        return {route: metrics.as_dict() for route, metrics in sorted(self.routes.items())}
+
+    def collect(self) -> list:
+        """
+        Report the per-route histograms for the metrics registry.
+
+        DB time is reported in milliseconds, matching its bucket bounds.
+
+        Returns:
+            list: Family snapshots
+        """
+        routes = [({"route": route}, metrics) for route, metrics in sorted(self.routes.items())]
+        return [
+            histogram_snapshot(
+                "db_queries_per_request",
+                "SQL statements issued per request",
+                [(labels, metrics.queries) for labels, metrics in routes],
+            ),
+            histogram_snapshot(
+                "db_time_per_request_milliseconds",
+                "Time spent executing SQL per request",
+                [(labels, metrics.db_time_ms) for labels, metrics in routes],
+            ),
+            counter_snapshot(
+                "db_query_budget_exceeded_total",
+                "Requests issuing more statements than the query budget",
+                [(labels, metrics.over_budget) for labels, metrics in routes],
+            ),
+        ]
+
+
+query_metrics = QueryMetrics()
+registry.register_collector(query_metrics.collect)
@@ -0,0 +1,174 @@
+"""
+Read/write routing between the primary database and read replicas.
+
+Read-only dependencies ask the router for an engine. Replicas are used
+round-robin while their replication lag is under the configured limit;
+otherwise, and for clients that wrote recently (read-your-writes), reads
+go to the primary. Replica lag is probed by a background task, never by
+the request asking for an engine. Clients that write are handed a marker
+to send back with their reads, so every worker honours it.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Replication lag in seconds as seen by a PostgreSQL standby
+PG_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+logger = logging.getLogger(__name__)
+
+LagProbe = Callable[[AsyncEngine], Awaitable[float]]
+
+
+async def probe_replica_lag(engine: AsyncEngine) -> float:
+    """
+    Measure a replica's replication lag.
+    
+    Engines that are not PostgreSQL (e.g. a SQLite stand-in) report no lag.
+    
+    Args:
+        engine: Replica engine
+        
+    Returns:
+        float: Lag in seconds
+    """
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    async with engine.connect() as conn:
+        result = await conn.execute(text(PG_REPLICA_LAG_SQL))
+        return float(result.scalar() or 0.0)
+
+
+class ReplicaRouter:
+    """Choose the engine that serves a read-only session."""
+    
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: Sequence[AsyncEngine] = (),
+        *,
+        max_lag: float = 5.0,
+        lag_check_interval: float = 1.0,
+        sticky_seconds: float = 5.0,
+        lag_probe: LagProbe = probe_replica_lag,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the router.
+        
+        Args:
+            primary: Primary (read-write) engine
+            replicas: Read replica engines
+            max_lag: Maximum replication lag in seconds for a usable replica
+            lag_check_interval: Seconds between lag probes of the replicas
+            sticky_seconds: Seconds a client reads from the primary after a write
+            lag_probe: Coroutine measuring a replica's lag in seconds
+            clock: Wall clock, shared by all workers that see a client's marker
+        """
+        self.primary = primary
+        self.replicas: List[AsyncEngine] = list(replicas)
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.sticky_seconds = sticky_seconds
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._next = itertools.count()
+        # Replica index -> (checked_at, usable)
+        self._health: Dict[int, Tuple[float, bool]] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+    def write_marker(self) -> float:
+        """
+        Get the read-your-writes marker for a client that is writing now.
+        
+        The marker is handed back to the client, which sends it with its
+        next requests, so any worker can route them without shared state.
+        
+        Returns:
+            float: Unix time until which the client reads from the primary
+        """
+        return self.clock() + self.sticky_seconds
+        
+    def read_engine(self, primary_until: Optional[float] = None) -> AsyncEngine:
+        """
+        Get the engine for a read-only session.
+        
+        Args:
+            primary_until: The client's read-your-writes marker, if any.
+                Markers further ahead than sticky_seconds are ignored.
+            
+        Returns:
+            AsyncEngine: A healthy replica, or the primary
+        """
+        if not self.replicas:
+            return self.primary
+        now = self.clock()
+        if primary_until is not None and now < primary_until <= now + self.sticky_seconds:
+            return self.primary
+            
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            if self._is_usable(index, now):
+                return self.replicas[index]
+        return self.primary
+        
+    async def check_replicas(self) -> None:
+        """Probe the lag of every replica and record which are usable."""
+        lags = await asyncio.gather(
+            *(
+                asyncio.wait_for(self.lag_probe(replica), timeout=self.max_lag)
+                for replica in self.replicas
+            ),
+            return_exceptions=True,
+        )
+        now = self.clock()
+        for index, lag in enumerate(lags):
+            usable = not isinstance(lag, BaseException) and lag <= self.max_lag
+            self._health[index] = (now, usable)
+            
+    async def start(self) -> None:
+        """Probe the replicas, then keep probing them in the background."""
+        if not self.replicas or self._task is not None:
+            return
+        await self.check_replicas()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        
+    async def stop(self) -> None:
+        """Stop probing."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.lag_check_interval)
+            try:
+                await self.check_replicas()
+            except Exception as exc:
+                logger.warning("Replica lag check failed: %r", exc)
+                
+    def _is_usable(self, index: int, now: float) -> bool:
+        checked = self._health.get(index)
+        if checked is None:
+            return False
+        # A result the probe task has not refreshed in a while is not trusted
+        checked_at, usable = checked
+        return usable and now - checked_at <= self.lag_check_interval + self.max_lag
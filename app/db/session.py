@@ -1,30 +1,296 @@
-from typing import AsyncGenerator
+"""
+Database engines and sessions.
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+Engines are created on first use rather than at import, so importing the
+app (for the CLI, tests or OpenAPI generation) loads no database driver.
+The application creates them in its lifespan handler and disposes them
+on shutdown; scripts simply use ``engine`` or ``AsyncSessionLocal``.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
-
-# Create async PostgreSQL engine
-engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI),
-    echo=settings.DEBUG,
-    pool_pre_ping=True,  # Health check for connections
-    pool_size=10,        # Default number of connections
-    max_overflow=20,     # Allow up to 20 extra connections
-    future=True
+from app.core.metrics import (
+    LATENCY_BUCKETS,
+    DecayingAverage,
+    Histogram,
+    gauge_snapshot,
+    histogram_snapshot,
+    registry,
 )
+from app.db.query_stats import install_query_hooks
+from app.db.routing import ReplicaRouter
+from app.db.tracing import install_tracing_hooks
+
+
+class _Engines:
+    """Engines and the replica router, once created."""
+    
+    def __init__(self):
+        self.primary: Optional[AsyncEngine] = None
+        self.replicas: List[AsyncEngine] = []
+        self.router: Optional[ReplicaRouter] = None
+
+
+_engines = _Engines()
+
+
+# Time checkouts waited for a connection, over every engine; the recent
+# average is one of the load shedder's overload signals
+pool_wait = Histogram(LATENCY_BUCKETS)
+recent_pool_wait = DecayingAverage()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool recording how long each checkout waits.
+    
+    Time spent opening a new (overflow) connection is not waiting for the
+    pool, so it is left out: a slow connect is not a sign of exhaustion.
+    """
+    
+    def _create_connection(self) -> Any:
+        started = time.perf_counter()
+        record = super()._create_connection()
+        record.connect_seconds = time.perf_counter() - started
+        return record
+    
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        record = None
+        try:
+            record = super()._do_get()
+            return record
+        finally:
+            waited = time.perf_counter() - started
+            if record is not None:
+                waited -= record.__dict__.pop("connect_seconds", 0.0)
+            pool_wait.observe(waited)
+            recent_pool_wait.observe(waited)
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options() -> Dict[str, Any]:
+    """
+    Build the options shared by the primary and replica engines.
+    
+    Prepared statements are cached per connection, up to
+    DB_STATEMENT_CACHE_SIZE. In PgBouncer transaction mode consecutive
+    transactions may run on different server connections, so statements
+    are never cached and get unique names instead of asyncpg's numbering.
+    
+    Returns:
+        Dict[str, Any]: Keyword arguments for create_async_engine
+    """
+    connect_args: Dict[str, Any] = {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        connect_args = {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+    return dict(
+        echo=settings.DEBUG,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,  # Health check for connections
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        connect_args=connect_args,
+        future=True,
+    )
+
+
+def init_engines() -> AsyncEngine:
+    """
+    Create the primary and replica engines if not created yet.
+    
+    Installs the query statistics and tracing hooks, binds
+    AsyncSessionLocal to the primary and builds the replica router.
+    
+    Returns:
+        AsyncEngine: The primary engine
+    """
+    if _engines.primary is not None:
+        return _engines.primary
+        
+    # Create async PostgreSQL engine
+    primary = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI), **engine_options())
+    
+    # Read replica engines, used only by read-only sessions
+    replicas = [
+        create_async_engine(url, **engine_options())
+        for url in settings.DATABASE_REPLICA_URLS
+    ]
+    
+    # Count and time statements per request
+    if settings.QUERY_STATS_ENABLED:
+        for instrumented_engine in [primary, *replicas]:
+            install_query_hooks(instrumented_engine, settings.SLOW_QUERY_MS / 1000)
+            
+    # Record statements of traced requests as spans
+    if settings.TRACING_ENABLED:
+        for traced_engine in [primary, *replicas]:
+            install_tracing_hooks(traced_engine)
+            
+    # Routes read-only sessions to a healthy replica or the primary
+    _engines.router = ReplicaRouter(
+        primary,
+        replicas,
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+        lag_check_interval=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+        sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    )
+    _engines.replicas = replicas
+    _engines.primary = primary
+    AsyncSessionLocal.configure(bind=primary)
+    return primary
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Get the primary engine, creating it on first use.
+    
+    Returns:
+        AsyncEngine: The primary engine
+    """
+    return _engines.primary or init_engines()
+
+
+def get_engines() -> List[AsyncEngine]:
+    """
+    Get the primary and replica engines, creating them on first use.
+    
+    Returns:
+        List[AsyncEngine]: The primary engine followed by the replicas
+    """
+    return [get_engine(), *_engines.replicas]
+
+
+def get_router() -> ReplicaRouter:
+    """
+    Get the replica router, creating the engines on first use.
+    
+    Returns:
+        ReplicaRouter: Router for read-only sessions
+    """
+    if _engines.router is None:
+        init_engines()
+    return _engines.router
+
+
+async def dispose_engines() -> None:
+    """Close all pooled connections and forget the engines."""
+    engines = [_engines.primary, *_engines.replicas] if _engines.primary else []
+    _engines.primary, _engines.replicas, _engines.router = None, [], None
+    for engine in engines:
+        await engine.dispose()
+
+
+def __getattr__(name: str) -> Any:
+    # Module attributes kept for scripts: ``from app.db.session import engine``
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engines":
+        get_engine()
+        return _engines.replicas
+    if name == "router":
+        return get_router()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine, 
-    class_=AsyncSession, 
+def pool_metrics() -> List[dict]:
+    """
+    Report connection pool usage of the primary and replica engines.
+    
+    Returns:
+        List[dict]: Family snapshots, labelled engine="primary" / "replicaN"
+    """
+    if _engines.primary is None:
+        return []
+    pools = [("primary", _engines.primary)] + [
+        (f"replica{index}", replica) for index, replica in enumerate(_engines.replicas)
+    ]
+    samples = {"size": [], "checkedin": [], "checkedout": [], "overflow": []}
+    for name, pool_engine in pools:
+        pool = pool_engine.sync_engine.pool
+        for stat, values in samples.items():
+            # Pools without a fixed size (e.g. NullPool) lack these methods
+            if hasattr(pool, stat):
+                values.append(({"engine": name}, getattr(pool, stat)()))
+    return [
+        gauge_snapshot("db_pool_size", "Configured pool size", samples["size"]),
+        gauge_snapshot(
+            "db_pool_checked_in", "Idle connections in the pool", samples["checkedin"]
+        ),
+        gauge_snapshot(
+            "db_pool_checked_out", "Connections in use", samples["checkedout"]
+        ),
+        gauge_snapshot(
+            "db_pool_overflow",
+            "Connections beyond the pool size (negative while below it)",
+            samples["overflow"],
+        ),
+        histogram_snapshot(
+            "db_pool_wait_seconds", "Time checkouts waited for a connection", [({}, pool_wait)]
+        ),
+    ]
+
+
+registry.register_collector(pool_metrics)
+
+
+class _LazySessionmaker(async_sessionmaker):
+    """Session factory that creates the engines before its first session."""
+    
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        if _engines.primary is None:
+            init_engines()
+        return super().__call__(**local_kw)
+
+
+# Create async session factory, bound to the primary by init_engines()
+AsyncSessionLocal = _LazySessionmaker(
+    class_=AsyncSession,
     expire_on_commit=False,
     autoflush=False,
     autocommit=False
 )
 
+
+@asynccontextmanager
+async def primary_session(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Get a session on the primary for reads that must not see replica lag.
+    
+    Used for loads whose result outlives the request, such as cache fills.
+    
+    Args:
+        db: The request's session
+        
+    Yields:
+        AsyncSession: db itself, or a new primary session if db is bound
+            to a read replica
+    """
+    if not any(db.bind is replica for replica in _engines.replicas):
+        yield db
+        return
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 # Base class for SQLAlchemy models
 Base = declarative_base()
 
@@ -41,4 +307,4 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
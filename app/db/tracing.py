@@ -0,0 +1,48 @@
+"""
+SQL statement spans.
+
+Cursor execution hooks record every statement issued while serving a
+traced request as a CLIENT span under the request's current span.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.tracing import CLIENT, child_span
+from app.db.query_stats import compact_statement
+
+_SPANS_KEY = "tracing_spans"
+
+
+def install_tracing_hooks(engine: AsyncEngine) -> None:
+    """
+    Trace every statement an engine executes as a CLIENT span.
+
+    Args:
+        engine: Engine to instrument
+    """
+    sync_engine = engine.sync_engine
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_SPANS_KEY, []).append(child_span(
+            "db.query",
+            CLIENT,
+            {"db.system": system, "db.statement": compact_statement(statement, 1000)},
+        ))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statement_span = conn.info[_SPANS_KEY].pop()
+        if statement_span is not None:
+            statement_span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_SPANS_KEY):
+            statement_span = conn.info[_SPANS_KEY].pop()
+            if statement_span is not None:
+                statement_span.record_exception(exception_context.original_exception)
+                statement_span.end()
@@ -0,0 +1,108 @@
+"""
+Connection pool warm-up.
+
+A freshly started worker has empty connection pools, so its first requests
+pay for connecting (TCP, TLS, authentication) and for preparing every
+statement on each new connection. warm_up() opens the connections up
+front and runs the hot statements on each of them, leaving them prepared
+in the connections' statement caches.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.crud import order, product, user
+
+logger = logging.getLogger(__name__)
+
+# Hot statements, issued through the same code as the request paths so the
+# SQL matches what gets prepared. ID 0 matches no row, so related rows are
+# never loaded and nothing is cached
+HOT_STATEMENTS: List[Callable[[AsyncSession], Awaitable]] = [
+    # User by ID, also run by every authenticated request
+    lambda db: user.get(db, id=0),
+    # Product by ID: version probe and loader
+    lambda db: product.get_version(db, id=0),
+    lambda db: db.execute(product.by_id_statement(0)),
+    # Product list: version probe and loader
+    lambda db: product.get_page_version(db, skip=0, limit=0),
+    lambda db: db.execute(product.page_statement(0, 0)),
+    # Orders by customer
+    lambda db: order.get_multi_by_customer(db, customer_id=0, limit=0),
+]
+
+
+async def warm_up(
+    engine: AsyncEngine,
+    connections: int,
+    statements: Sequence[Callable[[AsyncSession], Awaitable]] = HOT_STATEMENTS,
+) -> int:
+    """
+    Open connections on an engine and prepare the hot statements on each.
+
+    All connections are held at once so the pool really grows to that
+    size; they go back to the pool, open, when done. Connections beyond
+    the pool size would be closed on return, so no more are opened.
+
+    Args:
+        engine: Engine to warm up
+        connections: Number of connections to open
+        statements: Callables issuing the statements through a session
+
+    Returns:
+        int: Number of connections warmed
+    """
+    async def prepare(connection: AsyncConnection) -> None:
+        async with AsyncSession(bind=connection) as db:
+            for statement in statements:
+                await statement(db)
+
+    pool_size = getattr(engine.sync_engine.pool, "size", None)
+    if pool_size is not None:
+        connections = min(connections, pool_size())
+    opened = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)), return_exceptions=True
+    )
+    try:
+        for result in opened:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(prepare(connection) for connection in opened))
+    finally:
+        for result in opened:
+            if isinstance(result, AsyncConnection):
+                await result.close()
+    return len(opened)
+
+
+async def warm_up_engines(
+    engines: Sequence[AsyncEngine], connections: int, timeout: float
+) -> None:
+    """
+    Warm up several engines concurrently.
+
+    Failures and timeouts are logged rather than raised: a database that
+    is not reachable yet must not keep the application from starting.
+
+    Args:
+        engines: Engines to warm up
+        connections: Connections to open per engine
+        timeout: Seconds allowed per engine
+    """
+    async def run(engine: AsyncEngine) -> None:
+        start = time.perf_counter()
+        try:
+            warmed = await asyncio.wait_for(warm_up(engine, connections), timeout)
+        except Exception as exc:
+            logger.warning("Warm-up of %s failed: %r", engine.url, exc)
+        else:
+            logger.info(
+                "Warmed %d connections to %s in %.0f ms",
+                warmed, engine.url, (time.perf_counter() - start) * 1000,
+            )
+
+    await asyncio.gather(*(run(engine) for engine in engines))
@@ -1,45 +1,178 @@
 """
 Main application module.
 
-This module initializes the FastAPI application and registers all routes.
+This module builds the FastAPI application and registers all routes.
 """
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, RedirectResponse
 
-from app.api.api import api_router, auth_router
+from app.api.api import include_api_routes
+from app.api.endpoints.monitoring import metrics_router
 from app.core.config import settings
-
-# Create FastAPI app
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description=settings.PROJECT_DESCRIPTION,
-    version=settings.VERSION,
+from app.core.load_shedding import LoadShedder, PriorityRules
+from app.core.metrics import metrics_store, registry
+from app.core.profiling import loop_monitor
+from app.core.revocation import token_denylist
+from app.core.security import configure_password_hashing
+from app.db.denylist import DenylistSync
+from app.db.session import (
+    AsyncSessionLocal,
+    dispose_engines,
+    get_engines,
+    get_router,
+    init_engines,
+    recent_pool_wait,
 )
+from app.db.warmup import warm_up_engines
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.tracing import TracingMiddleware
 
-# Set up CORS
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
 
-# Register routes
-app.include_router(api_router, prefix=settings.API_V1_STR)
-app.include_router(auth_router, prefix=settings.API_V1_STR)
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Create and warm up the database engines on startup, release them on shutdown.
+    
+    Args:
+        app: The application being served
+    """
+    init_engines()
+    # Open and prime the pools before the first requests arrive
+    if settings.DB_WARMUP_ENABLED:
+        await warm_up_engines(
+            get_engines(),
+            settings.DB_WARMUP_CONNECTIONS or settings.DB_POOL_SIZE,
+            settings.DB_WARMUP_TIMEOUT_SECONDS,
+        )
+    # Probe replica lag in the background instead of during requests
+    await get_router().start()
+    # Benchmark the password hash cost, unless the server's master
+    # process already did before forking this worker
+    configure_password_hashing()
+    # Share this worker's metrics with the others through snapshot files
+    if settings.METRICS_ENABLED and metrics_store is not None:
+        await metrics_store.start(registry)
+    # Record stacks whenever the event loop is blocked
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # Deny access tokens revoked by any worker
+    denylist_sync = None
+    if settings.TOKEN_DENYLIST_SYNC_SECONDS > 0:
+        denylist_sync = DenylistSync(
+            token_denylist, AsyncSessionLocal, settings.TOKEN_DENYLIST_SYNC_SECONDS
+        )
+        await denylist_sync.start()
+    try:
+        yield
+    finally:
+        if denylist_sync is not None:
+            await denylist_sync.stop()
+        if settings.LOOP_MONITOR_ENABLED:
+            await loop_monitor.stop()
+        if settings.METRICS_ENABLED and metrics_store is not None:
+            await metrics_store.stop(registry)
+        await get_router().stop()
+        await dispose_engines()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+    
+    Importing this module only builds the app; database engines and other
+    connections are created by the lifespan handler when it is served.
+    
+    Returns:
+        FastAPI: The configured application
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description=settings.PROJECT_DESCRIPTION,
+        version=settings.VERSION,
+        default_response_class=ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse,
+        lifespan=lifespan,
+    )
+    
+    # Reject low-priority requests while the worker is overloaded; added
+    # first so the rejections still get CORS headers and are counted (the
+    # loop lag signal needs LOOP_MONITOR_ENABLED)
+    if settings.LOAD_SHEDDING_ENABLED:
+        app.add_middleware(
+            LoadSheddingMiddleware,
+            shedder=LoadShedder({
+                "loop_lag": (
+                    lambda: loop_monitor.recent_lag.value,
+                    settings.LOAD_SHEDDING_LOOP_LAG_MS / 1000,
+                ),
+                "pool_wait": (
+                    lambda: recent_pool_wait.value,
+                    settings.LOAD_SHEDDING_POOL_WAIT_MS / 1000,
+                ),
+            }),
+            rules=PriorityRules(settings.LOAD_SHEDDING_LOW_PRIORITY, settings.LOAD_SHEDDING_CRITICAL),
+        )
+    
+    # Set up CORS
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    
+    # Compress text and JSON responses
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            encodings=settings.COMPRESSION_ENCODINGS,
+            levels=settings.COMPRESSION_LEVELS,
+        )
+    
+    # Count SQL statements per request
+    if settings.QUERY_STATS_ENABLED:
+        app.add_middleware(
+            QueryStatsMiddleware,
+            budget=settings.QUERY_BUDGET,
+            debug_headers=settings.DEBUG,
+        )
+    
+    # Count requests and time them per route
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    
+    # Trace sampled requests down to their SQL statements
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+    
+    # Register routes
+    include_api_routes(app)
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
+    
+    @app.get("/", include_in_schema=False)
+    def root():
+        """Root endpoint redirect to docs."""
+        return RedirectResponse(url="/docs")
+    
+    return app
 
 
-@app.get("/", include_in_schema=False)
-def root():
-    """Root endpoint redirect to docs."""
-    return RedirectResponse(url="/docs")
+app = create_app()
 
 
 if __name__ == "__main__":
     import uvicorn
     
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Development server; use `python -m app.server` in production
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=settings.DEBUG)
@@ -0,0 +1,3 @@
+"""
+ASGI middleware used by the application.
+"""
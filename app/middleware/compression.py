@@ -0,0 +1,133 @@
+"""
+Response compression middleware.
+
+Negotiates gzip / brotli / zstd from Accept-Encoding and compresses text
+and JSON responses of at least a minimum size. Streamed responses are
+compressed chunk by chunk. Responses that already carry a
+Content-Encoding (such as precompressed cached bodies) pass through
+untouched.
+"""
+
+from typing import Dict, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import enabled_codecs, is_compressible, negotiate
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best accepted codec."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = ("br", "zstd", "gzip"),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped application
+            minimum_size: Complete responses smaller than this are not compressed
+            encodings: Encodings to offer, most preferred first
+            levels: Per-encoding compression level overrides
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = {codec.name: codec for codec in enabled_codecs(encodings)}
+        self.levels = {
+            name: (levels or {}).get(name, codec.level) for name, codec in self.codecs.items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), list(self.codecs))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            send, self.codecs[encoding], self.levels[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Compresses one response on its way out."""
+
+    def __init__(self, send: Send, codec, level: int, minimum_size: int):
+        self._send = send
+        self.codec = codec
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self._first_body(start, message)
+        elif self.passthrough:
+            await self._send(message)
+        else:
+            await self._stream_body(message)
+
+    async def _first_body(self, start: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if (
+            "content-encoding" in headers
+            or start["status"] in (204, 304)
+            or not is_compressible(headers.get("content-type"))
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            compressed = self.codec.compress(body, self.level)
+            if len(compressed) >= len(body):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            headers["Content-Encoding"] = self.codec.name
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        # Total size is unknown, so stream compressed chunks
+        headers["Content-Encoding"] = self.codec.name
+        if "content-length" in headers:
+            del headers["content-length"]
+        self.stream = self.codec.stream(self.level)
+        await self._send(start)
+        await self._stream_body(message)
+
+    async def _stream_body(self, message: Message) -> None:
+        chunk = self.stream.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            chunk += self.stream.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,54 @@
+"""
+Load shedding middleware.
+
+Rejects requests with 503 Service Unavailable while the worker is
+overloaded, by priority, before any handler or database work is done.
+"""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.load_shedding import LoadShedder, PriorityRules
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware rejecting requests the overloaded worker should not take."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        shedder: LoadShedder,
+        rules: PriorityRules,
+        retry_after: int = 1,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped application
+            shedder: Decides whether a request of a priority is rejected
+            rules: Priorities of requests
+            retry_after: Seconds clients are told to wait before retrying
+        """
+        self.app = app
+        self.shedder = shedder
+        self.rules = rules
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.rules.priority(scope["method"], scope["path"])
+        if self.shedder.reject(priority) is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Server overloaded, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+        await response(scope, receive, send)
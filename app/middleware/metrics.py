@@ -0,0 +1,68 @@
+"""
+Request metrics middleware.
+
+Records in-flight requests, request counts by status code and latency
+histograms per route template. In multiprocess mode the snapshots are
+written by the store's background task, not by requests.
+"""
+
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Registry, registry as default_registry
+from app.middleware.routes import route_path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latencies."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        registry: Optional[Registry] = None,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped application
+            registry: Registry receiving the metrics
+        """
+        self.app = app
+        self.registry = registry if registry is not None else default_registry
+        self.in_flight = self.registry.gauge(
+            "http_requests_in_flight", "Requests currently being served"
+        ).labels()
+        self.requests = self.registry.counter(
+            "http_requests_total", "Completed requests", ("method", "route", "status")
+        )
+        self.duration = self.registry.histogram(
+            "http_request_duration_seconds", "Request latency", ("method", "route")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        self.in_flight.inc()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            method = scope.get("method", "")
+            route = route_path(scope)
+            self.duration.labels(method, route).observe(time.perf_counter() - started)
+            self.requests.labels(method, route, str(status)).inc()
@@ -0,0 +1,88 @@
+"""
+Per-request SQL accounting middleware.
+
+Collects the statements issued while serving each request, adds them as
+X-DB-* response headers in debug mode, aggregates them into per-route
+histograms and warns about requests that exceed the query budget.
+"""
+
+import logging
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.query_stats import (
+    QueryMetrics,
+    QueryStats,
+    compact_statement,
+    current_query_stats,
+    query_metrics,
+)
+from app.middleware.routes import route_name
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware recording SQL statements per request."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        budget: int = 20,
+        debug_headers: bool = False,
+        metrics: Optional[QueryMetrics] = None,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped application
+            budget: Requests issuing more statements than this log a warning
+            debug_headers: Whether to add X-DB-* response headers
+            metrics: Per-route metrics registry
+        """
+        self.app = app
+        self.budget = budget
+        self.debug_headers = debug_headers
+        self.metrics = metrics if metrics is not None else query_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.total_seconds * 1000:.2f}"
+                headers["X-DB-Slowest-Ms"] = f"{stats.slowest_seconds * 1000:.2f}"
+                if stats.slowest_statement:
+                    headers["X-DB-Slowest-Statement"] = compact_statement(
+                        stats.slowest_statement, 200
+                    ).encode("latin-1", "replace").decode("latin-1")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+            route = route_name(scope)
+            over_budget = stats.count > self.budget
+            self.metrics.observe(route, stats, over_budget)
+            if over_budget:
+                logger.warning(
+                    "%s issued %d SQL statements (budget %d, %.1f ms in DB); slowest %.1f ms: %s",
+                    route,
+                    stats.count,
+                    self.budget,
+                    stats.total_seconds * 1000,
+                    stats.slowest_seconds * 1000,
+                    compact_statement(stats.slowest_statement or ""),
+                )
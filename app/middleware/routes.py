@@ -0,0 +1,34 @@
+"""
+Route labels for per-route metrics.
+"""
+
+from starlette.types import Scope
+
+
+def route_path(scope: Scope) -> str:
+    """
+    Get the matched route template of a request.
+
+    Templates keep metric label cardinality bounded, unlike raw paths.
+
+    Args:
+        scope: ASGI scope after routing
+
+    Returns:
+        str: e.g. "/api/v1/orders/{id}", or "unmatched"
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def route_name(scope: Scope) -> str:
+    """
+    Get the method and matched route template of a request.
+
+    Args:
+        scope: ASGI scope after routing
+
+    Returns:
+        str: e.g. "GET /api/v1/orders/{id}", or the method and "unmatched"
+    """
+    return f"{scope.get('method', '')} {route_path(scope)}"
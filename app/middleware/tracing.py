@@ -0,0 +1,74 @@
+"""
+Request tracing middleware.
+
+Starts a SERVER span per sampled request, continuing the caller's trace
+when a traceparent header is present, and makes it the current span for
+everything the request runs. Sampled responses carry a traceresponse
+header naming the trace.
+"""
+
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import (
+    SERVER,
+    Tracer,
+    current_span,
+    format_traceparent,
+    parse_traceparent,
+    tracer as default_tracer,
+)
+from app.middleware.routes import route_path
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a trace span per request."""
+
+    def __init__(self, app: ASGIApp, *, tracer: Optional[Tracer] = None):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped application
+            tracer: Tracer deciding sampling and exporting spans
+        """
+        self.app = app
+        self.tracer = tracer if tracer is not None else default_tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        span = self.tracer.start_trace(
+            f"{method} {scope.get('path', '')}",
+            parent,
+            SERVER,
+            {"http.method": method, "http.target": scope.get("path", "")},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                MutableHeaders(scope=message)["traceresponse"] = format_traceparent(span.context)
+            await send(message)
+
+        token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except Exception as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            current_span.reset(token)
+            route = route_path(scope)
+            span.name = f"{method} {route}"
+            span.set_attribute("http.route", route)
+            span.end()
@@ -4,10 +4,23 @@ Database models for the application.
 This module contains SQLAlchemy models that represent the database schema.
 """
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from app.db.partitions import ORDER_ITEMS_ORDER_FK
 from app.db.session import Base
 
 # Association table for many-to-many relationships
@@ -23,6 +36,15 @@ class User(Base):
     """User model for authentication and identification."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination and filtering for the admin user directory
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_is_active_created_at_id", "is_active", "created_at", "id"),
+        Index("ix_users_is_superuser_created_at_id", "is_superuser", "created_at", "id"),
+        # Its prefix search uses text_pattern_ops indexes on lower(username)
+        # and lower(email) created by migration a7c3e91d5b28; declaring
+        # them here would load the PostgreSQL dialect on import
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -30,6 +52,7 @@ class User(Base):
     hashed_password = Column(String(100), nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped to revoke all tokens
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -39,6 +62,33 @@ class User(Base):
     addresses = relationship("Address", back_populates="user")
 
 
+class RefreshToken(Base):
+    """Rotating refresh token; only a keyed digest of the token is stored."""
+    
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)  # Shared by a login's rotations
+    access_jti = Column(String(32), nullable=False)  # Access token issued alongside
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)  # Set when rotated
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RevokedToken(Base):
+    """Access token revoked before its expiry, loaded into every worker's denylist."""
+    
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Entry is dropped after
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Address(Base):
     """User address model for shipping and billing."""
     
@@ -94,13 +144,25 @@ class Product(Base):
 
 
 class Order(Base):
-    """Order model for tracking customer purchases."""
+    """
+    Order model for tracking customer purchases.
     
-    __tablename__ = "orders"
+    On PostgreSQL orders are partitioned by month of order_date, which is
+    why the date is part of the primary key.
+    """
     
-    id = Column(Integer, primary_key=True, index=True)
+    __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination and filtering for the admin order listing
+        Index("ix_orders_order_date_id", "order_date", "id"),
+        Index("ix_orders_status_order_date_id", "status", "order_date", "id"),
+        Index("ix_orders_customer_id_order_date_id", "customer_id", "order_date", "id"),
+        Index("ix_orders_total_amount_id", "total_amount", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    order_date = Column(DateTime(timezone=True), server_default=func.now())
+    order_date = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     total_amount = Column(Float(precision=2), nullable=False)
     status = Column(String(20), default="pending")  # pending, processing, shipped, delivered, cancelled
     shipping_address_id = Column(Integer, ForeignKey("addresses.id"), nullable=True)
@@ -119,9 +181,20 @@ class OrderItem(Base):
     """Items within an order with quantity and price tracking."""
     
     __tablename__ = "order_items"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    __table_args__ = (
+        # Items live in the partition of their order's month
+        ForeignKeyConstraint(
+            ["order_id", "order_date"],
+            ["orders.id", "orders.order_date"],
+            name=ORDER_ITEMS_ORDER_FK,
+        ),
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id_order_id", "product_id", "order_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    order_id = Column(Integer, nullable=False)
+    order_date = Column(DateTime(timezone=True), primary_key=True)  # Partition key, copied from the order
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float(precision=2), nullable=False)  # Price at time of purchase
@@ -11,7 +11,7 @@ This module contains Pydantic models that are used for:
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
@@ -21,12 +21,23 @@ class Token(BaseModel):
     """Schema for authentication token response."""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class TokenRefresh(BaseModel):
+    """Schema for exchanging a refresh token."""
+    refresh_token: str
 
 
 class TokenPayload(BaseModel):
     """Schema for token payload."""
     sub: Optional[str] = None
     exp: Optional[int] = None
+    jti: Optional[str] = None
+    active: Optional[bool] = None
+    superuser: Optional[bool] = None
+    token_version: Optional[int] = None
 
 
 # User schemas
@@ -37,9 +48,8 @@ class UserBase(BaseModel):
 
 
 class UserCreate(UserBase):
-    """Schema for user creation."""
+    """Schema for user creation (registration never grants superuser rights)."""
     password: str = Field(..., min_length=8)
-    is_superuser: Optional[bool] = False
 
 
 class UserUpdate(BaseModel):
@@ -65,6 +75,17 @@ class User(UserInDBBase):
     pass
 
 
+class UserAdmin(User):
+    """Schema for a user in the admin directory."""
+    is_superuser: bool
+
+
+class UserPage(BaseModel):
+    """Schema for a keyset-paginated page of users."""
+    items: List[UserAdmin]
+    next_cursor: Optional[str] = None
+
+
 # Address schemas
 class AddressBase(BaseModel):
     """Base schema for address data."""
@@ -167,6 +188,44 @@ class Product(ProductBase):
         from_attributes = True
 
 
+class ProductCacheStats(BaseModel):
+    """Schema for product cache counters."""
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+
+# Monitoring schemas
+class HistogramSnapshot(BaseModel):
+    """Schema for a histogram with cumulative buckets keyed by upper bound."""
+    buckets: Dict[str, int]
+    sum: float
+    count: int
+
+
+class RouteQueryStats(BaseModel):
+    """Schema for per-route SQL statement metrics."""
+    requests: int
+    over_budget: int
+    queries: HistogramSnapshot
+    db_time_ms: HistogramSnapshot
+
+
+class LoopStall(BaseModel):
+    """Schema for a period during which the event loop was blocked."""
+    detected_at: datetime
+    blocked_ms: float
+    stack: List[str]
+
+
+class LoopStallReport(BaseModel):
+    """Schema for recent event loop stalls with their stacks."""
+    threshold_ms: float
+    stalls: int
+    recent: List[LoopStall]
+
+
 # OrderItem schemas
 class OrderItemBase(BaseModel):
     """Base schema for order item data."""
@@ -229,4 +288,41 @@ class Order(OrderBase):
     tracking_number: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderCounts(BaseModel):
+    """Schema for aggregate counts over a filtered order set."""
+    total: int
+    by_status: Dict[str, int]
+
+
+class OrderPage(BaseModel):
+    """Schema for a keyset-paginated page of orders."""
+    items: List[Order]
+    next_cursor: Optional[str] = None
+    counts: Optional[OrderCounts] = None
+
+
+class OrderStatusChange(BaseModel):
+    """Schema for a single order status change."""
+    order_id: int
+    status: str = Field(..., pattern='^(pending|processing|shipped|delivered|cancelled)$')
+
+
+class OrderStatusBatchUpdate(BaseModel):
+    """Schema for batch order status changes."""
+    changes: List[OrderStatusChange] = Field(..., min_length=1)
+
+
+class OrderBulkCancel(BaseModel):
+    """Schema for bulk order cancellation."""
+    order_ids: List[int] = Field(..., min_length=1)
+
+
+class OrderBulkResult(BaseModel):
+    """Schema for bulk order operation response."""
+    updated: List[int] = Field(..., description="Orders changed and committed")
+    rejected: List[int] = Field(
+        ..., description="Orders left unchanged: missing, or not allowed in their current status"
+    )
@@ -0,0 +1,88 @@
+"""
+Schema-aware serializers for hot response paths.
+
+A serializer is built once per response schema and turns an ORM row
+straight into the dictionary the schema would produce in JSON mode,
+without validating data we just loaded from our own database. Output
+matches ``Schema.model_validate(row).model_dump(mode="json")`` for the
+field types our response schemas use.
+"""
+
+import typing
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.schemas import schemas
+
+Serializer = Callable[[Any], Dict[str, Any]]
+
+
+def _datetime_json(value: datetime) -> str:
+    # pydantic writes UTC as "Z"
+    text = value.isoformat()
+    if value.utcoffset() == timedelta(0):
+        text = text[:-6] + "Z"
+    return text
+
+
+def _date_json(value: date) -> str:
+    return value.isoformat()
+
+
+def _converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Get the JSON conversion for a field type, or None if it is JSON-ready."""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _converter(args[0]) if len(args) == 1 else None
+    if origin in (list, List):
+        (item,) = typing.get_args(annotation) or (Any,)
+        convert = _converter(item)
+        if convert is None:
+            return list
+        return lambda values: [convert(value) for value in values]
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return build_serializer(annotation)
+        if issubclass(annotation, datetime):
+            return _datetime_json
+        if issubclass(annotation, date):
+            return _date_json
+        if annotation is float:
+            return float
+    return None
+
+
+def build_serializer(schema: Type[BaseModel]) -> Serializer:
+    """
+    Build a row-to-dict serializer for a response schema.
+
+    Args:
+        schema: Pydantic response schema (with from_attributes)
+
+    Returns:
+        Serializer: Function reading the schema's fields from an object
+    """
+    fields: List[Tuple[str, Optional[Callable[[Any], Any]]]] = [
+        (name, _converter(field.annotation))
+        for name, field in schema.model_fields.items()
+    ]
+
+    def serialize(obj: Any) -> Dict[str, Any]:
+        data = {}
+        for name, convert in fields:
+            value = getattr(obj, name)
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    serialize.__name__ = f"serialize_{schema.__name__.lower()}"
+    return serialize
+
+
+serialize_product = build_serializer(schemas.Product)
+serialize_order = build_serializer(schemas.Order)
+serialize_user_admin = build_serializer(schemas.UserAdmin)
@@ -0,0 +1,176 @@
+"""
+Production server.
+
+Runs the application under gunicorn with one uvicorn worker per CPU:
+
+    python -m app.server
+    python -m app.server --workers 4 --bind 0.0.0.0:8000
+
+The application is imported once in the master process before the workers
+are forked, so they share its modules copy-on-write; database engines and
+other connections are only created by each worker's lifespan handler.
+The password hash cost is calibrated in the master too, so every worker
+uses the same one.
+Workers run on uvloop with the httptools parser when they are installed.
+
+On SIGTERM, workers stop accepting connections, give in-flight requests up
+to SERVER_GRACEFUL_TIMEOUT_SECONDS to finish and then run the lifespan
+shutdown, which closes the database pools. Each worker is replaced after
+SERVER_MAX_REQUESTS requests (plus jitter, so they do not all restart at
+once), which bounds memory growth from fragmentation or leaks.
+
+Caches and rate-limit buckets in "memory://" are private to each worker, so
+with several workers writes only invalidate one worker's cache and every
+client gets one allowance per worker; the server refuses to start that way
+unless --allow-per-worker-state is given. Forwarded client addresses are
+only taken from the proxies listed in FORWARDED_ALLOW_IPS.
+"""
+
+import argparse
+import gc
+import importlib.util
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+# Seconds between the end of request draining and gunicorn's hard kill,
+# left for the lifespan shutdown to close the database pools
+SHUTDOWN_MARGIN_SECONDS = 5
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker using uvloop and httptools, draining requests on exit."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": max(
+            settings.SERVER_GRACEFUL_TIMEOUT_SECONDS - SHUTDOWN_MARGIN_SECONDS, 1
+        ),
+    }
+
+
+def default_workers() -> int:
+    """
+    Get the number of CPUs this process may run on.
+
+    Returns:
+        int: Usable CPU count
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def per_worker_state() -> List[str]:
+    """
+    Get the settings that keep state in each worker's memory.
+
+    Returns:
+        List[str]: Names of the settings using a "memory://" backend
+    """
+    names = []
+    if settings.CACHE_URL.startswith("memory://"):
+        names.append("CACHE_URL")
+    if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_STORAGE_URL.startswith("memory://"):
+        names.append("RATE_LIMIT_STORAGE_URL")
+    return names
+
+
+def server_options(
+    workers: Optional[int] = None,
+    bind: Optional[str] = None,
+    max_requests: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Build the gunicorn configuration.
+
+    Args:
+        workers: Worker processes (defaults to WEB_CONCURRENCY, else one per CPU)
+        bind: Address to listen on (defaults to SERVER_BIND)
+        max_requests: Requests before a worker is replaced (defaults to
+            SERVER_MAX_REQUESTS)
+
+    Returns:
+        Dict[str, Any]: gunicorn settings
+    """
+    if max_requests is None:
+        max_requests = settings.SERVER_MAX_REQUESTS
+    options = {
+        "bind": bind or settings.SERVER_BIND,
+        "workers": workers or settings.WEB_CONCURRENCY or default_workers(),
+        "worker_class": "app.server.Worker",
+        "preload_app": True,
+        "max_requests": max_requests,
+        "max_requests_jitter": min(settings.SERVER_MAX_REQUESTS_JITTER, max_requests // 10),
+        "graceful_timeout": math.ceil(settings.SERVER_GRACEFUL_TIMEOUT_SECONDS),
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+    }
+    # Worker heartbeats are files; keep them off overlay filesystems
+    if os.path.isdir("/dev/shm"):
+        options["worker_tmp_dir"] = "/dev/shm"
+    return options
+
+
+class Server(BaseApplication):
+    """gunicorn application serving app.main:app."""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from app.core.security import configure_password_hashing
+        from app.main import app
+
+        # Calibrated once here, so every worker hashes at the same cost
+        configure_password_hashing()
+
+        # Objects created by the imports live as long as the process; moving
+        # them out of the collector's reach keeps its passes from writing to
+        # (and so copying) the pages workers share with the master
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Parse the command line and run the server."""
+    parser = argparse.ArgumentParser(description="Run the API with several workers")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--bind", help=f"Address to listen on (default: {settings.SERVER_BIND})")
+    parser.add_argument("--max-requests", type=int, help="Requests before a worker is replaced (0 = never)")
+    parser.add_argument(
+        "--allow-per-worker-state",
+        action="store_true",
+        help="Run several workers even with memory:// caches or rate limits",
+    )
+    args = parser.parse_args(argv)
+
+    options = server_options(args.workers, args.bind, args.max_requests)
+    per_worker = per_worker_state()
+    if options["workers"] > 1 and per_worker and not args.allow_per_worker_state:
+        parser.error(
+            f"{', '.join(per_worker)} must point to a shared redis:// backend with "
+            f"{options['workers']} workers (or pass --workers 1 or --allow-per-worker-state)"
+        )
+    Server(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks.
+
+Benchmarks run against the database configured in the environment and
+print their results as JSON.
+"""
@@ -0,0 +1,87 @@
+"""
+Compare two load reports from benchmarks/load.py.
+
+Prints throughput, p95 latency and queries per request side by side for
+every scenario in both reports. With --fail-over, exits non-zero when a
+scenario's throughput drops or its p95/p99 latency grows by more than
+that percentage, so the comparison can gate a commit. Usage:
+
+    python benchmarks/compare.py reports/base.json reports/head.json --fail-over 10
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+# Metrics compared, and whether higher values are better
+METRICS = (
+    ("throughput_rps", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("queries_per_request", False),
+)
+GATED = ("throughput_rps", "p95_ms", "p99_ms")
+
+
+def change(base: Optional[float], head: Optional[float]) -> Optional[float]:
+    """
+    Get the relative change between two values in percent.
+
+    Args:
+        base: Baseline value
+        head: New value
+
+    Returns:
+        Optional[float]: Change in percent, or None if not comparable
+    """
+    if base is None or head is None or base == 0:
+        return None
+    return (head - base) / base * 100
+
+
+def compare(base: dict, head: dict, fail_over: Optional[float] = None) -> List[str]:
+    """
+    Compare scenarios present in both reports.
+
+    Args:
+        base: Baseline report
+        head: New report
+        fail_over: Regression threshold in percent for gated metrics
+
+    Returns:
+        List[str]: Regressions over the threshold, as messages
+    """
+    regressions = []
+    print(f"base {base.get('commit')}  head {head.get('commit')}")
+    for name, head_summary in head["scenarios"].items():
+        base_summary = base["scenarios"].get(name)
+        if base_summary is None:
+            continue
+        print(f"\n{name}")
+        for metric, higher_is_better in METRICS:
+            before, after = base_summary.get(metric), head_summary.get(metric)
+            delta = change(before, after)
+            shown = f"{delta:+.1f}%" if delta is not None else "n/a"
+            print(f"  {metric:<20} {before!s:>10} -> {after!s:>10}  {shown}")
+            if fail_over is None or delta is None or metric not in GATED:
+                continue
+            regression = -delta if higher_is_better else delta
+            if regression > fail_over:
+                regressions.append(f"{name} {metric} {shown}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two load reports")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--fail-over", type=float, help="Fail on regressions above this percent")
+    args = parser.parse_args()
+
+    with open(args.base) as base_file, open(args.head) as head_file:
+        regressions = compare(json.load(base_file), json.load(head_file), args.fail_over)
+    if regressions:
+        print("\nRegressions: " + ", ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,85 @@
+"""
+Benchmark bandwidth saved against CPU cost per compression level.
+
+Compresses a rendered product listing page with every available codec
+(gzip, plus brotli / zstd when installed) at each representative level
+and reports the compressed size, the share of bytes saved and the time
+to compress and decompress. Levels marked "default" are used for
+on-the-fly compression, "precompress" for cached catalog bodies, which
+are compressed once per version.
+
+Runs without a database. Usage:
+
+    python benchmarks/compression.py --page-size 100 --iterations 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+
+from app.core.compression import available_codecs
+from app.schemas.serializers import serialize_product
+from benchmarks.serialization import _rows
+
+
+def _median_us(func, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+def run(page_size: int, iterations: int) -> dict:
+    """
+    Measure every codec and level on one product page.
+
+    Args:
+        page_size: Products on the page
+        iterations: Repetitions per measurement
+
+    Returns:
+        dict: Payload size and one result per codec level
+    """
+    body = orjson.dumps([serialize_product(row) for row in _rows(page_size)])
+    results = []
+
+    for codec in available_codecs().values():
+        for level in codec.levels:
+            compressed = codec.compress(body, level)
+            compress_us = _median_us(lambda: codec.compress(body, level), iterations)
+            decompress_us = _median_us(lambda: codec.decompress(compressed), iterations)
+            role = []
+            if level == codec.level:
+                role.append("default")
+            if level == codec.precompress_level:
+                role.append("precompress")
+            results.append({
+                "encoding": codec.name,
+                "level": level,
+                "role": ",".join(role),
+                "bytes": len(compressed),
+                "saved_pct": round(100 * (1 - len(compressed) / len(body)), 1),
+                "compress_us": round(compress_us, 1),
+                "decompress_us": round(decompress_us, 1),
+                "compress_mb_s": round(len(body) / compress_us, 1),
+            })
+
+    return {"page_size": page_size, "raw_bytes": len(body), "levels": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compression ratio vs CPU per level")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.page_size, args.iterations), indent=2))
@@ -0,0 +1,156 @@
+"""
+Profile the generic CRUD write path (CRUDBase.create / CRUDBase.update).
+
+Runs create+update cycles on categories through the current CRUDBase and
+through a copy of the previous implementation, which mapped fields with
+jsonable_encoder on both the input schema and the ORM instance. For each
+it reports wall time, SQL statements and Python function calls per cycle,
+plus the functions with the most self time in cProfile. The field mapping
+step is also timed on its own, without the database.
+
+Runs against the database configured in the environment. Usage:
+
+    python benchmarks/crud_writes.py --cycles 500
+"""
+
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import uuid
+from typing import Any, Dict, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event
+
+from app.crud.base import CRUDBase
+from app.db.session import AsyncSessionLocal, engine
+from app.models.models import Category
+from app.schemas.schemas import CategoryCreate, CategoryUpdate
+
+
+class LegacyCRUD(CRUDBase):
+    """The create/update field mapping CRUDBase used before the column map."""
+
+    async def create(self, db, *, obj_in):
+        db_obj = self.model(**jsonable_encoder(obj_in))
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(self, db, *, db_obj, obj_in: Union[Any, Dict[str, Any]]):
+        obj_data = jsonable_encoder(db_obj)
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+
+async def _cycles(crud: CRUDBase, prefix: str, cycles: int) -> None:
+    async with AsyncSessionLocal() as db:
+        for i in range(cycles):
+            db_obj = await crud.create(
+                db, obj_in=CategoryCreate(name=f"{prefix}-{i}", description="bench")
+            )
+            await crud.update(
+                db, db_obj=db_obj, obj_in=CategoryUpdate(description="bench updated")
+            )
+
+
+def _top_functions(profile: cProfile.Profile, count: int) -> list:
+    stats = pstats.Stats(profile)
+    rows = [
+        (own, f"{os.path.basename(filename)}:{line}({name})", calls)
+        for (filename, line, name), (_, calls, own, _, _) in stats.stats.items()
+    ]
+    rows.sort(reverse=True)
+    return [
+        {"function": label, "calls": calls, "self_ms": round(own * 1000, 2)}
+        for own, label, calls in rows[:count]
+    ]
+
+
+def _mapping_only(crud: CRUDBase, legacy: bool, iterations: int) -> float:
+    obj_in = CategoryCreate(name="mapping", description="bench")
+    obj_update = CategoryUpdate(description="bench updated")
+    db_obj = Category(id=1, name="mapping", description="bench")
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if legacy:
+            Category(**jsonable_encoder(obj_in))
+            update_data = obj_update.dict(exclude_unset=True)
+            for field in jsonable_encoder(db_obj):
+                if field in update_data:
+                    setattr(db_obj, field, update_data[field])
+        else:
+            Category(**obj_in.model_dump(include=set(crud.column_keys)))
+            for field, value in obj_update.model_dump(exclude_unset=True).items():
+                if field in crud.column_keys:
+                    setattr(db_obj, field, value)
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+async def run(cycles: int, top: int) -> dict:
+    """
+    Profile create+update cycles for the legacy and current mapping.
+
+    Args:
+        cycles: create+update cycles per implementation
+        top: Number of functions to report, by self time
+
+    Returns:
+        dict: Results per implementation
+    """
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    prefix = f"bench-crud-{uuid.uuid4().hex[:8]}"
+    results = {"cycles": cycles}
+
+    try:
+        for name, crud in (("legacy", LegacyCRUD(Category)), ("column_map", CRUDBase(Category))):
+            statements.clear()
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            await _cycles(crud, f"{prefix}-{name}", cycles)
+            profile.disable()
+            elapsed = time.perf_counter() - started
+
+            results[name] = {
+                "cycle_ms": round(elapsed * 1000 / cycles, 3),
+                "statements_per_cycle": round(len(statements) / cycles, 2),
+                "calls_per_cycle": round(pstats.Stats(profile).total_calls / cycles, 1),
+                "mapping_only_us": round(_mapping_only(crud, name == "legacy", 5000), 2),
+                "top_functions": _top_functions(profile, top),
+            }
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+        async with engine.begin() as conn:
+            await conn.execute(delete(Category).where(Category.name.like(f"{prefix}-%")))
+        await engine.dispose()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile CRUDBase create/update")
+    parser.add_argument("--cycles", type=int, default=500)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.cycles, args.top)), indent=2))
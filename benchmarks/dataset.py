@@ -0,0 +1,291 @@
+"""
+Seed a reproducible benchmark dataset at a configurable scale.
+
+Rows are generated server-side with INSERT ... SELECT over
+generate_series, in chunks, so even the large scale (1M products, 10M
+order items) loads without shipping rows through Python. Every chunk
+reseeds PostgreSQL's random() from --seed (with parallel query off), so
+the same seed, scale and anchor month give the same data on a fresh
+database.
+
+Benchmark rows are recognisable by their prefix: users "bench_user_<n>"
+(all sharing BENCH_PASSWORD), the superuser "bench_admin", categories
+"bench category <n>" and products with SKU "BENCH-<n>". Order history
+spans --months months before the anchor month; missing partitions are
+created first. Users, categories and products are skipped when they
+already exist, but every run appends another batch of orders.
+
+Requires PostgreSQL migrated to head; use a dedicated database. Usage:
+
+    python benchmarks/dataset.py --scale small --seed 42
+    python benchmarks/dataset.py --scale large --seed 42 --anchor 2024-01-01
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.core.security import get_password_hash
+from app.db.partitions import add_months, create_partitions_sql, month_start
+from app.db.session import engine
+
+BENCH_PASSWORD = "bench-password"
+BENCH_ADMIN = "bench_admin"
+CHUNK_SIZE = 100_000
+CATEGORY_COUNT = 50
+
+# Words product names are built from; the search scenario queries them
+PRODUCT_WORDS = (
+    "wireless", "leather", "organic", "vintage", "compact", "premium", "bamboo",
+    "ceramic", "portable", "steel", "cotton", "smart", "classic", "outdoor",
+    "ergonomic", "waterproof", "handmade", "digital", "modular", "travel",
+)
+PRODUCT_NOUNS = (
+    "headphones", "backpack", "lamp", "kettle", "chair", "jacket", "speaker",
+    "notebook", "bottle", "watch", "blender", "tent", "keyboard", "mug", "camera",
+)
+
+SCALES = {
+    "tiny": {"users": 100, "products": 1_000, "orders": 2_500},
+    "small": {"users": 1_000, "products": 10_000, "orders": 25_000},
+    "medium": {"users": 10_000, "products": 100_000, "orders": 250_000},
+    "large": {"users": 100_000, "products": 1_000_000, "orders": 2_500_000},
+}
+ITEMS_PER_ORDER = 4
+
+SEED_USERS_SQL = """
+INSERT INTO users (username, email, hashed_password, is_active, is_superuser)
+SELECT 'bench_user_' || g, 'bench_user_' || g || '@example.com', :hashed_password, true, false
+FROM generate_series(:first, :last) AS g
+ON CONFLICT DO NOTHING
+"""
+
+SEED_CATEGORIES_SQL = """
+INSERT INTO categories (name, description)
+SELECT 'bench category ' || g, 'Benchmark category ' || g
+FROM generate_series(1, :count) AS g
+ON CONFLICT DO NOTHING
+"""
+
+SEED_PRODUCTS_SQL = """
+INSERT INTO products (name, description, price, inventory, sku, owner_id)
+SELECT initcap(
+           (CAST(:words AS text[]))[1 + floor(random() * cardinality(CAST(:words AS text[])))::int]
+           || ' '
+           || (CAST(:nouns AS text[]))[1 + floor(random() * cardinality(CAST(:nouns AS text[])))::int]
+       ) || ' ' || g,
+       'Benchmark product ' || g || ', ' || md5(g::text),
+       round((1 + random() * 499)::numeric, 2),
+       1000000,
+       'BENCH-' || g,
+       :owner_id
+FROM generate_series(:first, :last) AS g
+ON CONFLICT DO NOTHING
+"""
+
+SEED_PRODUCT_CATEGORIES_SQL = """
+INSERT INTO product_categories (product_id, category_id)
+SELECT products.id, categories.id
+FROM products
+JOIN categories
+  ON categories.name = 'bench category ' || (1 + products.id % :category_count)
+WHERE products.sku LIKE 'BENCH-%'
+ON CONFLICT DO NOTHING
+"""
+
+# Order IDs are drawn up front so items can reference their order and
+# totals can be computed before the order rows are inserted
+SEED_ORDERS_SQL = """
+WITH order_rows AS MATERIALIZED (
+    SELECT nextval('orders_id_seq') AS id,
+           :first_user + floor(random() * :user_count)::int AS customer_id,
+           CAST(:history_start AS timestamptz)
+               + random() * (CAST(:history_end AS timestamptz) - CAST(:history_start AS timestamptz))
+               AS order_date,
+           (ARRAY['pending', 'processing', 'shipped', 'delivered', 'delivered', 'cancelled'])
+               [1 + floor(random() * 6)::int] AS status
+    FROM generate_series(1, :count)
+),
+item_rows AS MATERIALIZED (
+    SELECT order_rows.id AS order_id,
+           order_rows.order_date,
+           :first_product + floor(random() * :product_count)::int AS product_id,
+           1 + floor(random() * 3)::int AS quantity,
+           round((1 + random() * 499)::numeric, 2) AS unit_price
+    FROM order_rows CROSS JOIN generate_series(1, :items_per_order)
+),
+new_orders AS (
+    INSERT INTO orders (id, customer_id, order_date, total_amount, status)
+    SELECT order_rows.id, order_rows.customer_id, order_rows.order_date, totals.amount, order_rows.status
+    FROM order_rows
+    JOIN (
+        SELECT order_id, sum(quantity * unit_price) AS amount FROM item_rows GROUP BY order_id
+    ) AS totals ON totals.order_id = order_rows.id
+    RETURNING id
+)
+INSERT INTO order_items (order_id, order_date, product_id, quantity, unit_price)
+SELECT item_rows.order_id, item_rows.order_date, item_rows.product_id,
+       item_rows.quantity, item_rows.unit_price
+FROM item_rows JOIN new_orders ON new_orders.id = item_rows.order_id
+"""
+
+
+def _chunks(total: int):
+    for first in range(1, total + 1, CHUNK_SIZE):
+        yield first, min(first + CHUNK_SIZE - 1, total)
+
+
+async def _reseed(conn, seed: int, step: int) -> None:
+    # setseed takes a value in [-1, 1]
+    await conn.execute(
+        text("SELECT setseed(:value)"),
+        {"value": ((seed * 1_000_003 + step) % 2_000_000) / 1_000_000 - 1},
+    )
+
+
+async def _scalar(conn, sql: str, **params):
+    return (await conn.execute(text(sql), params)).scalar_one()
+
+
+async def seed(scale: dict, seed: int, anchor: date, months: int) -> dict:
+    """
+    Seed benchmark users, categories, products and order history.
+
+    Args:
+        scale: Row counts (users, products, orders)
+        seed: Seed for PostgreSQL's random()
+        anchor: Order history ends at the start of this month
+        months: Months of order history
+
+    Returns:
+        dict: Resulting row counts and seconds per step
+    """
+    timings = {}
+    history_end = month_start(anchor)
+    history_start = add_months(history_end, -months)
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+
+    async with engine.begin() as conn:
+        for statement in create_partitions_sql(history_start, history_end):
+            await conn.execute(text(statement))
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SET max_parallel_workers_per_gather = 0"))
+
+        started = time.perf_counter()
+        await conn.execute(
+            text(
+                "INSERT INTO users (username, email, hashed_password, is_active, is_superuser) "
+                "VALUES (:username, :email, :hashed_password, true, true) ON CONFLICT DO NOTHING"
+            ),
+            {
+                "username": BENCH_ADMIN,
+                "email": f"{BENCH_ADMIN}@example.com",
+                "hashed_password": hashed_password,
+            },
+        )
+        for first, last in _chunks(scale["users"]):
+            await conn.execute(
+                text(SEED_USERS_SQL),
+                {"first": first, "last": last, "hashed_password": hashed_password},
+            )
+        await conn.commit()
+        timings["users"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        admin_id = await _scalar(
+            conn, "SELECT id FROM users WHERE username = :username", username=BENCH_ADMIN
+        )
+        await conn.execute(text(SEED_CATEGORIES_SQL), {"count": CATEGORY_COUNT})
+        for step, (first, last) in enumerate(_chunks(scale["products"])):
+            await _reseed(conn, seed, step)
+            await conn.execute(
+                text(SEED_PRODUCTS_SQL),
+                {
+                    "first": first,
+                    "last": last,
+                    "owner_id": admin_id,
+                    "words": list(PRODUCT_WORDS),
+                    "nouns": list(PRODUCT_NOUNS),
+                },
+            )
+            await conn.commit()
+        await conn.execute(
+            text(SEED_PRODUCT_CATEGORIES_SQL), {"category_count": CATEGORY_COUNT}
+        )
+        await conn.commit()
+        timings["products"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        first_user, user_count = (await conn.execute(text(
+            "SELECT min(id), count(*) FROM users WHERE username LIKE 'bench\\_user\\_%'"
+        ))).one()
+        first_product, product_count = (await conn.execute(text(
+            "SELECT min(id), count(*) FROM products WHERE sku LIKE 'BENCH-%'"
+        ))).one()
+        for step, (first, last) in enumerate(_chunks(scale["orders"])):
+            await _reseed(conn, seed, 1_000 + step)
+            await conn.execute(
+                text(SEED_ORDERS_SQL),
+                {
+                    "first_user": first_user,
+                    "user_count": user_count,
+                    "first_product": first_product,
+                    "product_count": product_count,
+                    "history_start": datetime.combine(history_start, datetime.min.time(), timezone.utc),
+                    "history_end": datetime.combine(history_end, datetime.min.time(), timezone.utc),
+                    "count": last - first + 1,
+                    "items_per_order": ITEMS_PER_ORDER,
+                },
+            )
+            await conn.commit()
+            print(f"orders {last}/{scale['orders']}", file=sys.stderr)
+        timings["orders"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for table in ("users", "categories", "products", "product_categories", "orders", "order_items"):
+            await conn.execute(text(f"ANALYZE {table}"))
+        await conn.commit()
+        timings["analyze"] = time.perf_counter() - started
+
+        counts = {
+            table: await _scalar(conn, f"SELECT count(*) FROM {table}")
+            for table in ("users", "products", "orders", "order_items")
+        }
+
+    await engine.dispose()
+    return {
+        "seed": seed,
+        "anchor": history_end.isoformat(),
+        "months": months,
+        "scale": scale,
+        "counts": counts,
+        "seconds": {step: round(value, 2) for step, value in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a benchmark dataset")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--products", type=int, help="Override the scale's product count")
+    parser.add_argument("--orders", type=int, help="Override the scale's order count")
+    parser.add_argument("--users", type=int, help="Override the scale's user count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in ("users", "products", "orders"):
+        if getattr(args, key):
+            scale[key] = getattr(args, key)
+
+    print(json.dumps(asyncio.run(seed(scale, args.seed, args.anchor, args.months)), indent=2))
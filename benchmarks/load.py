@@ -0,0 +1,378 @@
+"""
+Scripted async load scenarios against a running API.
+
+Runs each scenario for a fixed duration with a pool of concurrent
+virtual users against a local uvicorn + PostgreSQL seeded by
+benchmarks/dataset.py, then reports throughput, latency percentiles,
+status codes and SQL statements per request as JSON. Every virtual user
+draws its requests from its own random.Random seeded from --seed, so
+runs with the same seed issue the same request mix and reports can be
+compared between commits with benchmarks/compare.py.
+
+Scenarios:
+    browse     product listing pages and product details (80% of
+               detail reads go to the 1% most popular products)
+    search     product name searches
+    checkout   order placement by bench customers
+    login      login storm with the shared bench password
+    analytics  admin order queries with filters and per-status counts
+
+Queries per request come from the server's /metrics SQL histograms,
+scraped before and after each scenario (run the server with a single
+worker, or with METRICS_MULTIPROC_DIR set). Tokens for authenticated
+scenarios are minted with the server's SECRET_KEY, so this script needs
+the same environment as the server.
+
+Usage:
+
+    uvicorn app.main:app --port 8000 &
+    python benchmarks/load.py --base-url http://localhost:8000 \\
+        --scenarios browse,search,checkout --concurrency 32 --duration 30 \\
+        --output reports/$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import text
+
+from app.core.security import create_access_token
+from app.db.session import engine
+from benchmarks.dataset import BENCH_ADMIN, BENCH_PASSWORD, PRODUCT_NOUNS, PRODUCT_WORDS
+
+API = "/api/v1"
+_METRIC_LINE = re.compile(r"^db_queries_per_request_(sum|count)\{[^}]*\} (\S+)$", re.MULTILINE)
+
+
+class Context:
+    """Benchmark rows and tokens shared by the virtual users."""
+
+    def __init__(self, product_ids: List[int], customers: List[dict], admin_token: str):
+        self.product_ids = product_ids
+        self.hot_product_ids = product_ids[: max(1, len(product_ids) // 100)]
+        self.customers = customers
+        self.admin_token = admin_token
+
+
+async def load_context(max_customers: int = 1000) -> Context:
+    """
+    Read benchmark product IDs and customers, and mint their tokens.
+
+    Args:
+        max_customers: Customers used by the authenticated scenarios
+
+    Returns:
+        Context: Shared scenario state
+    """
+    async with engine.connect() as conn:
+        product_ids = list((await conn.execute(text(
+            "SELECT id FROM products WHERE sku LIKE 'BENCH-%' ORDER BY id"
+        ))).scalars())
+        customers = (await conn.execute(text(
+            "SELECT id, username FROM users WHERE username LIKE 'bench\\_user\\_%' "
+            "ORDER BY id LIMIT :limit"
+        ), {"limit": max_customers})).all()
+        admin_id = (await conn.execute(
+            text("SELECT id FROM users WHERE username = :username"), {"username": BENCH_ADMIN}
+        )).scalar_one_or_none()
+    await engine.dispose()
+
+    if not product_ids or not customers or admin_id is None:
+        raise SystemExit("No benchmark dataset found; run benchmarks/dataset.py first")
+    expires = timedelta(hours=12)
+    return Context(
+        product_ids,
+        [
+            {"username": username, "token": create_access_token(id, expires_delta=expires)}
+            for id, username in customers
+        ],
+        create_access_token(admin_id, expires_delta=expires),
+    )
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _product_id(rng: random.Random, ctx: Context) -> int:
+    ids = ctx.hot_product_ids if rng.random() < 0.8 else ctx.product_ids
+    return rng.choice(ids)
+
+
+async def browse(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> httpx.Response:
+    if rng.random() < 0.3:
+        skip = rng.randrange(0, min(len(ctx.product_ids), 10_000), 20)
+        return await client.get(f"{API}/products/", params={"skip": skip, "limit": 20})
+    return await client.get(f"{API}/products/{_product_id(rng, ctx)}")
+
+
+async def search(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> httpx.Response:
+    term = rng.choice(PRODUCT_WORDS + PRODUCT_NOUNS)
+    return await client.get(f"{API}/products/", params={"search": term, "limit": 20})
+
+
+async def checkout(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> httpx.Response:
+    customer = rng.choice(ctx.customers)
+    items = [
+        {"product_id": _product_id(rng, ctx), "quantity": rng.randint(1, 3)}
+        for _ in range(rng.randint(1, 4))
+    ]
+    return await client.post(
+        f"{API}/orders/",
+        json={"shipping_address": "1 Bench Street", "items": items},
+        headers=_auth(customer["token"]),
+    )
+
+
+async def login(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> httpx.Response:
+    customer = rng.choice(ctx.customers)
+    return await client.post(
+        f"{API}/auth/login",
+        data={"username": customer["username"], "password": BENCH_PASSWORD},
+    )
+
+
+async def analytics(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> httpx.Response:
+    now = datetime.now(timezone.utc)
+    params = {
+        "date_from": (now - timedelta(days=rng.choice((7, 30, 90, 365)))).isoformat(),
+        "sort_by": rng.choice(("order_date", "total_amount")),
+        "limit": 100,
+        "include_counts": rng.random() < 0.5,
+    }
+    if rng.random() < 0.5:
+        params["status"] = rng.choice(("pending", "shipped", "delivered"))
+    return await client.get(
+        f"{API}/orders/admin", params=params, headers=_auth(ctx.admin_token)
+    )
+
+
+Scenario = Callable[[httpx.AsyncClient, random.Random, Context], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "browse": browse,
+    "search": search,
+    "checkout": checkout,
+    "login": login,
+    "analytics": analytics,
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Get a percentile by the nearest-rank method.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_ms: List[float], statuses: Counter, errors: int, seconds: float) -> dict:
+    """
+    Summarize one scenario's samples.
+
+    Args:
+        latencies_ms: Latency of every completed request
+        statuses: Responses per status code
+        errors: Requests that failed without a response
+        seconds: Measured duration
+
+    Returns:
+        dict: Throughput, percentiles and counts
+    """
+    latencies_ms = sorted(latencies_ms)
+    failed = errors + sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(latencies_ms),
+        "failed": failed,
+        "error_rate": round(failed / len(latencies_ms), 4) if latencies_ms else 0.0,
+        "throughput_rps": round(len(latencies_ms) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 0.50), 2),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 2),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 2),
+        "max_ms": round(latencies_ms[-1], 2) if latencies_ms else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def _query_totals(client: httpx.AsyncClient) -> Optional[tuple]:
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    totals = {"sum": 0.0, "count": 0.0}
+    for kind, value in _METRIC_LINE.findall(response.text):
+        totals[kind] += float(value)
+    return totals["sum"], totals["count"]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    ctx: Context,
+    *,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> dict:
+    """
+    Run one scenario with concurrent virtual users for a fixed time.
+
+    Args:
+        client: HTTP client for the API
+        name: Scenario name
+        ctx: Shared scenario state
+        concurrency: Virtual users
+        duration: Measured seconds
+        warmup: Unmeasured seconds before measuring
+        seed: Base seed of the virtual users' generators
+
+    Returns:
+        dict: Scenario summary
+    """
+    scenario = SCENARIOS[name]
+    latencies_ms: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    measuring = False
+    started = time.perf_counter()
+    deadline = started + warmup + duration
+
+    async def virtual_user(index: int) -> None:
+        nonlocal errors
+        rng = random.Random(f"{seed}:{name}:{index}")
+        while time.perf_counter() < deadline:
+            request_started = time.perf_counter()
+            try:
+                response = await scenario(client, rng, ctx)
+            except httpx.HTTPError:
+                if measuring:
+                    errors += 1
+                continue
+            if measuring:
+                latencies_ms.append((time.perf_counter() - request_started) * 1000)
+                statuses[response.status_code] += 1
+
+    users = [asyncio.ensure_future(virtual_user(index)) for index in range(concurrency)]
+    await asyncio.sleep(warmup)
+    before = await _query_totals(client)
+    measuring = True
+    measured_from = time.perf_counter()
+    await asyncio.gather(*users)
+    measured = time.perf_counter() - measured_from
+    after = await _query_totals(client)
+
+    summary = summarize(latencies_ms, statuses, errors, measured)
+    summary["queries_per_request"] = None
+    if before and after and after[1] > before[1]:
+        summary["queries_per_request"] = round(
+            (after[0] - before[0]) / (after[1] - before[1]), 2
+        )
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(
+    base_url: str,
+    scenarios: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> dict:
+    """
+    Run scenarios one after another against an API.
+
+    Args:
+        base_url: API server URL
+        scenarios: Scenario names, in order
+        concurrency: Virtual users per scenario
+        duration: Measured seconds per scenario
+        warmup: Unmeasured seconds before each scenario
+        seed: Seed of the request mix
+
+    Returns:
+        dict: Report with run settings and one summary per scenario
+    """
+    ctx = await load_context()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for name in scenarios:
+            results[name] = await run_scenario(
+                client, name, ctx,
+                concurrency=concurrency, duration=duration, warmup=warmup, seed=seed,
+            )
+            print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": base_url,
+        "seed": seed,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "products": len(ctx.product_ids),
+        "scenarios": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async load scenarios against a running API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Comma-separated scenarios: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(
+        args.base_url, names, args.concurrency, args.duration, args.warmup, args.seed
+    ))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
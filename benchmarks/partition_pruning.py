@@ -0,0 +1,168 @@
+"""
+Benchmark recent-orders queries as order history grows.
+
+Seeds monthly order history into the partitioned orders/order_items tables
+in steps and, after each step, times the storefront "my recent orders"
+query and counts the partitions the plan touches. With partition pruning
+both should stay flat as months of history are added.
+
+Requires PostgreSQL migrated to head. Usage:
+
+    python benchmarks/partition_pruning.py --steps 6,12,24,48 --orders-per-month 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.db.partitions import add_months, create_partitions_sql, month_start
+from app.db.session import engine
+
+BENCH_USERNAME = "bench_partitions"
+
+RECENT_ORDERS_SQL = """
+SELECT orders.id, orders.order_date, orders.total_amount, orders.status
+FROM orders
+WHERE orders.customer_id = :customer_id
+  AND orders.order_date >= now() - interval '30 days'
+ORDER BY orders.order_date DESC, orders.id DESC
+LIMIT 20
+"""
+
+SEED_MONTH_SQL = """
+WITH new_orders AS (
+    INSERT INTO orders (customer_id, order_date, total_amount, status)
+    SELECT :customer_id,
+           CAST(:month_start AS timestamptz)
+               + random() * (CAST(:month_end AS timestamptz) - CAST(:month_start AS timestamptz)),
+           round((random() * 500)::numeric, 2),
+           'delivered'
+    FROM generate_series(1, :count)
+    RETURNING id, order_date
+)
+INSERT INTO order_items (order_id, order_date, product_id, quantity, unit_price)
+SELECT id, order_date, :product_id, 1, 9.99 FROM new_orders
+"""
+
+
+async def _setup(conn) -> tuple:
+    await conn.execute(
+        text(
+            "INSERT INTO users (username, email, hashed_password, is_active, is_superuser) "
+            "VALUES (:username, :email, 'x', true, false) ON CONFLICT DO NOTHING"
+        ),
+        {"username": BENCH_USERNAME, "email": f"{BENCH_USERNAME}@example.com"},
+    )
+    user_id = (
+        await conn.execute(
+            text("SELECT id FROM users WHERE username = :username"),
+            {"username": BENCH_USERNAME},
+        )
+    ).scalar_one()
+    product_id = (
+        await conn.execute(
+            text(
+                "INSERT INTO products (name, price, inventory, owner_id) "
+                "VALUES ('bench partition product', 9.99, 0, :owner_id) RETURNING id"
+            ),
+            {"owner_id": user_id},
+        )
+    ).scalar_one()
+    return user_id, product_id
+
+
+async def _measure(conn, customer_id: int, iterations: int) -> dict:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await conn.execute(text(RECENT_ORDERS_SQL), {"customer_id": customer_id})
+        timings.append((time.perf_counter() - started) * 1000)
+        
+    plan = (
+        await conn.execute(
+            text("EXPLAIN (FORMAT JSON) " + RECENT_ORDERS_SQL), {"customer_id": customer_id}
+        )
+    ).scalar_one()
+    scanned = json.dumps(plan).count('"Relation Name": "orders_p')
+    
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "partitions_scanned": scanned,
+    }
+
+
+async def run(steps: list, orders_per_month: int, iterations: int) -> list:
+    """
+    Seed history in steps and measure the recent-orders query after each.
+    
+    Args:
+        steps: Cumulative months of history to measure at
+        orders_per_month: Orders seeded per month
+        iterations: Query repetitions per measurement
+        
+    Returns:
+        list: One result dict per step
+    """
+    current = month_start(datetime.now(timezone.utc))
+    results = []
+    
+    async with engine.begin() as conn:
+        customer_id, product_id = await _setup(conn)
+        
+    seeded = 0
+    for months in steps:
+        async with engine.begin() as conn:
+            first = add_months(current, -(months - 1))
+            for statement in create_partitions_sql(first, current):
+                await conn.execute(text(statement))
+            for offset in range(seeded, months):
+                month = add_months(current, -offset)
+                await conn.execute(
+                    text(SEED_MONTH_SQL),
+                    {
+                        "customer_id": customer_id,
+                        "product_id": product_id,
+                        "month_start": datetime.combine(month, datetime.min.time(), timezone.utc),
+                        "month_end": datetime.combine(add_months(month, 1), datetime.min.time(), timezone.utc),
+                        "count": orders_per_month,
+                    },
+                )
+            seeded = months
+            
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE orders"))
+            result = {"months_of_history": months, "orders": months * orders_per_month}
+            result.update(await _measure(conn, customer_id, iterations))
+            results.append(result)
+            print(json.dumps(result))
+            
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recent-orders latency as history grows")
+    parser.add_argument("--steps", default="6,12,24,48",
+                        help="comma-separated cumulative months of history")
+    parser.add_argument("--orders-per-month", type=int, default=20000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    
+    asyncio.run(
+        run(
+            steps=[int(step) for step in args.steps.split(",")],
+            orders_per_month=args.orders_per_month,
+            iterations=args.iterations,
+        )
+    )
@@ -0,0 +1,122 @@
+"""
+Benchmark per-item JSON serialization cost of product pages.
+
+Compares the ways a page of products can become response bytes:
+
+- response_model: what FastAPI does for a route with a response_model,
+  i.e. pydantic validation from ORM attributes, a JSON-mode dump and
+  stdlib json encoding
+- pydantic_json: validation followed by pydantic's own dump_json
+- fast: the prebuilt schema-aware serializer plus orjson
+- cached: orjson alone, for pages served from the product cache
+
+Runs without a database, on in-memory stand-ins for Product rows. Usage:
+
+    python benchmarks/serialization.py --page-size 100 --iterations 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.schemas.schemas import Product
+from app.schemas.serializers import serialize_product
+
+
+def _rows(count: int) -> list:
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    categories = [
+        SimpleNamespace(id=i, name=f"Category {i}", description="Bench category")
+        for i in range(3)
+    ]
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"Product {i}",
+            description="A product used for serialization benchmarks",
+            price=9.99 + i,
+            inventory=i % 50,
+            sku=f"SKU-{i:06d}",
+            image_url=None,
+            owner_id=1,
+            created_at=created + timedelta(minutes=i),
+            updated_at=None if i % 2 else created + timedelta(days=1, minutes=i),
+            categories=categories[: i % 4],
+        )
+        for i in range(count)
+    ]
+
+
+def _time(encode, iterations: int, items: int) -> dict:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        body = encode()
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return {
+        "page_p50_us": round(statistics.median(timings), 1),
+        "page_p95_us": round(timings[int(len(timings) * 0.95) - 1], 1),
+        "per_item_us": round(statistics.median(timings) / items, 3),
+        "bytes": len(body),
+    }
+
+
+def run(page_size: int, iterations: int) -> dict:
+    """
+    Time each serialization path for one page of products.
+
+    Args:
+        page_size: Products per page
+        iterations: Repetitions per path
+
+    Returns:
+        dict: Timings per path
+    """
+    rows = _rows(page_size)
+    adapter = TypeAdapter(List[Product])
+    cached = [serialize_product(row) for row in rows]
+
+    paths = {
+        "response_model": lambda: json.dumps(
+            adapter.dump_python(
+                adapter.validate_python(rows, from_attributes=True), mode="json"
+            ),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode(),
+        "pydantic_json": lambda: adapter.dump_json(
+            adapter.validate_python(rows, from_attributes=True)
+        ),
+        "fast": lambda: orjson.dumps([serialize_product(row) for row in rows]),
+        "cached": lambda: orjson.dumps(cached),
+    }
+
+    results = {"page_size": page_size, "iterations": iterations}
+    for name, encode in paths.items():
+        results[name] = _time(encode, iterations, page_size)
+    baseline = results["response_model"]["per_item_us"]
+    for name in paths:
+        results[name]["speedup"] = round(baseline / results[name]["per_item_us"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-item product serialization cost")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.page_size, args.iterations), indent=2))
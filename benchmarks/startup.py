@@ -0,0 +1,145 @@
+"""
+Startup time benchmark.
+
+Imports the application in fresh interpreters under ``python -X importtime``
+and reports the wall time of the import, its cumulative import time and
+the modules costing the most. Heavy modules that should only be loaded on
+first use (database drivers, JWT and password hashing libraries) are
+listed when they show up at import. Usage:
+
+    python benchmarks/startup.py --runs 10 --top 15 --output reports/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported by ``import app.main``
+DEFERRED_MODULES = (
+    "asyncpg",
+    "sqlalchemy.dialects.postgresql.asyncpg",
+    "jose",
+    "passlib",
+)
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        output: Standard error of the interpreter
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Self and cumulative microseconds per module
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module: str = "app.main") -> dict:
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        dict: Wall time in ms and the parsed import times of every module
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    return {"wall_ms": wall_ms, "modules": parse_importtime(completed.stderr)}
+
+
+def loaded(modules: Dict[str, Tuple[int, int]], prefixes=DEFERRED_MODULES) -> List[str]:
+    """
+    Find imported modules that belong to any of the given packages.
+
+    Args:
+        modules: Parsed import times
+        prefixes: Package or module names
+
+    Returns:
+        List[str]: Matching module names
+    """
+    return sorted(
+        name for name in modules
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes)
+    )
+
+
+def run(module: str, runs: int, top: int) -> dict:
+    """
+    Measure the import several times.
+
+    Args:
+        module: Module to import
+        runs: Number of fresh interpreters
+        top: Number of most expensive modules to report
+
+    Returns:
+        dict: Report with wall and import time statistics
+    """
+    samples = [measure_import(module) for _ in range(runs)]
+    wall = [sample["wall_ms"] for sample in samples]
+    cumulative = [sample["modules"][module][1] / 1000 for sample in samples]
+    # Self time of each module, averaged over runs
+    self_ms: Dict[str, float] = {}
+    for sample in samples:
+        for name, (self_us, _) in sample["modules"].items():
+            self_ms[name] = self_ms.get(name, 0.0) + self_us / 1000 / runs
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_ms": {"median": statistics.median(wall), "min": min(wall), "max": max(wall)},
+        "import_ms": {"median": statistics.median(cumulative), "min": min(cumulative)},
+        "modules_loaded": len(samples[-1]["modules"]),
+        "top_self_ms": sorted(self_ms.items(), key=lambda item: item[1], reverse=True)[:top],
+        "deferred_loaded": loaded(samples[-1]["modules"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure application import time")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = run(args.module, args.runs, args.top)
+    print(
+        f"{report['module']}: wall {report['wall_ms']['median']:.0f} ms, "
+        f"import {report['import_ms']['median']:.0f} ms "
+        f"(median of {report['runs']}), {report['modules_loaded']} modules"
+    )
+    for name, self_ms in report["top_self_ms"]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+    if report["deferred_loaded"]:
+        print(f"loaded at import but expected on first use: {', '.join(report['deferred_loaded'])}")
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
@@ -0,0 +1,280 @@
+"""
+Throughput of the production server across worker counts.
+
+Starts app/server.py with each worker count in turn and drives one of the
+benchmarks/load.py scenarios against it from several client processes, so
+the load generator does not become the bottleneck. Reports throughput,
+latency percentiles, the time until the server answered, how long its
+graceful shutdown took and the memory of its processes (PSS counts pages
+shared by the preloaded workers once). Needs the dataset from
+benchmarks/dataset.py and the server's environment. Usage:
+
+    python benchmarks/workers.py --workers 1,2,4,8 --scenario browse \\
+        --clients 4 --concurrency 64 --duration 20 --output reports/workers.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.load import SCENARIOS, Context, _git_commit, load_context, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def drive(
+    base_url: str,
+    name: str,
+    ctx: Context,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> Tuple[List[float], Counter, int]:
+    """
+    Run a scenario's virtual users from this process.
+
+    Args:
+        base_url: API server URL
+        name: Scenario name
+        ctx: Shared scenario state
+        concurrency: Virtual users
+        duration: Measured seconds
+        warmup: Unmeasured seconds before measuring
+        seed: Base seed of the virtual users' generators
+
+    Returns:
+        Tuple[List[float], Counter, int]: Latencies in ms, responses per
+            status code and failed requests of the measured period
+    """
+    scenario = SCENARIOS[name]
+    latencies_ms: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def virtual_user(index: int) -> None:
+            nonlocal errors
+            rng = random.Random(f"{seed}:{name}:{index}")
+            while True:
+                request_started = time.perf_counter()
+                if request_started >= deadline:
+                    return
+                try:
+                    response = await scenario(client, rng, ctx)
+                except httpx.HTTPError:
+                    if request_started >= measure_from:
+                        errors += 1
+                    continue
+                if request_started >= measure_from:
+                    latencies_ms.append((time.perf_counter() - request_started) * 1000)
+                    statuses[response.status_code] += 1
+
+        await asyncio.gather(*(virtual_user(index) for index in range(concurrency)))
+    return latencies_ms, statuses, errors
+
+
+def _client_process(args: tuple) -> Tuple[List[float], Counter, int]:
+    return asyncio.run(drive(*args))
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """
+    Start the production server without worker recycling.
+
+    Args:
+        workers: Worker processes
+        port: Local port to listen on
+
+    Returns:
+        subprocess.Popen: The gunicorn master process
+    """
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "app.server",
+            "--workers", str(workers),
+            "--bind", f"127.0.0.1:{port}",
+            "--max-requests", "0",
+            "--allow-per-worker-state",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60) -> float:
+    """
+    Wait until the server answers.
+
+    Args:
+        base_url: API server URL
+        server: The server process
+        timeout: Seconds to wait at most
+
+    Returns:
+        float: Seconds until the first response
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/docs", timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit(f"Server not ready after {timeout:.0f}s")
+
+
+def memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Get the resident and proportional memory of a process and its children.
+
+    Args:
+        pid: Process ID of the gunicorn master
+
+    Returns:
+        Optional[Dict[str, float]]: RSS and PSS totals in MB, or None
+            where /proc does not provide them
+    """
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as handle:
+            pids = [pid, *(int(child) for child in handle.read().split())]
+        totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+        for process in pids:
+            with open(f"/proc/{process}/smaps_rollup") as handle:
+                for line in handle:
+                    field, value = line.split(":", 1)
+                    if field in ("Rss", "Pss"):
+                        totals[f"{field.lower()}_mb"] += int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        return None
+    return {key: round(value, 1) for key, value in totals.items()}
+
+
+def stop_server(server: subprocess.Popen, timeout: float = 60) -> float:
+    """
+    Stop the server gracefully.
+
+    Args:
+        server: The server process
+        timeout: Seconds before it is killed
+
+    Returns:
+        float: Seconds the graceful shutdown took
+    """
+    started = time.perf_counter()
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    return time.perf_counter() - started
+
+
+def run(
+    worker_counts: List[int],
+    scenario: str,
+    clients: int,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+    port: int,
+) -> dict:
+    """
+    Measure the scenario against each worker count.
+
+    Args:
+        worker_counts: Worker counts, in order
+        scenario: Scenario name from benchmarks/load.py
+        clients: Load generator processes
+        concurrency: Virtual users per client process
+        duration: Measured seconds per worker count
+        warmup: Unmeasured seconds before measuring
+        seed: Seed of the request mix
+        port: Local port for the server
+
+    Returns:
+        dict: Report with one summary per worker count
+    """
+    ctx = asyncio.run(load_context())
+    base_url = f"http://127.0.0.1:{port}"
+    results = {}
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        for workers in worker_counts:
+            server = start_server(workers, port)
+            try:
+                startup_s = wait_ready(base_url, server)
+                samples = pool.map(_client_process, [
+                    (base_url, scenario, ctx, concurrency, duration, warmup, f"{seed}:{index}")
+                    for index in range(clients)
+                ])
+                resident = memory(server.pid)
+            finally:
+                shutdown_s = stop_server(server)
+            latencies = [latency for sample in samples for latency in sample[0]]
+            statuses = sum((sample[1] for sample in samples), Counter())
+            errors = sum(sample[2] for sample in samples)
+            results[str(workers)] = {
+                **summarize(latencies, statuses, errors, duration),
+                "startup_s": round(startup_s, 2),
+                "shutdown_s": round(shutdown_s, 2),
+                "memory": resident,
+            }
+            print(f"{workers} workers: {json.dumps(results[str(workers)])}", file=sys.stderr)
+
+    return {
+        "commit": _git_commit(),
+        "scenario": scenario,
+        "clients": clients,
+        "concurrency": clients * concurrency,
+        "duration_s": duration,
+        "cpus": os.cpu_count(),
+        "workers": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput across worker counts")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--scenario", default="browse", choices=sorted(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users per client")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(
+        [int(count) for count in args.workers.split(",") if count.strip()],
+        args.scenario, args.clients, args.concurrency,
+        args.duration, args.warmup, args.seed, args.port,
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
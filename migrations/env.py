@@ -25,8 +25,8 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Set the database URL
-database_url = str(settings.SQLALCHEMY_DATABASE_URI)
+# Set the database URL (callers such as the test harness may pass their own)
+database_url = config.attributes.get("database_url") or str(settings.SQLALCHEMY_DATABASE_URI)
 # Convert async URL to sync URL for migrations
 sync_database_url = database_url.replace("postgresql+asyncpg://", "postgresql://")
 config.set_main_option("sqlalchemy.url", sync_database_url)
@@ -0,0 +1,36 @@
+"""Add indexes backing the admin user directory
+
+Revision ID: a7c3e91d5b28
+Revises: f2b8d4e6a913
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e91d5b28'
+down_revision = 'f2b8d4e6a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Prefix search: text_pattern_ops makes LIKE 'abc%' an index range scan
+    # whatever the database collation
+    op.create_index('ix_users_username_prefix', 'users', [sa.text('lower(username) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_email_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    # Each directory filter leads an index that ends in the keyset sort
+    # columns, so filtered pages are read in index order
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_is_active_created_at_id', 'users', ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_is_superuser_created_at_id', 'users', ['is_superuser', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_is_superuser_created_at_id', table_name='users')
+    op.drop_index('ix_users_is_active_created_at_id', table_name='users')
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_users_email_prefix', table_name='users')
+    op.drop_index('ix_users_username_prefix', table_name='users')
@@ -0,0 +1,36 @@
+"""Add indexes backing the admin order listing
+
+Revision ID: c4e2a9d17f30
+Revises: b79bc6da3ac5
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e2a9d17f30'
+down_revision = 'b79bc6da3ac5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Each admin listing filter leads an index that ends in the keyset
+    # sort columns, so filtered pages are read in index order
+    op.create_index('ix_orders_order_date_id', 'orders', ['order_date', 'id'], unique=False)
+    op.create_index('ix_orders_status_order_date_id', 'orders', ['status', 'order_date', 'id'], unique=False)
+    op.create_index('ix_orders_customer_id_order_date_id', 'orders', ['customer_id', 'order_date', 'id'], unique=False)
+    op.create_index('ix_orders_total_amount_id', 'orders', ['total_amount', 'id'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id_order_id', 'order_items', ['product_id', 'order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_product_id_order_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_total_amount_id', table_name='orders')
+    op.drop_index('ix_orders_customer_id_order_date_id', table_name='orders')
+    op.drop_index('ix_orders_status_order_date_id', table_name='orders')
+    op.drop_index('ix_orders_order_date_id', table_name='orders')
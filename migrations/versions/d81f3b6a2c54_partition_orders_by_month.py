@@ -0,0 +1,185 @@
+"""Partition orders and order_items by month of order_date
+
+Revision ID: d81f3b6a2c54
+Revises: c4e2a9d17f30
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.partitions import (
+    ORDER_ITEMS_ORDER_FK,
+    add_months,
+    create_partitions_sql,
+    month_start,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3b6a2c54'
+down_revision = 'c4e2a9d17f30'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+ORDER_INDEXES = [
+    ('ix_orders_id', ['id']),
+    ('ix_orders_order_date_id', ['order_date', 'id']),
+    ('ix_orders_status_order_date_id', ['status', 'order_date', 'id']),
+    ('ix_orders_customer_id_order_date_id', ['customer_id', 'order_date', 'id']),
+    ('ix_orders_total_amount_id', ['total_amount', 'id']),
+]
+
+ORDER_ITEM_INDEXES = [
+    ('ix_order_items_id', ['id']),
+    ('ix_order_items_order_id', ['order_id']),
+    ('ix_order_items_product_id_order_id', ['product_id', 'order_id']),
+]
+
+
+def _drop_indexes() -> None:
+    for name, _ in ORDER_ITEM_INDEXES:
+        op.drop_index(name, table_name='order_items')
+    for name, _ in ORDER_INDEXES:
+        op.drop_index(name, table_name='orders')
+
+
+def _create_indexes() -> None:
+    for name, columns in ORDER_INDEXES:
+        op.create_index(name, 'orders', columns, unique=False)
+    for name, columns in ORDER_ITEM_INDEXES:
+        op.create_index(name, 'order_items', columns, unique=False)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # Keep the id sequences alive when the old tables are dropped
+    _drop_indexes()
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.rename_table('order_items', 'order_items_legacy')
+    op.rename_table('orders', 'orders_legacy')
+
+    # The partition key has to be part of every unique constraint
+    op.execute("""
+        CREATE TABLE orders (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            customer_id INTEGER NOT NULL REFERENCES users (id),
+            order_date TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            total_amount FLOAT(2) NOT NULL,
+            status VARCHAR(20),
+            shipping_address_id INTEGER REFERENCES addresses (id),
+            billing_address_id INTEGER REFERENCES addresses (id),
+            payment_id VARCHAR(100),
+            tracking_number VARCHAR(100),
+            PRIMARY KEY (id, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+    op.execute(f"""
+        CREATE TABLE order_items (
+            id INTEGER NOT NULL DEFAULT nextval('order_items_id_seq'),
+            order_id INTEGER NOT NULL,
+            order_date TIMESTAMP WITH TIME ZONE NOT NULL,
+            product_id INTEGER NOT NULL REFERENCES products (id),
+            quantity INTEGER NOT NULL,
+            unit_price FLOAT(2) NOT NULL,
+            PRIMARY KEY (id, order_date),
+            CONSTRAINT {ORDER_ITEMS_ORDER_FK} FOREIGN KEY (order_id, order_date)
+                REFERENCES orders (id, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    # One partition per month of existing history, plus a few ahead
+    current = month_start(datetime.now(timezone.utc))
+    oldest = conn.execute(sa.text("SELECT min(order_date) FROM orders_legacy")).scalar()
+    first = month_start(oldest) if oldest else current
+    for statement in create_partitions_sql(first, add_months(current, MONTHS_AHEAD)):
+        op.execute(statement)
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+    op.execute("CREATE TABLE order_items_default PARTITION OF order_items DEFAULT")
+    _create_indexes()
+
+    op.execute("""
+        INSERT INTO orders (
+            id, customer_id, order_date, total_amount, status,
+            shipping_address_id, billing_address_id, payment_id, tracking_number
+        )
+        SELECT
+            id, customer_id, COALESCE(order_date, now()), total_amount, status,
+            shipping_address_id, billing_address_id, payment_id, tracking_number
+        FROM orders_legacy
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, order_date, product_id, quantity, unit_price)
+        SELECT items.id, items.order_id, orders.order_date,
+               items.product_id, items.quantity, items.unit_price
+        FROM order_items_legacy items
+        JOIN orders ON orders.id = items.order_id
+    """)
+    op.drop_table('order_items_legacy')
+    op.drop_table('orders_legacy')
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.rename_table('order_items', 'order_items_partitioned')
+    op.rename_table('orders', 'orders_partitioned')
+
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('orders_id_seq')"), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('order_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('total_amount', sa.Float(precision=2), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('shipping_address_id', sa.Integer(), nullable=True),
+        sa.Column('billing_address_id', sa.Integer(), nullable=True),
+        sa.Column('payment_id', sa.String(length=100), nullable=True),
+        sa.Column('tracking_number', sa.String(length=100), nullable=True),
+        sa.ForeignKeyConstraint(['billing_address_id'], ['addresses.id']),
+        sa.ForeignKeyConstraint(['customer_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['shipping_address_id'], ['addresses.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_items_id_seq')"), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(precision=2), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.execute("""
+        INSERT INTO orders (
+            id, customer_id, order_date, total_amount, status,
+            shipping_address_id, billing_address_id, payment_id, tracking_number
+        )
+        SELECT
+            id, customer_id, order_date, total_amount, status,
+            shipping_address_id, billing_address_id, payment_id, tracking_number
+        FROM orders_partitioned
+    """)
+    op.execute("""
+        INSERT INTO order_items (id, order_id, product_id, quantity, unit_price)
+        SELECT id, order_id, product_id, quantity, unit_price
+        FROM order_items_partitioned
+    """)
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
+    _create_indexes()
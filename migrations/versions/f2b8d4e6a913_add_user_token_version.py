@@ -0,0 +1,25 @@
+"""Add token_version to users
+
+Revision ID: f2b8d4e6a913
+Revises: e5a1c7f04b92
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4e6a913'
+down_revision = 'e5a1c7f04b92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Access tokens carry this version; bumping it revokes them all
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -6,7 +6,7 @@ Simplified Demo Data Population Script for E-commerce Admin API
 import asyncio
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
 
 # Add the project root to the Python path
@@ -90,6 +90,7 @@ async def create_sample_data():
             if not order:
                 order = Order(
                     customer_id=admin_user.id,
+                    order_date=datetime.now(timezone.utc),
                     total_amount=29.99,
                     status="delivered",
                     shipping_address_id=address.id
@@ -100,6 +101,7 @@ async def create_sample_data():
                 # Add order item
                 order_item = OrderItem(
                     order_id=order.id,
+                    order_date=order.order_date,
                     product_id=product.id,
                     quantity=1,
                     unit_price=29.99
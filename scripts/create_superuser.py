@@ -26,10 +26,8 @@ async def create_superuser() -> None:
                 username=settings.FIRST_SUPERUSER_USERNAME,
                 email=settings.FIRST_SUPERUSER_EMAIL,
                 password=settings.FIRST_SUPERUSER_PASSWORD,
-                is_superuser=True,
-                is_active=True
             )
-            new_user = await user.create(db, obj_in=user_in)
+            new_user = await user.create(db, obj_in=user_in, is_superuser=True)
             print(f"Superuser created: {new_user.username} ({new_user.email})")
         else:
             print(f"Superuser already exists: {existing_user.username} ({existing_user.email})")
@@ -0,0 +1,479 @@
+"""
+High-volume synthetic data generator.
+
+Generates users, categories, products, orders and order items in Python
+and streams them into PostgreSQL with COPY (asyncpg
+copy_records_to_table), one transaction per chunk, instead of adding and
+flushing ORM objects row by row. The next chunk is generated in a worker
+thread while the current one is being copied.
+
+The data has the shape analytics queries care about:
+
+- Product popularity follows a Zipf distribution (--zipf) over a seeded
+  shuffle of the products, so a few products take most order lines
+- Order dates follow a weekly cycle, a November/December peak, a daily
+  traffic curve and year-over-year growth (--growth)
+- Older orders are mostly delivered; recent ones are still in progress
+
+Every chunk draws from its own generator seeded with --seed, the table
+and the chunk number, so the same arguments give the same rows on a
+fresh database. IDs are reserved from the tables' sequences up front.
+All generated users share one password (bcrypt runs once).
+
+Requires PostgreSQL migrated to head. Usage:
+
+    python scripts/generate_data.py --users 100000 --products 1000000 --orders 2500000
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.security import get_password_hash
+from app.db.partitions import add_months, create_partitions_sql, month_start
+from app.db.session import engine
+
+PASSWORD = "generated-password"
+
+PRODUCT_ADJECTIVES = (
+    "Wireless", "Leather", "Organic", "Vintage", "Compact", "Premium", "Bamboo",
+    "Ceramic", "Portable", "Steel", "Cotton", "Smart", "Classic", "Outdoor",
+    "Ergonomic", "Waterproof", "Handmade", "Digital", "Modular", "Travel",
+)
+PRODUCT_NOUNS = (
+    "Headphones", "Backpack", "Lamp", "Kettle", "Chair", "Jacket", "Speaker",
+    "Notebook", "Bottle", "Watch", "Blender", "Tent", "Keyboard", "Mug", "Camera",
+)
+
+# Relative traffic by weekday (Monday first) and by UTC hour
+WEEKDAY_WEIGHTS = (1.0, 0.95, 0.95, 1.0, 1.1, 1.3, 1.25)
+HOUR_WEIGHTS = (
+    0.3, 0.2, 0.15, 0.1, 0.1, 0.15, 0.3, 0.5, 0.7, 0.8, 0.9, 1.0,
+    1.0, 0.95, 0.9, 0.9, 0.95, 1.0, 1.1, 1.25, 1.3, 1.2, 0.9, 0.5,
+)
+
+QUANTITY_WEIGHTS = (60, 25, 8, 4, 3)
+RECENT_STATUSES = ("pending", "processing", "shipped", "delivered", "cancelled")
+RECENT_STATUS_WEIGHTS = (25, 25, 30, 15, 5)
+SETTLED_STATUSES = ("delivered", "cancelled", "shipped")
+SETTLED_STATUS_WEIGHTS = (88, 9, 3)
+SETTLED_AFTER = timedelta(days=14)
+
+USER_COLUMNS = ("id", "username", "email", "hashed_password", "is_active", "is_superuser")
+CATEGORY_COLUMNS = ("id", "name", "description")
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "inventory", "sku", "owner_id")
+PRODUCT_CATEGORY_COLUMNS = ("product_id", "category_id")
+ORDER_COLUMNS = ("id", "customer_id", "order_date", "total_amount", "status")
+ORDER_ITEM_COLUMNS = ("order_id", "order_date", "product_id", "quantity", "unit_price")
+
+
+def chunk_random(seed: int, table: str, index: int) -> random.Random:
+    """
+    Get the generator for one chunk of a table.
+    
+    Args:
+        seed: Run seed
+        table: Table name
+        index: Chunk number
+        
+    Returns:
+        random.Random: Generator independent of every other chunk
+    """
+    return random.Random(f"{seed}:{table}:{index}")
+
+
+def chunks(total: int, size: int) -> List[Tuple[int, int]]:
+    """Split a row count into (offset, count) chunks."""
+    return [(offset, min(size, total - offset)) for offset in range(0, total, size)]
+
+
+class ZipfSampler:
+    """Draws ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** exponent."""
+    
+    def __init__(self, n: int, exponent: float):
+        self.population = range(n)
+        self.cum_weights = list(
+            itertools.accumulate((rank ** -exponent for rank in range(1, n + 1)))
+        )
+        
+    def sample(self, rng: random.Random, k: int) -> List[int]:
+        """Draw k ranks."""
+        return rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+
+def day_weights(first_day: date, days: int, growth: float) -> List[float]:
+    """
+    Get the cumulative order volume weight of each day in the history.
+    
+    Args:
+        first_day: First day of the history
+        days: Days of history
+        growth: Year-over-year growth in order volume, e.g. 0.3 for 30%
+        
+    Returns:
+        List[float]: Cumulative weights, for random.choices
+    """
+    weights = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        # Holiday season peaking in mid December, ramping up from Black Friday
+        season = 1.0 + 1.2 * math.exp(-(((day.timetuple().tm_yday - 345) / 22) ** 2))
+        trend = (1.0 + growth) ** (offset / 365)
+        weights.append(WEEKDAY_WEIGHTS[day.weekday()] * season * trend)
+    return list(itertools.accumulate(weights))
+
+
+def build_users(
+    first_id: int, offset: int, count: int, hashed_password: str, superuser_id: int
+) -> List[tuple]:
+    """Build user rows; all share one password hash."""
+    return [
+        (
+            id,
+            f"gen_user_{id}",
+            f"gen_user_{id}@example.com",
+            hashed_password,
+            True,
+            id == superuser_id,
+        )
+        for id in range(first_id + offset, first_id + offset + count)
+    ]
+
+
+def build_products(
+    seed: int,
+    index: int,
+    first_id: int,
+    offset: int,
+    count: int,
+    owner_id: int,
+    category_ids: Sequence[int],
+    categories: ZipfSampler,
+    prices: array,
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Build one chunk of product and product-category rows.
+    
+    Prices are also written to prices (indexed by product offset) so
+    order items can use them.
+    
+    Returns:
+        Tuple[List[tuple], List[tuple]]: Product rows and category links
+    """
+    rng = chunk_random(seed, "products", index)
+    products, links = [], []
+    for position in range(offset, offset + count):
+        id = first_id + position
+        price = round(min(5000.0, rng.lognormvariate(3.4, 0.9)), 2)
+        prices[position] = price
+        name = f"{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_NOUNS)} {id}"
+        products.append((
+            id,
+            name,
+            f"{name}, generated for load testing",
+            price,
+            rng.randint(0, 500),
+            f"GEN-{id}",
+            owner_id,
+        ))
+        for rank in set(categories.sample(rng, rng.choice((1, 1, 2)))):
+            links.append((id, category_ids[rank]))
+    return products, links
+
+
+def build_orders(
+    seed: int,
+    index: int,
+    first_id: int,
+    offset: int,
+    count: int,
+    history_start: datetime,
+    history_end: datetime,
+    days: List[float],
+    customer_ids: Sequence[int],
+    customers: ZipfSampler,
+    product_ids: Sequence[int],
+    popularity: ZipfSampler,
+    prices: array,
+    item_count_weights: Sequence[float],
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Build one chunk of order and order item rows.
+    
+    Returns:
+        Tuple[List[tuple], List[tuple]]: Order rows and their item rows
+    """
+    rng = chunk_random(seed, "orders", index)
+    day_offsets = rng.choices(range(len(days)), cum_weights=days, k=count)
+    hours = rng.choices(range(24), weights=HOUR_WEIGHTS, k=count)
+    buyers = customers.sample(rng, count)
+    item_counts = rng.choices(range(1, len(item_count_weights) + 1), weights=item_count_weights, k=count)
+    ranks = popularity.sample(rng, sum(item_counts))
+    quantities = rng.choices(range(1, len(QUANTITY_WEIGHTS) + 1), weights=QUANTITY_WEIGHTS, k=len(ranks))
+    
+    orders, items = [], []
+    line = 0
+    for position in range(count):
+        id = first_id + offset + position
+        order_date = history_start + timedelta(
+            days=day_offsets[position], hours=hours[position], seconds=rng.randrange(3600)
+        )
+        if history_end - order_date > SETTLED_AFTER:
+            status = rng.choices(SETTLED_STATUSES, weights=SETTLED_STATUS_WEIGHTS)[0]
+        else:
+            status = rng.choices(RECENT_STATUSES, weights=RECENT_STATUS_WEIGHTS)[0]
+            
+        total = 0.0
+        for _ in range(item_counts[position]):
+            rank, quantity = ranks[line], quantities[line]
+            line += 1
+            items.append((id, order_date, product_ids[rank], quantity, prices[rank]))
+            total += prices[rank] * quantity
+        orders.append((id, customer_ids[buyers[position]], order_date, round(total, 2), status))
+    return orders, items
+
+
+async def reserve_ids(pg, table: str, count: int) -> int:
+    """
+    Reserve a block of IDs from a table's sequence.
+    
+    Args:
+        pg: asyncpg connection
+        table: Table with a serial "id" column
+        count: IDs to reserve
+        
+    Returns:
+        int: First reserved ID
+    """
+    sequence = await pg.fetchval("SELECT pg_get_serial_sequence($1, 'id')", table)
+    first_id = await pg.fetchval("SELECT nextval($1)", sequence)
+    if count > 1:
+        await pg.execute("SELECT setval($1, $2)", sequence, first_id + count - 1)
+    return first_id
+
+
+async def pipeline(
+    count: int, build: Callable[[int], object], load: Callable[[object], Awaitable[None]], label: str
+) -> None:
+    """
+    Build chunks in a worker thread while the previous chunk is loaded.
+    
+    Args:
+        count: Number of chunks
+        build: Builds chunk i
+        load: Loads a built chunk
+        label: Progress label
+    """
+    loop = asyncio.get_running_loop()
+    pending = loop.run_in_executor(None, build, 0) if count else None
+    for index in range(count):
+        chunk = await pending
+        if index + 1 < count:
+            pending = loop.run_in_executor(None, build, index + 1)
+        await load(chunk)
+        print(f"{label} {index + 1}/{count}", file=sys.stderr)
+
+
+async def generate(
+    users: int,
+    products: int,
+    orders: int,
+    *,
+    categories: int = 50,
+    seed: int = 42,
+    anchor: date,
+    months: int = 24,
+    zipf: float = 1.1,
+    growth: float = 0.3,
+    max_items: int = 6,
+    chunk_size: int = 50_000,
+) -> dict:
+    """
+    Generate and load a synthetic dataset.
+    
+    Args:
+        users: Customers to create
+        products: Products to create
+        orders: Orders to create
+        categories: Categories to create
+        seed: Seed for every random choice
+        anchor: Order history ends at the start of this month
+        months: Months of order history
+        zipf: Zipf exponent of product popularity
+        growth: Year-over-year growth in order volume
+        max_items: Maximum lines per order
+        chunk_size: Rows per COPY chunk
+        
+    Returns:
+        dict: Rows loaded and seconds per table
+    """
+    end_month = month_start(anchor)
+    start_month = add_months(end_month, -months)
+    history_start = datetime.combine(start_month, datetime.min.time(), timezone.utc)
+    history_end = datetime.combine(end_month, datetime.min.time(), timezone.utc)
+    hashed_password = get_password_hash(PASSWORD)
+    counts, timings = {}, {}
+    
+    async with engine.connect() as conn:
+        pg = (await conn.get_raw_connection()).driver_connection
+        await pg.execute("SET synchronous_commit = off")
+        for statement in create_partitions_sql(start_month, end_month):
+            await pg.execute(statement)
+            
+        async def copy(table: str, rows: List[tuple], columns: Sequence[str]) -> None:
+            if rows:
+                await pg.copy_records_to_table(table, records=rows, columns=list(columns))
+            counts[table] = counts.get(table, 0) + len(rows)
+            
+        # Users; the first generated user owns the products if there is no superuser yet
+        started = time.perf_counter()
+        first_user = await reserve_ids(pg, "users", users)
+        owner_id = await pg.fetchval(
+            "SELECT id FROM users WHERE is_superuser ORDER BY id LIMIT 1"
+        ) or first_user
+        
+        async def load_users(rows: List[tuple]) -> None:
+            async with pg.transaction():
+                await copy("users", rows, USER_COLUMNS)
+                
+        user_chunks = chunks(users, chunk_size)
+        await pipeline(
+            len(user_chunks),
+            lambda i: build_users(first_user, *user_chunks[i], hashed_password, owner_id),
+            load_users,
+            "users",
+        )
+        timings["users"] = time.perf_counter() - started
+        
+        # Categories and products
+        started = time.perf_counter()
+        first_category = await reserve_ids(pg, "categories", categories)
+        category_ids = range(first_category, first_category + categories)
+        async with pg.transaction():
+            await copy(
+                "categories",
+                [(id, f"Category {id}", f"Generated category {id}") for id in category_ids],
+                CATEGORY_COLUMNS,
+            )
+            
+        first_product = await reserve_ids(pg, "products", products)
+        category_sampler = ZipfSampler(categories, 0.8)
+        prices = array("d", bytes(8 * products))
+        
+        async def load_products(chunk: Tuple[List[tuple], List[tuple]]) -> None:
+            async with pg.transaction():
+                await copy("products", chunk[0], PRODUCT_COLUMNS)
+                await copy("product_categories", chunk[1], PRODUCT_CATEGORY_COLUMNS)
+                
+        product_chunks = chunks(products, chunk_size)
+        await pipeline(
+            len(product_chunks),
+            lambda i: build_products(
+                seed, i, first_product, *product_chunks[i],
+                owner_id, category_ids, category_sampler, prices,
+            ),
+            load_products,
+            "products",
+        )
+        timings["products"] = time.perf_counter() - started
+        
+        # Orders and their items, popular products first in a seeded shuffle
+        started = time.perf_counter()
+        product_ids = list(range(first_product, first_product + products))
+        shuffled_prices = array("d", prices)
+        order = list(range(products))
+        random.Random(f"{seed}:popularity").shuffle(order)
+        for rank, position in enumerate(order):
+            product_ids[rank] = first_product + position
+            shuffled_prices[rank] = prices[position]
+        customer_ids = list(range(first_user, first_user + users))
+        random.Random(f"{seed}:customers").shuffle(customer_ids)
+        
+        days = day_weights(start_month, (end_month - start_month).days, growth)
+        item_count_weights = [0.55 ** count for count in range(max_items)]
+        first_order = await reserve_ids(pg, "orders", orders)
+        popularity = ZipfSampler(products, zipf)
+        customer_sampler = ZipfSampler(users, 0.5)
+        
+        async def load_orders(chunk: Tuple[List[tuple], List[tuple]]) -> None:
+            async with pg.transaction():
+                await copy("orders", chunk[0], ORDER_COLUMNS)
+                await copy("order_items", chunk[1], ORDER_ITEM_COLUMNS)
+                
+        order_chunks = chunks(orders, chunk_size)
+        await pipeline(
+            len(order_chunks),
+            lambda i: build_orders(
+                seed, i, first_order, *order_chunks[i],
+                history_start, history_end, days,
+                customer_ids, customer_sampler, product_ids, popularity,
+                shuffled_prices, item_count_weights,
+            ),
+            load_orders,
+            "orders",
+        )
+        timings["orders"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for table in counts:
+            await pg.execute(f"ANALYZE {table}")
+        timings["analyze"] = time.perf_counter() - started
+        
+    await engine.dispose()
+    total_seconds = sum(timings.values())
+    return {
+        "seed": seed,
+        "history": [start_month.isoformat(), end_month.isoformat()],
+        "rows": counts,
+        "seconds": {step: round(value, 2) for step, value in timings.items()},
+        "rows_per_second": round(sum(counts.values()) / total_seconds) if total_seconds else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=date.today(),
+                        help="order history ends at the start of this month (YYYY-MM-DD)")
+    parser.add_argument("--months", type=int, default=24, help="months of order history")
+    parser.add_argument("--zipf", type=float, default=1.1,
+                        help="Zipf exponent of product popularity")
+    parser.add_argument("--growth", type=float, default=0.3,
+                        help="year-over-year growth in order volume")
+    parser.add_argument("--max-items", type=int, default=6, help="maximum lines per order")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per COPY")
+    args = parser.parse_args()
+    
+    for key in ("users", "products", "orders", "categories"):
+        if getattr(args, key) < 1:
+            parser.error(f"--{key} must be at least 1")
+            
+    result = asyncio.run(generate(
+        args.users,
+        args.products,
+        args.orders,
+        categories=args.categories,
+        seed=args.seed,
+        anchor=args.anchor,
+        months=args.months,
+        zipf=args.zipf,
+        growth=args.growth,
+        max_items=args.max_items,
+        chunk_size=args.chunk_size,
+    ))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,100 @@
+"""
+Maintenance script for the monthly orders/order_items partitions.
+
+Creates partitions ahead of the current month and detaches partitions
+older than the retention window, optionally archiving them into another
+schema or dropping them. Run it from cron, e.g. daily:
+
+    python scripts/manage_partitions.py --months-ahead 3 --retain-months 24
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.db.partitions import (
+    LIST_PARTITIONS_SQL,
+    PARTITIONED_TABLES,
+    add_months,
+    create_partitions_sql,
+    detach_partition_sql,
+    month_start,
+    partition_month,
+)
+from app.db.session import engine
+
+
+async def manage_partitions(
+    months_ahead: int,
+    retain_months: int = None,
+    archive_schema: str = None,
+    drop: bool = False,
+    dry_run: bool = False,
+) -> None:
+    """
+    Create upcoming partitions and retire expired ones.
+    
+    Args:
+        months_ahead: Months after the current one to create partitions for
+        retain_months: Months of history to keep attached (None keeps all)
+        archive_schema: Schema to move detached partitions into
+        drop: Drop detached partitions instead of keeping them
+        dry_run: Print the statements without running them
+    """
+    current = month_start(datetime.now(timezone.utc))
+    statements = create_partitions_sql(
+        current, add_months(current, months_ahead), move_default_rows=True
+    )
+    
+    async with engine.begin() as conn:
+        if retain_months is not None:
+            cutoff = add_months(current, -retain_months)
+            # Items reference orders, so their partitions are detached first
+            for table in reversed(PARTITIONED_TABLES):
+                result = await conn.execute(text(LIST_PARTITIONS_SQL), {"table": table})
+                for name in result.scalars().all():
+                    month = partition_month(table, name)
+                    if month is not None and month < cutoff:
+                        statements.extend(
+                            detach_partition_sql(
+                                table, month, archive_schema=archive_schema, drop=drop
+                            )
+                        )
+                        
+        for statement in statements:
+            print(statement)
+            if not dry_run:
+                await conn.execute(text(statement))
+                
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=3,
+                        help="months after the current one to create partitions for")
+    parser.add_argument("--retain-months", type=int, default=None,
+                        help="months of history to keep attached (default: keep all)")
+    parser.add_argument("--archive-schema", default=None,
+                        help="schema to move detached partitions into")
+    parser.add_argument("--drop", action="store_true",
+                        help="drop detached partitions instead of keeping them")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the statements without running them")
+    args = parser.parse_args()
+    
+    asyncio.run(
+        manage_partitions(
+            months_ahead=args.months_ahead,
+            retain_months=args.retain_months,
+            archive_schema=args.archive_schema,
+            drop=args.drop,
+            dry_run=args.dry_run,
+        )
+    )
@@ -252,6 +252,7 @@ async def create_orders(db: AsyncSession, users: list, products: list) -> None:
             for item_data in order_items_data:
                 order_item = OrderItem(
                     order_id=order.id,
+                    order_date=order.order_date,
                     product_id=item_data['product'].id,
                     quantity=item_data['quantity'],
                     unit_price=item_data['unit_price']
@@ -0,0 +1,13 @@
+"""
+Hand-driven clock for tests of time-based behaviour.
+"""
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
@@ -2,56 +2,151 @@
 Test configuration and utilities.
 """
 
+import asyncio
 import os
 import pytest
-from typing import Dict, Generator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, Generator
+
+# Read when the app is built: a busy test machine's loop lag must not get
+# test requests rejected
+os.environ["LOAD_SHEDDING_ENABLED"] = "False"
+
+from fastapi import Request
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
+from app.api import deps
 from app.main import app
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import get_db
+from app.core.security import pwd_context
+from app.crud import user as crud_user
+from app.schemas.schemas import UserCreate
+from tests.database import (
+    TransactionalDatabase,
+    clone_postgres_database,
+    create_sqlite_database,
+    create_test_engine,
+    drop_postgres_database,
+    worker_id,
+)
 
-# Test database configuration
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Full-cost hashing only slows tests down, and so would calibrating it
+pwd_context.update(bcrypt__rounds=4)
+settings.PASSWORD_HASH_TARGET_MS = 0
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Requests use the test database, never the application's connection pools
+settings.DB_WARMUP_ENABLED = False
+
+# Fixtures log in far more often than the login limits allow
+settings.RATE_LIMIT_ENABLED = False
 
+# Revocations apply in the test process at once; the background reload
+# would read the application's database rather than the test database
+settings.TOKEN_DENYLIST_SYNC_SECONDS = 0
 
-def override_get_db():
-    """Override database dependency for testing."""
+# The running test's database; requests made by the test use it
+_current: Dict[str, TransactionalDatabase] = {}
+
+
+async def override_get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Override database dependencies with a session in the test's transaction.
+    
+    A request gets one session for all its dependencies: sessions sharing
+    the test's connection must not close their SAVEPOINTs out of order.
+    """
+    session = getattr(request.state, "test_session", None)
+    if session is not None:
+        yield session
+        return
+    session = request.state.test_session = await _current["database"].session()
     try:
-        db = TestingSessionLocal()
-        yield db
+        yield session
     finally:
-        db.close()
+        await session.close()
 
 
-app.dependency_overrides[get_db] = override_get_db
+@asynccontextmanager
+async def test_session() -> AsyncIterator[AsyncSession]:
+    """Open a session in the test's transaction, e.g. for background tasks."""
+    session = await _current["database"].session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
 
+app.dependency_overrides[deps.get_db] = override_get_db
+app.dependency_overrides[deps.get_read_db] = override_get_db
+app.dependency_overrides[deps.get_session_factory] = lambda: test_session
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_test_db():
-    """Create test database tables."""
-    # Remove existing test database
-    if os.path.exists("./test.db"):
-        os.remove("./test.db")
+
+def pytest_collection_modifyitems(config, items) -> None:
+    """
+    Skip tests using both the client and db fixtures on PostgreSQL.
     
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
+    Both use the test's one connection, from two event loops (the
+    TestClient's and pytest's); only aiosqlite connections allow that.
+    """
+    if not os.getenv("TEST_DATABASE_URL"):
+        return
+    skip = pytest.mark.skip(
+        reason="shares the test connection between the TestClient's and pytest's "
+        "event loops, which only the SQLite test database supports"
+    )
+    for item in items:
+        if {"client", "db"} <= set(getattr(item, "fixturenames", ())):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory) -> Generator[str, None, None]:
+    """
+    Create this worker's test database.
     
-    # Clean up test database
-    if os.path.exists("./test.db"):
-        os.remove("./test.db")
+    Uses a clone of a migrated PostgreSQL template when TEST_DATABASE_URL
+    is set, else a SQLite file in the worker's temporary directory.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        url = asyncio.run(clone_postgres_database(url))
+        yield url
+        asyncio.run(drop_postgres_database(url))
+    else:
+        url = f"sqlite+aiosqlite:///{tmp_path_factory.getbasetemp() / f'test_{worker_id()}.db'}"
+        asyncio.run(create_sqlite_database(url))
+        yield url
+
+
+@pytest.fixture(scope="session")
+def test_engine(database_url: str) -> AsyncEngine:
+    """Engine for the worker's test database."""
+    return create_test_engine(database_url)
+
+
+@pytest.fixture(autouse=True)
+async def database(test_engine: AsyncEngine) -> AsyncGenerator[TransactionalDatabase, None]:
+    """Run each test in a transaction that is rolled back afterwards."""
+    database = TransactionalDatabase(test_engine)
+    _current["database"] = database
+    try:
+        yield database
+    finally:
+        await database.rollback()
+        _current.pop("database", None)
+        # User IDs of the rolled-back test are handed out again
+        await crud_user.token_versions.backend.clear()
+
+
+@pytest.fixture
+async def db(database: TransactionalDatabase) -> AsyncGenerator[AsyncSession, None]:
+    """Async session inside the test's transaction, for calling CRUD directly."""
+    session = await database.session()
+    try:
+        yield session
+    finally:
+        await session.close()
 
 
 @pytest.fixture(scope="module")
@@ -61,36 +156,34 @@ def client() -> Generator:
         yield c
 
 
+async def seed_superuser() -> None:
+    """Create the first superuser in the test's database if it doesn't exist."""
+    async with test_session() as db:
+        if await crud_user.get_by_username(db, username=settings.FIRST_SUPERUSER_USERNAME) is None:
+            user_in = UserCreate(
+                username=settings.FIRST_SUPERUSER_USERNAME,
+                email=settings.FIRST_SUPERUSER_EMAIL,
+                password=settings.FIRST_SUPERUSER_PASSWORD,
+            )
+            await crud_user.create(db, obj_in=user_in, is_superuser=True)
+
+
 @pytest.fixture
 def superuser_token_headers(client: TestClient) -> Dict[str, str]:
     """Get superuser authentication headers."""
-    # First create a superuser if it doesn't exist
-    superuser_data = {
-        "username": settings.FIRST_SUPERUSER_USERNAME,
-        "email": settings.FIRST_SUPERUSER_EMAIL,
-        "password": settings.FIRST_SUPERUSER_PASSWORD,
-        "full_name": "Super User",
-        "is_superuser": True
-    }
-    client.post(f"{settings.API_V1_STR}/users/", json=superuser_data)
+    # Registration cannot grant superuser rights; seed the user directly,
+    # on the client's event loop like the requests using the database
+    client.portal.call(seed_superuser)
     
     login_data = {
         "username": settings.FIRST_SUPERUSER_USERNAME,
         "password": settings.FIRST_SUPERUSER_PASSWORD,
     }
     r = client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
-    if r.status_code == 200:
-        tokens = r.json()
-        a_token = tokens["access_token"]
-        headers = {"Authorization": f"Bearer {a_token}"}
-        return headers
-    else:
-        # Fallback: try to login without creating user
-        r = client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
-        tokens = r.json()
-        a_token = tokens["access_token"]
-        headers = {"Authorization": f"Bearer {a_token}"}
-        return headers
+    tokens = r.json()
+    a_token = tokens["access_token"]
+    headers = {"Authorization": f"Bearer {a_token}"}
+    return headers
 
 
 @pytest.fixture
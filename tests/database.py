@@ -0,0 +1,255 @@
+"""
+Test database backend with per-test transactional isolation.
+
+Tests run against the database in TEST_DATABASE_URL, or against an async
+SQLite file when it is unset. Each pytest-xdist worker gets its own
+database: on PostgreSQL a clone of a template migrated to the Alembic
+head (built once and reused until the head revision changes), on SQLite
+a file in the worker's temporary directory.
+
+Every test gets one connection with an open transaction that is rolled
+back afterwards. Sessions handed to the app are bound to that connection
+with join_transaction_mode="create_savepoint", so their commits and
+rollbacks only release or roll back SAVEPOINTs and the CRUD code runs
+unchanged.
+
+The TestClient serves requests on its own event loop in another thread,
+while async tests run on pytest's loop. Only aiosqlite connections can be
+used from both, since they run their queries in a thread of their own.
+asyncpg connections are bound to the loop that opened them, so on
+PostgreSQL tests that use both the client and the db fixture are skipped
+(see conftest) and any other cross-loop use fails loudly.
+"""
+
+import asyncio
+import os
+import zlib
+from typing import Optional
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, UniqueConstraint, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.query_stats import install_query_hooks
+from app.models import models  # noqa: F401  (registers the tables)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker_id() -> str:
+    """Get the pytest-xdist worker name, or "main" without xdist."""
+    return os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+def _enable_sqlite_savepoints(engine: AsyncEngine) -> None:
+    # pysqlite's own transaction handling breaks SAVEPOINT; emit BEGIN
+    # ourselves and enforce foreign keys like PostgreSQL does
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+def create_test_engine(url: str) -> AsyncEngine:
+    """
+    Create the engine tests run against.
+
+    Connections are not pooled: each test opens one on the event loop it
+    runs on, and closes it when the test ends.
+
+    Args:
+        url: Async database URL
+
+    Returns:
+        AsyncEngine: Test engine
+    """
+    engine = create_async_engine(url, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        _enable_sqlite_savepoints(engine)
+    if settings.QUERY_STATS_ENABLED:
+        install_query_hooks(engine, settings.SLOW_QUERY_MS / 1000)
+    return engine
+
+
+def _sqlite_metadata() -> MetaData:
+    """
+    Copy the schema in a form SQLite can create.
+
+    SQLite only generates ids for single-column integer primary keys, so the
+    tables keyed by (id, order_date) for partitioning are keyed by id alone,
+    with (id, order_date) kept unique for the items' foreign key.
+    """
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        key = copy.primary_key.columns
+        if len(key) > 1 and "id" in key and copy.c.id.autoincrement is True:
+            for column in key:
+                column.primary_key = column.name == "id"
+            copy.append_constraint(UniqueConstraint(*key))
+            copy.append_constraint(PrimaryKeyConstraint(copy.c.id))
+    return metadata
+
+
+async def create_sqlite_database(url: str) -> None:
+    """
+    Create all tables in a fresh SQLite database.
+
+    Args:
+        url: sqlite+aiosqlite URL of the database file
+    """
+    path = make_url(url).database
+    if path and os.path.exists(path):
+        os.remove(path)
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(_sqlite_metadata().create_all)
+    await engine.dispose()
+
+
+def _migrate(url: str) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.attributes["database_url"] = url
+    command.upgrade(config, "head")
+
+
+def _head_revision() -> str:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return "_".join(sorted(ScriptDirectory.from_config(config).get_heads()))
+
+
+async def clone_postgres_database(url: str) -> str:
+    """
+    Create this worker's database as a clone of the migrated template.
+
+    The template is named after the Alembic head, so it is rebuilt only
+    when migrations change. Workers build it under an advisory lock.
+
+    Args:
+        url: postgresql+asyncpg URL; its database name is the prefix
+
+    Returns:
+        str: URL of the worker's database
+    """
+    base = make_url(url)
+    template = f"{base.database}_template_{_head_revision()}"
+    database = f"{base.database}_{worker_id()}"
+    admin = create_async_engine(
+        base.set(database="postgres"), poolclass=NullPool, isolation_level="AUTOCOMMIT"
+    )
+
+    async with admin.connect() as conn:
+        lock = zlib.crc32(template.encode())
+        await conn.execute(text("SELECT pg_advisory_lock(:lock)"), {"lock": lock})
+        try:
+            exists = await conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": template}
+            )
+            if not exists:
+                await conn.execute(text(f'CREATE DATABASE "{template}"'))
+                template_url = base.set(database=template).render_as_string(hide_password=False)
+                await asyncio.get_running_loop().run_in_executor(
+                    None, _migrate, template_url.replace("+asyncpg", "")
+                )
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:lock)"), {"lock": lock})
+
+        await conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        await conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{template}"'))
+    await admin.dispose()
+    return base.set(database=database).render_as_string(hide_password=False)
+
+
+async def drop_postgres_database(url: str) -> None:
+    """
+    Drop a worker's database.
+
+    Args:
+        url: URL of the worker's database
+    """
+    target = make_url(url)
+    admin = create_async_engine(
+        target.set(database="postgres"), poolclass=NullPool, isolation_level="AUTOCOMMIT"
+    )
+    async with admin.connect() as conn:
+        await conn.execute(text(f'DROP DATABASE IF EXISTS "{target.database}" WITH (FORCE)'))
+    await admin.dispose()
+
+
+class TransactionalDatabase:
+    """One test's connection, whose outer transaction is rolled back."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.connection = None
+        self.transaction = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def session(self) -> AsyncSession:
+        """
+        Get a session inside the test's transaction.
+
+        The connection is opened on first use, on the calling event loop
+        (the test's, or a TestClient's).
+
+        Returns:
+            AsyncSession: Session whose commits release SAVEPOINTs
+        """
+        if self.connection is None:
+            self.loop = asyncio.get_running_loop()
+            self.connection = await self.engine.connect()
+            self.transaction = await self.connection.begin()
+        elif self.loop is not asyncio.get_running_loop() and not self.shares_loops:
+            raise RuntimeError(
+                f"The test's {self.engine.dialect.name} connection was opened on another "
+                "event loop; only SQLite test databases can serve the TestClient and "
+                "the test itself at once"
+            )
+        return AsyncSession(
+            bind=self.connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+            autoflush=False,
+        )
+
+    @property
+    def shares_loops(self) -> bool:
+        """Whether the connection can be used from several event loops."""
+        return self.engine.dialect.name == "sqlite"
+
+    async def _rollback(self) -> None:
+        try:
+            await self.transaction.rollback()
+        finally:
+            await self.connection.close()
+
+    async def rollback(self) -> None:
+        """Roll back everything the test wrote and close the connection."""
+        if self.connection is None:
+            return
+        loop, self.loop = self.loop, None
+        try:
+            if loop is not asyncio.get_running_loop() and loop.is_running():
+                # Opened by a TestClient, whose loop runs in another thread
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._rollback(), loop))
+            else:
+                await self._rollback()
+        finally:
+            self.connection = self.transaction = None
@@ -0,0 +1,251 @@
+"""
+Tests for cache backends and the product cache.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import InMemoryCache, RedisCache, create_cache_backend
+from app.crud.product_cache import ProductCache
+from tests.clock import FakeClock
+
+
+class FakeProduct:
+    """Stand-in for a Product row with the attributes the schema reads."""
+
+    def __init__(self, id: int, name: str = "Widget", inventory: int = 10):
+        self.id = id
+        self.name = name
+        self.description = None
+        self.price = 9.99
+        self.inventory = inventory
+        self.sku = None
+        self.image_url = None
+        self.owner_id = 1
+        self.created_at = datetime(2026, 1, 1)
+        self.updated_at = None
+        self.categories = []
+
+
+def redis_backend():
+    """Create a Redis backend on a fakeredis stand-in."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from fakeredis.aioredis import FakeRedis
+
+    return RedisCache(FakeRedis(server=fakeredis.FakeServer()))
+
+
+class TestInMemoryCache:
+    """Test the in-process cache backend."""
+
+    @pytest.mark.unit
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL."""
+        clock = FakeClock()
+        cache = InMemoryCache(clock=clock)
+        
+        async def run():
+            await cache.set("a", 1, ttl=5)
+            assert await cache.get("a") == 1
+            clock.now += 6
+            assert await cache.get("a") is None
+            
+        asyncio.run(run())
+
+    @pytest.mark.unit
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = InMemoryCache(max_entries=2)
+        
+        async def run():
+            await cache.set("a", 1, ttl=60)
+            await cache.set("b", 2, ttl=60)
+            await cache.get("a")
+            await cache.set("c", 3, ttl=60)
+            return await cache.get("a"), await cache.get("b"), await cache.get("c")
+            
+        assert asyncio.run(run()) == (1, None, 3)
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+
+    @pytest.mark.unit
+    def test_counters_survive_eviction(self):
+        """Test that counters are not evicted by cached entries."""
+        cache = InMemoryCache(max_entries=1)
+        
+        async def run():
+            await cache.incr("gen")
+            await cache.set("a", 1, ttl=60)
+            await cache.set("b", 2, ttl=60)
+            return await cache.incr("gen")
+            
+        assert asyncio.run(run()) == 2
+
+    @pytest.mark.unit
+    def test_redis_counters_never_expire(self):
+        """Test that on Redis only entries get a TTL, so volatile-lru spares counters."""
+        cache = redis_backend()
+        
+        async def run():
+            await cache.incr("gen")
+            await cache.set("a", 1, ttl=60)
+            return await cache.client.ttl("forsit:gen"), await cache.client.ttl("forsit:a")
+            
+        counter_ttl, entry_ttl = asyncio.run(run())
+        
+        assert counter_ttl == -1
+        assert 0 < entry_ttl <= 60
+
+    @pytest.mark.unit
+    def test_create_backend_from_url(self):
+        """Test choosing a backend by URL."""
+        assert isinstance(create_cache_backend("memory://"), InMemoryCache)
+        with pytest.raises(ValueError):
+            create_cache_backend("memcached://localhost")
+
+
+class TestProductCache:
+    """Test read-through caching and invalidation of products."""
+
+    @pytest.fixture(params=["memory", "redis"])
+    def cache(self, request):
+        """Create a product cache on each backend."""
+        backend = InMemoryCache() if request.param == "memory" else redis_backend()
+        return ProductCache(backend, ttl=60, list_ttl=60)
+
+    @pytest.mark.products
+    def test_read_through(self, cache):
+        """Test that only the first read hits the loader."""
+        rows = {1: FakeProduct(1)}
+        loads = []
+        
+        async def load():
+            loads.append(1)
+            return rows.get(1)
+            
+        async def run():
+            first = await cache.get(1, load)
+            second = await cache.get(1, load)
+            return first, second
+            
+        first, second = asyncio.run(run())
+        
+        assert first == second
+        assert first["name"] == "Widget"
+        assert len(loads) == 1
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.hit_ratio == 0.5
+
+    @pytest.mark.products
+    def test_invalidate_product_and_pages(self, cache):
+        """Test that writes invalidate the product and every listing page."""
+        rows = {1: FakeProduct(1, inventory=10)}
+        
+        async def load_one():
+            return rows[1]
+            
+        async def load_page():
+            return list(rows.values())
+            
+        async def run():
+            await cache.get(1, load_one)
+            await cache.get_page(0, 100, load_page)
+            rows[1] = FakeProduct(1, inventory=7)
+            stale = (await cache.get(1, load_one))["inventory"]
+            await cache.invalidate([1])
+            return (
+                stale,
+                (await cache.get(1, load_one))["inventory"],
+                (await cache.get_page(0, 100, load_page))[0]["inventory"],
+            )
+            
+        assert asyncio.run(run()) == (10, 7, 7)
+
+    @pytest.mark.products
+    def test_fill_racing_a_write_is_not_served(self, cache):
+        """Test that a load that started before an invalidation is not cached."""
+        rows = {1: FakeProduct(1, inventory=10)}
+        
+        async def load_racing_write():
+            # The row is read, then another request writes and invalidates
+            # before this load fills the cache
+            row = rows[1]
+            rows[1] = FakeProduct(1, inventory=7)
+            await cache.invalidate([1])
+            return row
+            
+        async def load_one():
+            return rows[1]
+            
+        async def run():
+            racing = (await cache.get(1, load_racing_write))["inventory"]
+            return racing, (await cache.get(1, load_one))["inventory"]
+            
+        assert asyncio.run(run()) == (10, 7)
+
+    @pytest.mark.products
+    def test_missing_products_are_not_cached(self, cache):
+        """Test that a miss for an unknown product is retried next time."""
+        loads = []
+        
+        async def load():
+            loads.append(1)
+            return None
+            
+        async def run():
+            await cache.get(404, load)
+            await cache.get(404, load)
+            
+        asyncio.run(run())
+        
+        assert len(loads) == 2
+
+    @pytest.mark.products
+    def test_disabled_cache_always_loads(self):
+        """Test that a disabled cache passes every read through."""
+        cache = ProductCache(InMemoryCache(), enabled=False)
+        loads = []
+        
+        async def load():
+            loads.append(1)
+            return FakeProduct(1)
+            
+        async def run():
+            await cache.get(1, load)
+            await cache.get(1, load)
+            
+        asyncio.run(run())
+        
+        assert len(loads) == 2
+
+    @pytest.mark.products
+    def test_version_mismatch_reloads(self, cache):
+        """Test that a cached entry older than the probed version is reloaded."""
+        rows = {1: FakeProduct(1, inventory=10)}
+        
+        async def load_one():
+            return rows[1]
+            
+        async def load_page():
+            return list(rows.values())
+            
+        async def run():
+            await cache.get(1, load_one)
+            await cache.get_page(0, 100, load_page)
+            # Changed through another worker, so nothing was invalidated here
+            rows[1] = FakeProduct(1, inventory=7)
+            rows[1].updated_at = datetime(2026, 1, 2)
+            version = (1, datetime(2026, 1, 2))
+            page_version = (1, 1, 1, 1, datetime(2026, 1, 2))
+            return (
+                (await cache.get(1, load_one))["inventory"],
+                (await cache.get(1, load_one, version))["inventory"],
+                (await cache.get_page(0, 100, load_page, page_version))[0]["inventory"],
+                (await cache.get(1, load_one, version))["inventory"],
+            )
+            
+        assert asyncio.run(run()) == (10, 7, 7, 7)
+        assert cache.stats.hits == 2
@@ -0,0 +1,174 @@
+"""
+Tests for response compression and precompressed bodies.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import responses
+from app.core.compression import available_codecs, is_compressible, negotiate
+from app.core.config import settings
+from app.middleware.compression import CompressionMiddleware
+
+PAYLOAD = '{"items": [' + ", ".join(['{"name": "Widget", "price": 9.99}'] * 200) + "]}"
+
+
+def make_app(**options) -> FastAPI:
+    """Build a small app behind the compression middleware."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, encodings=("gzip",), **options)
+
+    @app.get("/large")
+    def large():
+        return Response(PAYLOAD, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return Response('{"ok": true}', media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/precompressed")
+    def precompressed():
+        return Response(
+            gzip.compress(PAYLOAD.encode()),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (PAYLOAD[i:i + 500] for i in range(0, len(PAYLOAD), 500)),
+            media_type="text/plain",
+        )
+
+    return app
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("header,expected", [
+        ("gzip, deflate, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("*;q=0.5, br;q=0", "zstd"),
+        ("identity", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_negotiate(self, header, expected):
+        """Test q-values, wildcards and server preference on ties."""
+        assert negotiate(header, ["br", "zstd", "gzip"]) == expected
+
+    @pytest.mark.unit
+    def test_compressible_types(self):
+        """Test which media types are compressed."""
+        assert is_compressible("application/json")
+        assert is_compressible("text/csv; charset=utf-8")
+        assert is_compressible("application/problem+json")
+        assert not is_compressible("image/png")
+        assert not is_compressible(None)
+
+    @pytest.mark.unit
+    def test_codecs_round_trip(self):
+        """Test one-shot and streamed compression for each codec."""
+        data = PAYLOAD.encode()
+        for codec in available_codecs().values():
+            assert codec.decompress(codec.compress(data, codec.level)) == data
+
+            stream = codec.stream(codec.level)
+            chunks = [stream.compress(data[i:i + 700]) for i in range(0, len(data), 700)]
+            assert codec.decompress(b"".join(chunks) + stream.finish()) == data
+
+
+class TestCompressionMiddleware:
+    """Test the compression middleware."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client for the small app."""
+        return TestClient(make_app(minimum_size=1024))
+
+    @pytest.mark.unit
+    def test_large_response_is_compressed(self, client):
+        """Test that a response over the threshold is gzip encoded."""
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(PAYLOAD)
+        assert response.text == PAYLOAD
+
+    @pytest.mark.unit
+    def test_skipped_responses(self, client):
+        """Test small, binary and identity-only responses stay uncompressed."""
+        for path in ("/small", "/image"):
+            response = client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers
+
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.unit
+    def test_precompressed_passes_through(self, client):
+        """Test that an encoded body is not compressed twice."""
+        response = client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == PAYLOAD
+
+    @pytest.mark.unit
+    def test_streaming_response(self, client):
+        """Test that streamed bodies are compressed chunk by chunk."""
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == PAYLOAD
+
+
+class TestVersionedJson:
+    """Test precompressed bodies for versioned responses."""
+
+    @pytest.mark.unit
+    def test_body_reused_without_loading(self, monkeypatch):
+        """Test that a second request for an ETag skips the loader."""
+        monkeypatch.setattr(settings, "COMPRESSION_ENABLED", True)
+        monkeypatch.setattr(settings, "COMPRESSION_ENCODINGS", ["gzip"])
+        monkeypatch.setattr(settings, "COMPRESSION_MINIMUM_SIZE", 100)
+        asyncio.run(responses.body_cache.clear())
+        content = [{"name": "Widget", "price": 9.99}] * 50
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return content
+
+        async def serve():
+            request = Request({
+                "type": "http",
+                "headers": [(b"accept-encoding", b"gzip")],
+            })
+            sub_response = Response()
+            sub_response.headers["ETag"] = 'W/"v1"'
+            return await responses.versioned_json(request, sub_response, 'W/"v1"', load)
+
+        first = asyncio.run(serve())
+        second = asyncio.run(serve())
+
+        assert len(loads) == 1
+        assert first.body == second.body
+        assert second.headers["content-encoding"] == "gzip"
+        assert second.headers["etag"] == 'W/"v1"'
+        assert gzip.decompress(second.body) == responses.render_json(content)
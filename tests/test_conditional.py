@@ -0,0 +1,89 @@
+"""
+Tests for HTTP conditional request helpers.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app.api.conditional import (
+    format_http_date,
+    is_not_modified,
+    make_etag,
+    not_modified,
+)
+
+MODIFIED = datetime(2026, 10, 19, 9, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def make_request(**headers) -> Request:
+    """Build a GET request with the given headers."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [
+            (name.replace("_", "-").lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+    })
+
+
+class TestConditional:
+    """Test ETag and Last-Modified validation."""
+
+    @pytest.mark.unit
+    def test_etag_is_weak_and_stable(self):
+        """Test that equal versions give equal tags."""
+        etag = make_etag("product", 1, MODIFIED)
+
+        assert etag.startswith('W/"')
+        assert etag == make_etag("product", 1, MODIFIED)
+        assert etag != make_etag("product", 2, MODIFIED)
+
+    @pytest.mark.unit
+    def test_if_none_match(self):
+        """Test weak comparison against a list of tags."""
+        etag = make_etag("product", 1, MODIFIED)
+        opaque = etag[2:]
+
+        assert is_not_modified(make_request(if_none_match=etag), etag)
+        assert is_not_modified(make_request(if_none_match=f'"x", {opaque}'), etag)
+        assert is_not_modified(make_request(if_none_match="*"), etag)
+        assert not is_not_modified(make_request(if_none_match='"x"'), etag)
+        assert not is_not_modified(make_request(), etag, MODIFIED)
+
+    @pytest.mark.unit
+    def test_if_modified_since(self):
+        """Test date comparison at second resolution."""
+        etag = make_etag("product", 1, MODIFIED)
+        current = format_http_date(MODIFIED)
+        older = format_http_date(datetime(2026, 10, 19, 9, 30, 14))
+
+        assert current == "Mon, 19 Oct 2026 09:30:15 GMT"
+        assert is_not_modified(make_request(if_modified_since=current), etag, MODIFIED)
+        assert not is_not_modified(make_request(if_modified_since=older), etag, MODIFIED)
+        assert not is_not_modified(make_request(if_modified_since="garbage"), etag, MODIFIED)
+
+    @pytest.mark.unit
+    def test_if_none_match_takes_precedence(self):
+        """Test that a stale tag wins over a matching date."""
+        etag = make_etag("product", 1, MODIFIED)
+        request = make_request(
+            if_none_match='"stale"', if_modified_since=format_http_date(MODIFIED)
+        )
+
+        assert not is_not_modified(request, etag, MODIFIED)
+
+    @pytest.mark.unit
+    def test_not_modified_response(self):
+        """Test the empty 304 response and its headers."""
+        etag = make_etag("product", 1, MODIFIED)
+        response = not_modified(etag, MODIFIED)
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+        assert response.headers["last-modified"] == "Mon, 19 Oct 2026 09:30:15 GMT"
+        assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,67 @@
+"""
+Tests for the generic CRUD field mapping.
+"""
+
+import asyncio
+
+import pytest
+
+from app.crud.base import CRUDBase
+from app.models.models import Category, Product
+from app.schemas.schemas import CategoryCreate, ProductUpdate
+
+
+class RecordingSession:
+    """Session stand-in that records writes without a database."""
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+class TestCRUDBaseMapping:
+    """Test create/update against the precomputed column map."""
+
+    @pytest.mark.unit
+    def test_column_keys_exclude_relationships(self):
+        """Test that only mapped columns are writable."""
+        keys = CRUDBase(Product).column_keys
+
+        assert {"id", "name", "price", "inventory", "owner_id", "updated_at"} <= keys
+        assert not keys & {"owner", "categories", "order_items"}
+
+    @pytest.mark.unit
+    def test_create_maps_schema_fields(self):
+        """Test that create builds the row from the input schema."""
+        db = RecordingSession()
+
+        db_obj = asyncio.run(
+            CRUDBase(Category).create(
+                db, obj_in=CategoryCreate(name="Tools", description="Hand tools")
+            )
+        )
+
+        assert db.added == [db_obj]
+        assert (db_obj.name, db_obj.description) == ("Tools", "Hand tools")
+
+    @pytest.mark.unit
+    def test_update_sets_only_columns(self):
+        """Test that unset fields and non-column keys are left alone."""
+        db_obj = Product(name="Widget", price=1.0, inventory=5)
+        crud = CRUDBase(Product)
+
+        asyncio.run(crud.update(RecordingSession(), db_obj=db_obj, obj_in=ProductUpdate(price=2.5)))
+        asyncio.run(
+            crud.update(RecordingSession(), db_obj=db_obj, obj_in={"inventory": 7, "categories": [1]})
+        )
+
+        assert (db_obj.name, db_obj.price, db_obj.inventory) == ("Widget", 2.5, 7)
+        assert db_obj.categories == []
@@ -0,0 +1,67 @@
+"""
+Tests for the transactional test database backend.
+"""
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.crud import user
+from app.models.models import User
+from app.schemas.schemas import UserCreate
+from tests.database import TransactionalDatabase
+
+NEW_USER = UserCreate(username="isolated", email="isolated@example.com", password="secret123")
+
+
+async def count_users(session: AsyncSession) -> int:
+    """Count users visible to a session."""
+    return await session.scalar(select(func.count()).select_from(User))
+
+
+class TestTransactionalDatabase:
+    """Test per-test isolation and SAVEPOINT-backed sessions."""
+
+    @pytest.mark.unit
+    async def test_crud_commits_stay_inside_the_test(self, db: AsyncSession):
+        """Test that CRUD commits are visible to later sessions of the same test."""
+        created = await user.create(db, obj_in=NEW_USER)
+
+        assert created.id is not None
+        assert (await user.get_by_username(db, username="isolated")).id == created.id
+
+    @pytest.mark.unit
+    async def test_rollback_discards_committed_work(self, test_engine: AsyncEngine):
+        """Test that the outer rollback undoes everything a test committed."""
+        first = TransactionalDatabase(test_engine)
+        session = await first.session()
+        before = await count_users(session)
+        await user.create(session, obj_in=NEW_USER)
+        assert await count_users(session) == before + 1
+        await session.close()
+        await first.rollback()
+
+        second = TransactionalDatabase(test_engine)
+        session = await second.session()
+        try:
+            assert await count_users(session) == before
+        finally:
+            await session.close()
+            await second.rollback()
+
+    @pytest.mark.unit
+    async def test_session_rollback_keeps_the_test_transaction(self, database: TransactionalDatabase):
+        """Test that an app-level rollback only undoes its own SAVEPOINT."""
+        session = await database.session()
+        await user.create(session, obj_in=NEW_USER)
+        session.add(User(username="pending", email="pending@example.com", hashed_password="x"))
+        await session.flush()
+        await session.rollback()
+        await session.close()
+
+        session = await database.session()
+        names = set((await session.scalars(select(User.username))).all())
+        await session.close()
+
+        assert "isolated" in names
+        assert "pending" not in names
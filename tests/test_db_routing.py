@@ -0,0 +1,191 @@
+"""
+Tests for read replica routing.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from starlette.requests import Request
+
+from app.api.deps import primary_until
+from app.db import session as db_session
+from app.db.routing import ReplicaRouter
+from tests.clock import FakeClock
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """Create a primary and two replica SQLite stand-ins."""
+    created = {
+        name: create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        for name in ("primary", "replica1", "replica2")
+    }
+    yield created
+    for engine in created.values():
+        asyncio.run(engine.dispose())
+
+
+class TestReplicaRouting:
+    """Test choosing engines for read-only sessions."""
+
+    @pytest.mark.unit
+    def test_no_replicas_reads_primary(self, engines):
+        """Test that reads use the primary when no replica is configured."""
+        router = ReplicaRouter(engines["primary"])
+        
+        assert router.read_engine() is engines["primary"]
+
+    @pytest.mark.unit
+    def test_round_robin_over_replicas(self, engines):
+        """Test that reads are spread across healthy replicas."""
+        replicas = [engines["replica1"], engines["replica2"]]
+        router = ReplicaRouter(engines["primary"], replicas)
+        asyncio.run(router.check_replicas())
+        
+        chosen = [router.read_engine() for _ in range(4)]
+        
+        assert chosen == replicas * 2
+
+    @pytest.mark.unit
+    def test_sqlite_replica_serves_queries(self, engines):
+        """Test that a session on the chosen replica can run queries."""
+        router = ReplicaRouter(engines["primary"], [engines["replica1"]])
+        
+        async def run():
+            await router.check_replicas()
+            engine = router.read_engine()
+            async with engine.connect() as conn:
+                return engine, (await conn.execute(text("SELECT 1"))).scalar()
+                
+        engine, value = asyncio.run(run())
+        
+        assert engine is engines["replica1"]
+        assert value == 1
+
+    @pytest.mark.unit
+    def test_read_your_writes(self, engines):
+        """Test that a client holding a fresh write marker reads from the primary."""
+        clock = FakeClock()
+        router = ReplicaRouter(
+            engines["primary"], [engines["replica1"]], sticky_seconds=5, clock=clock
+        )
+        asyncio.run(router.check_replicas())
+        marker = router.write_marker()
+        
+        assert router.read_engine(marker) is engines["primary"]
+        assert router.read_engine() is engines["replica1"]
+        # Markers set too far ahead are not honoured
+        assert router.read_engine(clock.now + 60) is engines["replica1"]
+        
+        clock.now += 6
+        assert router.read_engine(marker) is engines["replica1"]
+
+    @pytest.mark.unit
+    def test_lagging_replica_is_skipped(self, engines):
+        """Test that replicas over the lag limit are not used."""
+        lags = {engines["replica1"]: 30.0, engines["replica2"]: 0.5}
+        
+        async def probe(engine):
+            return lags[engine]
+            
+        clock = FakeClock()
+        router = ReplicaRouter(
+            engines["primary"],
+            [engines["replica1"], engines["replica2"]],
+            max_lag=5,
+            lag_check_interval=1,
+            lag_probe=probe,
+            clock=clock,
+        )
+        
+        asyncio.run(router.check_replicas())
+        
+        assert {router.read_engine() for _ in range(4)} == {engines["replica2"]}
+        
+        # Both lagging: fall back to the primary after the next check
+        lags[engines["replica2"]] = 30.0
+        clock.now += 2
+        asyncio.run(router.check_replicas())
+        assert router.read_engine() is engines["primary"]
+
+    @pytest.mark.unit
+    def test_unchecked_or_stale_health_reads_primary(self, engines):
+        """Test that replicas are only used while the probe keeps confirming them."""
+        clock = FakeClock()
+        router = ReplicaRouter(
+            engines["primary"], [engines["replica1"]], max_lag=5, lag_check_interval=1, clock=clock
+        )
+        
+        assert router.read_engine() is engines["primary"]
+        asyncio.run(router.check_replicas())
+        assert router.read_engine() is engines["replica1"]
+        clock.now += 10
+        assert router.read_engine() is engines["primary"]
+
+    @pytest.mark.unit
+    def test_unreachable_replica_falls_back(self, engines):
+        """Test that a failing lag probe sends reads to the primary."""
+        async def probe(engine):
+            raise ConnectionError("replica down")
+            
+        router = ReplicaRouter(engines["primary"], [engines["replica1"]], lag_probe=probe)
+        asyncio.run(router.check_replicas())
+        
+        assert router.read_engine() is engines["primary"]
+
+    @pytest.mark.unit
+    def test_background_probe_does_not_block_reads(self, engines):
+        """Test that a hanging lag probe never delays choosing an engine."""
+        release = asyncio.Event()
+        
+        async def probe(engine):
+            await release.wait()
+            return 0.0
+            
+        router = ReplicaRouter(
+            engines["primary"], [engines["replica1"]], max_lag=0.05, lag_check_interval=0.01, lag_probe=probe
+        )
+        
+        async def run():
+            await router.start()
+            await asyncio.sleep(0.1)
+            chosen = router.read_engine()
+            await router.stop()
+            return chosen
+            
+        assert asyncio.run(run()) is engines["primary"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "headers, expected",
+        [
+            ([(b"x-primary-until", b"1005.5")], 1005.5),
+            ([(b"cookie", b"primary_until=1003.25")], 1003.25),
+            ([(b"cookie", b"primary_until=soon")], None),
+            ([], None),
+        ],
+    )
+    def test_marker_read_from_header_or_cookie(self, headers, expected):
+        """Test that the marker is taken from the header, else the cookie."""
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+        
+        assert primary_until(request) == expected
+
+    @pytest.mark.unit
+    def test_primary_session_leaves_replicas(self, engines, monkeypatch):
+        """Test that loads meant for the cache move replica sessions to the primary."""
+        monkeypatch.setattr(db_session._engines, "primary", engines["primary"])
+        monkeypatch.setattr(db_session._engines, "replicas", [engines["replica1"]])
+        
+        async def run():
+            on_primary = AsyncSession(bind=engines["primary"])
+            on_replica = AsyncSession(bind=engines["replica1"])
+            async with db_session.primary_session(on_primary) as session:
+                assert session is on_primary
+            async with db_session.primary_session(on_replica) as session:
+                assert session is not on_replica
+                assert session.bind is not engines["replica1"]
+                
+        asyncio.run(run())
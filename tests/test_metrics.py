@@ -0,0 +1,253 @@
+"""
+Tests for the metrics registry, exposition and multiprocess merging.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import (
+    MultiprocessStore,
+    Registry,
+    cache_collector,
+    gauge_snapshot,
+    merge_snapshots,
+    render,
+    scrape,
+)
+from app.core.cache import CacheStats
+from app.core.security import PasswordHashPool
+from app.middleware.metrics import MetricsMiddleware
+
+
+def make_app(registry: Registry) -> FastAPI:
+    """Build a small app recording into a given registry."""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/items/{id}")
+    async def item(id: int):
+        return {"id": id}
+
+    return app
+
+
+class TestRegistry:
+    """Test metric families and text exposition."""
+
+    @pytest.mark.unit
+    def test_render_counters_and_histograms(self):
+        """Test the exposition of labelled counters and histograms."""
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        requests.labels('/a"b').inc()
+        requests.labels('/a"b').inc(2)
+        latency.labels().observe(0.5)
+
+        text = render(registry.snapshot())
+
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a\\"b"} 3' in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+        assert "latency_seconds_sum 0.5" in text
+        assert "latency_seconds_count 1" in text
+
+    @pytest.mark.unit
+    def test_collected_families_are_combined(self):
+        """Test that collectors reporting the same family share one header."""
+        registry = Registry()
+        first, second = CacheStats(), CacheStats()
+        first.hits, first.misses = 3, 1
+        second.misses = 2
+        registry.register_collector(cache_collector("first", first))
+        registry.register_collector(cache_collector("second", second))
+
+        text = render(registry.snapshot())
+
+        assert text.count("# TYPE cache_hits_total counter") == 1
+        assert 'cache_hits_total{cache="first"} 3' in text
+        assert 'cache_misses_total{cache="second"} 2' in text
+        assert 'cache_hit_ratio{cache="first"} 0.75' in text
+
+
+class TestMultiprocess:
+    """Test merging snapshots written by several workers."""
+
+    @pytest.mark.unit
+    def test_merge_sums_counters_and_live_gauges(self):
+        """Test that dead workers keep their counts but drop their gauges."""
+        def worker(requests, in_flight, ratio):
+            registry = Registry()
+            registry.counter("requests_total", "Requests").labels().inc(requests)
+            registry.gauge("in_flight", "In flight").labels().set(in_flight)
+            registry.histogram("latency", "Latency", buckets=(1,)).labels().observe(requests)
+            registry.register_collector(lambda: [
+                gauge_snapshot("ratio", "Ratio", [({}, ratio)], multiprocess_mode="all")
+            ])
+            return registry.snapshot()
+
+        merged = merge_snapshots(
+            {1: worker(2, 1, 0.5), 2: worker(3, 4, 0.25), 3: worker(5, 7, 0.1)},
+            live_pids=[1, 2],
+        )
+        text = render(merged)
+
+        assert "requests_total 10" in text
+        assert "in_flight 5" in text
+        assert 'latency_bucket{le="+Inf"} 3' in text
+        assert 'ratio{pid="1"} 0.5' in text
+        assert 'ratio{pid="2"} 0.25' in text
+        assert 'pid="3"' not in text
+
+    @pytest.mark.unit
+    def test_store_round_trip(self, tmp_path):
+        """Test atomic snapshot files and merged scrapes."""
+        store = MultiprocessStore(str(tmp_path))
+        other = Registry()
+        other.counter("requests_total", "Requests").labels().inc(4)
+        store.write(other.snapshot(), instance="4242-abcd")
+
+        registry = Registry()
+        client = TestClient(make_app(registry))
+        client.get("/items/1")
+        client.get("/items/2")
+
+        assert 'http_requests_total{method="GET",route="/items/{id}",status="200"} 2' in scrape(
+            registry.snapshot(), store
+        )
+        assert not list(tmp_path.glob("*.tmp"))
+        per_process, live = store.read()
+        assert set(per_process) == {"4242-abcd", store.instance}
+        assert sorted(live) == sorted(per_process)
+
+    @pytest.mark.unit
+    def test_abandoned_files_folded_into_aggregate(self, tmp_path):
+        """Test that exited workers' counters survive in one aggregate file."""
+        now = [time.time()]
+        store = MultiprocessStore(str(tmp_path), flush_interval=5, clock=lambda: now[0])
+        for instance, requests in (("100-aaaa", 3), ("100-bbbb", 4)):
+            worker = Registry()
+            worker.counter("requests_total", "Requests").labels().inc(requests)
+            worker.gauge("in_flight", "In flight").labels().inc(2)
+            store.write(worker.snapshot(), instance=instance)
+        # The first worker stopped writing long ago; its pid was then reused
+        stale = now[0] - 60
+        os.utime(tmp_path / "metrics_100-aaaa.json", (stale, stale))
+
+        assert store.compact() == ["100-aaaa"]
+        per_process, live = store.read()
+        text = render(merge_snapshots(per_process, live))
+        assert set(per_process) == {"aggregate", "100-bbbb"}
+        assert live == ["100-bbbb"]
+        assert "requests_total 7" in text
+        assert "in_flight 2" in text
+
+        # A worker shutting down folds its own file right away
+        store.write(Registry().snapshot())
+        assert store.compact(retire=True) == [store.instance]
+        assert store.compact() == []
+        assert "requests_total 7" in render(merge_snapshots(*store.read()))
+
+    @pytest.mark.unit
+    def test_background_flush(self, tmp_path):
+        """Test that snapshots are written by the background task, not by requests."""
+        store = MultiprocessStore(str(tmp_path), flush_interval=0.01)
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests").labels()
+
+        async def run():
+            await store.start(registry)
+            counter.inc(5)
+            await asyncio.sleep(0.1)
+            written = json.loads((tmp_path / f"metrics_{store.instance}.json").read_text())
+            await store.stop(registry)
+            return written
+
+        written = asyncio.run(run())
+
+        assert written[0]["samples"][0]["value"] == 5
+        assert not (tmp_path / f"metrics_{store.instance}.json").exists()
+        assert "requests_total 5" in render(merge_snapshots(*store.read()))
+
+
+class TestMetricsMiddleware:
+    """Test request metrics."""
+
+    @pytest.mark.unit
+    def test_counts_by_route_and_status(self):
+        """Test counters and histograms keyed by route template and status."""
+        registry = Registry()
+        client = TestClient(make_app(registry))
+
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/x")
+        client.get("/missing")
+
+        text = render(registry.snapshot())
+        assert 'http_requests_total{method="GET",route="/items/{id}",status="200"} 2' in text
+        assert 'http_requests_total{method="GET",route="/items/{id}",status="422"} 1' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="/items/{id}"} 3' in text
+        assert "http_requests_in_flight 0" in text
+
+    @pytest.mark.unit
+    def test_endpoints_read_metrics_on_the_loop(self):
+        """Test that scrapes do not read live metrics from the threadpool."""
+        from app.api.endpoints.monitoring import read_metrics, read_query_stats
+
+        # Plain functions would run in a thread while the loop updates them
+        assert asyncio.iscoroutinefunction(read_metrics)
+        assert asyncio.iscoroutinefunction(read_query_stats)
+
+
+class TestPasswordHashPool:
+    """Test the password hashing thread pool."""
+
+    @pytest.mark.unit
+    def test_hash_and_verify_off_loop(self):
+        """Test hashing in the pool and its load metrics."""
+        pool = PasswordHashPool(max_workers=1)
+
+        async def run():
+            hashed = await pool.hash("secret")
+            return await asyncio.gather(
+                pool.verify("secret", hashed), pool.verify("wrong", hashed)
+            )
+
+        assert asyncio.run(run()) == [True, False]
+        assert pool.in_flight == 0
+        assert pool.seconds.count == 3
+        assert 'password_hash_duration_seconds_count 3' in render(pool.collect())
+
+
+class TestPoolWait:
+    """Test the time checkouts wait for a database connection."""
+
+    @pytest.mark.unit
+    async def test_connect_time_not_counted(self):
+        """Test that opening a new connection is not counted as waiting."""
+        from sqlalchemy import event, text
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from app.db.session import TimedQueuePool, pool_wait
+
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=TimedQueuePool)
+        event.listen(engine.sync_engine, "connect", lambda *args: time.sleep(0.2))
+        before = pool_wait.count, pool_wait.sum
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        finally:
+            await engine.dispose()
+
+        assert pool_wait.count == before[0] + 1
+        assert pool_wait.sum - before[1] < 0.1
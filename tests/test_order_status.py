@@ -0,0 +1,61 @@
+"""
+Tests for the order status state machine.
+"""
+
+import pytest
+
+from app.core.order_status import (
+    ORDER_STATUSES,
+    can_transition,
+    source_statuses,
+)
+
+
+class TestOrderStatus:
+    """Test order status transition rules."""
+
+    @pytest.mark.orders
+    @pytest.mark.parametrize(
+        "current,target",
+        [
+            ("pending", "processing"),
+            ("pending", "shipped"),
+            ("pending", "cancelled"),
+            ("processing", "shipped"),
+            ("shipped", "delivered"),
+        ],
+    )
+    def test_allowed_transitions(self, current, target):
+        """Test that forward fulfilment transitions are allowed."""
+        assert can_transition(current, target)
+
+    @pytest.mark.orders
+    @pytest.mark.parametrize(
+        "current,target",
+        [
+            ("processing", "pending"),
+            ("processing", "cancelled"),
+            ("shipped", "cancelled"),
+            ("delivered", "shipped"),
+            ("cancelled", "pending"),
+            ("pending", "pending"),
+            ("unknown", "pending"),
+        ],
+    )
+    def test_rejected_transitions(self, current, target):
+        """Test that backward, terminal and no-op transitions are rejected."""
+        assert not can_transition(current, target)
+
+    @pytest.mark.orders
+    def test_source_statuses(self):
+        """Test looking up the statuses an order can reach a target from."""
+        assert sorted(source_statuses("shipped")) == ["pending", "processing"]
+        assert source_statuses("cancelled") == ["pending"]
+        assert source_statuses("pending") == []
+
+    @pytest.mark.orders
+    def test_terminal_statuses(self):
+        """Test that delivered and cancelled orders cannot move."""
+        for target in ORDER_STATUSES:
+            assert not can_transition("delivered", target)
+            assert not can_transition("cancelled", target)
@@ -2,10 +2,58 @@
 Tests for order endpoints.
 """
 
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 
 from app.core.config import settings
+from app.crud import order, user
+from app.models.models import Order, Product
+from app.schemas.schemas import OrderCreate, OrderItemCreate, UserCreate
+
+
+async def seed_orders(
+    db, *quantities: int, inventory: int = 100, customer_id: Optional[int] = None
+) -> Tuple[int, List[int]]:
+    """
+    Place one order per quantity of a new product.
+
+    Orders are placed for customer_id, or for a new customer if not given.
+
+    Returns:
+        Tuple[int, List[int]]: Product ID and order IDs
+    """
+    if customer_id is None:
+        customer = await user.create(
+            db, obj_in=UserCreate(username="order-seed", email="order-seed@example.com", password="testpass123")
+        )
+        customer_id = customer.id
+    product = Product(name="Seeded product", price=5.0, inventory=inventory, owner_id=customer_id)
+    db.add(product)
+    await db.commit()
+    order_ids = []
+    for quantity in quantities:
+        placed = await order.create_with_items(
+            db,
+            obj_in=OrderCreate(items=[OrderItemCreate(product_id=product.id, quantity=quantity)]),
+            customer_id=customer_id,
+        )
+        order_ids.append(placed.id)
+    return product.id, order_ids
+
+
+async def inventory_of(db, product_id: int) -> int:
+    result = await db.execute(select(Product.inventory).filter(Product.id == product_id))
+    return result.scalar_one()
+
+
+async def statuses_of(db, order_ids: List[int]) -> List[str]:
+    result = await db.execute(select(Order.id, Order.status).filter(Order.id.in_(order_ids)))
+    statuses = dict(result.all())
+    return [statuses[order_id] for order_id in order_ids]
 
 
 class TestOrders:
@@ -237,3 +285,212 @@ class TestOrders:
         
         # This should fail due to foreign key constraint or validation
         assert response.status_code in [400, 422, 404]
+
+    @pytest.mark.orders
+    async def test_create_order_takes_stock_atomically(self, db):
+        """Test that an order exceeding the stock across its items changes nothing."""
+        product_id, _ = await seed_orders(db, inventory=3)
+        items = [OrderItemCreate(product_id=product_id, quantity=2)] * 2
+
+        with pytest.raises(ValueError):
+            await order.create_with_items(db, obj_in=OrderCreate(items=items), customer_id=1)
+
+        assert await inventory_of(db, product_id) == 3
+        result = await db.execute(select(Order.id).join(Order.items).filter(Order.customer_id == 1))
+        assert result.all() == []
+
+    @pytest.mark.orders
+    async def test_get_by_id_with_items_reads_one_month(self, db):
+        """Test that an order date hint restricts the lookup to that month."""
+        _, (order_id,) = await seed_orders(db, 2)
+        placed = await order.get_by_id_with_items(db, order_id=order_id)
+        next_month = placed.order_date + timedelta(days=32)
+
+        found = await order.get_by_id_with_items(db, order_id=order_id, order_date=placed.order_date)
+
+        assert found is not None
+        assert [item.quantity for item in found.items] == [2]
+        assert await order.get_by_id_with_items(db, order_id=order_id, order_date=next_month) is None
+
+    @pytest.mark.orders
+    def test_bulk_cancel_requires_superuser(self, client: TestClient, normal_user_token_headers):
+        """Test that bulk cancellation is restricted to superusers."""
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/cancel/batch",
+            json={"order_ids": [1, 2, 3]},
+            headers=normal_user_token_headers
+        )
+        
+        assert response.status_code == 403
+
+    @pytest.mark.orders
+    def test_bulk_cancel_rejects_unknown_orders(self, client: TestClient, superuser_token_headers):
+        """Test that bulk cancellation reports orders it could not cancel."""
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/cancel/batch",
+            json={"order_ids": [99998, 99999]},
+            headers=superuser_token_headers
+        )
+        
+        assert response.status_code == 200
+        content = response.json()
+        assert content["updated"] == []
+        assert content["rejected"] == [99998, 99999]
+
+    @pytest.mark.orders
+    async def test_bulk_cancel_restores_inventory(
+        self, client: TestClient, superuser_token_headers, db, monkeypatch
+    ):
+        """Test that bulk cancellation cancels pending orders and restocks their items."""
+        monkeypatch.setattr(settings, "ORDER_BULK_CHUNK_SIZE", 1)
+        product_id, order_ids = await seed_orders(db, 2, 3, inventory=10)
+        assert await inventory_of(db, product_id) == 5
+
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/cancel/batch",
+            json={"order_ids": [*order_ids, 99999]},
+            headers=superuser_token_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"updated": order_ids, "rejected": [99999]}
+        assert await statuses_of(db, order_ids) == ["cancelled", "cancelled"]
+        assert await inventory_of(db, product_id) == 10
+
+        # Cancelling again restocks nothing
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/cancel/batch",
+            json={"order_ids": order_ids},
+            headers=superuser_token_headers
+        )
+        assert response.json() == {"updated": [], "rejected": order_ids}
+        assert await inventory_of(db, product_id) == 10
+
+    @pytest.mark.orders
+    def test_batch_status_update_requires_superuser(self, client: TestClient, normal_user_token_headers):
+        """Test that batch status updates are restricted to superusers."""
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/status/batch",
+            json={"changes": [{"order_id": 1, "status": "shipped"}]},
+            headers=normal_user_token_headers
+        )
+        
+        assert response.status_code == 403
+
+    @pytest.mark.orders
+    async def test_batch_status_update_applies_allowed_transitions(
+        self, client: TestClient, superuser_token_headers, db
+    ):
+        """Test that a batch applies allowed transitions and rejects the others."""
+        product_id, (processing, skipped, shipped) = await seed_orders(db, 1, 1, 1, inventory=10)
+
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/status/batch",
+            json={"changes": [
+                {"order_id": processing, "status": "processing"},
+                {"order_id": skipped, "status": "delivered"},
+                {"order_id": shipped, "status": "shipped"},
+                {"order_id": 99999, "status": "shipped"},
+            ]},
+            headers=superuser_token_headers
+        )
+
+        assert response.status_code == 200
+        content = response.json()
+        assert sorted(content["updated"]) == sorted([processing, shipped])
+        assert sorted(content["rejected"]) == sorted([skipped, 99999])
+        assert await statuses_of(db, [processing, skipped, shipped]) == ["processing", "pending", "shipped"]
+        assert await inventory_of(db, product_id) == 7
+
+        # Orders only move forward
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/status/batch",
+            json={"changes": [{"order_id": shipped, "status": "processing"}]},
+            headers=superuser_token_headers
+        )
+        assert response.json() == {"updated": [], "rejected": [shipped]}
+
+    @pytest.mark.orders
+    async def test_customer_cannot_change_status(self, client: TestClient, normal_user_token_headers, db):
+        """Test that customers cannot move their own orders through fulfilment."""
+        customer = await user.get_by_username(db, username="testuser")
+        _, (order_id,) = await seed_orders(db, 1, customer_id=customer.id)
+
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/{order_id}",
+            json={"status": "shipped"},
+            headers=normal_user_token_headers
+        )
+
+        assert response.status_code == 403
+        assert await statuses_of(db, [order_id]) == ["pending"]
+        response = client.put(
+            f"{settings.API_V1_STR}/orders/{order_id}/cancel",
+            headers=normal_user_token_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+
+    @pytest.mark.orders
+    def test_admin_order_query_requires_superuser(self, client: TestClient, normal_user_token_headers):
+        """Test that the cross-customer order listing is restricted to superusers."""
+        response = client.get(
+            f"{settings.API_V1_STR}/orders/admin",
+            headers=normal_user_token_headers
+        )
+        
+        assert response.status_code == 403
+
+    @pytest.mark.orders
+    async def test_admin_order_query_with_counts(self, client: TestClient, superuser_token_headers, db):
+        """Test walking filtered pages of orders, each with the counts of the whole set."""
+        customer = await user.create(
+            db, obj_in=UserCreate(username="order-pages", email="order-pages@example.com", password="testpass123")
+        )
+        _, order_ids = await seed_orders(db, 1, 1, 1, 1, 1, customer_id=customer.id)
+        await order.cancel_orders(db, order_ids=order_ids[:1])
+        params = {"customer_id": customer.id, "sort_by": "id", "limit": 2, "include_counts": True}
+
+        seen = []
+        pages = 0
+        while True:
+            response = client.get(
+                f"{settings.API_V1_STR}/orders/admin",
+                params=params,
+                headers=superuser_token_headers
+            )
+            assert response.status_code == 200
+            content = response.json()
+            seen.extend(item["id"] for item in content["items"])
+            assert content["counts"]["total"] == 5
+            assert content["counts"]["by_status"]["pending"] == 4
+            assert content["counts"]["by_status"]["cancelled"] == 1
+            pages += 1
+            if not content["next_cursor"]:
+                break
+            params["cursor"] = content["next_cursor"]
+
+        assert seen == sorted(order_ids, reverse=True)
+        assert pages == 3
+
+    @pytest.mark.orders
+    async def test_admin_order_query_rejects_foreign_cursor(
+        self, client: TestClient, superuser_token_headers, db
+    ):
+        """Test that a cursor is only accepted by the sort and filters it came from."""
+        await seed_orders(db, 1, 1, 1)
+        url = f"{settings.API_V1_STR}/orders/admin"
+        response = client.get(url, params={"sort_by": "id", "limit": 1}, headers=superuser_token_headers)
+        cursor = response.json()["next_cursor"]
+        assert cursor
+
+        for params in (
+            {"sort_by": "order_date", "limit": 1, "cursor": cursor},
+            {"sort_by": "id", "limit": 1, "cursor": cursor, "status": ["pending"]},
+        ):
+            response = client.get(url, params=params, headers=superuser_token_headers)
+            assert response.status_code == 400
+        response = client.get(
+            url, params={"sort_by": "id", "limit": 1, "cursor": cursor}, headers=superuser_token_headers
+        )
+        assert response.status_code == 200
@@ -0,0 +1,53 @@
+"""
+Tests for keyset pagination cursors.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.crud.pagination import decode_cursor, encode_cursor, query_fingerprint
+
+
+class TestPagination:
+    """Test cursor encoding and decoding."""
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        """Test that cursor values survive a round trip."""
+        order_date = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        cursor = encode_cursor(order_date, 42)
+        
+        assert decode_cursor(cursor, 2) == [order_date, 42]
+        assert decode_cursor(encode_cursor(19.99, 7), 2) == [19.99, 7]
+
+    @pytest.mark.unit
+    def test_cursor_is_url_safe(self):
+        """Test that cursors can be passed as query parameters unescaped."""
+        cursor = encode_cursor("a/b+c?d", 1)
+        
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor(1, 2, 3)])
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 2)
+
+    @pytest.mark.unit
+    def test_cursor_bound_to_query(self):
+        """Test that a cursor is rejected by other queries and for wrong value types."""
+        query = query_fingerprint(sort_by="order_date", status=None)
+        order_date = datetime(2026, 1, 2, tzinfo=timezone.utc)
+        cursor = encode_cursor(order_date, 42, query=query)
+
+        assert decode_cursor(cursor, 2, query=query, types=(datetime, int)) == [order_date, 42]
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 2, query=query_fingerprint(sort_by="id", status=None))
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(order_date, 42), 2, query=query)
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(7, 42, query=query), 2, query=query, types=(datetime, int))
+        # Whole numbers are valid values for float columns
+        assert decode_cursor(encode_cursor(20, 1), 2, types=(float, int)) == [20, 1]
@@ -0,0 +1,106 @@
+"""
+Tests for the order partitioning helpers.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.db.partitions import (
+    add_months,
+    create_partition_sql,
+    create_partitions_sql,
+    detach_partition_sql,
+    iter_months,
+    month_start,
+    move_default_rows_sql,
+    partition_month,
+    partition_name,
+)
+
+
+class TestPartitions:
+    """Test monthly partition naming and DDL generation."""
+
+    @pytest.mark.unit
+    def test_month_arithmetic(self):
+        """Test month starts and month shifting across year boundaries."""
+        assert month_start(date(2026, 3, 17)) == date(2026, 3, 1)
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert list(iter_months(date(2025, 11, 5), date(2026, 1, 1))) == [
+            date(2025, 11, 1),
+            date(2025, 12, 1),
+            date(2026, 1, 1),
+        ]
+
+    @pytest.mark.unit
+    def test_month_start_uses_utc(self):
+        """Test that aware datetimes are bucketed by their UTC month."""
+        local = datetime(2026, 3, 1, 1, 0, tzinfo=timezone(timedelta(hours=5)))
+        
+        assert month_start(local) == date(2026, 2, 1)
+
+    @pytest.mark.unit
+    def test_partition_names_round_trip(self):
+        """Test that partition names can be parsed back into months."""
+        name = partition_name("orders", date(2026, 7, 1))
+        
+        assert name == "orders_p2026_07"
+        assert partition_month("orders", name) == date(2026, 7, 1)
+        assert partition_month("orders", "orders_default") is None
+        assert partition_month("orders", "order_items_p2026_07") is None
+
+    @pytest.mark.unit
+    def test_create_partition_sql(self):
+        """Test the bounds of a monthly partition."""
+        sql = create_partition_sql("orders", date(2026, 12, 1))
+        
+        assert "orders_p2026_12 PARTITION OF orders" in sql
+        assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in sql
+
+    @pytest.mark.unit
+    def test_partitions_are_co_located(self):
+        """Test that each month gets an orders and an order_items partition."""
+        statements = create_partitions_sql(date(2026, 1, 1), date(2026, 2, 1))
+        
+        assert len(statements) == 4
+        assert "orders_p2026_01 " in statements[0]
+        assert "order_items_p2026_01 " in statements[1]
+
+    @pytest.mark.unit
+    def test_default_rows_moved_into_new_partitions(self):
+        """Test that a month's default rows are stashed, partitioned and restored in order."""
+        statements = move_default_rows_sql(date(2026, 5, 1))
+        creates = [index for index, sql in enumerate(statements) if "PARTITION OF" in sql]
+        deletes = [index for index, sql in enumerate(statements) if "DELETE FROM" in sql]
+        inserts = [sql for sql in statements if sql.startswith("INSERT INTO")]
+        
+        assert "DELETE FROM order_items_default" in statements[deletes[0]]
+        assert "DELETE FROM orders_default" in statements[deletes[1]]
+        assert "order_date >= '2026-05-01 00:00:00+00' AND order_date < '2026-06-01 00:00:00+00'" in (
+            statements[deletes[0]]
+        )
+        assert max(deletes) < min(creates)
+        assert inserts == [
+            "INSERT INTO orders SELECT * FROM orders_p2026_05_moved",
+            "INSERT INTO order_items SELECT * FROM order_items_p2026_05_moved",
+        ]
+        assert statements[-2:] == inserts
+        
+        statements = create_partitions_sql(date(2026, 1, 1), date(2026, 2, 1), move_default_rows=True)
+        assert statements == move_default_rows_sql(date(2026, 1, 1)) + move_default_rows_sql(date(2026, 2, 1))
+
+    @pytest.mark.unit
+    def test_detach_partition_sql(self):
+        """Test detaching with archiving and dropping."""
+        archived = detach_partition_sql("order_items", date(2024, 1, 1), archive_schema="archive")
+        dropped = detach_partition_sql("orders", date(2024, 1, 1), drop=True)
+        
+        assert archived[0] == "ALTER TABLE order_items DETACH PARTITION order_items_p2024_01"
+        assert any("DROP CONSTRAINT" in statement for statement in archived)
+        assert archived[-1] == "ALTER TABLE order_items_p2024_01 SET SCHEMA archive"
+        assert dropped == [
+            "ALTER TABLE orders DETACH PARTITION orders_p2024_01",
+            "DROP TABLE orders_p2024_01",
+        ]
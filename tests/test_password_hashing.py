@@ -0,0 +1,141 @@
+"""
+Tests for the password hashing policy and rehashing at login.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    HASH_COST_BOUNDS,
+    calibrate_hash_cost,
+    configure_password_hashing,
+    create_pwd_context,
+    get_pwd_context,
+)
+from app.crud import user
+from app.models.models import User
+from app.schemas.schemas import UserCreate
+
+
+@pytest.fixture
+def raise_cost():
+    """Raise the bcrypt rounds hashes must have, restoring the policy afterwards."""
+    context = get_pwd_context()
+    saved = context.to_dict()
+
+    def raise_to(rounds: int) -> None:
+        context.update(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+
+    yield raise_to
+    context.load(saved)
+
+
+class TestHashPolicy:
+    """Test hashing contexts and cost calibration."""
+
+    @pytest.mark.unit
+    def test_lower_cost_needs_update(self):
+        """Test that hashes below the policy's cost verify but need an update."""
+        old_hash = create_pwd_context("bcrypt", 4).hash("secret")
+        context = create_pwd_context("bcrypt", 5)
+
+        assert context.verify("secret", old_hash)
+        assert context.needs_update(old_hash)
+        assert not context.needs_update(context.hash("secret"))
+
+    @pytest.mark.unit
+    def test_argon2id_preferred(self):
+        """Test that with argon2 preferred, bcrypt hashes verify and get replaced."""
+        pytest.importorskip("argon2")
+        bcrypt_hash = create_pwd_context("bcrypt", 4).hash("secret")
+        context = create_pwd_context("argon2", 2)
+
+        argon2_hash = context.hash("secret")
+
+        assert argon2_hash.startswith("$argon2id$")
+        assert context.verify("secret", argon2_hash)
+        assert not context.needs_update(argon2_hash)
+        assert context.verify("secret", bcrypt_hash)
+        assert context.needs_update(bcrypt_hash)
+
+    @pytest.mark.unit
+    def test_unknown_scheme(self):
+        """Test that unsupported schemes are rejected."""
+        with pytest.raises(ValueError):
+            create_pwd_context("md5_crypt")
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("scheme", ["bcrypt", "argon2"])
+    def test_calibration_stays_in_bounds(self, scheme):
+        """Test that calibration never picks a cost outside the scheme's bounds."""
+        if scheme == "argon2":
+            pytest.importorskip("argon2")
+        low, high = HASH_COST_BOUNDS[scheme]
+
+        assert calibrate_hash_cost(scheme, 0.0001, samples=1) == low
+        assert calibrate_hash_cost(scheme, 1e9, samples=1) == high
+
+    @pytest.mark.unit
+    def test_calibrated_cost_only_for_new_hashes(self, monkeypatch, raise_cost):
+        """Test that a calibrated cost does not make existing hashes outdated."""
+        monkeypatch.setattr(security, "_hash_policy", None)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "bcrypt")
+        monkeypatch.setattr(settings, "PASSWORD_HASH_COST", 0)
+        monkeypatch.setattr(settings, "PASSWORD_HASH_TARGET_MS", 250)
+        monkeypatch.setattr(security, "calibrate_hash_cost", lambda scheme, target: 12)
+        context = get_pwd_context()
+        # Start from the library defaults rather than the tests' fast hashing
+        context.load(create_pwd_context("bcrypt").to_dict())
+
+        assert configure_password_hashing().cost == 12
+
+        assert context.default_scheme() == "bcrypt"
+        assert context.to_dict()["bcrypt__default_rounds"] == 12
+        assert not context.needs_update(create_pwd_context("bcrypt", 10).hash("secret"))
+        assert context.needs_update(create_pwd_context("bcrypt", 4).hash("secret"))
+
+
+class TestRehashOnLogin:
+    """Test replacing outdated hashes after a successful login."""
+
+    @pytest.mark.auth
+    async def test_outdated_hash_replaced(self, client: TestClient, db, raise_cost):
+        """Test that a login rehashes at the current cost without revoking tokens."""
+        db_user = await user.create(
+            db, obj_in=UserCreate(username="rehash", email="rehash@example.com", password="testpass123")
+        )
+        old_hash, token_version = db_user.hashed_password, db_user.token_version
+        assert old_hash.startswith("$2b$04$")
+        raise_cost(5)
+
+        response = client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": "rehash", "password": "testpass123"},
+        )
+
+        assert response.status_code == 200
+        result = await db.execute(
+            select(User.hashed_password, User.token_version).filter(User.id == db_user.id)
+        )
+        new_hash, new_version = result.one()
+        assert new_hash.startswith("$2b$05$")
+        assert get_pwd_context().verify("testpass123", new_hash)
+        assert new_version == token_version
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert client.get(f"{settings.API_V1_STR}/orders/", headers=headers).status_code == 200
+
+    @pytest.mark.auth
+    async def test_changed_password_not_overwritten(self, db):
+        """Test that a rehash does not overwrite a password changed meanwhile."""
+        db_user = await user.create(
+            db, obj_in=UserCreate(username="rehash-race", email="race@example.com", password="testpass123")
+        )
+
+        replaced = await user.rehash_password(
+            db, user_id=db_user.id, hashed_password="$2b$04$stale", password="testpass123"
+        )
+
+        assert not replaced
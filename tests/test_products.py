@@ -172,6 +172,31 @@ class TestProducts:
         get_response = client.get(f"{settings.API_V1_STR}/products/{product_id}")
         assert get_response.status_code == 404
 
+    @pytest.mark.products
+    def test_list_not_modified_only_by_etag(self, client: TestClient, normal_user_token_headers):
+        """Test that a deletion is not hidden from If-Modified-Since requests."""
+        ids = []
+        for i in range(2):
+            response = client.post(
+                f"{settings.API_V1_STR}/products/",
+                json={"name": f"Listed {i}", "price": 5.0, "sku": f"LISTED-{i}", "inventory": 1},
+                headers=normal_user_token_headers,
+            )
+            ids.append(response.json()["id"])
+        first = client.get(f"{settings.API_V1_STR}/products/")
+        assert client.get(
+            f"{settings.API_V1_STR}/products/", headers={"If-None-Match": first.headers["ETag"]}
+        ).status_code == 304
+
+        client.delete(f"{settings.API_V1_STR}/products/{ids[0]}", headers=normal_user_token_headers)
+        response = client.get(
+            f"{settings.API_V1_STR}/products/",
+            headers={"If-Modified-Since": first.headers["Last-Modified"]},
+        )
+
+        assert response.status_code == 200
+        assert ids[0] not in [item["id"] for item in response.json()]
+
     @pytest.mark.products
     def test_search_products(self, client: TestClient, normal_user_token_headers):
         """Test searching products."""
@@ -0,0 +1,157 @@
+"""
+Tests for the sampling profiler and the event loop lag monitor.
+"""
+
+import asyncio
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.profiling import LoopLagMonitor, Profiler, ProfilerBusy, collapse, stack_of
+from app.main import app
+
+
+def _spin(seconds: float) -> None:
+    """Block the calling thread with CPU work."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfiler:
+    """Test sampling profiles of the event loop thread."""
+
+    @pytest.mark.unit
+    def test_collapse_orders_by_count(self):
+        """Test the collapsed stack format."""
+        assert collapse({"a;b": 1, "a;c": 3}) == "a;c 3\na;b 1\n"
+
+    @pytest.mark.unit
+    def test_frame_labels(self):
+        """Test that frames are labelled by function and path relative to sys.path."""
+        stack = stack_of(sys._getframe())
+
+        assert stack[-1].startswith("test_frame_labels (tests/test_profiling.py:")
+        assert stack_of(sys._getframe()) == stack
+
+    @pytest.mark.unit
+    def test_samples_code_blocking_the_loop(self):
+        """Test that stacks of a blocking coroutine are sampled, idle ones dropped."""
+        profiler = Profiler()
+
+        async def blocking():
+            await asyncio.sleep(0.05)
+            _spin(0.2)
+
+        async def run():
+            sampler, _ = await asyncio.gather(profiler.profile(0.3, 0.005), blocking())
+            return sampler
+
+        sampler = asyncio.run(run())
+
+        assert sampler.samples > sampler.idle_samples > 0
+        assert any("_spin (" in stack.split(";")[-1] for stack in sampler.stacks)
+        assert not any("selectors.py" in stack.split(";")[-1] for stack in sampler.stacks)
+
+    @pytest.mark.unit
+    def test_uvloop_idle_samples_dropped(self):
+        """Test that waiting in uvloop, which has no selector frame, counts as idle."""
+        uvloop = pytest.importorskip("uvloop")
+        profiler = Profiler()
+
+        async def blocking():
+            await asyncio.sleep(0.05)
+            _spin(0.1)
+
+        async def run():
+            sampler, _ = await asyncio.gather(profiler.profile(0.3, 0.005), blocking())
+            return sampler
+
+        # Served the way uvicorn runs its workers: asyncio.run on a uvloop loop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        try:
+            sampler = asyncio.run(run())
+        finally:
+            asyncio.set_event_loop_policy(None)
+
+        leaves = [stack.split(";")[-1] for stack in sampler.stacks]
+        assert sampler.samples > sampler.idle_samples > 0
+        assert any("_spin (" in leaf for leaf in leaves)
+        assert not any("runners.py" in leaf for leaf in leaves)
+
+    @pytest.mark.unit
+    def test_one_profile_at_a_time(self):
+        """Test that a concurrent profile is rejected."""
+        profiler = Profiler()
+
+        async def run():
+            first = asyncio.ensure_future(profiler.profile(0.05, 0.01))
+            await asyncio.sleep(0)
+            with pytest.raises(ProfilerBusy):
+                await profiler.profile(0.05, 0.01)
+            await first
+
+        asyncio.run(run())
+
+
+class TestLoopLagMonitor:
+    """Test event loop stall detection."""
+
+    @pytest.mark.unit
+    def test_records_stack_of_blocked_loop(self):
+        """Test that a stall records the blocking stack and its duration."""
+        monitor = LoopLagMonitor(threshold=0.05, interval=0.01)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            _spin(0.25)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        asyncio.run(run())
+        report = monitor.report()
+
+        assert report["stalls"] == 1
+        assert report["recent"][0]["blocked_ms"] >= 200
+        assert "_spin (" in report["recent"][0]["stack"][-1]
+        assert "_spin (" in monitor.collapsed()
+        assert monitor.lag.count > 0
+
+
+class TestProfilingEndpoints:
+    """Test the superuser profiling endpoints."""
+
+    @pytest.fixture
+    def client(self):
+        """Client authenticated as a superuser."""
+        app.dependency_overrides[deps.get_current_active_superuser] = lambda: object()
+        yield TestClient(app)
+        app.dependency_overrides.pop(deps.get_current_active_superuser)
+
+    @pytest.mark.unit
+    def test_profile_returns_collapsed_stacks(self, client):
+        """Test the profile endpoint response."""
+        response = client.get("/api/v1/monitoring/profile", params={"seconds": 0.05})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["x-profile-samples"]) > 0
+
+    @pytest.mark.unit
+    def test_profile_duration_is_bounded(self, client):
+        """Test that overly long profiles are rejected."""
+        response = client.get("/api/v1/monitoring/profile", params={"seconds": 3600})
+
+        assert response.status_code == 422
+
+    @pytest.mark.unit
+    def test_loop_stalls_report(self, client):
+        """Test the loop stall report shape."""
+        response = client.get("/api/v1/monitoring/loop-stalls")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"threshold_ms", "stalls", "recent"}
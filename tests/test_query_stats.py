@@ -0,0 +1,143 @@
+"""
+Tests for per-request SQL accounting.
+"""
+
+import asyncio
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.metrics import Histogram
+from app.db.query_stats import QueryMetrics, QueryStats, current_query_stats, install_query_hooks
+from app.middleware.query_stats import QueryStatsMiddleware
+
+
+@pytest.fixture
+def engine():
+    """Create an instrumented in-memory SQLite engine."""
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite://")
+    install_query_hooks(engine, slow_query_seconds=60)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def make_app(engine, metrics: QueryMetrics, **options) -> FastAPI:
+    """Build a small app issuing a given number of statements."""
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, metrics=metrics, **options)
+
+    @app.get("/items/{count}")
+    async def items(count: int):
+        async with engine.connect() as conn:
+            for _ in range(count):
+                await conn.execute(text("SELECT 1"))
+        return {"count": count}
+
+    return app
+
+
+class TestHistogram:
+    """Test the histogram primitive."""
+
+    @pytest.mark.unit
+    def test_cumulative_buckets(self):
+        """Test that values land in every bucket at or above them."""
+        histogram = Histogram((1, 5, 10))
+        for value in (0, 1, 3, 7, 50):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == {"1": 2, "5": 3, "10": 4, "+Inf": 5}
+        assert histogram.as_dict()["sum"] == 61
+        assert histogram.count == 5
+
+
+class TestQueryHooks:
+    """Test the cursor execution hooks."""
+
+    @pytest.mark.unit
+    def test_records_into_current_request(self, engine):
+        """Test that statements are counted only while stats are set."""
+        stats = QueryStats()
+
+        async def run():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                token = current_query_stats.set(stats)
+                try:
+                    await conn.execute(text("SELECT 2"))
+                    await conn.execute(text("SELECT 3"))
+                finally:
+                    current_query_stats.reset(token)
+
+        asyncio.run(run())
+
+        assert stats.count == 2
+        assert stats.total_seconds >= stats.slowest_seconds > 0
+        assert stats.slowest_statement in ("SELECT 2", "SELECT 3")
+
+    @pytest.mark.unit
+    def test_slow_queries_are_logged(self, caplog):
+        """Test that statements over the threshold are logged."""
+        pytest.importorskip("aiosqlite")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        install_query_hooks(engine, slow_query_seconds=0)
+
+        async def run():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT   1"))
+            await engine.dispose()
+
+        with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+            asyncio.run(run())
+
+        assert any("Slow query" in record.message and "SELECT 1" in record.message
+                   for record in caplog.records)
+
+
+class TestQueryStatsMiddleware:
+    """Test the per-request middleware."""
+
+    @pytest.mark.unit
+    def test_debug_headers_and_route_metrics(self, engine):
+        """Test headers in debug mode and histograms keyed by route template."""
+        metrics = QueryMetrics()
+        client = TestClient(make_app(engine, metrics, debug_headers=True))
+
+        response = client.get("/items/3")
+        client.get("/items/1")
+
+        assert response.headers["x-db-query-count"] == "3"
+        assert float(response.headers["x-db-time-ms"]) >= 0
+        assert response.headers["x-db-slowest-statement"] == "SELECT 1"
+        route = metrics.snapshot()["GET /items/{count}"]
+        assert route["requests"] == 2
+        assert route["queries"]["buckets"]["1"] == 1
+        assert route["queries"]["buckets"]["3"] == 2
+        assert route["over_budget"] == 0
+
+    @pytest.mark.unit
+    def test_no_headers_outside_debug(self, engine):
+        """Test that headers are only added in debug mode."""
+        client = TestClient(make_app(engine, QueryMetrics()))
+
+        assert "x-db-query-count" not in client.get("/items/1").headers
+
+    @pytest.mark.unit
+    def test_budget_warning(self, engine, caplog):
+        """Test that requests over the query budget log a warning."""
+        metrics = QueryMetrics()
+        client = TestClient(make_app(engine, metrics, budget=2))
+
+        with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+            client.get("/items/2")
+            client.get("/items/5")
+
+        warnings = [record.message for record in caplog.records]
+        assert len(warnings) == 1
+        assert "GET /items/{count} issued 5 SQL statements (budget 2" in warnings[0]
+        assert metrics.snapshot()["GET /items/{count}"]["over_budget"] == 1
@@ -0,0 +1,350 @@
+"""
+Tests for rate limiting and load shedding.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.api import deps
+from app.core.config import settings
+from app.core.load_shedding import LoadShedder, Priority, PriorityRules
+from app.core.metrics import DecayingAverage
+from app.core.rate_limit import (
+    InMemoryRateLimitStore,
+    Rate,
+    RateLimiter,
+    RedisRateLimitStore,
+    parse_rate,
+)
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from tests.clock import FakeClock
+
+
+class BrokenStore:
+    """Store whose server is unreachable."""
+
+    async def consume(self, key, rate, cost=1):
+        raise ConnectionError("store down")
+
+
+@pytest.fixture
+async def rate_limits(monkeypatch):
+    """Enable rate limiting, with buckets emptied before and after."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    await deps.rate_limiter.store.clear()
+    yield monkeypatch
+    await deps.rate_limiter.store.clear()
+
+
+class TestRates:
+    """Test parsing rates."""
+
+    @pytest.mark.unit
+    def test_parse_rate(self):
+        """Test that the bucket holds one period's allowance."""
+        assert parse_rate("10/minute") == Rate(10, 10 / 60)
+        assert parse_rate("5 / Seconds") == Rate(5, 5.0)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("text", ["10", "ten/minute", "0/minute", "10/fortnight"])
+    def test_invalid_rate(self, text):
+        """Test that malformed rates are rejected."""
+        with pytest.raises(ValueError):
+            parse_rate(text)
+
+
+class TestInMemoryStore:
+    """Test token buckets kept in the process."""
+
+    @pytest.mark.unit
+    async def test_burst_then_refill(self):
+        """Test that a full bucket allows a burst and refills over time."""
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(clock=clock)
+        rate = Rate(3, 1.0)
+
+        results = [await store.consume("k", rate) for _ in range(4)]
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert results[2].remaining == 0
+        assert results[3].retry_after == pytest.approx(1.0)
+
+        clock.now += 1.5
+        result = await store.consume("k", rate)
+        assert result.allowed
+        assert result.remaining == 0
+
+    @pytest.mark.unit
+    async def test_keys_are_independent_and_bounded(self):
+        """Test that buckets are per key and the least recently used is dropped."""
+        store = InMemoryRateLimitStore(max_keys=2, clock=FakeClock())
+        rate = Rate(1, 1.0)
+
+        assert (await store.consume("a", rate)).allowed
+        assert (await store.consume("b", rate)).allowed
+        assert not (await store.consume("a", rate)).allowed
+        assert (await store.consume("c", rate)).allowed
+
+        assert len(store) == 2
+        # "b" was dropped and starts full again
+        assert (await store.consume("b", rate)).allowed
+
+
+    @pytest.mark.unit
+    async def test_check_without_taking(self):
+        """Test that a cost of 0 checks for a token without taking it."""
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(clock=clock)
+        rate = Rate(1, 0.5)
+
+        assert (await store.consume("k", rate, cost=0)).allowed
+        assert (await store.consume("k", rate)).allowed
+        denied = await store.consume("k", rate, cost=0)
+
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(2.0)
+
+
+class TestRedisStore:
+    """Test token buckets shared through a Redis-compatible server."""
+
+    @pytest.mark.unit
+    async def test_shared_bucket(self):
+        """Test that two stores on one server share buckets."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        from fakeredis.aioredis import FakeRedis
+
+        server = fakeredis.FakeServer()
+        first = RedisRateLimitStore(FakeRedis(server=server))
+        second = RedisRateLimitStore(FakeRedis(server=server))
+        rate = Rate(2, 0.5)
+
+        assert (await first.consume("k", rate)).allowed
+        result = await second.consume("k", rate)
+        assert result.allowed
+        assert result.remaining == 0
+
+        denied = await first.consume("k", rate)
+        assert not denied.allowed
+        assert 0 < denied.retry_after <= 2
+
+        await first.clear()
+        assert (await second.consume("k", rate)).allowed
+
+
+class TestRateLimiter:
+    """Test applying several limits to a request."""
+
+    @pytest.mark.unit
+    async def test_all_limits_must_allow(self):
+        """Test that the tightest limit decides."""
+        limiter = RateLimiter(InMemoryRateLimitStore(clock=FakeClock()))
+        limits = [("wide", Rate(5, 1.0), "ip"), ("narrow", Rate(1, 0.25), "user")]
+
+        allowed = await limiter.hit(limits)
+        denied = await limiter.hit(limits)
+
+        assert allowed.allowed and allowed.remaining == 0
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(4.0)
+
+    @pytest.mark.unit
+    async def test_limits_without_key_are_skipped(self):
+        """Test that an unknown client is not limited."""
+        limiter = RateLimiter(InMemoryRateLimitStore(clock=FakeClock()))
+
+        for _ in range(3):
+            assert (await limiter.hit([("ip", Rate(1, 1.0), None)])).allowed
+
+    @pytest.mark.unit
+    async def test_fails_open(self):
+        """Test that requests are allowed while the store is down."""
+        limiter = RateLimiter(BrokenStore())
+        errors = limiter.errors.value
+
+        result = await limiter.hit([("ip", Rate(1, 1.0), "k")])
+
+        assert result.allowed
+        assert limiter.errors.value == errors + 1
+
+
+def request_from(peer, *forwarded_for):
+    """Build a request received from a peer with X-Forwarded-For headers."""
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded_for]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+class TestClientIp:
+    """Test finding the client address behind proxies."""
+
+    @pytest.mark.unit
+    def test_untrusted_peer_ignores_forwarded_for(self, monkeypatch):
+        """Test that clients cannot pick their address with the header."""
+        monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "10.0.0.1")
+
+        assert deps.client_ip(request_from("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+    @pytest.mark.unit
+    def test_trusted_proxies_are_skipped(self, monkeypatch):
+        """Test that the address before the last trusted hop is used."""
+        monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "10.0.0.1, 10.0.0.2")
+
+        # The first entry was sent by the client and is not trusted
+        request = request_from("10.0.0.1", "1.2.3.4, 203.0.113.9", "10.0.0.2")
+        assert deps.client_ip(request) == "203.0.113.9"
+        assert deps.client_ip(request_from("10.0.0.1")) == "10.0.0.1"
+
+    @pytest.mark.unit
+    def test_trust_everyone(self, monkeypatch):
+        """Test that with "*" the first forwarded address is the client."""
+        monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "*")
+
+        assert deps.client_ip(request_from("10.0.0.1", "203.0.113.9, 10.0.0.2")) == "203.0.113.9"
+
+
+class TestRateLimitedRoutes:
+    """Test limits on the login and checkout endpoints."""
+
+    @pytest.mark.auth
+    def test_login_limited_per_username(self, client: TestClient, rate_limits):
+        """Test that repeated logins of one username get 429 with Retry-After."""
+        rate_limits.setattr(settings, "RATE_LIMIT_LOGIN_PER_USERNAME", "2/minute")
+        login_data = {"username": "Limited", "password": "wrongpassword"}
+
+        responses = [
+            client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
+            for _ in range(3)
+        ]
+
+        assert [response.status_code for response in responses] == [400, 400, 429]
+        assert int(responses[2].headers["Retry-After"]) > 0
+
+        # Usernames are limited case-insensitively, other usernames are not
+        login_data["username"] = "limited"
+        response = client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
+        assert response.status_code == 429
+        login_data["username"] = "someone-else"
+        response = client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
+        assert response.status_code == 400
+
+    @pytest.mark.auth
+    def test_successful_logins_not_charged_to_username(
+        self, client: TestClient, normal_user_token_headers, rate_limits
+    ):
+        """Test that only failed logins use up a username's allowance."""
+        rate_limits.setattr(settings, "RATE_LIMIT_LOGIN_PER_USERNAME", "1/minute")
+        login_data = {"username": "testuser", "password": "testpass123"}
+
+        for _ in range(3):
+            response = client.post(f"{settings.API_V1_STR}/auth/login", data=login_data)
+            assert response.status_code == 200
+
+        login_data["password"] = "wrongpassword"
+        assert client.post(f"{settings.API_V1_STR}/auth/login", data=login_data).status_code == 400
+        assert client.post(f"{settings.API_V1_STR}/auth/login", data=login_data).status_code == 429
+
+    @pytest.mark.auth
+    def test_login_limited_per_forwarded_ip(self, client: TestClient, rate_limits):
+        """Test that clients behind a trusted proxy get their own buckets."""
+        rate_limits.setattr(settings, "RATE_LIMIT_LOGIN_PER_IP", "1/minute")
+        rate_limits.setattr(settings, "FORWARDED_ALLOW_IPS", "testclient")
+        login_data = {"username": "nobody", "password": "wrongpassword"}
+
+        def login(forwarded_for: str) -> int:
+            return client.post(
+                f"{settings.API_V1_STR}/auth/login",
+                data=login_data,
+                headers={"X-Forwarded-For": forwarded_for},
+            ).status_code
+
+        assert [login("203.0.113.1"), login("203.0.113.2"), login("203.0.113.1")] == [400, 400, 429]
+
+    @pytest.mark.orders
+    def test_checkout_limited_per_user(
+        self, client: TestClient, normal_user_token_headers, rate_limits
+    ):
+        """Test that placing orders is limited before the order is validated."""
+        rate_limits.setattr(settings, "RATE_LIMIT_CHECKOUT_PER_USER", "1/minute")
+
+        first = client.post(f"{settings.API_V1_STR}/orders/", headers=normal_user_token_headers, json={})
+        second = client.post(f"{settings.API_V1_STR}/orders/", headers=normal_user_token_headers, json={})
+
+        assert first.status_code == 422
+        assert second.status_code == 429
+
+
+class TestLoadShedding:
+    """Test rejecting requests by priority under load."""
+
+    @pytest.mark.unit
+    def test_priority_rules(self):
+        """Test that critical rules win and wildcards match prefixes."""
+        rules = PriorityRules(
+            low=["/docs*", "GET /api/v1/orders/admin"],
+            critical=["POST /api/v1/orders/", "/metrics"],
+        )
+
+        assert rules.priority("GET", "/docs") == Priority.LOW
+        assert rules.priority("GET", "/docs/oauth2-redirect") == Priority.LOW
+        assert rules.priority("GET", "/api/v1/orders/admin") == Priority.LOW
+        assert rules.priority("DELETE", "/api/v1/orders/admin") == Priority.NORMAL
+        assert rules.priority("POST", "/api/v1/orders/") == Priority.CRITICAL
+        assert rules.priority("GET", "/api/v1/orders/") == Priority.NORMAL
+        assert rules.priority("GET", "/metrics") == Priority.CRITICAL
+
+    @pytest.mark.unit
+    def test_shedding_by_pressure(self):
+        """Test that low priority is shed first and critical never."""
+        lag = {"value": 0.0}
+        shedder = LoadShedder({"loop_lag": (lambda: lag["value"], 0.05), "off": (lambda: 9.0, 0)})
+
+        assert shedder.reject(Priority.LOW) is None
+
+        lag["value"] = 0.06
+        assert shedder.reject(Priority.LOW) == "loop_lag"
+        assert shedder.reject(Priority.NORMAL) is None
+
+        lag["value"] = 0.1
+        assert shedder.reject(Priority.NORMAL) == "loop_lag"
+        assert shedder.reject(Priority.CRITICAL) is None
+
+    @pytest.mark.unit
+    def test_middleware_returns_503(self):
+        """Test that shed requests get 503 with Retry-After."""
+        lag = {"value": 1.0}
+        inner = Starlette(routes=[
+            Route("/report", lambda request: PlainTextResponse("report")),
+            Route("/checkout", lambda request: PlainTextResponse("ok"), methods=["POST"]),
+        ])
+        app = LoadSheddingMiddleware(
+            inner,
+            shedder=LoadShedder({"loop_lag": (lambda: lag["value"], 0.05)}),
+            rules=PriorityRules(critical=["POST /checkout"]),
+            retry_after=2,
+        )
+
+        with TestClient(app) as test_client:
+            shed = test_client.get("/report")
+            assert shed.status_code == 503
+            assert shed.headers["Retry-After"] == "2"
+            assert test_client.post("/checkout").status_code == 200
+
+            lag["value"] = 0.0
+            assert test_client.get("/report").status_code == 200
+
+    @pytest.mark.unit
+    def test_signal_decays_without_observations(self):
+        """Test that an overload signal falls back once nothing is measured."""
+        clock = FakeClock()
+        average = DecayingAverage(weight=0.5, half_life=1.0, clock=clock)
+
+        average.observe(0.2)
+        assert average.value == pytest.approx(0.1)
+
+        clock.now += 2
+        assert average.value == pytest.approx(0.025)
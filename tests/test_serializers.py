@@ -0,0 +1,110 @@
+"""
+Tests for schema-aware serializers and the fast JSON response path.
+"""
+
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.responses import fast_json
+from app.core.config import settings
+from app.schemas import schemas
+from app.schemas.serializers import build_serializer, serialize_order, serialize_product
+
+
+def make_product(**overrides):
+    """Build a stand-in Product row."""
+    values = dict(
+        id=1,
+        name="Widget",
+        description=None,
+        price=10,
+        inventory=3,
+        sku="W-1",
+        image_url=None,
+        owner_id=7,
+        created_at=datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc),
+        updated_at=None,
+        categories=[SimpleNamespace(id=2, name="Tools", description="Hand tools")],
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def make_order():
+    """Build a stand-in Order row with one item."""
+    return SimpleNamespace(
+        id=5,
+        customer_id=7,
+        order_date=datetime(2026, 3, 4, 5, 6, 7, 890000, tzinfo=timezone.utc),
+        total_amount=20,
+        status="pending",
+        shipping_address_id=None,
+        billing_address_id=None,
+        payment_id=None,
+        tracking_number=None,
+        items=[SimpleNamespace(id=9, product_id=1, quantity=2, unit_price=10)],
+    )
+
+
+class TestSerializers:
+    """Test that fast serializers match pydantic's JSON output."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("overrides", [
+        {},
+        {"updated_at": datetime(2026, 2, 1, 8, 30, 0, 1)},
+        {"categories": []},
+    ])
+    def test_product_matches_pydantic(self, overrides):
+        """Test products, including naive datetimes and empty relations."""
+        row = make_product(**overrides)
+        expected = schemas.Product.model_validate(row).model_dump(mode="json")
+
+        assert serialize_product(row) == expected
+
+    @pytest.mark.unit
+    def test_order_matches_pydantic(self):
+        """Test orders with nested items."""
+        row = make_order()
+        expected = schemas.Order.model_validate(row).model_dump(mode="json")
+        data = serialize_order(row)
+
+        assert data == expected
+        assert data["order_date"].endswith("Z")
+        assert isinstance(data["items"][0]["unit_price"], float)
+
+    @pytest.mark.unit
+    def test_build_serializer_reads_only_schema_fields(self):
+        """Test that attributes outside the schema are not exposed."""
+        row = SimpleNamespace(id=3, name="Tools", description=None, secret="x")
+
+        assert build_serializer(schemas.Category)(row) == {
+            "id": 3, "name": "Tools", "description": None,
+        }
+
+
+class TestFastJson:
+    """Test the opt-in fast response path."""
+
+    @pytest.mark.unit
+    def test_disabled_returns_content(self, monkeypatch):
+        """Test that content goes through response_model when disabled."""
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+        content = [{"id": 1}]
+
+        assert fast_json(content) is content
+
+    @pytest.mark.unit
+    def test_enabled_renders_with_headers(self, monkeypatch):
+        """Test that content is encoded directly and headers carry over."""
+        pytest.importorskip("orjson")
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+        sub_response = SimpleNamespace(headers={"ETag": 'W/"1"', "content-length": "0"})
+
+        response = fast_json([serialize_product(make_product())], sub_response)
+
+        assert response.headers["etag"] == 'W/"1"'
+        assert json.loads(response.body)[0]["created_at"] == "2026-01-01T12:00:00Z"
@@ -0,0 +1,89 @@
+"""
+Tests for the production server configuration.
+"""
+
+import gc
+
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.server import Server, Worker, default_workers, main, per_worker_state, server_options
+
+
+class TestServerOptions:
+    """Test the gunicorn settings built by the launcher."""
+
+    @pytest.mark.unit
+    def test_defaults(self, monkeypatch):
+        """Test one preloaded worker per CPU with recycling and draining."""
+        monkeypatch.setattr(settings, "WEB_CONCURRENCY", 0)
+
+        options = server_options()
+
+        assert options["workers"] == default_workers()
+        assert options["worker_class"] == "app.server.Worker"
+        assert options["preload_app"] is True
+        assert options["max_requests"] == settings.SERVER_MAX_REQUESTS
+        assert 0 < options["max_requests_jitter"] <= settings.SERVER_MAX_REQUESTS // 10
+        assert options["graceful_timeout"] >= settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+        assert options["forwarded_allow_ips"] == settings.FORWARDED_ALLOW_IPS
+
+    @pytest.mark.unit
+    def test_overrides(self, monkeypatch):
+        """Test that arguments win over settings and 0 disables recycling."""
+        monkeypatch.setattr(settings, "WEB_CONCURRENCY", 8)
+
+        options = server_options(workers=3, bind="127.0.0.1:9000", max_requests=0)
+
+        assert options["workers"] == 3
+        assert options["bind"] == "127.0.0.1:9000"
+        assert options["max_requests"] == 0
+        assert options["max_requests_jitter"] == 0
+        assert server_options()["workers"] == 8
+
+    @pytest.mark.unit
+    def test_per_worker_state(self, monkeypatch):
+        """Test that memory:// caches and rate limits are reported as per worker."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "CACHE_URL", "memory://")
+        monkeypatch.setattr(settings, "RATE_LIMIT_STORAGE_URL", "memory://")
+        assert per_worker_state() == ["CACHE_URL", "RATE_LIMIT_STORAGE_URL"]
+
+        monkeypatch.setattr(settings, "CACHE_URL", "redis://cache:6379/0")
+        monkeypatch.setattr(settings, "RATE_LIMIT_STORAGE_URL", "redis://cache:6379/1")
+        assert per_worker_state() == []
+
+    @pytest.mark.unit
+    def test_refuses_workers_without_shared_state(self, monkeypatch):
+        """Test that several workers need shared backends unless allowed."""
+        started = []
+        monkeypatch.setattr(settings, "CACHE_URL", "memory://")
+        monkeypatch.setattr(Server, "run", lambda self: started.append(self.options["workers"]))
+
+        with pytest.raises(SystemExit):
+            main(["--workers", "2"])
+        main(["--workers", "1"])
+        main(["--workers", "2", "--allow-per-worker-state"])
+
+        assert started == [1, 2]
+
+    @pytest.mark.unit
+    def test_gunicorn_accepts_options(self):
+        """Test that gunicorn validates every option and loads the app."""
+        server = Server(server_options(workers=2, bind="127.0.0.1:0"))
+        try:
+            assert server.cfg.workers == 2
+            assert server.cfg.forwarded_allow_ips == settings.FORWARDED_ALLOW_IPS.split(",")
+            assert server.cfg.worker_class is Worker
+            assert server.load() is app
+        finally:
+            gc.unfreeze()
+
+    @pytest.mark.unit
+    def test_worker_drains_before_gunicorn_kills_it(self):
+        """Test that request draining ends before the graceful timeout."""
+        pytest.importorskip("uvloop")
+
+        assert Worker.CONFIG_KWARGS["loop"] == "uvloop"
+        assert Worker.CONFIG_KWARGS["timeout_graceful_shutdown"] < server_options()["graceful_timeout"]
@@ -0,0 +1,47 @@
+"""
+Tests for application startup cost and the app factory.
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import session
+from app.main import create_app
+from benchmarks.startup import loaded, measure_import
+
+# Cumulative import time allowed for app.main, generous for slow CI machines
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "3000"))
+
+
+@pytest.fixture(scope="module")
+def app_import():
+    """Import times of app.main in a fresh interpreter."""
+    return measure_import("app.main")
+
+
+class TestStartup:
+    """Test what importing the application costs."""
+
+    @pytest.mark.slow
+    def test_import_skips_deferred_modules(self, app_import):
+        """Test that drivers and auth libraries are loaded on first use only."""
+        assert loaded(app_import["modules"]) == []
+
+    @pytest.mark.slow
+    def test_import_time_within_budget(self, app_import):
+        """Test that importing app.main stays within its time budget."""
+        _, cumulative_us = app_import["modules"]["app.main"]
+
+        assert cumulative_us / 1000 <= IMPORT_TIME_BUDGET_MS
+
+    @pytest.mark.unit
+    def test_lifespan_creates_and_disposes_engines(self):
+        """Test that engines exist only while the application is served."""
+        app = create_app()
+
+        with TestClient(app):
+            assert session.get_engine() is not None
+            assert session._engines.primary is not None
+        assert session._engines.primary is None
@@ -0,0 +1,260 @@
+"""
+Tests for refresh tokens, access token claims and revocation.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.cache import InMemoryCache
+from app.core.revocation import BloomFilter, TokenDenylist, TokenVersionCache
+from app.core.security import create_access_token
+from app.crud import token, user
+from app.db.denylist import reload_denylist
+from app.schemas.schemas import UserCreate
+
+
+def login(client: TestClient, username: str) -> Dict[str, str]:
+    """Register a user and log in."""
+    client.post(
+        f"{settings.API_V1_STR}/users/",
+        json={"username": username, "email": f"{username}@example.com", "password": "testpass123"},
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": username, "password": "testpass123"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def refresh(client: TestClient, refresh_token: str):
+    return client.post(f"{settings.API_V1_STR}/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def me(client: TestClient, tokens: Dict[str, str]):
+    return client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+
+
+class TestBloomFilter:
+    """Test the denylist's Bloom filter."""
+
+    @pytest.mark.unit
+    def test_no_false_negatives_and_few_false_positives(self):
+        """Test that added items are always found and others rarely."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+
+        assert all(f"revoked-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+class TestTokenDenylist:
+    """Test the in-memory denylist."""
+
+    @pytest.mark.unit
+    def test_add_and_reload(self):
+        """Test that reloads replace entries but keep revocations made meanwhile."""
+        denylist = TokenDenylist()
+        later = time.time() + 60
+        denylist.add("old", later)
+
+        denylist.begin_reload()
+        denylist.add("during-reload", later)
+        denylist.add("expired", time.time() - 1)
+        denylist.reload([("elsewhere", later)])
+
+        assert denylist.is_revoked("elsewhere")
+        assert denylist.is_revoked("during-reload")
+        assert not denylist.is_revoked("old")
+        assert not denylist.is_revoked("expired")
+        assert not denylist.is_revoked("never")
+        assert len(denylist) == 2
+
+    @pytest.mark.unit
+    async def test_reload_from_table(self, db):
+        """Test that unexpired revocations are loaded from the database."""
+        now = datetime.now(timezone.utc)
+        await token.revoke_access(
+            db, entries=[("live", now + timedelta(minutes=5)), ("stale", now - timedelta(minutes=5))]
+        )
+        denylist = TokenDenylist()
+
+        await reload_denylist(db, denylist)
+
+        assert denylist.is_revoked("live")
+        assert not denylist.is_revoked("stale")
+
+
+class TestTokenVersionCache:
+    """Test caching users' token versions."""
+
+    @pytest.mark.unit
+    async def test_load_racing_a_bump_is_not_served(self):
+        """Test that a version loaded before a bump was committed is not cached."""
+        cache = TokenVersionCache(InMemoryCache())
+        versions = {1: 0}
+
+        async def load_racing_bump():
+            # The version is read, then another request commits a bump
+            # before this load fills the cache
+            version = versions[1]
+            versions[1] = 1
+            await cache.invalidate(1)
+            return version
+
+        async def load():
+            return versions[1]
+
+        assert await cache.get(1, load_racing_bump) == 0
+        assert await cache.get(1, load) == 1
+        assert await cache.get(1, load_racing_bump) == 1
+        assert cache.stats.hits == 1
+
+
+class TestRefreshTokens:
+    """Test exchanging and revoking refresh tokens."""
+
+    @pytest.mark.auth
+    def test_login_returns_short_lived_tokens(self, client: TestClient):
+        """Test that a login returns an access and a refresh token."""
+        tokens = login(client, "refresh-login")
+
+        assert tokens["refresh_token"]
+        assert tokens["expires_in"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    @pytest.mark.auth
+    def test_refresh_rotates(self, client: TestClient):
+        """Test that a refresh token is exchanged once for a working pair."""
+        tokens = login(client, "refresh-rotate")
+
+        response = refresh(client, tokens["refresh_token"])
+
+        assert response.status_code == 200
+        renewed = response.json()
+        assert renewed["refresh_token"] != tokens["refresh_token"]
+        assert me(client, renewed).status_code == 200
+        assert refresh(client, renewed["refresh_token"]).status_code == 200
+
+    @pytest.mark.auth
+    def test_reuse_revokes_the_login(self, client: TestClient):
+        """Test that presenting a used refresh token revokes all tokens of its login."""
+        tokens = login(client, "refresh-reuse")
+        renewed = refresh(client, tokens["refresh_token"]).json()
+
+        assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+        assert refresh(client, renewed["refresh_token"]).status_code == 401
+        assert me(client, renewed).status_code == 401
+        assert me(client, tokens).status_code == 401
+
+    @pytest.mark.auth
+    def test_unknown_refresh_token(self, client: TestClient):
+        """Test that made-up refresh tokens are rejected."""
+        assert refresh(client, "not-a-token").status_code == 401
+
+    @pytest.mark.auth
+    def test_logout_revokes_tokens(self, client: TestClient):
+        """Test that logout revokes the access token and the login's refresh token."""
+        tokens = login(client, "refresh-logout")
+        other = login(client, "refresh-logout")
+
+        response = client.post(
+            f"{settings.API_V1_STR}/auth/logout",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+            json={"refresh_token": tokens["refresh_token"]},
+        )
+
+        assert response.status_code == 204
+        assert me(client, tokens).status_code == 401
+        assert refresh(client, tokens["refresh_token"]).status_code == 401
+        # Other logins of the same user are untouched
+        assert me(client, other).status_code == 200
+        assert refresh(client, other["refresh_token"]).status_code == 200
+
+
+    @pytest.mark.auth
+    async def test_role_change_revokes_every_login(self, db):
+        """Test that a token version bump revokes all of the user's refresh tokens."""
+        db_user = await user.create(
+            db, obj_in=UserCreate(username="refresh-demote", email="demote@example.com", password="testpass123")
+        )
+        first = await token.issue(db, user_id=db_user.id, access_jti="demote-first")
+        second = await token.issue(db, user_id=db_user.id, access_jti="demote-second")
+
+        await user.update(db, db_obj=db_user, obj_in={"is_superuser": True})
+
+        assert await token.rotate(db, token=first, access_jti="demote-third") is None
+        assert await token.rotate(db, token=second, access_jti="demote-third") is None
+        revoked = {jti for jti, _ in await token.get_revoked(db)}
+        assert {"demote-first", "demote-second"} <= revoked
+
+
+class TestClaims:
+    """Test authorizing requests from the access token's claims."""
+
+    @pytest.mark.auth
+    def test_authorized_without_user_lookup(self, client: TestClient, test_engine):
+        """Test that once the token version is cached, requests read no user row."""
+        tokens = login(client, "claims-cached")
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        client.get(f"{settings.API_V1_STR}/orders/", headers=headers)
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = client.get(f"{settings.API_V1_STR}/orders/", headers=headers)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert statements
+        assert not [statement for statement in statements if "FROM users" in statement]
+
+    @pytest.mark.auth
+    def test_password_change_revokes_tokens(self, client: TestClient):
+        """Test that a password change revokes access and refresh tokens issued before."""
+        tokens = login(client, "claims-password")
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get(f"{settings.API_V1_STR}/orders/", headers=headers).status_code == 200
+
+        response = client.put(
+            f"{settings.API_V1_STR}/users/me", headers=headers, json={"password": "newpass12345"}
+        )
+
+        assert response.status_code == 200
+        assert client.get(f"{settings.API_V1_STR}/orders/", headers=headers).status_code == 401
+        assert me(client, tokens).status_code == 401
+        # The login's refresh token is revoked with it
+        assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+        response = client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": "claims-password", "password": "newpass12345"},
+        )
+        assert response.status_code == 200
+        renewed = refresh(client, response.json()["refresh_token"]).json()
+        assert me(client, renewed).status_code == 200
+
+    @pytest.mark.auth
+    async def test_token_without_claims(self, client: TestClient, db):
+        """Test that tokens issued without claims are authorized from the user row."""
+        db_user = await user.create(
+            db, obj_in=UserCreate(username="claims-legacy", email="legacy@example.com", password="testpass123")
+        )
+        headers = {"Authorization": f"Bearer {create_access_token(db_user.id)}"}
+
+        assert client.get(f"{settings.API_V1_STR}/orders/", headers=headers).status_code == 200
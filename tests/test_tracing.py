@@ -0,0 +1,230 @@
+"""
+Tests for tracing spans, W3C trace context propagation and SQL spans.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.routing import TracedRoute
+from app.core.tracing import (
+    InMemorySpanExporter,
+    SpanContext,
+    Tracer,
+    current_span,
+    format_traceparent,
+    parse_traceparent,
+    span,
+    traced,
+)
+from app.db.tracing import install_tracing_hooks
+from app.middleware.tracing import TracingMiddleware
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+class Service:
+    """Stand-in for a CRUD class."""
+
+    @traced
+    async def load(self, fail: bool = False):
+        with span("load.step"):
+            if fail:
+                raise ValueError("boom")
+        return 1
+
+
+class ProductService(Service):
+    """Subclass whose spans carry its own name."""
+
+
+def make_app(tracer: Tracer) -> FastAPI:
+    """Build a small app with a traced router."""
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/items/{id}")
+    async def read_item(id: int):
+        await ProductService().load()
+        return {"id": id}
+
+    @router.get("/sync")
+    def read_sync():
+        with span("sync.work"):
+            return {"ok": True}
+
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    app.include_router(router, prefix="/api")
+    return app
+
+
+def by_name(exporter: InMemorySpanExporter) -> dict:
+    """Index finished spans by name."""
+    return {finished.name: finished for finished in exporter.spans}
+
+
+class TestTraceContext:
+    """Test W3C traceparent parsing and formatting."""
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        """Test parsing a sampled header and formatting it back."""
+        header = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+        context = parse_traceparent(header)
+
+        assert context == SpanContext(TRACE_ID, PARENT_ID, True)
+        assert format_traceparent(context) == header
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("header", [
+        None,
+        "garbage",
+        f"ff-{TRACE_ID}-{PARENT_ID}-01",
+        f"00-{'0' * 32}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+        f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    ])
+    def test_invalid_headers_are_ignored(self, header):
+        """Test that malformed or invalid headers start a new trace."""
+        assert parse_traceparent(header) is None
+
+
+class TestTracer:
+    """Test sampling decisions and span nesting."""
+
+    @pytest.mark.unit
+    def test_sampling(self):
+        """Test ratio sampling of new traces and parent-based sampling."""
+        exporter = InMemorySpanExporter()
+        never, always = Tracer(exporter, 0.0), Tracer(exporter, 1.0)
+
+        assert never.start_trace("root") is None
+        assert always.start_trace("root") is not None
+        assert always.start_trace("root", SpanContext(TRACE_ID, PARENT_ID, False)) is None
+        continued = never.start_trace("root", SpanContext(TRACE_ID, PARENT_ID, True))
+        assert continued.context.trace_id == TRACE_ID
+        assert continued.parent_span_id == PARENT_ID
+
+    @pytest.mark.unit
+    def test_untraced_code_gets_noop_spans(self):
+        """Test that spans outside a trace record nothing."""
+        exporter = InMemorySpanExporter()
+
+        assert asyncio.run(ProductService().load()) == 1
+        assert exporter.spans == []
+
+    @pytest.mark.unit
+    def test_nested_spans_and_errors(self):
+        """Test parent links, method span names and recorded exceptions."""
+        exporter = InMemorySpanExporter()
+        root = Tracer(exporter).start_trace("root")
+
+        async def run():
+            token = current_span.set(root)
+            try:
+                await ProductService().load()
+                with pytest.raises(ValueError):
+                    await ProductService().load(fail=True)
+            finally:
+                current_span.reset(token)
+
+        asyncio.run(run())
+        names = [finished.name for finished in exporter.spans]
+
+        assert names == ["load.step", "ProductService.load"] * 2
+        step, load = exporter.spans[:2]
+        assert step.parent_span_id == load.context.span_id
+        assert load.parent_span_id == root.context.span_id
+        failed = exporter.spans[3].to_otlp()
+        assert failed["status"]["code"] == 2
+        assert failed["events"][0]["name"] == "exception"
+
+
+class TestTracingMiddleware:
+    """Test request, route and endpoint spans."""
+
+    @pytest.mark.unit
+    def test_request_continues_incoming_trace(self):
+        """Test span hierarchy, names and the traceresponse header."""
+        exporter = InMemorySpanExporter()
+        client = TestClient(make_app(Tracer(exporter, 0.0)))
+
+        response = client.get(
+            "/api/items/3", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+
+        spans = by_name(exporter)
+        server = spans["GET /api/items/{id}"]
+        route = spans["route /api/items/{id}"]
+        endpoint = spans["test_tracing.read_item"]
+        assert server.parent_span_id == PARENT_ID
+        assert server.attributes["http.status_code"] == 200
+        assert route.parent_span_id == server.context.span_id
+        assert endpoint.parent_span_id == route.context.span_id
+        assert spans["ProductService.load"].parent_span_id == endpoint.context.span_id
+        assert route.attributes["app.validation_ms"] >= 0
+        assert route.attributes["app.serialization_ms"] >= 0
+        assert {finished.context.trace_id for finished in exporter.spans} == {TRACE_ID}
+        assert response.headers["traceresponse"] == format_traceparent(server.context)
+
+    @pytest.mark.unit
+    def test_sync_endpoints_keep_the_trace(self):
+        """Test that spans in threadpool endpoints join the request trace."""
+        exporter = InMemorySpanExporter()
+        client = TestClient(make_app(Tracer(exporter, 1.0)))
+
+        client.get("/api/sync")
+
+        spans = by_name(exporter)
+        assert spans["sync.work"].parent_span_id == spans["test_tracing.read_sync"].context.span_id
+
+    @pytest.mark.unit
+    def test_unsampled_requests_record_nothing(self):
+        """Test that unsampled requests create no spans or headers."""
+        exporter = InMemorySpanExporter()
+        client = TestClient(make_app(Tracer(exporter, 0.0)))
+
+        response = client.get(
+            "/api/items/3", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+        )
+
+        assert response.status_code == 200
+        assert "traceresponse" not in response.headers
+        assert exporter.spans == []
+
+
+class TestSqlSpans:
+    """Test statement spans from the cursor hooks."""
+
+    @pytest.mark.unit
+    def test_statements_are_client_spans(self):
+        """Test that statements become children of the current span."""
+        pytest.importorskip("aiosqlite")
+        exporter = InMemorySpanExporter()
+        engine = create_async_engine("sqlite+aiosqlite://")
+        install_tracing_hooks(engine)
+
+        async def run():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                root = Tracer(exporter).start_trace("root")
+                token = current_span.set(root)
+                try:
+                    await conn.execute(text("SELECT   2"))
+                finally:
+                    current_span.reset(token)
+                    root.end()
+            await engine.dispose()
+
+        asyncio.run(run())
+
+        statement, root = exporter.spans
+        assert statement.kind == "CLIENT"
+        assert statement.parent_span_id == root.context.span_id
+        assert statement.attributes == {"db.system": "sqlite", "db.statement": "SELECT 2"}
@@ -151,3 +151,131 @@ class TestUsers:
         
         # This might be 422 (validation error) or 400 depending on implementation
         assert response.status_code in [400, 422]
+
+
+    @pytest.mark.users
+    def test_registration_cannot_grant_superuser(self, client: TestClient):
+        """Test that a superuser flag in the registration is ignored."""
+        user_data = {
+            "username": "self-promoted",
+            "email": "self-promoted@example.com",
+            "password": "testpass123",
+            "is_superuser": True,
+        }
+
+        response = client.post(f"{settings.API_V1_STR}/users/", json=user_data)
+        token = client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": "self-promoted", "password": "testpass123"},
+        ).json()["access_token"]
+
+        assert response.status_code == 200
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get(f"{settings.API_V1_STR}/users/", headers=headers).status_code == 403
+
+
+def create_users(client: TestClient, *usernames: str) -> None:
+    """Register users with an email derived from each username."""
+    for username in usernames:
+        client.post(
+            f"{settings.API_V1_STR}/users/",
+            json={"username": username, "email": f"{username.lower()}@example.com", "password": "testpass123"},
+        )
+
+
+class TestUserDirectory:
+    """Test the superuser user listing."""
+
+    @pytest.mark.users
+    def test_requires_superuser(self, client: TestClient, normal_user_token_headers):
+        """Test that the user listing is restricted to superusers."""
+        response = client.get(f"{settings.API_V1_STR}/users/", headers=normal_user_token_headers)
+
+        assert response.status_code == 403
+
+    @pytest.mark.users
+    def test_prefix_search(self, client: TestClient, superuser_token_headers):
+        """Test that the search matches username or email prefixes, ignoring case."""
+        create_users(client, "dirsearch-alpha", "DirSearch-beta", "dirsxearch-gamma")
+
+        def search(prefix: str):
+            response = client.get(
+                f"{settings.API_V1_STR}/users/",
+                params={"search": prefix},
+                headers=superuser_token_headers,
+            )
+            assert response.status_code == 200
+            return sorted(item["username"] for item in response.json()["items"])
+
+        assert search("DIRSEARCH") == ["DirSearch-beta", "dirsearch-alpha"]
+        assert search("dirsearch-beta@") == ["DirSearch-beta"]
+        # LIKE wildcards in the search are taken literally
+        assert search("dirs_earch") == []
+        assert search("search") == []
+
+    @pytest.mark.users
+    def test_superuser_filter(self, client: TestClient, superuser_token_headers):
+        """Test filtering on the superuser flag."""
+        create_users(client, "dirfilter-user")
+
+        response = client.get(
+            f"{settings.API_V1_STR}/users/",
+            params={"is_superuser": True},
+            headers=superuser_token_headers,
+        )
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert items and all(item["is_superuser"] for item in items)
+        assert settings.FIRST_SUPERUSER_USERNAME in [item["username"] for item in items]
+
+    @pytest.mark.users
+    def test_keyset_pagination(self, client: TestClient, superuser_token_headers):
+        """Test that following cursors returns every match exactly once."""
+        usernames = [f"dirpage-{i}" for i in range(5)]
+        create_users(client, *usernames)
+        params = {"search": "dirpage-", "sort_by": "id", "sort_dir": "asc", "limit": 2}
+
+        seen = []
+        pages = 0
+        while True:
+            response = client.get(f"{settings.API_V1_STR}/users/", params=params, headers=superuser_token_headers)
+            assert response.status_code == 200
+            content = response.json()
+            seen.extend(item["username"] for item in content["items"])
+            pages += 1
+            if not content["next_cursor"]:
+                break
+            params["cursor"] = content["next_cursor"]
+
+        assert seen == usernames
+        assert pages == 3
+
+    @pytest.mark.users
+    def test_invalid_cursor(self, client: TestClient, superuser_token_headers):
+        """Test that malformed cursors are rejected."""
+        response = client.get(
+            f"{settings.API_V1_STR}/users/",
+            params={"cursor": "not-a-cursor"},
+            headers=superuser_token_headers,
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.users
+    def test_cursor_from_other_sort_rejected(self, client: TestClient, superuser_token_headers):
+        """Test that a cursor reused with a different sort or search is rejected."""
+        create_users(client, "cursor-a", "cursor-b", "cursor-c")
+        url = f"{settings.API_V1_STR}/users/"
+        response = client.get(
+            url, params={"search": "cursor-", "sort_by": "id", "limit": 1}, headers=superuser_token_headers
+        )
+        cursor = response.json()["next_cursor"]
+        assert cursor
+
+        for params in (
+            {"search": "cursor-", "sort_by": "created_at", "limit": 1, "cursor": cursor},
+            {"search": "cursor-b", "sort_by": "id", "limit": 1, "cursor": cursor},
+        ):
+            response = client.get(url, params=params, headers=superuser_token_headers)
+            assert response.status_code == 400
@@ -0,0 +1,89 @@
+"""
+Tests for connection pool warm-up and engine options.
+"""
+
+import logging
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.db.session import engine_options
+from app.db.warmup import HOT_STATEMENTS, warm_up, warm_up_engines
+
+
+@pytest.fixture
+async def pooled_engine(database_url: str):
+    """Engine with a small connection pool on the test database."""
+    engine = create_async_engine(database_url, poolclass=AsyncAdaptedQueuePool, pool_size=3)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+class TestWarmUp:
+    """Test opening and priming pooled connections."""
+
+    @pytest.mark.unit
+    async def test_fills_pool_up_to_its_size(self, pooled_engine):
+        """Test that connections are opened concurrently and kept in the pool."""
+        warmed = await warm_up(pooled_engine, connections=5)
+
+        assert warmed == 3
+        assert pooled_engine.sync_engine.pool.checkedin() == 3
+
+    @pytest.mark.unit
+    async def test_runs_hot_statements_on_every_connection(self, pooled_engine):
+        """Test that each warmed connection executes all hot statements."""
+        executed = Counter()
+
+        @event.listens_for(pooled_engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            executed[id(conn.connection.dbapi_connection)] += 1
+
+        await warm_up(pooled_engine, connections=3)
+
+        assert len(executed) == 3
+        assert all(count >= len(HOT_STATEMENTS) for count in executed.values())
+
+    @pytest.mark.unit
+    async def test_unreachable_database_only_logs(self, caplog):
+        """Test that a failed warm-up does not prevent startup."""
+        engine = create_async_engine("postgresql+asyncpg://u:p@127.0.0.1:1/db")
+        try:
+            with caplog.at_level(logging.WARNING, logger="app.db.warmup"):
+                await warm_up_engines([engine], connections=2, timeout=5)
+        finally:
+            await engine.dispose()
+
+        assert "Warm-up of" in caplog.text
+
+
+class TestEngineOptions:
+    """Test statement caching settings of the engines."""
+
+    @pytest.mark.unit
+    def test_statement_cache_size(self, monkeypatch):
+        """Test that the prepared statement cache size is configurable."""
+        monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 250)
+
+        options = engine_options()
+
+        assert options["connect_args"] == {"prepared_statement_cache_size": 250}
+        assert options["pool_size"] == settings.DB_POOL_SIZE
+
+    @pytest.mark.unit
+    def test_pgbouncer_transaction_mode(self, monkeypatch):
+        """Test that PgBouncer mode disables caching and names statements uniquely."""
+        monkeypatch.setattr(settings, "DB_PGBOUNCER_TRANSACTION_MODE", True)
+
+        connect_args = engine_options()["connect_args"]
+        name = connect_args["prepared_statement_name_func"]
+
+        assert connect_args["prepared_statement_cache_size"] == 0
+        assert connect_args["statement_cache_size"] == 0
+        assert name() != name()